@@ -0,0 +1 @@
+"""Benchmarks for Sonic Nova."""
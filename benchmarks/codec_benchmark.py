@@ -0,0 +1,73 @@
+"""Per-event JSON encode/decode cost for each available codec backend.
+
+Usage:
+    python -m benchmarks.codec_benchmark [--number N]
+"""
+
+import os
+import sys
+import base64
+import timeit
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sonic_nova.utils.codec import available_codecs, get_codec
+
+def sample_events():
+    """Return representative events keyed by event type."""
+    pcm_in = base64.b64encode(os.urandom(2048)).decode('ascii')    # 64 ms at 16 kHz
+    pcm_out = base64.b64encode(os.urandom(19200)).decode('ascii')  # 400 ms at 24 kHz
+    return {
+        'audioInput': {"event": {"audioInput": {
+            "promptName": "p" * 36, "contentName": "c" * 36, "content": pcm_in}}},
+        'audioOutput': {"event": {"audioOutput": {
+            "content": pcm_out, "contentId": "c" * 36, "role": "ASSISTANT"}}},
+        'textOutput': {"event": {"textOutput": {
+            "content": "Your order is out for delivery and should arrive today.",
+            "role": "ASSISTANT", "contentId": "c" * 36}}},
+        'toolUse': {"event": {"toolUse": {
+            "toolName": "trackOrderTool", "toolUseId": "t" * 36,
+            "content": "{\"orderId\": \"1234\"}", "contentId": "c" * 36}}},
+        'contentStart': {"event": {"contentStart": {
+            "type": "TEXT", "role": "ASSISTANT", "contentId": "c" * 36,
+            "additionalModelFields": "{\"generationStage\":\"SPECULATIVE\"}"}}},
+    }
+
+def run(number=2000):
+    """Time encode and decode of every sample event with every backend.
+
+    Args:
+        number (int): Iterations per measurement
+
+    Returns:
+        dict: backend -> event type -> {"encode_us", "decode_us"}
+    """
+    events = sample_events()
+    results = {}
+    for name in available_codecs():
+        codec = get_codec(name)
+        results[name] = {}
+        for event_type, event in events.items():
+            encoded = codec.dumps(event)
+            encode = timeit.timeit(lambda: codec.dumps(event), number=number)
+            decode = timeit.timeit(lambda: codec.loads(encoded), number=number)
+            results[name][event_type] = {
+                'encode_us': encode / number * 1e6,
+                'decode_us': decode / number * 1e6,
+            }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON codec per-event benchmark')
+    parser.add_argument('--number', type=int, default=2000, help='Iterations per measurement')
+    args = parser.parse_args()
+
+    results = run(args.number)
+    print(f"{'backend':<8} {'event':<13} {'encode us':>10} {'decode us':>10}")
+    for name, per_event in results.items():
+        for event_type, timing in per_event.items():
+            print(f"{name:<8} {event_type:<13} {timing['encode_us']:>10.2f} {timing['decode_us']:>10.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,373 @@
+"""End-to-end load generator for sizing concurrent callers per host.
+
+Spins up simulated callers, each with its own BedrockStreamManager. Every
+caller streams microphone-sized PCM in real time: talk segments taken from
+prerecorded audio, alternating with silence of random length. Callers run
+against the local stream stand-in (default) or a real Bedrock endpoint. The
+caller count ramps through the requested steps, and for each step the
+generator reports:
+
+- throughput: answered turns and assistant audio per second
+- CPU per session: the whole process, and the client's own tasks only
+- first audio byte latency (end of talk to first assistant audio) p50/p95/p99
+- tool round trip (toolUse received to first audio after the result) p50/p95/p99
+
+Usage:
+    python -m benchmarks.loadgen --callers 1,4,16,32 [--step-duration 30]
+    python -m benchmarks.loadgen --endpoint https://bedrock-runtime.us-east-1.amazonaws.com --callers 1,2,4
+    python -m benchmarks.loadgen --pcm speech.wav --json load.json
+    python -m benchmarks.loadgen --callers 16,64 --dsp
+"""
+
+import os
+import sys
+import json
+import time
+import wave
+import random
+import asyncio
+import argparse
+from collections import deque
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.soak import TaskCpuMeter
+from sonic_nova.config.settings import (
+    INPUT_SAMPLE_RATE, OUTPUT_SAMPLE_RATE, CHUNK_SIZE, DEFAULT_MODEL_ID, DEFAULT_REGION, DSP_BATCHED
+)
+from sonic_nova.core.admission import AdmissionController
+from sonic_nova.core.bedrock_manager import BedrockStreamManager
+from sonic_nova.core.dsp import dsp_scheduler
+from sonic_nova.core.local_stream import LocalBedrockClient
+from sonic_nova.utils.metrics import summarize
+
+# Defaults
+TALK_SECONDS = (1.5, 4.0)
+SILENCE_SECONDS = (1.5, 3.0)
+ENDPOINT_SILENCE_MS = 600  # Silence the local stand-in waits for before answering
+LOCAL_TOOL_EVERY = 3
+
+# Coroutines that belong to the client rather than the harness or the stand-in
+CLIENT_TASK_PREFIXES = ('BedrockStreamManager.', 'OutboundWriter.')
+
+def load_pcm(path):
+    """Load 16-bit mono PCM at INPUT_SAMPLE_RATE from a WAV or raw file.
+
+    Args:
+        path (str): .wav file, or headerless little-endian 16-bit PCM
+
+    Returns:
+        bytes: PCM samples
+
+    Raises:
+        ValueError: If a WAV file is not 16-bit mono at INPUT_SAMPLE_RATE
+    """
+    if path.lower().endswith('.wav'):
+        with wave.open(path, 'rb') as w:
+            if w.getsampwidth() != 2 or w.getnchannels() != 1 or w.getframerate() != INPUT_SAMPLE_RATE:
+                raise ValueError(
+                    f"{path}: expected 16-bit mono at {INPUT_SAMPLE_RATE} Hz, got "
+                    f"{8 * w.getsampwidth()}-bit, {w.getnchannels()} channel(s) at {w.getframerate()} Hz"
+                )
+            return w.readframes(w.getnframes())
+    with open(path, 'rb') as f:
+        return f.read()
+
+def synthetic_speech(seconds=10.0, seed=0):
+    """Return speech-like PCM: noise shaped by a syllable-rate envelope.
+
+    Args:
+        seconds (float): Length of the recording
+        seed (int): Random seed
+
+    Returns:
+        bytes: 16-bit PCM at INPUT_SAMPLE_RATE
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * INPUT_SAMPLE_RATE)
+    t = np.arange(n) / INPUT_SAMPLE_RATE
+    envelope = 0.55 + 0.45 * np.sin(2 * np.pi * 4.0 * t) ** 2
+    samples = rng.standard_normal(n) * envelope * 3000
+    # Never emit an all-zero frame while talking
+    return (np.clip(samples, -32767, 32767).astype(np.int16) | 1).tobytes()
+
+class TalkPattern:
+    """Alternating talk and silence segments with random lengths."""
+
+    def __init__(self, talk=TALK_SECONDS, silence=SILENCE_SECONDS, seed=0):
+        self.talk = talk
+        self.silence = silence
+        self._rng = random.Random(seed)
+
+    def segments(self):
+        """Yield (is_talk, chunk_count) forever, starting with talk."""
+        chunk_seconds = CHUNK_SIZE / INPUT_SAMPLE_RATE
+        while True:
+            yield True, max(1, round(self._rng.uniform(*self.talk) / chunk_seconds))
+            yield False, max(1, round(self._rng.uniform(*self.silence) / chunk_seconds))
+
+class SyntheticCaller:
+    """One simulated caller with its own stream manager."""
+
+    def __init__(self, index, pcm, pattern, admission, client=None, endpoint_uri=None,
+                 region=DEFAULT_REGION, model_id=DEFAULT_MODEL_ID, dsp=None):
+        self.index = index
+        self.manager = BedrockStreamManager(
+            model_id=model_id, region=region, endpoint_uri=endpoint_uri,
+            transcript_sinks=[], admission=admission, dsp=dsp,
+        )
+        if client is not None:
+            self.manager.bedrock_client = client
+        self.pcm = pcm
+        self.pattern = pattern
+        self._silence = bytes(CHUNK_SIZE * 2)
+        self._pending_turn = None
+        self._pending_tool = None
+        self._reply_started = float('-inf')
+        self._tasks = []
+        # (time, value) records; filtered per ramp step
+        self.first_audio = deque()
+        self.tool_rtt = deque()
+        self.audio_out = deque()
+        self.unanswered = 0
+        self.error = None
+
+    async def start(self):
+        """Open the stream and start talking; returns False if the stream failed."""
+        try:
+            await self.manager.initialize_stream()
+            await self.manager.send_audio_content_start_event()
+        except Exception as e:
+            self.error = e
+            return False
+        loop = asyncio.get_running_loop()
+        self._tasks = [
+            loop.create_task(self._talk()),
+            loop.create_task(self._listen()),
+            loop.create_task(self._watch_events()),
+        ]
+        return True
+
+    async def _talk(self):
+        loop = asyncio.get_running_loop()
+        chunk_bytes = CHUNK_SIZE * 2
+        interval = CHUNK_SIZE / INPUT_SAMPLE_RATE
+        offset = 0
+        next_at = loop.time()
+        for is_talk, chunks in self.pattern.segments():
+            if is_talk and self._pending_turn is not None:
+                # Talking again before any reply: the last turn went unanswered
+                self.unanswered += 1
+                self._pending_turn = None
+            for _ in range(chunks):
+                if not self.manager.is_active:
+                    return
+                if is_talk:
+                    if offset + chunk_bytes > len(self.pcm):
+                        offset = 0
+                    chunk = self.pcm[offset:offset + chunk_bytes]
+                    offset += chunk_bytes
+                else:
+                    chunk = self._silence
+                self.manager.add_audio_chunk(chunk)
+                next_at += interval
+                await asyncio.sleep(max(0.0, next_at - loop.time()))
+            if is_talk:
+                self._pending_turn = loop.time()
+
+    async def _listen(self):
+        loop = asyncio.get_running_loop()
+        queue = self.manager.audio_output_queue
+        while True:
+            audio = await queue.get()
+            now = loop.time()
+            self.audio_out.append((now, len(audio)))
+            # Only audio of a reply that started after the turn counts;
+            # the tail of an earlier reply does not
+            if self._pending_turn is not None and self._reply_started >= self._pending_turn:
+                self.first_audio.append((now, (now - self._pending_turn) * 1000))
+                self._pending_turn = None
+            if self._pending_tool is not None and self._reply_started >= self._pending_tool:
+                self.tool_rtt.append((now, (now - self._pending_tool) * 1000))
+                self._pending_tool = None
+
+    async def _watch_events(self):
+        loop = asyncio.get_running_loop()
+        queue = self.manager.output_queue
+        while True:
+            event = (await queue.get()).get('event', {})
+            if 'toolUse' in event:
+                self._pending_tool = loop.time()
+            elif event.get('contentStart', {}).get('type') == 'AUDIO':
+                # Queued before the reply's audio, so seen before _listen gets it
+                self._reply_started = loop.time()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        try:
+            await self.manager.close()
+        except Exception:
+            pass
+
+def _window(records, start, end):
+    return [value for t, value in records if start <= t < end]
+
+def _percentiles(values):
+    summary = summarize(values)
+    return {key: summary[key] for key in ('count', 'p50', 'p95', 'p99', 'max')}
+
+def measure_step(callers, start, end, cpu_start, cpu_end, tasks_start, tasks_end, failed):
+    """Build the report row for one ramp step.
+
+    Args:
+        callers (list): SyntheticCaller instances running during the window
+        start (float): Window start (loop time)
+        end (float): Window end (loop time)
+        cpu_start (float): Process CPU seconds at the window start
+        cpu_end (float): Process CPU seconds at the window end
+        tasks_start (dict): TaskCpuMeter snapshot at the window start
+        tasks_end (dict): TaskCpuMeter snapshot at the window end
+        failed (int): Callers that failed to start so far
+
+    Returns:
+        dict: Throughput, CPU per session and latency percentiles
+    """
+    wall = end - start
+    n = max(1, len(callers))
+    first_audio = [v for c in callers for v in _window(c.first_audio, start, end)]
+    tool_rtt = [v for c in callers for v in _window(c.tool_rtt, start, end)]
+    audio_bytes = sum(v for c in callers for v in _window(c.audio_out, start, end))
+    client_cpu = sum(
+        seconds - tasks_start.get(name, 0.0)
+        for name, seconds in tasks_end.items()
+        if name.startswith(CLIENT_TASK_PREFIXES)
+    )
+    return {
+        'callers': len(callers),
+        'failed_callers': failed,
+        'window_s': wall,
+        'turns_per_s': len(first_audio) / wall,
+        'audio_out_s_per_s': audio_bytes / 2 / OUTPUT_SAMPLE_RATE / wall,
+        'unanswered_turns': sum(c.unanswered for c in callers),
+        'cpu_ms_per_session_s': (cpu_end - cpu_start) / wall / n * 1000,
+        'client_cpu_ms_per_session_s': client_cpu / wall / n * 1000,
+        'first_audio_ms': _percentiles(first_audio),
+        'tool_rtt_ms': _percentiles(tool_rtt),
+    }
+
+async def run_load(steps, step_duration=30.0, settle=3.0, pcm=None, talk=TALK_SECONDS,
+                   silence=SILENCE_SECONDS, endpoint_uri=None, region=DEFAULT_REGION,
+                   spawn_rate=5.0, seed=0, local_options=None, dsp=DSP_BATCHED):
+    """Ramp through caller counts and measure each step.
+
+    Args:
+        steps (list): Increasing caller counts
+        step_duration (float): Seconds measured per step
+        settle (float): Seconds to wait after adding callers before measuring
+        pcm (bytes, optional): Talk audio. Defaults to synthetic speech.
+        talk (tuple): Talk segment length range in seconds
+        silence (tuple): Silence length range in seconds
+        endpoint_uri (str, optional): Real Bedrock endpoint; None uses the local stand-in
+        region (str): AWS region for a real endpoint
+        spawn_rate (float): Stream creations per second while ramping
+        seed (int): Seed for talk patterns
+        local_options (dict, optional): Extra LocalBedrockClient options
+        dsp (bool): Run caller audio through the shared batched DSP scheduler
+
+    Returns:
+        list: One measure_step() row per step
+    """
+    loop = asyncio.get_running_loop()
+    meter = TaskCpuMeter()
+    meter.install(loop)
+    pcm = pcm or synthetic_speech(seed=seed)
+    client = None
+    if endpoint_uri is None:
+        options = {
+            'turn_silence_ms': ENDPOINT_SILENCE_MS,
+            'tool_every': LOCAL_TOOL_EVERY,
+            'tool_name': 'trackOrderTool',
+            'tool_input': {'orderId': '1234'},
+            'reply_audio_ms': 1200,
+            'realtime_audio': True,
+        }
+        options.update(local_options or {})
+        client = LocalBedrockClient(**options)
+    admission = AdmissionController(
+        max_streams=max(steps), rate=spawn_rate, burst=max(1, int(spawn_rate)),
+        max_queue=max(steps), max_wait=max(steps) / spawn_rate + 30,
+    )
+    callers, failed, rows = [], 0, []
+    try:
+        for target in steps:
+            new = [
+                SyntheticCaller(i, pcm, TalkPattern(talk, silence, seed + i), admission,
+                                client=client, endpoint_uri=endpoint_uri, region=region,
+                                dsp=dsp_scheduler if dsp else None)
+                for i in range(len(callers) + failed, target + failed)
+            ]
+            started = await asyncio.gather(*(c.start() for c in new))
+            for caller, ok in zip(new, started):
+                if ok:
+                    callers.append(caller)
+                else:
+                    failed += 1
+                    print(f"Caller {caller.index} failed to start: {caller.error}")
+            await asyncio.sleep(settle)
+            start, cpu_start, tasks_start = loop.time(), time.process_time(), meter.snapshot()
+            await asyncio.sleep(step_duration)
+            end, cpu_end, tasks_end = loop.time(), time.process_time(), meter.snapshot()
+            live = [c for c in callers if c.manager.is_active]
+            rows.append(measure_step(live, start, end, cpu_start, cpu_end, tasks_start, tasks_end, failed))
+    finally:
+        await asyncio.gather(*(c.stop() for c in callers), return_exceptions=True)
+        meter.uninstall()
+    return rows
+
+def _range(text):
+    low, _, high = text.partition('-')
+    return float(low), float(high or low)
+
+def main():
+    parser = argparse.ArgumentParser(description='Load generator: turn latency for N synthetic callers')
+    parser.add_argument('--callers', default='1,2,4,8', help='Comma-separated caller counts to ramp through')
+    parser.add_argument('--step-duration', type=float, default=30.0, help='Seconds measured per step')
+    parser.add_argument('--settle', type=float, default=3.0, help='Seconds after adding callers before measuring')
+    parser.add_argument('--pcm', help='Talk audio: 16-bit mono WAV or raw PCM at the input sample rate')
+    parser.add_argument('--talk', type=_range, default=TALK_SECONDS, help='Talk length range in seconds, e.g. 1.5-4')
+    parser.add_argument('--silence', type=_range, default=SILENCE_SECONDS, help='Silence length range in seconds')
+    parser.add_argument('--endpoint', help='Bedrock endpoint URI; omit to use the local stand-in')
+    parser.add_argument('--region', default=DEFAULT_REGION, help='AWS region for --endpoint')
+    parser.add_argument('--spawn-rate', type=float, default=5.0, help='Stream creations per second')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for talk patterns')
+    parser.add_argument('--dsp', action='store_true', default=DSP_BATCHED,
+                        help='Run caller audio through the shared batched DSP scheduler')
+    parser.add_argument('--json', metavar='PATH', help='Write the per-step report to PATH')
+    args = parser.parse_args()
+
+    steps = sorted({int(n) for n in args.callers.split(',') if n.strip()})
+    rows = asyncio.run(run_load(
+        steps, step_duration=args.step_duration, settle=args.settle,
+        pcm=load_pcm(args.pcm) if args.pcm else None, talk=args.talk, silence=args.silence,
+        endpoint_uri=args.endpoint, region=args.region, spawn_rate=args.spawn_rate, seed=args.seed,
+        dsp=args.dsp,
+    ))
+
+    print(f"{'callers':>7} {'turns/s':>8} {'cpu ms/s':>9} {'client':>7} "
+          f"{'first audio p50/p95/p99 ms':>28} {'tool rtt p50/p95/p99 ms':>25} {'failed':>6}")
+    for row in rows:
+        fa, tool = row['first_audio_ms'], row['tool_rtt_ms']
+        print(f"{row['callers']:>7} {row['turns_per_s']:>8.2f} {row['cpu_ms_per_session_s']:>9.1f} "
+              f"{row['client_cpu_ms_per_session_s']:>7.1f} "
+              f"{fa['p50']:>10.0f}/{fa['p95']:>7.0f}/{fa['p99']:>7.0f}  "
+              f"{tool['p50']:>8.0f}/{tool['p95']:>7.0f}/{tool['p99']:>7.0f} {row['failed_callers']:>6}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'steps': rows, 'config': vars(args)}, f, indent=2, default=str)
+
+if __name__ == '__main__':
+    main()
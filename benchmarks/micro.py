@@ -0,0 +1,437 @@
+"""Microbenchmarks for the hot paths, with stored baselines and regression gates.
+
+Covered paths:
+- audio event construction (base64 + bytes template)
+- base64 encode/decode of typical chunk sizes
+- response parsing in BedrockStreamManager._process_responses, per event type
+- processToolUse for each tool
+- start_prompt
+- playback slicing of an assistant audio buffer
+- playback catch-up time compression (WSOLA) of an assistant audio event
+- knowledge base retrieval (query embedding and top-k search)
+- batched capture DSP ticks; compare dsp.tick_64 / 64 with dsp.tick_1 for
+  the per-session saving
+
+Each benchmark reports the best per-operation time over several repeats. A
+run can be saved as a JSON baseline and later runs compared against it. Any
+benchmark slower than the baseline by more than the threshold, even after
+being measured again, is a regression, and the runner then exits non-zero.
+
+Usage:
+    python -m benchmarks.micro --save-baseline     # record a baseline
+    python -m benchmarks.micro [--threshold 15]    # compare against it
+    python -m benchmarks.micro --filter parse.     # run a subset
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import asyncio
+import argparse
+import random
+import platform
+import datetime
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sonic_nova.config.settings import CHUNK_SIZE
+from sonic_nova.core.bedrock_manager import BedrockStreamManager
+from sonic_nova.core.dsp import DspScheduler
+from sonic_nova.core.playback import TimeStretcher
+from sonic_nova.models.events import AUDIO_EVENT_TEMPLATE_BYTES
+from sonic_nova.knowledge.embeddings import HashingEmbedder
+from sonic_nova.knowledge.index import build_index
+from sonic_nova.utils.metrics import MetricsRegistry
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'micro.json')
+REGRESSION_THRESHOLD_PCT = 15.0
+MIN_REPEAT_SECONDS = 0.05  # Operations per repeat are scaled up to at least this long
+
+# Typical payload sizes
+INPUT_CHUNK_BYTES = CHUNK_SIZE * 2  # One microphone buffer at 16 kHz
+OUTPUT_CHUNK_BYTES = 19200          # 400 ms of assistant audio at 24 kHz
+LARGE_CHUNK_BYTES = 65536
+
+_BENCHMARKS = {}
+
+def benchmark(name, number=2000):
+    """Register a benchmark.
+
+    The decorated function receives no arguments and returns the operation to
+    time: a plain callable or a coroutine function, called with no arguments.
+    Setup work belongs in the decorated function, not in the operation.
+
+    Args:
+        name (str): Benchmark name, dotted by area
+        number (int): Default operations per repeat
+    """
+    def register(setup):
+        _BENCHMARKS[name] = (setup, number)
+        return setup
+    return register
+
+def _manager():
+    return BedrockStreamManager(transcript_sinks=[])
+
+# Audio event construction and base64
+
+@benchmark('audio_event.build')
+def _audio_event_build():
+    manager = _manager()
+    prompt = manager.prompt_name.encode('utf-8')
+    content = manager.audio_content_name.encode('utf-8')
+    pcm = os.urandom(INPUT_CHUNK_BYTES)
+    return lambda: AUDIO_EVENT_TEMPLATE_BYTES % (prompt, content, base64.b64encode(pcm))
+
+def _register_base64(size, label):
+    @benchmark(f'base64.encode[{label}]')
+    def _encode():
+        data = os.urandom(size)
+        return lambda: base64.b64encode(data)
+
+    @benchmark(f'base64.decode[{label}]')
+    def _decode():
+        data = base64.b64encode(os.urandom(size))
+        return lambda: base64.b64decode(data)
+
+_register_base64(INPUT_CHUNK_BYTES, 'input_chunk')
+_register_base64(OUTPUT_CHUNK_BYTES, 'output_chunk')
+_register_base64(LARGE_CHUNK_BYTES, '64k')
+
+# Response parsing
+
+def server_events():
+    """Return a representative server payload for each parsed event type."""
+    audio = base64.b64encode(os.urandom(OUTPUT_CHUNK_BYTES)).decode('ascii')
+    events = {
+        'contentStart': {"contentStart": {
+            "type": "TEXT", "role": "ASSISTANT", "contentId": "c" * 36,
+            "additionalModelFields": "{\"generationStage\":\"SPECULATIVE\"}"}},
+        'textOutput': {"textOutput": {
+            "content": "Your order is out for delivery and should arrive today.",
+            "role": "ASSISTANT", "contentId": "c" * 36}},
+        'audioOutput': {"audioOutput": {"content": audio, "contentId": "c" * 36, "role": "ASSISTANT"}},
+        'toolUse': {"toolUse": {
+            "toolName": "trackOrderTool", "toolUseId": "t" * 36,
+            "content": "{\"orderId\": \"1234\"}", "contentId": "c" * 36}},
+        'contentEnd': {"contentEnd": {"type": "TEXT", "stopReason": "END_TURN", "contentId": "c" * 36}},
+        'completionEnd': {"completionEnd": {"stopReason": "END_TURN"}},
+    }
+    return {name: json.dumps({"event": body}).encode('utf-8') for name, body in events.items()}
+
+class _Value:
+    __slots__ = ('bytes_',)
+
+    def __init__(self, payload):
+        self.bytes_ = payload
+
+class _Result:
+    __slots__ = ('value',)
+
+    def __init__(self, payload):
+        self.value = _Value(payload)
+
+class _ReplayStream:
+    """Feeds a fixed number of copies of one payload to _process_responses."""
+
+    def __init__(self, payload, count):
+        self._result = _Result(payload)
+        self._left = count
+
+    async def await_output(self):
+        return self, self
+
+    async def receive(self):
+        if self._left == 0:
+            raise StopAsyncIteration
+        self._left -= 1
+        return self._result
+
+def _register_parse(event_type):
+    @benchmark(f'parse.{event_type}', number=5000)
+    def _parse():
+        manager = _manager()
+        payload = server_events()[event_type]
+
+        async def batch(count):
+            manager.stream_response = _ReplayStream(payload, count)
+            manager.is_active = True
+            await manager._process_responses()
+            # Keep queues from growing across repeats
+            while not manager.audio_output_queue.empty():
+                manager.audio_output_queue.get_nowait()
+        batch.batched = True
+        return batch
+
+for _event_type in ('contentStart', 'textOutput', 'audioOutput', 'toolUse', 'contentEnd', 'completionEnd'):
+    _register_parse(_event_type)
+
+# Tools and prompt
+
+@benchmark('tool.getDateAndTimeTool', number=1000)
+def _tool_date():
+    manager = _manager()
+    content = {"toolName": "getDateAndTimeTool", "toolUseId": "t" * 36, "content": "{}"}
+    return lambda: manager.processToolUse("getDateAndTimeTool", content)
+
+@benchmark('tool.trackOrderTool', number=1000)
+def _tool_track():
+    manager = _manager()
+    content = {"toolName": "trackOrderTool", "toolUseId": "t" * 36,
+               "content": "{\"orderId\": \"1234\"}", "requestNotifications": True}
+    return lambda: manager.processToolUse("trackOrderTool", content)
+
+@benchmark('prompt.start_prompt', number=1000)
+def _start_prompt():
+    return _manager().start_prompt
+
+# Playback
+
+@benchmark('playback.slice')
+def _playback_slice():
+    audio = os.urandom(OUTPUT_CHUNK_BYTES)
+
+    def op():
+        view = memoryview(audio)
+        for i in range(0, len(audio), CHUNK_SIZE):
+            view[i:min(i + CHUNK_SIZE, len(audio))]
+    return op
+
+@benchmark('playback.wsola', number=200)
+def _playback_wsola():
+    audio = os.urandom(OUTPUT_CHUNK_BYTES)
+    stretcher = TimeStretcher()
+
+    def op():
+        stretcher.process(audio, 1.25)
+    return op
+
+# Knowledge base
+
+KB_CHUNKS = 20000
+
+@benchmark('kb.search', number=1000)
+def _kb_search():
+    words = ("return refund policy shipping order delivery warranty battery charger exchange "
+             "store credit days customer support account password invoice discount").split()
+    rng = random.Random(0)
+    chunks = ((' '.join(rng.choice(words) for _ in range(60)), f"doc{i % 300}.pdf") for i in range(KB_CHUNKS))
+    tmp = tempfile.TemporaryDirectory()
+    index = build_index(os.path.join(tmp.name, 'kb'), chunks)
+
+    def op():
+        tmp  # keep the index directory alive as long as the benchmark
+        index.search("what is the refund policy for a battery")
+    return op
+
+@benchmark('kb.embed_query')
+def _kb_embed_query():
+    embedder = HashingEmbedder()
+    return lambda: embedder.embed(["what is the refund policy for a battery"])
+
+# Batched capture DSP
+
+def _dsp_tick(sessions):
+    scheduler = DspScheduler(tick_interval=None, metrics_registry=MetricsRegistry())
+    handles = [scheduler.register(lambda *args: None) for _ in range(sessions)]
+    frame = bytes(random.Random(0).randbytes(CHUNK_SIZE * 2))
+
+    def op():
+        for handle in handles:
+            scheduler.submit(handle, frame)
+        scheduler.tick()
+    return op
+
+@benchmark('dsp.tick_1')
+def _dsp_tick_1():
+    return _dsp_tick(1)
+
+@benchmark('dsp.tick_64', number=100)
+def _dsp_tick_64():
+    return _dsp_tick(64)
+
+def _time_op(op, number, loop):
+    """Return seconds taken by number operations."""
+    if getattr(op, 'batched', False):
+        start = time.perf_counter()
+        loop.run_until_complete(op(number))
+        return time.perf_counter() - start
+    if asyncio.iscoroutinefunction(op) or _returns_coroutine(op):
+        async def run():
+            start = time.perf_counter()
+            for _ in range(number):
+                await op()
+            return time.perf_counter() - start
+        return loop.run_until_complete(run())
+    start = time.perf_counter()
+    for _ in range(number):
+        op()
+    return time.perf_counter() - start
+
+def _returns_coroutine(op):
+    result = op()
+    if asyncio.iscoroutine(result):
+        result.close()
+        return True
+    return False
+
+def benchmark_names():
+    """Return the names of all registered benchmarks."""
+    return sorted(_BENCHMARKS)
+
+def run(names=None, number=None, repeat=7):
+    """Run benchmarks.
+
+    Args:
+        names (list, optional): Benchmarks to run. Defaults to all.
+        number (int, optional): Operations per repeat. Defaults to each
+            benchmark's own number, scaled up so a repeat takes at least
+            MIN_REPEAT_SECONDS.
+        repeat (int): Repeats per benchmark; the best is reported
+
+    Returns:
+        dict: name -> {"us_per_op", "median_us", "number", "repeat"}
+    """
+    results = {}
+    loop = asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        for name in names or benchmark_names():
+            setup, default_number = _BENCHMARKS[name]
+            # The manager's queues and locks bind to the running loop
+            op = loop.run_until_complete(_setup_in_loop(setup))
+            count = number or default_number
+            elapsed = _time_op(op, count, loop)  # also warms up
+            if number is None and elapsed < MIN_REPEAT_SECONDS:
+                count = int(count * MIN_REPEAT_SECONDS / max(elapsed, 1e-9)) + 1
+            timings = sorted(_time_op(op, count, loop) / count * 1e6 for _ in range(repeat))
+            results[name] = {
+                'us_per_op': timings[0],
+                'median_us': timings[len(timings) // 2],
+                'number': count,
+                'repeat': repeat,
+            }
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+    return results
+
+async def _setup_in_loop(setup):
+    return setup()
+
+def save_baseline(results, path=DEFAULT_BASELINE):
+    """Write results as a JSON baseline.
+
+    Args:
+        results (dict): Output of run()
+        path (str): Baseline file
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    baseline = {
+        'meta': {
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+def load_baseline(path=DEFAULT_BASELINE):
+    """Read a JSON baseline, or return None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def compare(results, baseline_results, threshold_pct=REGRESSION_THRESHOLD_PCT):
+    """Compare results with a baseline.
+
+    Args:
+        results (dict): Output of run()
+        baseline_results (dict): The "results" section of a baseline
+        threshold_pct (float): Slowdown in percent that counts as a regression
+
+    Returns:
+        list: One dict per benchmark with name, baseline_us, current_us,
+        change_pct and status ('ok', 'regression', 'improvement' or 'new')
+    """
+    rows = []
+    for name, current in sorted(results.items()):
+        base = baseline_results.get(name)
+        if base is None:
+            rows.append({'name': name, 'baseline_us': None, 'current_us': current['us_per_op'],
+                         'change_pct': None, 'status': 'new'})
+            continue
+        change = (current['us_per_op'] - base['us_per_op']) / base['us_per_op'] * 100
+        if change > threshold_pct:
+            status = 'regression'
+        elif change < -threshold_pct:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append({'name': name, 'baseline_us': base['us_per_op'], 'current_us': current['us_per_op'],
+                     'change_pct': change, 'status': status})
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Hot-path microbenchmarks with regression gates')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write this run as the baseline')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD_PCT,
+                        help='Slowdown in percent that fails the run')
+    parser.add_argument('--filter', default='', help='Only run benchmarks whose name contains this')
+    parser.add_argument('--number', type=int, help='Operations per repeat (overrides defaults)')
+    parser.add_argument('--repeat', type=int, default=7, help='Repeats per benchmark')
+    parser.add_argument('--list', action='store_true', help='List benchmarks and exit')
+    args = parser.parse_args()
+
+    names = [name for name in benchmark_names() if args.filter in name]
+    if args.list:
+        print('\n'.join(names))
+        return
+    results = run(names, args.number, args.repeat)
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        for name, result in results.items():
+            print(f"{name:<32} {result['us_per_op']:>10.2f} us")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        for name, result in results.items():
+            print(f"{name:<32} {result['us_per_op']:>10.2f} us")
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+        return
+    if baseline['meta'].get('python') != platform.python_version():
+        print(f"Note: baseline recorded on Python {baseline['meta'].get('python')}")
+
+    rows = compare(results, baseline['results'], args.threshold)
+    # Re-measure apparent regressions once so a noisy moment does not fail the run
+    suspects = [row['name'] for row in rows if row['status'] == 'regression']
+    if suspects:
+        rerun = run(suspects, args.number, args.repeat)
+        for name, result in rerun.items():
+            if result['us_per_op'] < results[name]['us_per_op']:
+                results[name] = result
+        rows = compare(results, baseline['results'], args.threshold)
+    print(f"{'benchmark':<32} {'baseline us':>12} {'current us':>12} {'change':>9}")
+    for row in rows:
+        base = f"{row['baseline_us']:.2f}" if row['baseline_us'] is not None else '-'
+        change = f"{row['change_pct']:+.1f}%" if row['change_pct'] is not None else 'new'
+        flag = '  REGRESSION' if row['status'] == 'regression' else ''
+        print(f"{row['name']:<32} {base:>12} {row['current_us']:>12.2f} {change:>9}{flag}")
+    regressions = [row for row in rows if row['status'] == 'regression']
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0f}%")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
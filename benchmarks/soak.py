@@ -0,0 +1,432 @@
+"""Long-duration soak test with per-session memory and CPU accounting.
+
+Drives one or more BedrockStreamManager sessions against the local stream
+stand-in (sonic_nova.core.local_stream) with synthetic microphone audio for a
+configurable duration. Every user turn is answered with text and audio, and
+tool calls are mixed in. At each sample interval the harness records:
+
+- RSS and tracemalloc traced memory
+- depths of every session queue (audio input, audio output, output, outbound)
+- CPU time per asyncio task, keyed by coroutine name, and for the process
+- response latency, from the end of a user turn to the first audio byte
+
+The first sample after warmup is the baseline. The report compares it with
+the end of the run, lists the allocation sites that grew the most, and fails
+if memory growth, queue depth, latency drift or CPU drift exceeds its
+threshold.
+
+Usage:
+    python -m benchmarks.soak --duration 3600 [--sessions N] [--report soak.json]
+"""
+
+import os
+import sys
+import json
+import time
+import types
+import asyncio
+import argparse
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sonic_nova.config.settings import INPUT_SAMPLE_RATE, CHUNK_SIZE
+from sonic_nova.core import local_stream
+from sonic_nova.core.admission import AdmissionController
+from sonic_nova.core.bedrock_manager import BedrockStreamManager
+from sonic_nova.core.local_stream import LocalBedrockClient
+from sonic_nova.utils.metrics import metrics, summarize
+
+# Default failure thresholds
+MAX_RSS_GROWTH_MB = 20.0
+MAX_TRACED_GROWTH_MB = 5.0
+MAX_QUEUE_DEPTH = 64
+MAX_LATENCY_DRIFT_MS = 50.0
+MAX_CPU_DRIFT = 0.5  # Allowed relative increase of process CPU per wall second
+CPU_DRIFT_FLOOR = 0.02  # CPU seconds per wall second below which drift is ignored
+
+# Queues whose depth is a backlog; output_queue is a bounded retention buffer
+BACKLOG_QUEUES = ('audio_input', 'audio_output', 'outbound')
+
+def rss_bytes():
+    """Return the resident set size of this process in bytes (0 if unknown)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes; only the peak is available here
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        return 0
+
+@types.coroutine
+def _drive(coro, account):
+    """Run coro step by step, charging the thread CPU of every step to account."""
+    value, error = None, None
+    while True:
+        start = time.thread_time()
+        try:
+            if error is not None:
+                yielded = coro.throw(error)
+            else:
+                yielded = coro.send(value)
+        except StopIteration as stop:
+            account(time.thread_time() - start)
+            return stop.value
+        except BaseException:
+            account(time.thread_time() - start)
+            raise
+        account(time.thread_time() - start)
+        try:
+            value, error = (yield yielded), None
+        except GeneratorExit:
+            coro.close()
+            raise
+        except BaseException as e:
+            value, error = None, e
+
+class TaskCpuMeter:
+    """Accounts CPU time to asyncio tasks by coroutine name.
+
+    Installs a task factory that wraps every new task's coroutine and
+    measures thread CPU time around each step it runs.
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self._loop = None
+        self._previous = None
+
+    def _account(self, name):
+        def add(seconds):
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+        return add
+
+    def _factory(self, loop, coro, **kwargs):
+        name = getattr(coro, '__qualname__', type(coro).__name__)
+
+        async def metered():
+            return await _drive(coro, self._account(name))
+
+        return asyncio.Task(metered(), loop=loop, **kwargs)
+
+    def install(self, loop):
+        """Start metering tasks created on loop from now on."""
+        self._loop = loop
+        self._previous = loop.get_task_factory()
+        loop.set_task_factory(self._factory)
+
+    def uninstall(self):
+        """Restore the loop's previous task factory."""
+        if self._loop is not None:
+            self._loop.set_task_factory(self._previous)
+            self._loop = None
+
+    def snapshot(self):
+        """Return cumulative CPU seconds per coroutine name."""
+        return dict(self.totals)
+
+class SoakSession:
+    """One session fed with synthetic audio and drained by a simulated player."""
+
+    def __init__(self, client, admission, turn_seconds, speed, started):
+        self.manager = BedrockStreamManager(transcript_sinks=[], admission=admission)
+        self.manager.bedrock_client = client
+        self.turn_bytes = int(turn_seconds * INPUT_SAMPLE_RATE) * 2
+        self.chunk_interval = CHUNK_SIZE / INPUT_SAMPLE_RATE / speed
+        self.started = started
+        self.pending_turns = deque()
+        self.latencies = []  # (elapsed seconds, latency ms)
+        self.audio_out_bytes = 0
+        self._tasks = []
+        # One second of low-level noise, sliced into mic-sized chunks
+        self._noise = os.urandom(INPUT_SAMPLE_RATE * 2)
+        self._noise = bytes(b & 0x0F for b in self._noise)
+
+    async def start(self):
+        await self.manager.initialize_stream()
+        await self.manager.send_audio_content_start_event()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._feed()), loop.create_task(self._play())]
+
+    async def _feed(self):
+        """Send mic-sized chunks in real time (scaled by speed)."""
+        loop = asyncio.get_running_loop()
+        chunk_bytes = CHUNK_SIZE * 2
+        offset = sent = 0
+        next_at = loop.time()
+        while self.manager.is_active:
+            if offset + chunk_bytes > len(self._noise):
+                offset = 0
+            self.manager.add_audio_chunk(self._noise[offset:offset + chunk_bytes])
+            offset += chunk_bytes
+            sent += chunk_bytes
+            if sent >= self.turn_bytes:
+                sent -= self.turn_bytes
+                self.pending_turns.append(loop.time())
+            next_at += self.chunk_interval
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+
+    async def _play(self):
+        """Drain assistant audio and time the first byte after each user turn."""
+        loop = asyncio.get_running_loop()
+        queue = self.manager.audio_output_queue
+        while True:
+            audio = await queue.get()
+            self.audio_out_bytes += len(audio)
+            if self.pending_turns:
+                now = loop.time()
+                turn_end = self.pending_turns.popleft()
+                self.latencies.append((now - self.started, (now - turn_end) * 1000))
+
+    def queue_depths(self):
+        m = self.manager
+        return {
+            'audio_input': m.audio_input_queue.qsize(),
+            'audio_output': m.audio_output_queue.qsize(),
+            'output': m.output_queue.qsize(),
+            'outbound': m.outbound.depth(),
+        }
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.manager.close()
+
+def _take_sample(elapsed, sessions, meter):
+    traced, traced_peak = tracemalloc.get_traced_memory()
+    queues = {}
+    for session in sessions:
+        for name, depth in session.queue_depths().items():
+            queues[name] = max(queues.get(name, 0), depth)
+    return {
+        't': round(elapsed, 3),
+        'rss_bytes': rss_bytes(),
+        'traced_bytes': traced,
+        'traced_peak_bytes': traced_peak,
+        'queues': queues,
+        'process_cpu_s': time.process_time(),
+        'task_cpu_s': meter.snapshot(),
+    }
+
+def _top_growth(baseline, final, limit=10):
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, local_stream.__file__),
+    ]
+    stats = final.filter_traces(filters).compare_to(baseline.filter_traces(filters), 'lineno')
+    return [
+        {'site': str(stat.traceback[0]), 'size_diff_bytes': stat.size_diff, 'count_diff': stat.count_diff}
+        for stat in stats[:limit]
+    ]
+
+def _rate(first, last, seconds_of):
+    wall = last['t'] - first['t']
+    return (seconds_of(last) - seconds_of(first)) / wall if wall > 0 else 0.0
+
+def build_report(samples, latencies, sessions, top_growth, config):
+    """Compare the baseline sample with the end of the run.
+
+    Args:
+        samples (list): Samples taken after warmup, oldest first
+        latencies (list): (elapsed seconds, latency ms) for every answered turn
+        sessions (int): Number of concurrent sessions
+        top_growth (list): Allocation sites that grew the most
+        config (dict): Run configuration, copied into the report
+
+    Returns:
+        dict: The soak report
+    """
+    start, end = samples[0], samples[-1]
+    k = max(1, (len(samples) - 1) // 4)
+    early, late = samples[:k + 1], samples[-(k + 1):]
+    early_lat = [ms for t, ms in latencies if t <= early[-1]['t']]
+    late_lat = [ms for t, ms in latencies if t >= late[0]['t']]
+    early_summary, late_summary = summarize(early_lat), summarize(late_lat)
+
+    tasks = set(early[-1]['task_cpu_s']) | set(late[-1]['task_cpu_s'])
+    task_rates = {
+        name: {
+            'start': _rate(early[0], early[-1], lambda s: s['task_cpu_s'].get(name, 0.0)),
+            'end': _rate(late[0], late[-1], lambda s: s['task_cpu_s'].get(name, 0.0)),
+        }
+        for name in sorted(tasks)
+    }
+    hours = (end['t'] - start['t']) / 3600
+    rss_growth = end['rss_bytes'] - start['rss_bytes']
+    traced_growth = end['traced_bytes'] - start['traced_bytes']
+    return {
+        'config': config,
+        'duration_s': end['t'],
+        'sessions': sessions,
+        'start': start,
+        'end': end,
+        'growth': {
+            'rss_bytes': rss_growth,
+            'traced_bytes': traced_growth,
+            # Sessions share one heap, so this is the total spread evenly,
+            # not growth attributed to any one session
+            'traced_bytes_avg_per_session': traced_growth // max(1, sessions),
+            'rss_mb_per_hour': rss_growth / 2**20 / hours if hours else 0.0,
+        },
+        'max_queue_depths': {
+            name: max(s['queues'].get(name, 0) for s in samples) for name in end['queues']
+        },
+        'latency_ms': {
+            'start': early_summary,
+            'end': late_summary,
+            'drift_ms': late_summary['p50'] - early_summary['p50'],
+            'all': summarize([ms for _, ms in latencies]),
+        },
+        'cpu': {
+            'process_start': _rate(early[0], early[-1], lambda s: s['process_cpu_s']),
+            'process_end': _rate(late[0], late[-1], lambda s: s['process_cpu_s']),
+            'tasks': task_rates,
+        },
+        'top_growth': top_growth,
+        'samples': samples,
+    }
+
+def evaluate(report, max_rss_growth_mb=MAX_RSS_GROWTH_MB, max_traced_growth_mb=MAX_TRACED_GROWTH_MB,
+             max_queue_depth=MAX_QUEUE_DEPTH, max_latency_drift_ms=MAX_LATENCY_DRIFT_MS,
+             max_cpu_drift=MAX_CPU_DRIFT):
+    """Check a soak report against the thresholds.
+
+    Returns:
+        list: Human-readable failures; empty when the run passed
+    """
+    failures = []
+    growth = report['growth']
+    if growth['rss_bytes'] > max_rss_growth_mb * 2**20:
+        failures.append(f"RSS grew {growth['rss_bytes'] / 2**20:.1f} MB (limit {max_rss_growth_mb} MB)")
+    if growth['traced_bytes'] > max_traced_growth_mb * 2**20:
+        failures.append(f"Traced memory grew {growth['traced_bytes'] / 2**20:.1f} MB (limit {max_traced_growth_mb} MB)")
+    for name in BACKLOG_QUEUES:
+        depth = report['max_queue_depths'].get(name, 0)
+        if depth > max_queue_depth:
+            failures.append(f"{name} queue reached {depth} items (limit {max_queue_depth})")
+    latency = report['latency_ms']
+    if latency['start']['count'] and latency['end']['count'] and latency['drift_ms'] > max_latency_drift_ms:
+        failures.append(f"Response latency p50 drifted {latency['drift_ms']:.1f} ms (limit {max_latency_drift_ms} ms)")
+    cpu = report['cpu']
+    if cpu['process_end'] > CPU_DRIFT_FLOOR and cpu['process_end'] > cpu['process_start'] * (1 + max_cpu_drift):
+        failures.append(
+            f"Process CPU rose from {cpu['process_start']:.3f} to {cpu['process_end']:.3f} s/s "
+            f"(limit +{max_cpu_drift:.0%})"
+        )
+    return failures
+
+async def run_soak(duration=60.0, sessions=1, sample_interval=5.0, warmup=5.0, speed=1.0,
+                   turn_seconds=3.0, tool_every=4):
+    """Run the soak and return its report.
+
+    Args:
+        duration (float): Seconds to run after warmup
+        sessions (int): Concurrent sessions
+        sample_interval (float): Seconds between samples
+        warmup (float): Seconds before the baseline sample
+        speed (float): Audio feed rate relative to real time
+        turn_seconds (float): Seconds of user audio per turn
+        tool_every (int): Ask for a tool every N turns (0 disables tools)
+
+    Returns:
+        dict: Report from build_report()
+    """
+    config = {
+        'duration': duration, 'sessions': sessions, 'sample_interval': sample_interval,
+        'warmup': warmup, 'speed': speed, 'turn_seconds': turn_seconds, 'tool_every': tool_every,
+    }
+    loop = asyncio.get_running_loop()
+    meter = TaskCpuMeter()
+    meter.install(loop)
+    tracemalloc.start()
+    client = LocalBedrockClient(
+        turn_audio_bytes=int(turn_seconds * INPUT_SAMPLE_RATE) * 2,
+        tool_every=tool_every,
+    )
+    admission = AdmissionController(max_streams=sessions, rate=1000.0, burst=sessions)
+    started = loop.time()
+    soak_sessions = [SoakSession(client, admission, turn_seconds, speed, started) for _ in range(sessions)]
+    try:
+        await asyncio.gather(*(s.start() for s in soak_sessions))
+        await asyncio.sleep(warmup)
+        baseline = tracemalloc.take_snapshot()
+        samples = [_take_sample(loop.time() - started, soak_sessions, meter)]
+        end_at = loop.time() + duration
+        while loop.time() < end_at:
+            await asyncio.sleep(min(sample_interval, max(0.0, end_at - loop.time())))
+            samples.append(_take_sample(loop.time() - started, soak_sessions, meter))
+        final = tracemalloc.take_snapshot()
+    finally:
+        await asyncio.gather(*(s.stop() for s in soak_sessions), return_exceptions=True)
+        meter.uninstall()
+        tracemalloc.stop()
+
+    latencies = sorted(l for s in soak_sessions for l in s.latencies)
+    report = build_report(samples, latencies, sessions, _top_growth(baseline, final), config)
+    report['turns_answered'] = len(latencies)
+    report['metrics'] = metrics.snapshot()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test BedrockStreamManager against a local stream")
+    parser.add_argument('--duration', type=float, default=60.0, help="Seconds to run after warmup")
+    parser.add_argument('--sessions', type=int, default=1, help="Concurrent sessions")
+    parser.add_argument('--sample-interval', type=float, default=5.0, help="Seconds between samples")
+    parser.add_argument('--warmup', type=float, default=5.0, help="Seconds before the baseline sample")
+    parser.add_argument('--speed', type=float, default=1.0, help="Audio feed rate relative to real time")
+    parser.add_argument('--turn-seconds', type=float, default=3.0, help="Seconds of user audio per turn")
+    parser.add_argument('--tool-every', type=int, default=4, help="Request a tool every N turns (0 disables)")
+    parser.add_argument('--max-rss-growth-mb', type=float, default=MAX_RSS_GROWTH_MB)
+    parser.add_argument('--max-traced-growth-mb', type=float, default=MAX_TRACED_GROWTH_MB)
+    parser.add_argument('--max-queue-depth', type=int, default=MAX_QUEUE_DEPTH)
+    parser.add_argument('--max-latency-drift-ms', type=float, default=MAX_LATENCY_DRIFT_MS)
+    parser.add_argument('--max-cpu-drift', type=float, default=MAX_CPU_DRIFT)
+    parser.add_argument('--report', metavar='PATH', help="Write the full JSON report to PATH")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_soak(
+        duration=args.duration, sessions=args.sessions, sample_interval=args.sample_interval,
+        warmup=args.warmup, speed=args.speed, turn_seconds=args.turn_seconds, tool_every=args.tool_every,
+    ))
+    failures = evaluate(
+        report, max_rss_growth_mb=args.max_rss_growth_mb, max_traced_growth_mb=args.max_traced_growth_mb,
+        max_queue_depth=args.max_queue_depth, max_latency_drift_ms=args.max_latency_drift_ms,
+        max_cpu_drift=args.max_cpu_drift,
+    )
+    report['failures'] = failures
+
+    start, end, growth = report['start'], report['end'], report['growth']
+    latency, cpu = report['latency_ms'], report['cpu']
+    print(f"{report['sessions']} session(s), {report['duration_s']:.0f}s, {report['turns_answered']} turns answered")
+    print(f"{'':<22}{'start':>14}{'end':>14}")
+    print(f"{'RSS (MB)':<22}{start['rss_bytes'] / 2**20:>14.1f}{end['rss_bytes'] / 2**20:>14.1f}")
+    print(f"{'traced (MB)':<22}{start['traced_bytes'] / 2**20:>14.2f}{end['traced_bytes'] / 2**20:>14.2f}")
+    print(f"{'latency p50 (ms)':<22}{latency['start']['p50']:>14.1f}{latency['end']['p50']:>14.1f}")
+    print(f"{'latency p95 (ms)':<22}{latency['start']['p95']:>14.1f}{latency['end']['p95']:>14.1f}")
+    print(f"{'process CPU (s/s)':<22}{cpu['process_start']:>14.3f}{cpu['process_end']:>14.3f}")
+    print(f"Traced growth, average per session: {growth['traced_bytes_avg_per_session'] / 1024:.1f} KiB")
+    print(f"Max queue depths: {report['max_queue_depths']}")
+    for site in report['top_growth'][:5]:
+        print(f"  {site['size_diff_bytes'] / 1024:+9.1f} KiB  {site['site']}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("PASS")
+
+if __name__ == '__main__':
+    main()
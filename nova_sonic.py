@@ -14,10 +14,12 @@ The application supports the following features:
 - Real-time voice input and output
 
 Usage:
-    python nova_sonic.py [--debug]
+    python nova_sonic.py [--debug] [--loop-report PATH] [--audio-process]
 
 Options:
-    --debug    Enable debug mode for detailed logging
+    --debug              Enable debug mode for detailed logging
+    --loop-report PATH   Monitor event-loop stalls and write a JSON report on exit
+    --audio-process      Run microphone and speaker I/O in a dedicated process
 """
 
 import os
@@ -29,10 +31,13 @@ from dotenv import load_dotenv
 from sonic_nova.config.settings import (
     DEFAULT_MODEL_ID,
     DEFAULT_REGION,
+    AUDIO_DEVICE_PROCESS,
     set_debug
 )
 from sonic_nova.core.bedrock_manager import BedrockStreamManager
 from sonic_nova.core.audio_streamer import AudioStreamer
+from sonic_nova.core.startup import StartupTimeline, start_session
+from sonic_nova.utils.loop_monitor import LoopLagMonitor
 
 # Load environment variables from .env file
 load_dotenv()
@@ -40,18 +45,21 @@ load_dotenv()
 # Suppress warnings
 warnings.filterwarnings("ignore")
 
-async def main(debug=False):
+async def main(debug=False, loop_report=None, audio_process=AUDIO_DEVICE_PROCESS):
     """Initialize and run the Sonic Nova application.
     
     This function sets up the core components of the application:
     1. Configures debug mode
-    2. Creates and initializes the Bedrock stream manager
-    3. Creates and initializes the audio streamer
+    2. Creates the Bedrock stream manager and the audio streamer
+    3. Opens the audio devices concurrently with the Bedrock stream handshake
+       (the startup timeline is printed in debug mode)
     4. Starts the streaming process
     5. Handles cleanup on shutdown
     
     Args:
         debug (bool): Whether to enable debug mode. Defaults to False.
+        loop_report (str, optional): Path for the event-loop stall report.
+        audio_process (bool): Run device I/O in a dedicated process.
     
     Returns:
         None
@@ -59,30 +67,46 @@ async def main(debug=False):
     Raises:
         Exception: If there's an error during initialization or streaming.
     """
+    # Startup phases are timed from here
+    timeline = StartupTimeline()
+
     # Set debug mode
     set_debug(debug)
 
+    # Watch for callbacks that block the event loop
+    loop_monitor = None
+    if loop_report:
+        loop_monitor = LoopLagMonitor()
+        loop_monitor.start()
+
     # Create stream manager
     stream_manager = BedrockStreamManager(
         model_id=DEFAULT_MODEL_ID,
         region=DEFAULT_REGION
     )
 
-    # Create audio streamer
-    audio_streamer = AudioStreamer(stream_manager)
-
-    # Initialize the stream
-    await stream_manager.initialize_stream()
+    # Create audio streamer; its devices are opened by start_session
+    audio_streamer = AudioStreamer(stream_manager, open_devices=False, device_process=audio_process)
 
     try:
-        # This will run until the user presses Enter
-        await audio_streamer.start_streaming()
-        
-    except KeyboardInterrupt:
-        print("Interrupted by user")
+        # Open the audio devices and the Bedrock stream concurrently
+        await start_session(stream_manager, audio_streamer, timeline)
+
+        try:
+            # This will run until the user presses Enter
+            await audio_streamer.start_streaming()
+
+        except KeyboardInterrupt:
+            print("Interrupted by user")
+        finally:
+            # Clean up
+            await audio_streamer.stop_streaming()
     finally:
-        # Clean up
-        await audio_streamer.stop_streaming()
+        # Report loop stalls even when the session failed to start
+        if loop_monitor:
+            loop_monitor.stop()
+            loop_monitor.export(loop_report, session_id=stream_manager.prompt_name)
+            print(f"Loop lag report written to {loop_report}")
 
 if __name__ == "__main__":
     import argparse
@@ -95,11 +119,22 @@ if __name__ == "__main__":
         action='store_true',
         help='Enable debug mode for detailed logging'
     )
+    parser.add_argument(
+        '--loop-report',
+        metavar='PATH',
+        help='Monitor event-loop stalls and write a JSON report to PATH on exit'
+    )
+    parser.add_argument(
+        '--audio-process',
+        action='store_true',
+        default=AUDIO_DEVICE_PROCESS,
+        help='Run microphone and speaker I/O in a dedicated process fed through shared memory'
+    )
     args = parser.parse_args()
 
     # Run the main function
     try:
-        asyncio.run(main(debug=args.debug))
+        asyncio.run(main(debug=args.debug, loop_report=args.loop_report, audio_process=args.audio_process))
     except Exception as e:
         print(f"Application error: {e}")
         if args.debug:
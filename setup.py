@@ -6,12 +6,19 @@ setup(
     packages=find_packages(),
     install_requires=[
         'pyaudio',
+        'numpy',
         'pytz',
         'python-dotenv',
         'aws-sdk-bedrock-runtime',
         'smithy-aws-core'
     ],
     extras_require={
+        'fast': [
+            'orjson'
+        ],
+        'kb': [
+            'pypdf'
+        ],
         'test': [
             'pytest',
             'pytest-asyncio',
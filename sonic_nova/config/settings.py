@@ -3,8 +3,17 @@
 This module contains all the configuration settings for the Sonic Nova application,
 including:
 - Audio configuration (sample rates, channels, format, chunk size)
+- Optional dedicated audio device process and its shared-memory ring sizes
+- Local barge-in detection thresholds
+- Echo suppression parameters
+- Batched capture DSP (VAD, automatic gain) for multi-session hosts
+- Filler audio played during slow tool calls
+- Playback catch-up (time compression) when assistant audio backs up
+- Network ingress server for remote callers (WebSocket and UDP)
 - AWS configuration (region, model ID)
-- Debug mode settings
+- Session checkpoints for crash recovery
+- Knowledge base index location, retrieval and ingestion parameters
+- Debug mode and log sampling settings
 - System prompts
 
 The settings in this module can be customized to modify the behavior of the application
@@ -24,9 +33,63 @@ CHANNELS = 1  # Mono audio
 FORMAT = pyaudio.paInt16  # 16-bit audio
 CHUNK_SIZE = 1024  # Number of frames per buffer
 
+# Audio Process Configuration
+AUDIO_DEVICE_PROCESS = False  # Run device I/O in a dedicated process fed through shared-memory rings
+AUDIO_CAPTURE_RING_MS = 1000  # Capture audio buffered for the main process; frames arriving while it is full are dropped
+AUDIO_PLAYBACK_RING_MS = 100  # Playback audio queued ahead of the device; bounds barge-in flush and echo reference lag
+AUDIO_PROCESS_START_TIMEOUT = 10.0  # Seconds to wait for the audio process to open the devices
+
+# Barge-in Configuration
+BARGE_IN_MODE = 'stop'  # 'stop' pauses playback on local speech onset, 'duck' lowers its volume
+BARGE_IN_THRESHOLD_DB = -40.0  # dBFS a capture block must exceed to count as speech
+BARGE_IN_MARGIN_DB = 12.0  # dB above the tracked noise floor required for speech
+BARGE_IN_MIN_SPEECH_MS = 32  # Consecutive speech required before reporting onset
+BARGE_IN_PLAYBACK_TAIL = 0.3  # Seconds after the last played chunk the assistant counts as speaking
+BARGE_IN_CONFIRM_TIMEOUT = 1.5  # Seconds to wait for the server's interrupted signal before resuming
+BARGE_IN_DUCK_GAIN = 0.2  # Playback gain while ducked
+
+# Echo Suppression Configuration
+ECHO_SUPPRESSION_ENABLED = True  # Remove assistant playback picked up by the microphone
+ECHO_MAX_DELAY_MS = 250  # Largest playback-to-capture delay searched
+ECHO_GATE_CORRELATION = 0.5  # Correlation with playback above which a frame is echo only
+ECHO_GATE_GAIN = 0.1  # Gain applied to echo-only frames
+ECHO_STEP_SIZE = 0.5  # Adaptive filter step size
+
+# Batched Capture DSP Configuration
+DSP_BATCHED = False  # Run ingress and load-generator sessions through the shared batched DSP scheduler
+DSP_TICK_MS = 16  # Milliseconds between batched DSP ticks; adds at most this much capture latency
+DSP_VAD_THRESHOLD_DB = -45.0  # dBFS a frame must exceed to count as speech
+DSP_VAD_MARGIN_DB = 10.0  # dB above the tracked noise floor required for speech
+DSP_VAD_HANGOVER_MS = 200  # Speech is still reported this long after the level drops
+DSP_AGC_TARGET_DB = -20.0  # Speech level the automatic gain steers toward
+DSP_AGC_MAX_GAIN_DB = 20.0  # Largest automatic gain applied
+
+# Filler Audio Configuration
+FILLER_CACHE_DIR = 'filler_cache'  # Packed filler clips; filler audio is off when missing
+FILLER_THRESHOLD_MS = 400  # Tool wait after toolUse before a filler clip starts
+FILLER_FADE_MS = 20  # Fade-out applied when real audio cuts a filler clip short
+
+# Playback Catch-up Configuration
+PLAYBACK_CATCHUP_THRESHOLD_MS = 1000  # Queued assistant audio above which playback speeds up
+PLAYBACK_CATCHUP_TARGET_MS = 300  # Queued audio at which playback returns to normal speed
+PLAYBACK_CATCHUP_SPEED = 1.25  # Playback speed while catching up; pitch is preserved
+PLAYBACK_WSOLA_FRAME_MS = 20  # Time-compression analysis frame
+PLAYBACK_WSOLA_SEARCH_MS = 5  # How far each frame may shift to line up with the previous one
+
+# Ingress Server Configuration
+INGRESS_HOST = '127.0.0.1'  # Interface the ingress server listens on
+INGRESS_WS_PORT = 8765  # WebSocket port for remote callers
+INGRESS_UDP_PORT = None  # UDP port for media gateways; None disables UDP ingress
+INGRESS_MAX_FRAME_BYTES = 65536  # Largest accepted frame; bigger WebSocket frames close the connection
+INGRESS_MAX_QUEUED_CHUNKS = 32  # Caller audio chunks queued per session before reading pauses (UDP: drops)
+INGRESS_WRITE_BUFFER_HIGH = 262144  # Bytes buffered toward a WebSocket caller before assistant audio waits
+INGRESS_UDP_IDLE_TIMEOUT = 10.0  # Seconds without datagrams before a UDP caller's session ends
+INGRESS_UDP_REJECT_BACKOFF = 5.0  # Seconds a rejected UDP caller's datagrams are dropped before it may retry
+
 # AWS Configuration
 DEFAULT_REGION = 'us-east-1'  # Default AWS region
 DEFAULT_MODEL_ID = 'amazon.nova-sonic-v1:0'  # Nova model identifier
+CREDENTIALS_REFRESH_MARGIN = 300  # Seconds before credential expiry to refresh them
 
 # Debug Configuration
 _debug_mode = False  # Internal debug state
@@ -51,6 +114,64 @@ def is_debug():
     """
     return _debug_mode
 
+# Loop Monitor Configuration
+LOOP_LAG_INTERVAL = 0.05  # Seconds between event-loop heartbeats
+LOOP_LAG_THRESHOLD = 0.1  # Heartbeat delay in seconds that counts as a stall
+
+# Worker Configuration
+WORKER_COUNT = None  # Worker processes for multi-session hosting; None uses every CPU core
+WORKER_REPORT_INTERVAL = 1.0  # Seconds between worker load and metrics reports
+WORKER_RESTART_BACKOFF = 0.5  # Seconds before restarting a crashed worker, doubled per consecutive crash
+WORKER_RESTART_BACKOFF_MAX = 30.0  # Longest restart delay; a worker that stayed up this long starts over at the minimum
+
+# Outbound Writer Configuration
+OUTBOUND_CONTROL_CAPACITY = 64  # Queued control/tool events before producers wait
+OUTBOUND_BULK_CAPACITY = 32  # Queued audio events before producers wait
+OUTBOUND_MAX_RETRIES = 3  # Retries for transient send failures
+OUTBOUND_RETRY_BACKOFF = 0.05  # Initial retry delay in seconds, doubled per retry
+AUDIO_COALESCE_MAX_BYTES = 16384  # Largest audioInput payload built from queued chunks
+
+# Receive Configuration
+OUTPUT_QUEUE_MAXSIZE = 256  # Parsed events kept for other components; oldest dropped beyond this
+
+# Tool Configuration
+SPECULATIVE_TOOL_EXECUTION = True  # Start tools at toolUse instead of waiting for the TOOL contentEnd
+
+# Admission Control Configuration
+MAX_CONCURRENT_STREAMS = 20  # Active Bedrock streams allowed per process
+STREAM_CREATION_RATE = 5.0  # Stream creations per second (token bucket refill rate)
+STREAM_CREATION_BURST = 5  # Stream creations allowed back to back
+ADMISSION_MAX_QUEUE = 50  # Callers allowed to wait for a slot; more are rejected as saturated
+ADMISSION_MAX_WAIT = 10.0  # Seconds a caller may wait for a slot before timing out
+
+# Checkpoint Configuration
+CHECKPOINT_DIR = None  # Directory of per-worker checkpoint files for crash recovery; None disables it
+CHECKPOINT_FSYNC_INTERVAL = 0.05  # Seconds of checkpoints gathered into each fsync
+CHECKPOINT_COMPACT_BYTES = 4 * 1024 * 1024  # File size past which only each live session's latest checkpoint is kept
+CHECKPOINT_MAX_HISTORY_TURNS = 20  # Conversation turns kept in a checkpoint and replayed on recovery
+CHECKPOINT_MAX_RECOVERY_ATTEMPTS = 3  # Restarts in a row a session is recovered without completing a turn before it is dropped
+
+# Knowledge Base Configuration
+KB_INDEX_DIR = 'kb_index'  # Persistent vector index; knowledgeBaseTool is offered only when it exists
+KB_EMBEDDING_DIM = 512  # Hashing embedder dimension for newly built indexes
+KB_TOP_K = 3  # Passages returned per lookup
+KB_MIN_SCORE = 0.1  # Cosine similarity below which passages are dropped
+KB_QUERY_CACHE_SIZE = 1024  # Query embeddings kept in the LRU cache
+KB_CHUNK_WORDS = 200  # Words per indexed passage
+KB_CHUNK_OVERLAP = 40  # Words shared by consecutive passages
+KB_INGEST_WORKERS = None  # Parser processes; None uses every CPU
+KB_INGEST_BATCH_SIZE = 256  # Passages embedded per call during ingestion
+
+# JSON Codec Configuration
+JSON_CODEC = 'auto'  # 'auto' uses orjson when installed, else 'json' (stdlib) or 'orjson'
+
+# Logging Configuration
+# Fraction of debug records kept per event type; unlisted types are always kept
+LOG_SAMPLE_RATES = {
+    'audioInput': 0.01,
+    'audioOutput': 0.01,
+}
+
 # System Prompt
 DEFAULT_SYSTEM_PROMPT = """You are a friend. The user and you will engage in a spoken dialog exchanging the transcripts of a natural real-time conversation.
 When reading order numbers, please read each digit individually, separated by pauses. For example, order #1234 should be read as 'order number one-two-three-four' rather than 'order number one thousand two hundred thirty-four'.""" 
\ No newline at end of file
@@ -0,0 +1,252 @@
+"""Admission control for Bedrock stream creation.
+
+Bedrock limits concurrent bidirectional streams per account, and a stream
+that exceeds the quota fails only after a full handshake. AdmissionController
+sits in front of initialize_stream and enforces:
+
+- a cap on concurrently active streams,
+- a token bucket on the stream creation rate,
+- a bounded FIFO of waiting callers, each with a maximum wait.
+
+When the queue is full the caller is rejected straight away. Every
+rejection raises AdmissionRejected with a machine-readable status, so
+callers can tell a saturated host from a quota error returned by the service.
+"""
+
+import time
+import asyncio
+from collections import deque
+from sonic_nova.config.settings import (
+    MAX_CONCURRENT_STREAMS,
+    STREAM_CREATION_RATE,
+    STREAM_CREATION_BURST,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_MAX_WAIT,
+)
+from sonic_nova.utils.metrics import metrics
+
+# Rejection statuses
+STATUS_SATURATED = 'saturated'
+STATUS_TIMEOUT = 'timeout'
+STATUS_QUOTA_EXCEEDED = 'quota_exceeded'
+
+# Substrings of service errors that mean the account's stream quota is used up
+QUOTA_ERROR_MARKERS = ('ServiceQuotaExceeded', 'ThrottlingException', 'TooManyRequests')
+
+class AdmissionRejected(Exception):
+    """Raised when a stream cannot be admitted.
+
+    Attributes:
+        status (str): STATUS_SATURATED, STATUS_TIMEOUT or STATUS_QUOTA_EXCEEDED
+        snapshot (dict): Controller status at the time of rejection
+    """
+
+    def __init__(self, status, message, snapshot=None):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.snapshot = snapshot or {}
+
+def is_quota_error(error):
+    """Return True if an exception from stream creation is a quota error."""
+    text = f"{type(error).__name__} {error}"
+    return any(marker in text for marker in QUOTA_ERROR_MARKERS)
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at rate tokens per second."""
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        """Initialize the bucket.
+
+        Args:
+            rate (float): Tokens added per second
+            burst (int): Bucket capacity
+            clock (callable): Monotonic clock, replaceable in tests
+        """
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def tokens(self):
+        """float: Tokens currently available."""
+        self._refill()
+        return self._tokens
+
+    def try_take(self):
+        """Take a token if one is available.
+
+        Returns:
+            bool: True if a token was taken
+        """
+        self._refill()
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    def seconds_until_token(self):
+        """Return how long until a token will be available."""
+        self._refill()
+        if self._tokens >= 1.0 or self.rate <= 0:
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+class AdmissionController:
+    """Admits stream creations under concurrency and rate limits."""
+
+    def __init__(
+        self,
+        max_streams=MAX_CONCURRENT_STREAMS,
+        rate=STREAM_CREATION_RATE,
+        burst=STREAM_CREATION_BURST,
+        max_queue=ADMISSION_MAX_QUEUE,
+        max_wait=ADMISSION_MAX_WAIT,
+        metrics_registry=None,
+    ):
+        """Initialize the controller.
+
+        Args:
+            max_streams (int): Concurrently active streams allowed
+            rate (float): Stream creations per second
+            burst (int): Creations allowed back to back
+            max_queue (int): Callers allowed to wait; more are rejected
+            max_wait (float): Seconds a caller may wait before being rejected
+            metrics_registry (MetricsRegistry, optional): Where to publish stats
+        """
+        self.max_streams = max_streams
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.bucket = TokenBucket(rate, burst)
+        self.metrics = metrics_registry or metrics
+        self.active = 0
+        self._waiters = deque()
+        self._timer = None
+        self.admitted = 0
+        self.rejected = {STATUS_SATURATED: 0, STATUS_TIMEOUT: 0, STATUS_QUOTA_EXCEEDED: 0}
+
+    def status(self):
+        """Return the controller's current state.
+
+        Returns:
+            dict: active, waiting, limits, available tokens and counters
+        """
+        return {
+            'active': self.active,
+            'max_streams': self.max_streams,
+            'waiting': len(self._waiters),
+            'max_queue': self.max_queue,
+            'tokens': round(self.bucket.tokens, 3),
+            'admitted': self.admitted,
+            'rejected': dict(self.rejected),
+            'saturated': self.active >= self.max_streams and len(self._waiters) >= self.max_queue,
+        }
+
+    def _reject(self, status, message):
+        self.rejected[status] += 1
+        self.metrics.increment(f"admission.rejected.{status}")
+        return AdmissionRejected(status, message, self.status())
+
+    def _can_admit(self):
+        return self.active < self.max_streams and self.bucket.try_take()
+
+    def _admit(self, waited, reserved=False):
+        if not reserved:
+            self.active += 1
+        self.admitted += 1
+        self.metrics.increment("admission.admitted")
+        self.metrics.observe("admission.wait_ms", waited * 1000)
+
+    def _dispatch(self):
+        """Admit waiting callers while capacity and tokens allow."""
+        self._timer = None
+        while self._waiters:
+            future, _ = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if self.active >= self.max_streams:
+                return
+            if not self.bucket.try_take():
+                # Wake up again when the next token is due
+                delay = self.bucket.seconds_until_token()
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            self._waiters.popleft()
+            # Reserve the slot now: the waiter only resumes later, and every
+            # waiter resolved in this loop would otherwise see the same slot free
+            self.active += 1
+            future.set_result(True)
+
+    async def acquire(self):
+        """Wait for admission.
+
+        Raises:
+            AdmissionRejected: If the wait queue is full or max_wait elapses
+        """
+        start = time.monotonic()
+        if not self._waiters and self._can_admit():
+            self._admit(0.0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject(
+                STATUS_SATURATED,
+                f"{self.active}/{self.max_streams} streams active and {len(self._waiters)} callers waiting"
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, start)
+        self._waiters.append(entry)
+        self.metrics.observe("admission.queue_depth", len(self._waiters))
+        if self._timer is None:
+            self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Admitted at the last moment
+                self._admit(time.monotonic() - start, reserved=True)
+                return
+            self._abandon(entry)
+            raise self._reject(STATUS_TIMEOUT, f"no stream slot within {self.max_wait:.1f}s")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Give back the slot reserved for this caller
+                self.release()
+            self._abandon(entry)
+            raise
+        self._admit(time.monotonic() - start, reserved=True)
+
+    def _abandon(self, entry):
+        entry[0].cancel()
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            pass
+
+    def release(self):
+        """Return a stream slot and admit the next waiting caller."""
+        if self.active > 0:
+            self.active -= 1
+        if self._waiters and self._timer is None:
+            self._dispatch()
+
+    def quota_error(self, error):
+        """Convert a service quota error into an AdmissionRejected.
+
+        Args:
+            error (Exception): The error raised by stream creation
+
+        Returns:
+            AdmissionRejected: With STATUS_QUOTA_EXCEEDED
+        """
+        return self._reject(STATUS_QUOTA_EXCEEDED, str(error))
+
+# Process-wide default controller
+admission_controller = AdmissionController()
@@ -0,0 +1,409 @@
+"""Audio device I/O in a dedicated process.
+
+PortAudio callbacks normally run in the same process as the protocol work
+(base64, JSON, tools), so a busy interpreter holding the GIL delays them and
+the devices overrun or underrun. AudioProcess moves the devices into a small
+child process that does nothing else. PCM crosses the process boundary
+through two single-producer/single-consumer ring buffers in
+multiprocessing.shared_memory:
+
+- capture ring: written by the device callback in the audio process, read on
+  the main event loop. Each captured block also writes one byte to a pipe the
+  loop watches, so the main process wakes without polling.
+- playback ring: written by the main process, read by the output callback in
+  the audio process. The device clock pulls audio; a short read is padded
+  with silence instead of blocking.
+
+The rings hold no locks. Each index in a ring's header has a single writer,
+and a writer publishes its index only after copying the data it covers.
+
+Usage:
+    >>> audio = AudioProcess()
+    >>> audio.start()                       # Blocks until the devices are open
+    >>> audio.attach(loop, on_capture)      # on_capture(pcm) runs on the loop
+    >>> await audio.write_playback(pcm)
+    >>> audio.flush_playback()              # Barge-in: drop queued playback
+    >>> audio.stop()
+"""
+
+import os
+import asyncio
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+import pyaudio
+from sonic_nova.config.settings import (
+    INPUT_SAMPLE_RATE,
+    OUTPUT_SAMPLE_RATE,
+    CHANNELS,
+    FORMAT,
+    CHUNK_SIZE,
+    AUDIO_CAPTURE_RING_MS,
+    AUDIO_PLAYBACK_RING_MS,
+    AUDIO_PROCESS_START_TIMEOUT
+)
+from sonic_nova.utils.helpers import debug_print
+
+# Ring header slots (uint64 each)
+_WRITE = 0  # Bytes ever written; producer only
+_READ = 1  # Bytes ever consumed; consumer only
+_DISCARD = 2  # Producer asks the consumer to skip everything before this offset
+_DROPPED = 3  # Bytes the producer dropped because the ring was full
+_PADDED = 4  # Consumer reads padded with silence
+_CAPACITY = 5
+_HEADER_BYTES = 64
+
+# Audio process -> main process status messages
+STATUS_READY = 'ready'
+STATUS_ERROR = 'error'
+
+# Main process -> audio process commands
+COMMAND_STOP = 'stop'
+
+class SharedRing:
+    """Lock-free SPSC byte ring in a shared memory block."""
+
+    def __init__(self, shm, owner):
+        """Use SharedRing.create() or SharedRing.attach() rather than calling this directly."""
+        self.shm = shm
+        self.owner = owner
+        self._header = np.ndarray((_HEADER_BYTES // 8,), dtype=np.uint64, buffer=shm.buf)
+        self.capacity = int(self._header[_CAPACITY])
+        self._data = np.ndarray((self.capacity,), dtype=np.uint8, buffer=shm.buf, offset=_HEADER_BYTES)
+
+    @classmethod
+    def create(cls, capacity):
+        """Allocate a new ring of capacity bytes."""
+        shm = shared_memory.SharedMemory(create=True, size=_HEADER_BYTES + capacity)
+        header = np.ndarray((_HEADER_BYTES // 8,), dtype=np.uint64, buffer=shm.buf)
+        header[:] = 0
+        header[_CAPACITY] = capacity
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Open a ring created by another process."""
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def dropped_bytes(self):
+        return int(self._header[_DROPPED])
+
+    @property
+    def padded_reads(self):
+        return int(self._header[_PADDED])
+
+    def available(self):
+        """Return the bytes the consumer can read."""
+        return int(self._header[_WRITE]) - max(int(self._header[_READ]), int(self._header[_DISCARD]))
+
+    def free(self):
+        """Return the bytes the producer can write."""
+        return self.capacity - (int(self._header[_WRITE]) - int(self._header[_READ]))
+
+    def write(self, data):
+        """Copy as much of data as fits. Producer only.
+
+        Returns:
+            int: Bytes written
+        """
+        src = np.frombuffer(data, dtype=np.uint8)
+        head = int(self._header[_WRITE])
+        n = min(len(src), self.capacity - (head - int(self._header[_READ])))
+        if n <= 0:
+            return 0
+        pos = head % self.capacity
+        first = min(n, self.capacity - pos)
+        self._data[pos:pos + first] = src[:first]
+        self._data[:n - first] = src[first:n]
+        # Publish only after the data is in place
+        self._header[_WRITE] = head + n
+        return n
+
+    def read(self, max_bytes):
+        """Consume up to max_bytes. Consumer only.
+
+        Returns:
+            bytes: The data read, possibly empty
+        """
+        tail = max(int(self._header[_READ]), int(self._header[_DISCARD]))
+        n = min(max_bytes, int(self._header[_WRITE]) - tail)
+        if n <= 0:
+            self._header[_READ] = tail
+            return b''
+        pos = tail % self.capacity
+        first = min(n, self.capacity - pos)
+        out = self._data[pos:pos + first].tobytes()
+        if first < n:
+            out += self._data[:n - first].tobytes()
+        self._header[_READ] = tail + n
+        return out
+
+    def discard(self):
+        """Ask the consumer to skip everything written so far. Producer only."""
+        self._header[_DISCARD] = self._header[_WRITE]
+
+    def note_dropped(self, n):
+        """Count n bytes the producer could not write."""
+        self._header[_DROPPED] += n
+
+    def note_padded(self):
+        """Count a consumer read that came up short."""
+        self._header[_PADDED] += 1
+
+    def close(self):
+        """Unmap the ring, and free it if this process created it."""
+        self._header = self._data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+class PyAudioDevices:
+    """Microphone and speaker streams, opened inside the audio process."""
+
+    def __init__(self):
+        self.p = None
+        self.input_stream = None
+        self.output_stream = None
+
+    def open(self, on_capture, on_playback):
+        """Open both streams in callback mode.
+
+        Args:
+            on_capture (callable): Called with each captured PCM block
+            on_playback (callable): Called with a byte count, returns that much PCM
+        """
+        sample_bytes = pyaudio.get_sample_size(FORMAT) * CHANNELS
+
+        def input_callback(in_data, frame_count, time_info, status):
+            on_capture(in_data)
+            return (None, pyaudio.paContinue)
+
+        def output_callback(in_data, frame_count, time_info, status):
+            return (on_playback(frame_count * sample_bytes), pyaudio.paContinue)
+
+        self.p = pyaudio.PyAudio()
+        self.input_stream = self.p.open(
+            format=FORMAT,
+            channels=CHANNELS,
+            rate=INPUT_SAMPLE_RATE,
+            input=True,
+            frames_per_buffer=CHUNK_SIZE,
+            stream_callback=input_callback
+        )
+        self.output_stream = self.p.open(
+            format=FORMAT,
+            channels=CHANNELS,
+            rate=OUTPUT_SAMPLE_RATE,
+            output=True,
+            frames_per_buffer=CHUNK_SIZE,
+            stream_callback=output_callback
+        )
+
+    def close(self):
+        """Stop and close the streams and terminate PyAudio."""
+        for stream in (self.input_stream, self.output_stream):
+            if stream:
+                if stream.is_active():
+                    stream.stop_stream()
+                stream.close()
+        self.input_stream = self.output_stream = None
+        if self.p:
+            self.p.terminate()
+            self.p = None
+
+def _audio_main(device_factory, capture_name, playback_name, notify, control):
+    """Entry point of the audio process."""
+    capture = SharedRing.attach(capture_name)
+    playback = SharedRing.attach(playback_name)
+    # Wake-ups are single raw bytes; never block the device callback on them
+    notify_fd = notify.fileno()
+    os.set_blocking(notify_fd, False)
+
+    def on_capture(pcm):
+        # Whole blocks only, so the main process always reads aligned frames
+        if capture.free() < len(pcm):
+            capture.note_dropped(len(pcm))
+            return
+        capture.write(pcm)
+        try:
+            os.write(notify_fd, b'\x01')
+        except (BlockingIOError, BrokenPipeError):
+            # The pipe is full of unread wake-ups, or the main process is gone
+            pass
+
+    def on_playback(n):
+        data = playback.read(n)
+        if len(data) < n:
+            if data:
+                playback.note_padded()
+            data += bytes(n - len(data))
+        return data
+
+    devices = device_factory()
+    try:
+        devices.open(on_capture, on_playback)
+    except Exception as e:
+        control.send((STATUS_ERROR, f"{type(e).__name__}: {e}"))
+        capture.close()
+        playback.close()
+        return
+    control.send((STATUS_READY, None))
+    try:
+        while control.recv() != COMMAND_STOP:
+            pass
+    except EOFError:
+        # The main process exited without stopping us
+        pass
+    finally:
+        devices.close()
+        capture.close()
+        playback.close()
+
+class AudioProcess:
+    """Main-process handle for device I/O running in a child process."""
+
+    def __init__(self, device_factory=PyAudioDevices, capture_ms=AUDIO_CAPTURE_RING_MS,
+                 playback_ms=AUDIO_PLAYBACK_RING_MS, frame_bytes=CHUNK_SIZE * 2, mp_context='spawn'):
+        """Initialize the handle; nothing is started until start().
+
+        Args:
+            device_factory (callable): Importable callable returning the device
+                object the child opens; defaults to PyAudioDevices
+            capture_ms (int): Capture ring size in milliseconds of audio
+            playback_ms (int): Playback ring size in milliseconds of audio
+            frame_bytes (int): Bytes handed to on_capture per call
+            mp_context (str): multiprocessing start method
+        """
+        self.device_factory = device_factory
+        self.frame_bytes = frame_bytes
+        self.capture_bytes = max(frame_bytes, INPUT_SAMPLE_RATE * 2 * capture_ms // 1000)
+        self.playback_bytes = OUTPUT_SAMPLE_RATE * 2 * playback_ms // 1000
+        # Sleep between attempts to write into a full playback ring
+        self._playback_wait = playback_ms / 4000
+        self._ctx = multiprocessing.get_context(mp_context)
+        self.process = None
+        self.capture = None
+        self.playback = None
+        self._notify = None
+        self._control = None
+        self._loop = None
+        self._on_capture = None
+
+    def start(self, timeout=AUDIO_PROCESS_START_TIMEOUT):
+        """Start the audio process and wait for it to open the devices.
+
+        Safe to call from a worker thread.
+
+        Raises:
+            OSError: If the devices could not be opened
+            TimeoutError: If the process did not report within timeout seconds
+        """
+        self.capture = SharedRing.create(self.capture_bytes)
+        self.playback = SharedRing.create(self.playback_bytes)
+        self._notify, child_notify = self._ctx.Pipe(duplex=False)
+        self._control, child_control = self._ctx.Pipe()
+        self.process = self._ctx.Process(
+            target=_audio_main,
+            args=(self.device_factory, self.capture.name, self.playback.name, child_notify, child_control),
+            name="sonic-nova-audio",
+            daemon=True,
+        )
+        self.process.start()
+        child_notify.close()
+        child_control.close()
+        os.set_blocking(self._notify.fileno(), False)
+
+        if not self._control.poll(timeout):
+            self.stop()
+            raise TimeoutError(f"Audio process did not open the devices within {timeout}s")
+        status, detail = self._control.recv()
+        if status != STATUS_READY:
+            self.stop()
+            raise OSError(f"Audio process could not open the devices: {detail}")
+        debug_print("Audio process %d ready", self.process.pid)
+
+    def attach(self, loop, on_capture):
+        """Deliver captured audio to on_capture on loop.
+
+        Must be called from the loop's thread.
+
+        Args:
+            loop: The event loop to watch the notification pipe on
+            on_capture (callable): Called with frame_bytes of PCM at a time
+        """
+        self._loop = loop
+        self._on_capture = on_capture
+        loop.add_reader(self._notify.fileno(), self._drain_capture)
+
+    def _drain_capture(self):
+        """Consume pending wake-ups and hand every whole captured frame to on_capture."""
+        try:
+            while os.read(self._notify.fileno(), 4096):
+                pass
+        except BlockingIOError:
+            pass
+        except OSError:
+            # The audio process is gone; nothing more will arrive
+            self._detach()
+            return
+        while self.capture.available() >= self.frame_bytes:
+            self._on_capture(self.capture.read(self.frame_bytes))
+
+    def _detach(self):
+        if self._loop is not None:
+            self._loop.remove_reader(self._notify.fileno())
+            self._loop = None
+
+    async def write_playback(self, pcm):
+        """Queue PCM for the speaker, waiting while the playback ring is full.
+
+        Raises:
+            RuntimeError: If the audio process has exited
+        """
+        view = memoryview(pcm).cast('B')
+        while view:
+            view = view[self.playback.write(view):]
+            if view:
+                if not self.process.is_alive():
+                    raise RuntimeError("Audio process exited")
+                await asyncio.sleep(self._playback_wait)
+
+    def flush_playback(self):
+        """Drop playback that is queued but not yet handed to the device."""
+        if self.playback is not None:
+            self.playback.discard()
+
+    def stats(self):
+        """Return overrun and underrun counters kept in the rings."""
+        return {
+            'capture_dropped_bytes': self.capture.dropped_bytes if self.capture else 0,
+            'playback_padded_reads': self.playback.padded_reads if self.playback else 0,
+        }
+
+    def stop(self, timeout=2.0):
+        """Close the devices, end the audio process and free the rings."""
+        self._detach()
+        if self.process is not None:
+            try:
+                self._control.send(COMMAND_STOP)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+            self.process = None
+        for conn in (self._notify, self._control):
+            if conn is not None:
+                conn.close()
+        self._notify = self._control = None
+        for ring in (self.capture, self.playback):
+            if ring is not None:
+                ring.close()
+        self.capture = self.playback = None
@@ -1,33 +1,100 @@
+import time
 import asyncio
+import numpy as np
 import pyaudio
 from sonic_nova.config.settings import (
     INPUT_SAMPLE_RATE,
     OUTPUT_SAMPLE_RATE,
     CHANNELS,
     FORMAT,
-    CHUNK_SIZE
+    CHUNK_SIZE,
+    BARGE_IN_MODE,
+    BARGE_IN_CONFIRM_TIMEOUT,
+    BARGE_IN_DUCK_GAIN,
+    ECHO_SUPPRESSION_ENABLED,
+    FILLER_THRESHOLD_MS,
+    FILLER_FADE_MS,
+    AUDIO_DEVICE_PROCESS
 )
+from sonic_nova.core.audio_process import AudioProcess
+from sonic_nova.core.playback import CatchUpController, TimeStretcher
+from sonic_nova.core.barge_in import BargeInDetector
+from sonic_nova.core.echo import EchoSuppressor
+from sonic_nova.core.filler import default_filler_cache
+from sonic_nova.core.startup import timed_phase
 from sonic_nova.utils.helpers import debug_print, time_it, time_it_async
+from sonic_nova.utils.metrics import metrics
 
 class AudioStreamer:
     """Handles continuous microphone input and audio output using separate streams."""
     
-    def __init__(self, stream_manager):
+    def __init__(self, stream_manager, open_devices=True, filler_cache=None, device_process=AUDIO_DEVICE_PROCESS):
         """Initialize the audio streamer with a stream manager.
         
         Args:
             stream_manager: An instance of BedrockStreamManager to handle the streaming logic
+            open_devices (bool): Open the audio devices now. Pass False to call
+                open_devices() later, e.g. from start_session().
+            filler_cache (FillerCache, optional): Clips played during slow tool
+                calls. Defaults to the shared cache at FILLER_CACHE_DIR, if any.
+            device_process (bool): Run device I/O in a dedicated process
+                (see AudioProcess) instead of PortAudio threads in this one.
         """
         self.stream_manager = stream_manager
         self.is_streaming = False
         self.loop = asyncio.get_event_loop()
 
+        # Local barge-in state; onset is a time.monotonic() timestamp while
+        # playback is held or ducked awaiting the server's confirmation
+        self.barge_in_detector = BargeInDetector()
+        self._barge_in_onset = None
+        self._barge_in_reacted = False
+        self._pending_audio = None
+
+        # Echo suppression uses the played audio as far-end reference
+        self.echo_suppressor = EchoSuppressor() if ECHO_SUPPRESSION_ENABLED else None
+
+        # Filler audio: at most one clip per tool wait, never the same clip twice running
+        self.filler_cache = filler_cache if filler_cache is not None else default_filler_cache()
+        self._filler_for = None
+        self._last_filler = None
+
+        # Playback speeds up slightly, pitch preserved, while audio backs up
+        self.catch_up = CatchUpController()
+        self.time_stretcher = TimeStretcher()
+
+        # PyAudio and the device streams; opened here unless the caller
+        # opens them itself (e.g. concurrently with the Bedrock handshake)
+        self.p = None
+        self.input_stream = None
+        self.output_stream = None
+        self.device_process = device_process
+        self.audio_process = None
+        if open_devices:
+            self.open_devices()
+
+    def open_devices(self, timeline=None):
+        """Initialize PyAudio and open the input and output streams.
+
+        Safe to call from a worker thread.
+
+        Args:
+            timeline (StartupTimeline, optional): Records each step as a phase
+        """
+        if self.device_process:
+            debug_print("Starting audio process...")
+            with timed_phase(timeline, 'audio_process_start'):
+                self.audio_process = AudioProcess()
+                self.audio_process.start()
+            return
+
         # Initialize PyAudio
         debug_print("AudioStreamer Initializing PyAudio...")
         @time_it("AudioStreamerInitPyAudio")
         def init_pyaudio():
             return pyaudio.PyAudio()
-        self.p = init_pyaudio()
+        with timed_phase(timeline, 'pyaudio_init'):
+            self.p = init_pyaudio()
         debug_print("AudioStreamer PyAudio initialized")
 
         # Initialize separate streams for input and output
@@ -43,7 +110,8 @@ class AudioStreamer:
                 frames_per_buffer=CHUNK_SIZE,
                 stream_callback=self.input_callback
             )
-        self.input_stream = open_input_stream()
+        with timed_phase(timeline, 'input_stream_open'):
+            self.input_stream = open_input_stream()
         debug_print("input audio stream opened")
 
         # Output stream for direct writing (no callback)
@@ -57,12 +125,39 @@ class AudioStreamer:
                 output=True,
                 frames_per_buffer=CHUNK_SIZE
             )
-        self.output_stream = open_output_stream()
+        with timed_phase(timeline, 'output_stream_open'):
+            self.output_stream = open_output_stream()
         debug_print("output audio stream opened")
 
+    def close_devices(self):
+        """Stop and close the device streams and terminate PyAudio."""
+        if self.audio_process:
+            stats = self.audio_process.stats()
+            debug_print("Audio process dropped %d capture bytes, padded %d playback reads",
+                        stats['capture_dropped_bytes'], stats['playback_padded_reads'])
+            self.audio_process.stop()
+            self.audio_process = None
+        if self.input_stream:
+            if self.input_stream.is_active():
+                self.input_stream.stop_stream()
+            self.input_stream.close()
+            self.input_stream = None
+        if self.output_stream:
+            if self.output_stream.is_active():
+                self.output_stream.stop_stream()
+            self.output_stream.close()
+            self.output_stream = None
+        if self.p:
+            self.p.terminate()
+            self.p = None
+
     def input_callback(self, in_data, frame_count, time_info, status):
         """Callback function that schedules audio processing in the asyncio event loop."""
         if self.is_streaming and in_data:
+            in_data, onset = self._condition_capture(in_data)
+            if onset is not None:
+                self.loop.call_soon_threadsafe(self._on_local_barge_in, onset)
+
             # Schedule the task in the event loop
             asyncio.run_coroutine_threadsafe(
                 self.process_input_audio(in_data), 
@@ -70,6 +165,32 @@ class AudioStreamer:
             )
         return (None, pyaudio.paContinue)
 
+    def _on_process_capture(self, in_data):
+        """Handle a frame captured by the audio process; runs on the event loop."""
+        if self.is_streaming:
+            in_data, onset = self._condition_capture(in_data)
+            if onset is not None:
+                self._on_local_barge_in(onset)
+            self.loop.create_task(self.process_input_audio(in_data))
+
+    def _condition_capture(self, in_data):
+        """Apply echo suppression and barge-in detection to a captured frame.
+
+        Returns:
+            tuple: (frame to send upstream, barge-in onset timestamp or None)
+        """
+        # Remove the assistant's own voice before it is sent upstream
+        echo_gated = False
+        if self.echo_suppressor is not None:
+            in_data, echo_gated = self.echo_suppressor.process(in_data)
+
+        # Detect barge-in as soon as the frame is captured so playback reacts
+        # without waiting for the server; echo-only frames are not user speech
+        onset = None
+        if not echo_gated:
+            onset = self.barge_in_detector.process(in_data)
+        return in_data, onset
+
     async def process_input_audio(self, audio_data):
         """Process a single audio chunk directly."""
         try:
@@ -79,53 +200,221 @@ class AudioStreamer:
             if self.is_streaming:
                 print(f"Error processing input audio: {e}")
     
+    def _on_local_barge_in(self, onset):
+        """Hold or duck playback after local speech onset.
+
+        Args:
+            onset (float): time.monotonic() timestamp of speech onset
+        """
+        if self._barge_in_onset is not None:
+            return
+        self._barge_in_onset = onset
+        self._barge_in_reacted = False
+        metrics.increment("barge_in.local_detections")
+        debug_print("Local barge-in detected, %s playback", BARGE_IN_MODE)
+
+    def _note_barge_in_reaction(self):
+        """Record onset-to-reaction time the first time playback reacts."""
+        if self._barge_in_onset is not None and not self._barge_in_reacted:
+            self._barge_in_reacted = True
+            metrics.observe("barge_in.reaction_ms", (time.monotonic() - self._barge_in_onset) * 1000)
+
+    def _release_barge_in(self, confirmed):
+        """End a local barge-in hold.
+
+        Args:
+            confirmed (bool): True if the server reported the interruption,
+                False if the confirmation timed out
+        """
+        onset = self._barge_in_onset
+        self._barge_in_onset = None
+        if onset is None:
+            return
+        if confirmed:
+            metrics.increment("barge_in.confirmed")
+            metrics.observe("barge_in.server_lag_ms", (time.monotonic() - onset) * 1000)
+        else:
+            metrics.increment("barge_in.false_alarms")
+            debug_print("Local barge-in not confirmed by server, resuming playback")
+
+    def _clear_output_queue(self):
+        """Drop all queued assistant audio."""
+        self._pending_audio = None
+        self.time_stretcher.reset()
+        if self.audio_process:
+            self.audio_process.flush_playback()
+        if self.echo_suppressor is not None:
+            self.echo_suppressor.discard_pending_reference()
+        while not self.stream_manager.audio_output_queue.empty():
+            try:
+                self.stream_manager.audio_output_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+
+    async def _write_output(self, chunk):
+        """Write one chunk to the output device and record it as played."""
+        if self.audio_process:
+            await self.audio_process.write_playback(chunk)
+            self._note_played(chunk)
+            return
+
+        # Create a new function that captures the chunk by value
+        def write_chunk(data):
+            return self.output_stream.write(data)
+
+        # Pass the chunk to the function
+        await asyncio.get_event_loop().run_in_executor(None, write_chunk, chunk)
+        self._note_played(chunk)
+
+    def _note_played(self, chunk):
+        """Feed a played chunk to barge-in detection and echo suppression."""
+        self.barge_in_detector.note_playback()
+        if self.echo_suppressor is not None:
+            self.echo_suppressor.push_reference(chunk)
+
+    def _catch_up(self, audio_data):
+        """Time-compress a dequeued chunk while the playback backlog is too long.
+
+        Returns:
+            bytes: The chunk to play; may be shorter, empty, or carry audio
+            held back from earlier chunks
+        """
+        queued = self.stream_manager.audio_output_queue.nbytes + len(audio_data)
+        speed = self.catch_up.update(queued * 1000 / (OUTPUT_SAMPLE_RATE * 2))
+        if speed != 1.0:
+            out = self.time_stretcher.process(audio_data, speed)
+            metrics.increment("playback.catchup_chunks")
+            metrics.observe("playback.catchup_saved_ms", (len(audio_data) - len(out)) * 1000 / (OUTPUT_SAMPLE_RATE * 2))
+            return out
+        if self.time_stretcher.active:
+            return self.time_stretcher.flush(audio_data)
+        return audio_data
+
+    def _filler_due(self):
+        """Return True if a tool call has kept the caller waiting long enough for filler."""
+        started = self.stream_manager.tool_wait_started
+        return (
+            self.filler_cache is not None
+            and started is not None
+            and started != self._filler_for
+            and time.monotonic() - started >= FILLER_THRESHOLD_MS / 1000
+            and self.stream_manager.audio_output_queue.empty()
+            and self._barge_in_onset is None
+        )
+
+    def _filler_interrupted(self, started):
+        """Return True if filler playback must give way."""
+        return (
+            not self.is_streaming
+            or not self.stream_manager.audio_output_queue.empty()
+            or self.stream_manager.tool_wait_started != started
+            or self.stream_manager.barge_in
+            or self._barge_in_onset is not None
+        )
+
+    async def _play_filler(self):
+        """Play one filler clip until it ends or real audio arrives.
+
+        When cut short, the clip is faded out over FILLER_FADE_MS rather than
+        stopped mid-waveform, which would click.
+        """
+        started = self.stream_manager.tool_wait_started
+        self._filler_for = started
+        self._last_filler = self.filler_cache.choose(exclude=self._last_filler)
+        clip = self.filler_cache.clip(self._last_filler)
+        metrics.increment("filler.played")
+
+        # Same number of bytes per write as assistant audio
+        step = CHUNK_SIZE // 2
+        fade = FILLER_FADE_MS * OUTPUT_SAMPLE_RATE // 1000
+        pos = 0
+        while pos < len(clip):
+            if self._filler_interrupted(started):
+                tail = clip[pos:pos + fade]
+                if self.is_streaming and len(tail):
+                    ramp = np.linspace(1.0, 0.0, len(tail), dtype=np.float32)
+                    await self._write_output((tail * ramp).astype(np.int16).tobytes())
+                    pos += len(tail)
+                metrics.increment("filler.cut")
+                break
+            await self._write_output(clip[pos:pos + step].tobytes())
+            pos += step
+        metrics.observe("filler.played_ms", min(pos, len(clip)) / OUTPUT_SAMPLE_RATE * 1000)
+
     async def play_output_audio(self):
         """Play audio responses from Nova Sonic."""
         while self.is_streaming:
             try:
                 # Check for barge-in flag
                 if self.stream_manager.barge_in:
-                    # Clear the audio queue
-                    while not self.stream_manager.audio_output_queue.empty():
-                        try:
-                            self.stream_manager.audio_output_queue.get_nowait()
-                        except asyncio.QueueEmpty:
-                            break
+                    self._clear_output_queue()
                     self.stream_manager.barge_in = False
+                    self._release_barge_in(confirmed=True)
                     # Small sleep after clearing
                     await asyncio.sleep(0.05)
                     continue
+
+                # Reconcile a local barge-in with the server
+                if self._barge_in_onset is not None:
+                    if time.monotonic() - self._barge_in_onset > BARGE_IN_CONFIRM_TIMEOUT:
+                        self._release_barge_in(confirmed=False)
+                    elif BARGE_IN_MODE == 'stop':
+                        self._note_barge_in_reaction()
+                        await asyncio.sleep(0.01)
+                        continue
                 
-                # Get audio data from the stream manager's queue
-                audio_data = await asyncio.wait_for(
-                    self.stream_manager.audio_output_queue.get(),
-                    timeout=0.1
-                )
+                # Resume audio held back by a local barge-in, else read the queue
+                if self._pending_audio is not None:
+                    audio_data, self._pending_audio = self._pending_audio, None
+                else:
+                    audio_data = await asyncio.wait_for(
+                        self.stream_manager.audio_output_queue.get(),
+                        timeout=0.1
+                    )
+                    audio_data = self._catch_up(audio_data)
                 
                 if audio_data and self.is_streaming:
-                    # Write directly to the output stream in smaller chunks
+                    # Write directly to the output stream in smaller chunks;
+                    # memoryview slices avoid copying each chunk
                     chunk_size = CHUNK_SIZE  # Use the same chunk size as the stream
+                    audio_view = memoryview(audio_data)
                     
                     # Write the audio data in chunks to avoid blocking too long
                     for i in range(0, len(audio_data), chunk_size):
                         if not self.is_streaming:
                             break
+
+                        # Stop mid-buffer on barge-in, keeping the rest in case
+                        # the server does not confirm a local detection
+                        holding = self._barge_in_onset is not None and BARGE_IN_MODE == 'stop'
+                        if holding or self.stream_manager.barge_in:
+                            self._pending_audio = audio_view[i:]
+                            self._note_barge_in_reaction()
+                            break
                         
                         end = min(i + chunk_size, len(audio_data))
-                        chunk = audio_data[i:end]
-                        
-                        # Create a new function that captures the chunk by value
-                        def write_chunk(data):
-                            return self.output_stream.write(data)
+                        chunk = audio_view[i:end]
+
+                        if self._barge_in_onset is not None:
+                            # Duck mode: keep playing at reduced volume
+                            samples = np.frombuffer(chunk, dtype=np.int16)
+                            chunk = (samples * BARGE_IN_DUCK_GAIN).astype(np.int16).tobytes()
+                            self._note_barge_in_reaction()
                         
-                        # Pass the chunk to the function
-                        await asyncio.get_event_loop().run_in_executor(None, write_chunk, chunk)
+                        await self._write_output(chunk)
                         
                         # Brief yield to allow other tasks to run
                         await asyncio.sleep(0.001)
                     
             except asyncio.TimeoutError:
-                # No data available within timeout, just continue
+                # No data available within timeout; play what the time
+                # stretcher still holds, then cover a slow tool call
+                if self.time_stretcher.active:
+                    held = self.time_stretcher.flush()
+                    if held and self.is_streaming:
+                        await self._write_output(held)
+                if self._filler_due():
+                    await self._play_filler()
                 continue
             except Exception as e:
                 if self.is_streaming:
@@ -151,8 +440,11 @@ class AudioStreamer:
         
         self.is_streaming = True
         
-        # Start the input stream if not already started
-        if not self.input_stream.is_active():
+        # Start the input stream if not already started; the audio process
+        # captures from the start and its frames are picked up from here on
+        if self.audio_process:
+            self.audio_process.attach(self.loop, self._on_process_capture)
+        elif not self.input_stream.is_active():
             self.input_stream.start_stream()
         
         # Start processing tasks
@@ -183,15 +475,6 @@ class AudioStreamer:
             await asyncio.gather(*tasks, return_exceptions=True)
             
         # Stop and close the streams
-        if self.input_stream:
-            if self.input_stream.is_active():
-                self.input_stream.stop_stream()
-            self.input_stream.close()
-        if self.output_stream:
-            if self.output_stream.is_active():
-                self.output_stream.stop_stream()
-            self.output_stream.close()
-        if self.p:
-            self.p.terminate()
+        self.close_devices()
         
         await self.stream_manager.close() 
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""Local barge-in detection for the Sonic Nova application.
+
+The server only signals a barge-in after it has heard the user, one network
+round trip after they started talking. BargeInDetector watches the capture
+path while assistant audio is playing and reports speech onset locally, so
+playback can be stopped or ducked within tens of milliseconds. The server's
+interrupted signal later confirms the barge-in; an unconfirmed detection is
+treated as a false alarm and playback resumes.
+
+Detection is energy based: each capture frame is split into short blocks,
+the RMS level of every block is computed in one vectorized NumPy call and
+compared against max(threshold_db, noise_floor + margin_db). Onset is
+reported after min_speech_ms of consecutive loud blocks.
+"""
+
+import time
+import numpy as np
+from sonic_nova.config.settings import (
+    INPUT_SAMPLE_RATE,
+    BARGE_IN_THRESHOLD_DB,
+    BARGE_IN_MARGIN_DB,
+    BARGE_IN_MIN_SPEECH_MS,
+    BARGE_IN_PLAYBACK_TAIL,
+)
+
+class BargeInDetector:
+    """Detects user speech onset while the assistant is speaking."""
+
+    def __init__(
+        self,
+        sample_rate=INPUT_SAMPLE_RATE,
+        block_ms=16,
+        threshold_db=BARGE_IN_THRESHOLD_DB,
+        margin_db=BARGE_IN_MARGIN_DB,
+        min_speech_ms=BARGE_IN_MIN_SPEECH_MS,
+        playback_tail=BARGE_IN_PLAYBACK_TAIL,
+        floor_alpha=0.05,
+    ):
+        """Initialize the detector.
+
+        Args:
+            sample_rate (int): Capture sample rate in Hz
+            block_ms (int): Analysis block length in milliseconds
+            threshold_db (float): Absolute level (dBFS) speech must exceed
+            margin_db (float): Level above the noise floor speech must exceed
+            min_speech_ms (int): Consecutive loud audio required for onset
+            playback_tail (float): Seconds after the last played chunk during
+                which the assistant still counts as speaking
+            floor_alpha (float): Smoothing factor for the noise floor estimate
+        """
+        self.block_size = max(1, int(sample_rate * block_ms / 1000))
+        self.block_duration = self.block_size / float(sample_rate)
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.min_blocks = max(1, int(round(min_speech_ms / float(block_ms))))
+        self.playback_tail = playback_tail
+        self.floor_alpha = floor_alpha
+        self.noise_floor_db = threshold_db - margin_db
+        self._last_playback = None
+        self._run = 0
+        self._run_start = None
+        self._triggered = False
+
+    def note_playback(self, now=None):
+        """Record that assistant audio was just handed to the output device.
+
+        Args:
+            now (float, optional): time.monotonic() timestamp
+        """
+        self._last_playback = time.monotonic() if now is None else now
+
+    def assistant_playing(self, now=None):
+        """Return True if assistant audio was played within playback_tail seconds."""
+        if self._last_playback is None:
+            return False
+        now = time.monotonic() if now is None else now
+        return now - self._last_playback <= self.playback_tail
+
+    def block_levels(self, frame_bytes):
+        """Return the RMS level in dBFS of each analysis block of a frame.
+
+        Args:
+            frame_bytes (bytes): 16-bit little-endian mono PCM
+
+        Returns:
+            numpy.ndarray: One level per complete block
+        """
+        samples = np.frombuffer(frame_bytes, dtype=np.int16)
+        n_blocks = len(samples) // self.block_size
+        if n_blocks == 0:
+            return np.empty(0, dtype=np.float32)
+        blocks = samples[:n_blocks * self.block_size].reshape(n_blocks, self.block_size)
+        blocks = blocks.astype(np.float32) / 32768.0
+        rms = np.sqrt(np.mean(blocks * blocks, axis=1))
+        return 20.0 * np.log10(rms + 1e-9)
+
+    def process(self, frame_bytes, now=None):
+        """Analyse a capture frame.
+
+        Args:
+            frame_bytes (bytes): 16-bit little-endian mono PCM
+            now (float, optional): time.monotonic() at which the frame ended
+
+        Returns:
+            float: Monotonic timestamp of speech onset when a barge-in is
+            detected in this frame, otherwise None
+        """
+        now = time.monotonic() if now is None else now
+        levels = self.block_levels(frame_bytes)
+        if levels.size == 0:
+            return None
+
+        threshold = max(self.threshold_db, self.noise_floor_db + self.margin_db)
+        loud = levels > threshold
+
+        # Track the noise floor from the quiet blocks only
+        quiet = levels[~loud]
+        if quiet.size:
+            self.noise_floor_db += self.floor_alpha * (float(quiet.mean()) - self.noise_floor_db)
+
+        playing = self.assistant_playing(now)
+        frame_start = now - levels.size * self.block_duration
+        onset = None
+        for i, is_loud in enumerate(loud.tolist()):
+            if not is_loud:
+                self._run = 0
+                self._run_start = None
+                self._triggered = False
+                continue
+            if self._run == 0:
+                self._run_start = frame_start + i * self.block_duration
+            self._run += 1
+            if self._run >= self.min_blocks and not self._triggered and playing:
+                self._triggered = True
+                onset = self._run_start
+        return onset
@@ -1,7 +1,23 @@
-"""AWS Bedrock Stream Manager for Nova Sonic model."""
+"""AWS Bedrock Stream Manager for Nova Sonic model.
+
+Sessions are voice sessions by default: capture audio goes out in one audio
+content block and assistant audio is queued for AudioStreamer. A text-only
+session (text_only=True) sets up no audio at all; user turns are sent with
+send_text() and the assistant's final text is read from text_replies():
+
+    >>> manager = BedrockStreamManager(text_only=True, transcript_sinks=[])
+    >>> await manager.initialize_stream()
+    >>> await manager.send_text("Where is my order 1234?")
+    >>> async for reply in manager.text_replies():
+    ...     print(reply)
+
+With a CheckpointStore, the session checkpoints its history and pending tool
+call at turn boundaries; from_checkpoint() resumes it on a new stream after
+a crash (see sonic_nova.core.checkpoint).
+"""
 
 import os
-import json
+import time
 import uuid
 import base64
 import asyncio
@@ -9,20 +25,40 @@ import datetime
 import hashlib
 import random
 import pytz
-from aws_sdk_bedrock_runtime.client import BedrockRuntimeClient, InvokeModelWithBidirectionalStreamOperationInput
+from aws_sdk_bedrock_runtime.client import InvokeModelWithBidirectionalStreamOperationInput
 from aws_sdk_bedrock_runtime.models import InvokeModelWithBidirectionalStreamInputChunk, BidirectionalInputPayloadPart
-from aws_sdk_bedrock_runtime.config import Config, HTTPAuthSchemeResolver, SigV4AuthScheme
-from smithy_aws_core.credentials_resolvers.environment import EnvironmentCredentialsResolver
 
 from sonic_nova.utils.helpers import debug_print, time_it_async
-from sonic_nova.config.settings import is_debug
+from sonic_nova.config.settings import (
+    is_debug,
+    AUDIO_COALESCE_MAX_BYTES,
+    OUTPUT_QUEUE_MAXSIZE,
+    SPECULATIVE_TOOL_EXECUTION,
+    CHECKPOINT_MAX_HISTORY_TURNS,
+)
+from sonic_nova.core.client_factory import client_factory
+from sonic_nova.core.admission import admission_controller, is_quota_error, AdmissionRejected
+from sonic_nova.core.outbound import OutboundWriter, LANE_CONTROL, LANE_BULK
+from sonic_nova.core.playback import AudioQueue
+from sonic_nova.core.startup import timed_phase
+from sonic_nova.knowledge.index import default_knowledge_base
+from sonic_nova.core.transcript import (
+    TranscriptEntry,
+    TranscriptWriter,
+    KIND_COMPLETION_END,
+    STAGE_SPECULATIVE,
+)
+from sonic_nova.models.fast_path import decode_audio_output, find_audio_output_content
+from sonic_nova.utils.metrics import metrics
+from sonic_nova.utils.codec import get_codec
 from sonic_nova.models.events import (
     START_SESSION_EVENT,
     SESSION_END_EVENT,
     CONTENT_START_EVENT,
     CONTENT_END_EVENT,
-    AUDIO_EVENT_TEMPLATE,
+    AUDIO_EVENT_TEMPLATE_BYTES,
     TEXT_CONTENT_START_EVENT,
+    HISTORY_CONTENT_START_EVENT,
     TEXT_INPUT_EVENT,
     TOOL_CONTENT_START_EVENT,
     PROMPT_END_EVENT,
@@ -31,15 +67,52 @@ from sonic_nova.models.events import (
 class BedrockStreamManager:
     """Manages bidirectional streaming with AWS Bedrock using asyncio"""
     
-    def __init__(self, model_id='ermis', region='us-east-1'):
-        """Initialize the stream manager."""
+    def __init__(self, model_id='ermis', region='us-east-1', transcript_sinks=None, codec=None,
+                 endpoint_uri=None, admission=None, knowledge_base=None, dsp=None, text_only=False,
+                 checkpoints=None, session_id=None, session_config=None):
+        """Initialize the stream manager.
+
+        Args:
+            model_id (str): Bedrock model identifier
+            region (str): AWS region
+            transcript_sinks (list, optional): TranscriptSink instances. Defaults to stdout.
+            codec (JsonCodec, optional): JSON codec. Defaults to the JSON_CODEC setting.
+            endpoint_uri (str, optional): Bedrock endpoint override
+            admission (AdmissionController, optional): Stream admission control.
+                Defaults to the process-wide controller.
+            knowledge_base (VectorIndex, optional): Index behind knowledgeBaseTool.
+                Defaults to the shared index at KB_INDEX_DIR, if present.
+            dsp (DspScheduler, optional): Batched capture DSP shared with other
+                sessions. Without one, capture audio is sent as submitted.
+            text_only (bool): Text conversation without any audio content;
+                see send_text() and text_replies()
+            checkpoints (CheckpointStore, optional): Where to checkpoint the
+                session at turn boundaries, for crash recovery
+            session_id (str, optional): Key of the session's checkpoints.
+                Defaults to the prompt name.
+            session_config (dict, optional): JSON-serializable host
+                configuration kept in the checkpoints and handed back on recovery
+        """
         self.model_id = model_id
         self.region = region
+        self.endpoint_uri = endpoint_uri
+        self.codec = codec or get_codec()
+        self.admission = admission or admission_controller
+        self._admitted = False
+        self.knowledge_base = knowledge_base if knowledge_base is not None else default_knowledge_base()
+        self.dsp = dsp
+        self._dsp_session = None
+        self.text_only = text_only
+        # Latest capture level (dBFS) and speech flag, when DSP is in use
+        self.input_level_db = None
+        self.input_speech = False
         
         # Replace RxPy subjects with asyncio queues
         self.audio_input_queue = asyncio.Queue()
-        self.audio_output_queue = asyncio.Queue()
-        self.output_queue = asyncio.Queue()
+        # Tracks queued bytes so playback can tell how far behind it is
+        self.audio_output_queue = AudioQueue()
+        # Bounded: when nobody consumes parsed events the oldest are dropped
+        self.output_queue = asyncio.Queue(maxsize=OUTPUT_QUEUE_MAXSIZE)
         
         self.response_task = None
         self.stream_response = None
@@ -52,25 +125,127 @@ class BedrockStreamManager:
         
         # Text response components
         self.display_assistant_text = False
+        self.generation_stage = None
         self.role = None
+        self.transcript = TranscriptWriter(transcript_sinks)
+        # Text-only sessions: the current turn's final assistant text, and one
+        # joined reply per turn (None once the stream has ended)
+        self._reply_parts = []
+        self.text_reply_queue = asyncio.Queue()
+        self._text_replies_done = False
+
+        # Single outbound writer; control and tool events jump ahead of audio
+        self.outbound = OutboundWriter(self._send_event_now)
 
         # Session information
         self.prompt_name = str(uuid.uuid4())
         self.content_name = str(uuid.uuid4())
         self.audio_content_name = str(uuid.uuid4())
+        self.audio_content_started = False
         self.toolUseContent = ""
         self.toolUseId = ""
         self.toolName = ""
+        # Tool calls started at toolUse: toolUseId -> (task, start time)
+        self.speculative_tools = SPECULATIVE_TOOL_EXECUTION
+        self._tool_tasks = {}
+        # time.monotonic() of the last toolUse until the answer's audio arrives;
+        # AudioStreamer plays filler audio when this wait gets long
+        self.tool_wait_started = None
+
+        # Crash recovery: final [role, text] turns, the toolUse awaiting its
+        # result, and a restored tool call started before the model asks again
+        self.checkpoints = checkpoints
+        self.session_id = session_id or self.prompt_name
+        self.session_config = session_config
+        self.history = []
+        self.pending_tool = None
+        self._prefetched_tool = None
+
+    @classmethod
+    def from_checkpoint(cls, state, **kwargs):
+        """Create an unstarted manager that resumes a checkpointed session.
+
+        initialize_stream() replays the conversation history into the new
+        stream and starts the pending tool call, if there was one.
+
+        Args:
+            state (dict): Checkpoint written by a previous process
+            **kwargs: Further BedrockStreamManager arguments, e.g. checkpoints;
+                model_id, region, endpoint_uri, text_only, session_id and
+                session_config come from the checkpoint
+
+        Returns:
+            BedrockStreamManager: The restored session
+        """
+        config = state['config']
+        # The session's own configuration wins over the caller's defaults
+        kwargs.update(model_id=config['model_id'], region=config['region'],
+                      endpoint_uri=config.get('endpoint_uri'), text_only=config.get('text_only', False),
+                      session_id=state.get('session_id') or state['prompt_name'],
+                      session_config=state.get('session_config'))
+        manager = cls(**kwargs)
+        manager.prompt_name = state['prompt_name']
+        manager.history = [list(turn) for turn in state.get('history', [])]
+        manager.pending_tool = state.get('pending_tool')
+        return manager
+
+    def checkpoint_state(self):
+        """Return what a new process needs to resume this session."""
+        return {
+            'config': {
+                'model_id': self.model_id,
+                'region': self.region,
+                'endpoint_uri': self.endpoint_uri,
+                'text_only': self.text_only,
+            },
+            'session_id': self.session_id,
+            'session_config': self.session_config,
+            'prompt_name': self.prompt_name,
+            'history': self.history,
+            'pending_tool': self.pending_tool,
+        }
+
+    def _checkpoint(self):
+        """Save a checkpoint at a turn boundary."""
+        if self.checkpoints is not None:
+            self.checkpoints.save(self.session_id, self.checkpoint_state())
+
+    def _record_turn(self, role, text):
+        """Add final text to the history, joining consecutive text of one role."""
+        if self.history and self.history[-1][0] == role:
+            self.history[-1][1] = f"{self.history[-1][1]} {text}"
+        else:
+            self.history.append([role, text])
+            del self.history[:-CHECKPOINT_MAX_HISTORY_TURNS]
+
+    async def _send_history(self):
+        """Replay restored conversation history as non-interactive text."""
+        for role, text in self.history:
+            content_name = str(uuid.uuid4())
+            content = self.codec.dumps_str(text)[1:-1]
+            for event, event_type in (
+                (HISTORY_CONTENT_START_EVENT % (self.prompt_name, content_name, role), 'contentStart'),
+                (TEXT_INPUT_EVENT % (self.prompt_name, content_name, content), 'textInput'),
+                (CONTENT_END_EVENT % (self.prompt_name, content_name), 'contentEnd'),
+            ):
+                await self.send_raw_event(event, event_type, lane=LANE_CONTROL)
+        if self.pending_tool is not None:
+            # The new stream knows nothing of the old toolUseId; the model asks
+            # again after the history, and is answered from this call
+            tool = self.pending_tool
+            self._prefetched_tool = (tool['toolName'], tool.get('content'),
+                                     asyncio.ensure_future(self._run_tool(tool['toolName'], tool)),
+                                     time.perf_counter())
 
     def start_prompt(self):
         """Create a promptStart event"""
-        get_default_tool_schema = json.dumps({
+        get_default_tool_schema = self.codec.dumps_str({
             "type": "object",
             "properties": {},
             "required": []
         })
 
-        get_order_tracking_schema = json.dumps({
+        get_order_tracking_schema = self.codec.dumps_str({
             "type": "object",
             "properties": {
                 "orderId": {
@@ -86,6 +261,48 @@ class BedrockStreamManager:
             "required": ["orderId"]
         })
 
+        tools = [
+            {
+                "toolSpec": {
+                    "name": "getDateAndTimeTool",
+                    "description": "get information about the current date and time",
+                    "inputSchema": {
+                        "json": get_default_tool_schema
+                    }
+                }
+            },
+            {
+                "toolSpec": {
+                    "name": "trackOrderTool",
+                    "description": "Retrieves real-time order tracking information and detailed status updates for customer orders by order ID. Provides estimated delivery dates. Use this tool when customers ask about their order status or delivery timeline.",
+                    "inputSchema": {
+                    "json": get_order_tracking_schema
+                    }
+                }
+            }
+        ]
+
+        # Offer knowledge base lookups only when an index is available
+        if self.knowledge_base is not None:
+            tools.append({
+                "toolSpec": {
+                    "name": "knowledgeBaseTool",
+                    "description": "Searches the company knowledge base (policies, FAQs and product documentation) and returns the most relevant passages with their sources. Use this tool when customers ask questions that company documentation can answer.",
+                    "inputSchema": {
+                        "json": self.codec.dumps_str({
+                            "type": "object",
+                            "properties": {
+                                "query": {
+                                    "type": "string",
+                                    "description": "The customer's question, rephrased as a search query"
+                                }
+                            },
+                            "required": ["query"]
+                        })
+                    }
+                }
+            })
+
         prompt_start_event = {
             "event": {
                 "promptStart": {
@@ -106,37 +323,18 @@ class BedrockStreamManager:
                         "mediaType": "application/json"
                     },
                     "toolConfiguration": {
-                        "tools": [
-                            {
-                                "toolSpec": {
-                                    "name": "getDateAndTimeTool",
-                                    "description": "get information about the current date and time",
-                                    "inputSchema": {
-                                        "json": get_default_tool_schema
-                                    }
-                                }
-                            },
-                            {
-                                "toolSpec": {
-                                    "name": "trackOrderTool",
-                                    "description": "Retrieves real-time order tracking information and detailed status updates for customer orders by order ID. Provides estimated delivery dates. Use this tool when customers ask about their order status or delivery timeline.",
-                                    "inputSchema": {
-                                    "json": get_order_tracking_schema
-                                    }
-                                }
-                            }
-                        ]
+                        "tools": tools
                     }
                 }
             }
         }
         
-        return json.dumps(prompt_start_event)
+        return self.codec.dumps(prompt_start_event)
     
     def tool_result_event(self, content_name, content, role):
         """Create a tool result event"""
         if isinstance(content, dict):
-            content_json_string = json.dumps(content)
+            content_json_string = self.codec.dumps_str(content)
         else:
             content_json_string = content
             
@@ -149,24 +347,30 @@ class BedrockStreamManager:
                 }
             }
         }
-        return json.dumps(tool_result_event)
+        return self.codec.dumps(tool_result_event)
 
     def _initialize_client(self):
-        """Initialize the Bedrock client."""
-        config = Config(
-            endpoint_uri=f"https://bedrock-runtime.{self.region}.amazonaws.com",
-            region=self.region,
-            aws_credentials_identity_resolver=EnvironmentCredentialsResolver(),
-            http_auth_scheme_resolver=HTTPAuthSchemeResolver(),
-            http_auth_schemes={"aws.auth#sigv4": SigV4AuthScheme()}
-        )
-        self.bedrock_client = BedrockRuntimeClient(config=config)
+        """Attach the process-wide Bedrock client for this region and endpoint."""
+        self.bedrock_client = client_factory.get_client(self.region, self.endpoint_uri)
     
-    async def initialize_stream(self):
-        """Initialize the bidirectional stream with Bedrock."""
+    async def initialize_stream(self, timeline=None):
+        """Initialize the bidirectional stream with Bedrock.
+
+        Args:
+            timeline (StartupTimeline, optional): Records admission, handshake
+                and init events as startup phases
+        """
         if not self.bedrock_client:
             self._initialize_client()
-        
+
+        try:
+            with timed_phase(timeline, 'admission'):
+                await self.admission.acquire()
+        except AdmissionRejected as e:
+            print(f"Stream not admitted ({e.status}): {e}")
+            raise
+        self._admitted = True
+
         try:
             @time_it_async("invoke_model_with_bidirectional_stream")
             async def invoke_stream():
@@ -174,8 +378,11 @@ class BedrockStreamManager:
                     InvokeModelWithBidirectionalStreamOperationInput(model_id=self.model_id)
                 )
             
-            self.stream_response = await invoke_stream()
+            with timed_phase(timeline, 'stream_handshake'):
+                self.stream_response = await invoke_stream()
             self.is_active = True
+            self.transcript.start()
+            self.outbound.start()
             default_system_prompt = "You are a friend. The user and you will engage in a spoken dialog exchanging the transcripts of a natural real-time conversation." \
             "When reading order numbers, please read each digit individually, separated by pauses. For example, order #1234 should be read as 'order number one-two-three-four' rather than 'order number one thousand two hundred thirty-four'."
             
@@ -185,58 +392,94 @@ class BedrockStreamManager:
             text_content = TEXT_INPUT_EVENT % (self.prompt_name, self.content_name, default_system_prompt)
             text_content_end = CONTENT_END_EVENT % (self.prompt_name, self.content_name)
             
-            init_events = [START_SESSION_EVENT, prompt_event, text_content_start, text_content, text_content_end]
+            init_events = [
+                (START_SESSION_EVENT, 'sessionStart'),
+                (prompt_event, 'promptStart'),
+                (text_content_start, 'contentStart'),
+                (text_content, 'textInput'),
+                (text_content_end, 'contentEnd'),
+            ]
             
-            for event in init_events:
-                await self.send_raw_event(event)
-                # Small delay between init events
+            with timed_phase(timeline, 'init_events'):
+                for event, event_type in init_events:
+                    await self.send_raw_event(event, event_type, lane=LANE_CONTROL)
+                    # Small delay between init events
+                    await asyncio.sleep(0.1)
+                await self._send_history()
+
+                # Start listening for responses
+                self.response_task = asyncio.create_task(self._process_responses())
+
+                # Start processing audio input
+                if not self.text_only:
+                    asyncio.create_task(self._process_audio_input())
+
+                # Wait a bit to ensure everything is set up
                 await asyncio.sleep(0.1)
             
-            # Start listening for responses
-            self.response_task = asyncio.create_task(self._process_responses())
-            
-            # Start processing audio input
-            asyncio.create_task(self._process_audio_input())
-            
-            # Wait a bit to ensure everything is set up
-            await asyncio.sleep(0.1)
-            
             debug_print("Stream initialized successfully")
             return self
         except Exception as e:
             self.is_active = False
+            self._release_admission()
+            if is_quota_error(e):
+                rejected = self.admission.quota_error(e)
+                print(f"Stream not admitted ({rejected.status}): {e}")
+                raise rejected from e
             print(f"Failed to initialize stream: {str(e)}")
             raise
+
+    def _release_admission(self):
+        """Return this session's stream slot to the admission controller."""
+        if self._admitted:
+            self._admitted = False
+            self.admission.release()
     
-    async def send_raw_event(self, event_json):
-        """Send a raw event JSON to the Bedrock stream."""
+    async def send_raw_event(self, event_json, event_type=None, lane=LANE_BULK):
+        """Queue a raw event JSON for the Bedrock stream.
+
+        Events are sent by the session's outbound writer. This call only waits
+        while the lane is full, which is how backpressure reaches producers.
+
+        Args:
+            event_json (bytes or str): The serialized event; bytes are sent as-is
+            event_type (str, optional): Event type supplied by the builder, used
+                for debug logging and sampling without re-parsing the JSON
+            lane (str): LANE_CONTROL for events that must not wait behind audio,
+                LANE_BULK for audio and events ordered with it
+        """
         if not self.stream_response or not self.is_active:
-            debug_print("Stream not initialized or closed")
+            debug_print("Stream not initialized or closed", event_type=event_type)
             return
-       
+
+        payload = event_json if isinstance(event_json, bytes) else event_json.encode('utf-8')
+        await self.outbound.submit(payload, event_type, lane)
+
+    async def _send_event_now(self, payload, event_type):
+        """Send one serialized event on the stream; called by the outbound writer."""
         event = InvokeModelWithBidirectionalStreamInputChunk(
-            value=BidirectionalInputPayloadPart(bytes_=event_json.encode('utf-8'))
+            value=BidirectionalInputPayloadPart(bytes_=payload)
         )
-        
-        try:
-            await self.stream_response.input_stream.send(event)
-            # For debugging large events, you might want to log just the type
-            if is_debug():
-                if len(event_json) > 200:
-                    event_type = json.loads(event_json).get("event", {}).keys()
-                    debug_print(f"Sent event type: {list(event_type)}")
-                else:
-                    debug_print(f"Sent event: {event_json}")
-        except Exception as e:
-            debug_print(f"Error sending event: {str(e)}")
-            if is_debug():
-                import traceback
-                traceback.print_exc()
+        await self.stream_response.input_stream.send(event)
+        # For large events log just the type the builder told us about
+        if is_debug():
+            if len(payload) > 200:
+                debug_print("Sent event type: %s", event_type, event_type=event_type)
+            else:
+                debug_print("Sent event: %s", payload, event_type=event_type)
     
     async def send_audio_content_start_event(self):
-        """Send a content start event to the Bedrock stream."""
+        """Send a content start event to the Bedrock stream.
+
+        The session has a single audio content block, so repeated calls are
+        no-ops; start_session() may already have sent it. Text-only sessions
+        never open one.
+        """
+        if self.audio_content_started or self.text_only:
+            return
+        self.audio_content_started = True
         content_start_event = CONTENT_START_EVENT % (self.prompt_name, self.audio_content_name)
-        await self.send_raw_event(content_start_event)
+        await self.send_raw_event(content_start_event, 'contentStart')
     
     async def _process_audio_input(self):
         """Process audio input from the queue and send to Bedrock."""
@@ -249,28 +492,58 @@ class BedrockStreamManager:
                 if not audio_bytes:
                     debug_print("No audio bytes received")
                     continue
+
+                # Coalesce chunks that queued up while the writer applied
+                # backpressure into one event; no extra latency when idle
+                if not self.audio_input_queue.empty():
+                    chunks = [audio_bytes]
+                    size = len(audio_bytes)
+                    while size < AUDIO_COALESCE_MAX_BYTES and not self.audio_input_queue.empty():
+                        extra = self.audio_input_queue.get_nowait().get('audio_bytes')
+                        if extra:
+                            chunks.append(extra)
+                            size += len(extra)
+                    if len(chunks) > 1:
+                        metrics.increment("outbound.audio_coalesced", len(chunks) - 1)
+                        audio_bytes = b''.join(chunks)
                 
-                # Base64 encode the audio data
+                # Base64 encode the audio data straight into a bytes event
                 blob = base64.b64encode(audio_bytes)
-                audio_event = AUDIO_EVENT_TEMPLATE % (
-                    self.prompt_name, 
-                    self.audio_content_name, 
-                    blob.decode('utf-8')
+                audio_event = AUDIO_EVENT_TEMPLATE_BYTES % (
+                    self.prompt_name.encode('utf-8'),
+                    self.audio_content_name.encode('utf-8'),
+                    blob
                 )
                 
                 # Send the event
-                await self.send_raw_event(audio_event)
+                await self.send_raw_event(audio_event, 'audioInput')
                 
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                debug_print(f"Error processing audio: {e}")
-                if is_debug():
-                    import traceback
-                    traceback.print_exc()
+                debug_print("Error processing audio: %s", e, exc_info=True)
     
     def add_audio_chunk(self, audio_bytes):
-        """Add an audio chunk to the queue."""
+        """Add an audio chunk to the queue, through the batched DSP if there is one."""
+        if self.dsp is not None:
+            if self._dsp_session is None:
+                self._dsp_session = self.dsp.register(self._on_processed_audio)
+            self.dsp.submit(self._dsp_session, audio_bytes)
+            return
+        self._queue_audio(audio_bytes)
+
+    def _on_processed_audio(self, audio_bytes, level_db, speech):
+        """Receive a frame from the batched DSP."""
+        self.input_level_db = level_db
+        self.input_speech = speech
+        self._queue_audio(audio_bytes)
+
+    def _release_dsp(self):
+        if self._dsp_session is not None:
+            self.dsp.unregister(self._dsp_session)
+            self._dsp_session = None
+
+    def _queue_audio(self, audio_bytes):
         self.audio_input_queue.put_nowait({
             'audio_bytes': audio_bytes,
             'prompt_name': self.prompt_name,
@@ -282,29 +555,103 @@ class BedrockStreamManager:
         if not self.is_active:
             debug_print("Stream is not active")
             return
+        if self.text_only:
+            return
         
         content_end_event = CONTENT_END_EVENT % (self.prompt_name, self.audio_content_name)
-        await self.send_raw_event(content_end_event)
+        await self.send_raw_event(content_end_event, 'contentEnd')
         debug_print("Audio ended")
     
+    async def send_text(self, text):
+        """Send one user turn as text.
+
+        Args:
+            text (str): What the user says
+        """
+        if not self.is_active:
+            debug_print("Stream is not active")
+            return
+
+        content_name = str(uuid.uuid4())
+        # The template takes the JSON string body, so escape quotes and newlines
+        content = self.codec.dumps_str(text)[1:-1]
+        for event, event_type in (
+            (TEXT_CONTENT_START_EVENT % (self.prompt_name, content_name, "USER"), 'contentStart'),
+            (TEXT_INPUT_EVENT % (self.prompt_name, content_name, content), 'textInput'),
+            (CONTENT_END_EVENT % (self.prompt_name, content_name), 'contentEnd'),
+        ):
+            await self.send_raw_event(event, event_type, lane=LANE_CONTROL)
+        self._record_turn('USER', text)
+
+    async def text_replies(self):
+        """Yield the assistant's final text, one string per turn, until the stream ends."""
+        while not (self._text_replies_done and self.text_reply_queue.empty()):
+            reply = await self.text_reply_queue.get()
+            if reply is None:
+                self._text_replies_done = True
+                return
+            yield reply
+
+    async def ask(self, text):
+        """Send a user turn and return the assistant's reply to it.
+
+        Returns:
+            str: The reply, or None if the stream ended first
+        """
+        await self.send_text(text)
+        if self._text_replies_done and self.text_reply_queue.empty():
+            return None
+        reply = await self.text_reply_queue.get()
+        if reply is None:
+            self._text_replies_done = True
+        return reply
+
+    def _collect_reply_text(self, text_content, role):
+        """Add final assistant text to the current turn's reply."""
+        if (role == 'ASSISTANT' and self.generation_stage != STAGE_SPECULATIVE
+                and '{ "interrupted" : true }' not in text_content):
+            self._reply_parts.append(text_content)
+
+    def _record_history_text(self, text_content, role):
+        """Keep final text of a voice session for checkpoints.
+
+        Text-only sessions record user turns in send_text() instead.
+        """
+        if '{ "interrupted" : true }' in text_content or self.generation_stage == STAGE_SPECULATIVE:
+            return
+        if role == 'ASSISTANT' or (role == 'USER' and not self.text_only):
+            self._record_turn(role, text_content)
+
+    def _is_turn_boundary(self, content_end):
+        """True at the end of the assistant's final text for a turn."""
+        return (self.role == 'ASSISTANT' and content_end.get('type') == 'TEXT'
+                and self.generation_stage != STAGE_SPECULATIVE
+                and content_end.get('stopReason') != 'PARTIAL_TURN')
+
+    def _end_reply_turn(self, content_end):
+        """Publish the current reply unless the model says the turn continues."""
+        if self._reply_parts and content_end.get('stopReason') != 'PARTIAL_TURN':
+            self.text_reply_queue.put_nowait(''.join(self._reply_parts))
+            self._reply_parts = []
+
     async def send_tool_start_event(self, content_name):
         """Send a tool content start event to the Bedrock stream."""
         content_start_event = TOOL_CONTENT_START_EVENT % (self.prompt_name, content_name, self.toolUseId)
-        debug_print(f"Sending tool start event: {content_start_event}")  
-        await self.send_raw_event(content_start_event)
+        debug_print("Sending tool start event: %s", content_start_event, event_type='contentStart')
+        await self.send_raw_event(content_start_event, 'contentStart', lane=LANE_CONTROL)
 
     async def send_tool_result_event(self, content_name, tool_result):
         """Send a tool content event to the Bedrock stream."""
         # Use the actual tool result from processToolUse
         tool_result_event = self.tool_result_event(content_name=content_name, content=tool_result, role="TOOL")
-        debug_print(f"Sending tool result event: {tool_result_event}")
-        await self.send_raw_event(tool_result_event)
+        debug_print("Sending tool result event: %s", tool_result_event, event_type='toolResult')
+        await self.send_raw_event(tool_result_event, 'toolResult', lane=LANE_CONTROL)
     
     async def send_tool_content_end_event(self, content_name):
         """Send a tool content end event to the Bedrock stream."""
         tool_content_end_event = CONTENT_END_EVENT % (self.prompt_name, content_name)
-        debug_print(f"Sending tool content event: {tool_content_end_event}")
-        await self.send_raw_event(tool_content_end_event)
+        debug_print("Sending tool content event: %s", tool_content_end_event, event_type='contentEnd')
+        await self.send_raw_event(tool_content_end_event, 'contentEnd', lane=LANE_CONTROL)
     
     async def send_prompt_end_event(self):
         """Close the stream and clean up resources."""
@@ -313,7 +660,7 @@ class BedrockStreamManager:
             return
         
         prompt_end_event = PROMPT_END_EVENT % (self.prompt_name)
-        await self.send_raw_event(prompt_end_event)
+        await self.send_raw_event(prompt_end_event, 'promptEnd')
         debug_print("Prompt ended")
         
     async def send_session_end_event(self):
@@ -322,7 +669,7 @@ class BedrockStreamManager:
             debug_print("Stream is not active")
             return
 
-        await self.send_raw_event(SESSION_END_EVENT)
+        await self.send_raw_event(SESSION_END_EVENT, 'sessionEnd')
         self.is_active = False
         debug_print("Session ended")
     
@@ -334,9 +681,24 @@ class BedrockStreamManager:
                     output = await self.stream_response.await_output()
                     result = await output[1].receive()
                     if result.value and result.value.bytes_:
+                        payload = result.value.bytes_
+
+                        # Text-only sessions drop the model's speech undecoded
+                        if self.text_only and find_audio_output_content(payload) is not None:
+                            metrics.increment("receive.audio_discarded")
+                            continue
+
+                        # Fast path: audioOutput is decoded straight from the raw
+                        # bytes and never parsed as JSON or kept in output_queue
+                        audio_bytes = decode_audio_output(payload)
+                        if audio_bytes is not None:
+                            metrics.increment("receive.audio_fast_path")
+                            self.tool_wait_started = None
+                            await self.audio_output_queue.put(audio_bytes)
+                            continue
+
                         try:
-                            response_data = result.value.bytes_.decode('utf-8')
-                            json_data = json.loads(response_data)
+                            json_data = self.codec.loads(payload)
                             
                             # Handle different response types
                             if 'event' in json_data:
@@ -345,16 +707,18 @@ class BedrockStreamManager:
                                     content_start = json_data['event']['contentStart']
                                     # set role
                                     self.role = content_start['role']
+                                    self.generation_stage = None
                                     # Check for speculative content
                                     if 'additionalModelFields' in content_start:
                                         try:
-                                            additional_fields = json.loads(content_start['additionalModelFields'])
-                                            if additional_fields.get('generationStage') == 'SPECULATIVE':
+                                            additional_fields = self.codec.loads(content_start['additionalModelFields'])
+                                            self.generation_stage = additional_fields.get('generationStage')
+                                            if self.generation_stage == STAGE_SPECULATIVE:
                                                 debug_print("Speculative content detected")
                                                 self.display_assistant_text = True
                                             else:
                                                 self.display_assistant_text = False
-                                        except json.JSONDecodeError:
+                                        except ValueError:
                                             debug_print("Error parsing additionalModelFields")
                                 elif 'textOutput' in json_data['event']:
                                     text_content = json_data['event']['textOutput']['content']
@@ -363,13 +727,23 @@ class BedrockStreamManager:
                                     if '{ "interrupted" : true }' in text_content:
                                         debug_print("Barge-in detected. Stopping audio output.")
                                         self.barge_in = True
+                                        self.tool_wait_started = None
+                                        self._cancel_tools("interrupted")
 
-                                    if (self.role == "ASSISTANT" and self.display_assistant_text):
-                                        print(f"Assistant: {text_content}")
-                                    elif (self.role == "USER"):
-                                        print(f"User: {text_content}")
+                                    # Hand off to the transcript writer; sinks decide what to show
+                                    self.transcript.submit(TranscriptEntry(
+                                        self.role or role,
+                                        text_content,
+                                        stage=self.generation_stage,
+                                        session=self.prompt_name
+                                    ))
+                                    if self.text_only:
+                                        self._collect_reply_text(text_content, self.role or role)
+                                    self._record_history_text(text_content, self.role or role)
 
                                 elif 'audioOutput' in json_data['event']:
+                                    metrics.increment("receive.audio_fallback")
+                                    self.tool_wait_started = None
                                     audio_content = json_data['event']['audioOutput']['content']
                                     audio_bytes = base64.b64decode(audio_content)
                                     await self.audio_output_queue.put(audio_bytes)
@@ -377,23 +751,39 @@ class BedrockStreamManager:
                                     self.toolUseContent = json_data['event']['toolUse']
                                     self.toolName = json_data['event']['toolUse']['toolName']
                                     self.toolUseId = json_data['event']['toolUse']['toolUseId']
-                                    debug_print(f"Tool use detected: {self.toolName}, ID: {self.toolUseId}")
+                                    debug_print("Tool use detected: %s, ID: %s", self.toolName, self.toolUseId, event_type='toolUse')
+                                    self.tool_wait_started = time.monotonic()
+                                    if not self._adopt_prefetched_tool() and self.speculative_tools:
+                                        self._start_tool()
+                                    self.pending_tool = self.toolUseContent
+                                    self._checkpoint()
                                 elif 'contentEnd' in json_data['event'] and json_data['event'].get('contentEnd', {}).get('type') == 'TOOL':
                                     debug_print("Processing tool use and sending result")
-                                    toolResult = await self.processToolUse(self.toolName, self.toolUseContent)
+                                    toolResult = await self._finish_tool()
                                     toolContent = str(uuid.uuid4())
                                     await self.send_tool_start_event(toolContent)
                                     await self.send_tool_result_event(toolContent, toolResult)
                                     await self.send_tool_content_end_event(toolContent)
+                                    self.pending_tool = None
+                                    self._checkpoint()
+
+                                elif 'contentEnd' in json_data['event']:
+                                    content_end = json_data['event']['contentEnd']
+                                    if self.text_only:
+                                        self._end_reply_turn(content_end)
+                                    if self._is_turn_boundary(content_end):
+                                        self._checkpoint()
                                 
                                 elif 'completionEnd' in json_data['event']:
                                     # Handle end of conversation, no more response will be generated
-                                    print("End of response sequence")
+                                    self.transcript.submit(TranscriptEntry(
+                                        None, "", kind=KIND_COMPLETION_END, session=self.prompt_name
+                                    ))
                             
                             # Put the response in the output queue for other components
-                            await self.output_queue.put(json_data)
-                        except json.JSONDecodeError:
-                            await self.output_queue.put({"raw_data": response_data})
+                            self._publish_output(json_data)
+                        except ValueError:
+                            self._publish_output({"raw_data": payload.decode('utf-8', errors='replace')})
                 except StopAsyncIteration:
                     # Stream has ended
                     break
@@ -410,11 +800,91 @@ class BedrockStreamManager:
             print(f"Response processing error: {e}")
         finally:
             self.is_active = False
+            self.tool_wait_started = None
+            self._cancel_tools("closed")
+            self._drop_prefetched_tool()
+            if self.text_only:
+                self.text_reply_queue.put_nowait(None)
+
+    async def _run_tool(self, tool_name, tool_use_content):
+        """Run a tool; return its result and how long it took."""
+        start = time.perf_counter()
+        result = await self.processToolUse(tool_name, tool_use_content)
+        return result, time.perf_counter() - start
+
+    def _start_tool(self):
+        """Start the tool of the current toolUse without waiting for its contentEnd.
+
+        The result is held until the TOOL contentEnd arrives, since the
+        protocol only accepts a toolResult after it.
+        """
+        # A new toolUse before the previous call's contentEnd supersedes that call
+        self._cancel_tools("superseded")
+        task = asyncio.ensure_future(self._run_tool(self.toolName, self.toolUseContent))
+        self._tool_tasks[self.toolUseId] = (task, time.perf_counter())
+
+    def _cancel_tools(self, reason):
+        """Cancel tool calls started at toolUse whose result is no longer wanted."""
+        for task, _ in self._tool_tasks.values():
+            if task.done():
+                if not task.cancelled():
+                    task.exception()  # Retrieved so a failure is not reported as unhandled
+            else:
+                task.cancel()
+                metrics.increment(f"tool.cancelled_{reason}")
+        self._tool_tasks.clear()
+
+    async def _finish_tool(self):
+        """Return the result for the current toolUse at its TOOL contentEnd.
+
+        Publishes tool.speculative_saved_ms: how much sooner the result is
+        ready than if the tool had only started now.
+        """
+        entry = self._tool_tasks.pop(self.toolUseId, None)
+        if entry is None:
+            return await self.processToolUse(self.toolName, self.toolUseContent)
+        task, started = entry
+        ended = time.perf_counter()
+        result, duration = await task
+        metrics.observe("tool.speculative_saved_ms", min(duration, ended - started) * 1000)
+        metrics.observe("tool.result_wait_ms", (time.perf_counter() - ended) * 1000)
+        return result
+
+    def _adopt_prefetched_tool(self):
+        """Answer the current toolUse from the restored tool call if it repeats it.
+
+        Returns:
+            bool: True if the restored call was adopted
+        """
+        if self._prefetched_tool is None:
+            return False
+        tool_name, content, task, started = self._prefetched_tool
+        self._prefetched_tool = None
+        if (tool_name, content) != (self.toolName, self.toolUseContent.get('content')):
+            task.cancel()
+            return False
+        self._cancel_tools("superseded")
+        self._tool_tasks[self.toolUseId] = (task, started)
+        metrics.increment("checkpoint.tool_reused")
+        return True
+
+    def _drop_prefetched_tool(self):
+        """Cancel a restored tool call the model never asked for again."""
+        if self._prefetched_tool is not None:
+            self._prefetched_tool[2].cancel()
+            self._prefetched_tool = None
+
+    def _publish_output(self, item):
+        """Put a parsed event on output_queue, dropping the oldest when full."""
+        if self.output_queue.full():
+            self.output_queue.get_nowait()
+            metrics.increment("receive.output_dropped")
+        self.output_queue.put_nowait(item)
 
     async def processToolUse(self, toolName, toolUseContent):
         """Return the tool result"""
         tool = toolName.lower()
-        debug_print(f"Tool Use Content: {toolUseContent}")
+        debug_print("Tool Use Content: %s", toolUseContent)
         
         if tool == "getdateandtimetool":
             # Get current date in PST timezone
@@ -434,7 +904,7 @@ class BedrockStreamManager:
         elif tool == "trackordertool":
             # Extract order ID from toolUseContent
             content = toolUseContent.get("content", {})
-            content_data = json.loads(content)
+            content_data = self.codec.loads(content)
             order_id = content_data.get("orderId", "")
             request_notifications = toolUseContent.get("requestNotifications", False)
             
@@ -518,19 +988,59 @@ class BedrockStreamManager:
                 tracking_info["additionalInfo"] = "Weather delays possible"
                 
             return tracking_info
+
+        elif tool == "knowledgebasetool":
+            content_data = self.codec.loads(toolUseContent.get("content", "{}"))
+            query = str(content_data.get("query", "")).strip()
+            if self.knowledge_base is None:
+                return {"error": "The knowledge base is not available", "results": []}
+            if not query:
+                return {"error": "A search query is required", "results": []}
+
+            results = self.knowledge_base.search(query)
+            debug_print("Knowledge base returned %d passages for %r", len(results), query)
+            return {
+                "query": query,
+                "results": [
+                    {"text": r["text"], "source": r["source"], "score": round(r["score"], 3)}
+                    for r in results
+                ]
+            }
     
+    async def _close_transcript(self):
+        """Flush remaining transcript lines without blocking the loop."""
+        await asyncio.get_event_loop().run_in_executor(None, self.transcript.close)
+
     async def close(self):
         """Close the stream properly."""
+        if self.checkpoints is not None:
+            # A session closed on purpose is not recovered
+            self.checkpoints.end(self.session_id)
         if not self.is_active:
+            if self.text_only and self.response_task is None:
+                # The stream never started; end any text_replies() iteration
+                self.text_reply_queue.put_nowait(None)
+            await self.outbound.close()
+            self._release_admission()
+            self._release_dsp()
+            await self._close_transcript()
             return
        
         self.is_active = False
         if self.response_task and not self.response_task.done():
             self.response_task.cancel()
+        self._cancel_tools("closed")
+        self._release_dsp()
 
         await self.send_audio_content_end_event()
         await self.send_prompt_end_event()
         await self.send_session_end_event()
 
+        # Let queued events go out before the input stream is closed
+        await self.outbound.close()
+
         if self.stream_response:
-            await self.stream_response.input_stream.close() 
\ No newline at end of file
+            await self.stream_response.input_stream.close()
+        self._release_admission()
+
+        await self._close_transcript() 
\ No newline at end of file
@@ -0,0 +1,316 @@
+"""Session checkpoints for crash recovery.
+
+If the process dies mid-call, everything BedrockStreamManager knows is lost
+and the caller has to start over. A manager given a CheckpointStore writes a
+compact checkpoint at every turn boundary:
+- configuration (model, region, endpoint, text-only)
+- the session id, its host configuration and the prompt name
+- conversation history: final user and assistant text, last
+  CHECKPOINT_MAX_HISTORY_TURNS turns
+- the pending tool call, between a toolUse and its toolResult
+
+After a crash every live session is reopened on a new stream, and its
+history is replayed as non-interactive text content, so the model picks the
+conversation up where it stopped. A pending tool call is started right
+away, and the model's repeated request for it is answered from that call.
+The sessions reconnect concurrently, so recovery takes one stream handshake
+plus the history events, whatever the number of sessions or the length of
+the original calls. A session recovered CHECKPOINT_MAX_RECOVERY_ATTEMPTS
+times in a row without completing a turn is dropped, so a checkpoint whose
+replay crashes the process is not retried forever. Supervisor workers started with a checkpoint directory
+do this on every restart (see manager_for_session()); a single process
+calls recover_sessions().
+
+The store is one append-only file shared by every session in the process;
+supervisor workers each have their own.
+Each record is one line: a CRC32 of the JSON, then the JSON. A torn or
+corrupt record at the tail, left by the crash itself, is skipped on load.
+Records are written by a background thread that fsyncs once per batch, at
+most every CHECKPOINT_FSYNC_INTERVAL seconds, so many sessions share each
+fsync and the event loop never waits on the disk. Past
+CHECKPOINT_COMPACT_BYTES the file is rewritten with just the latest
+checkpoint of each live session.
+
+Usage:
+    >>> store = CheckpointStore('checkpoints.log')
+    >>> manager = BedrockStreamManager(checkpoints=store)
+    ...
+    >>> # After a restart
+    >>> managers = await recover_sessions(CheckpointStore('checkpoints.log'))
+
+    >>> # Supervisor workers: one checkpoint file per worker, recovered on restart
+    >>> supervisor = WorkerSupervisor(run_session, checkpoint_dir='checkpoints')
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import queue
+import asyncio
+import threading
+from sonic_nova.config.settings import (
+    CHECKPOINT_FSYNC_INTERVAL,
+    CHECKPOINT_COMPACT_BYTES,
+    CHECKPOINT_MAX_RECOVERY_ATTEMPTS
+)
+from sonic_nova.utils.helpers import debug_print
+from sonic_nova.utils.metrics import metrics
+
+def encode_record(record):
+    """Return one checkpoint line for a record."""
+    body = json.dumps(record, separators=(',', ':')).encode('utf-8')
+    return b'%08x %s\n' % (zlib.crc32(body), body)
+
+def decode_record(line):
+    """Return the record on a checkpoint line, or None if it is torn or corrupt."""
+    crc, _, body = line.rstrip(b'\n').partition(b' ')
+    try:
+        if int(crc, 16) != zlib.crc32(body):
+            return None
+        return json.loads(body)
+    except ValueError:
+        return None
+
+def read_checkpoints(path):
+    """Return the latest checkpoint of every session in a file that has not ended.
+
+    Returns:
+        dict: Session id -> checkpoint state, in order of first appearance
+    """
+    live = {}
+    try:
+        with open(path, 'rb') as f:
+            for line in f:
+                record = decode_record(line)
+                if record is None:
+                    metrics.increment("checkpoint.corrupt_records")
+                    continue
+                if record.get('end'):
+                    live.pop(record['session'], None)
+                else:
+                    live[record['session']] = record['state']
+    except FileNotFoundError:
+        pass
+    return live
+
+class CheckpointStore:
+    """Append-only checkpoint file with batched fsync."""
+
+    _STOP = object()
+
+    def __init__(self, path, fsync_interval=CHECKPOINT_FSYNC_INTERVAL, compact_bytes=CHECKPOINT_COMPACT_BYTES):
+        """Open a store, loading the sessions left in it by a previous process.
+
+        Args:
+            path (str): Checkpoint file
+            fsync_interval (float): Seconds to gather records before each fsync
+            compact_bytes (int): File size that triggers compaction
+        """
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.compact_bytes = compact_bytes
+        # Sessions a previous process left unfinished; see recover_sessions()
+        self.recovered = read_checkpoints(path)
+        # Latest line of every live session, for compaction
+        self._latest = {session: encode_record({'session': session, 'state': state})
+                        for session, state in self.recovered.items()}
+        self._queue = queue.SimpleQueue()
+        self._stopping = False
+        self._file = open(path, 'ab')
+        self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+        self.records_written = 0
+        self.fsyncs = 0
+
+    def save(self, session, state):
+        """Queue a session's checkpoint; never blocks.
+
+        Args:
+            session (str): Session id
+            state (dict): JSON-serializable checkpoint
+        """
+        self._queue.put((session, encode_record({'session': session, 'state': state})))
+
+    def end(self, session):
+        """Record that a session finished normally and must not be recovered."""
+        self._queue.put((session, None))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is on disk.
+
+        Returns:
+            bool: False if timeout expired first
+        """
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def begin_recovery(self, max_attempts=CHECKPOINT_MAX_RECOVERY_ATTEMPTS):
+        """Durably count a recovery attempt for every session in recovered.
+
+        The count is kept in the checkpoint and cleared by the next one the
+        session writes, at the end of its first completed turn. Sessions past
+        max_attempts are ended and dropped from recovered.
+
+        Returns:
+            dict: Session id -> checkpoint state of the sessions to recover
+        """
+        for session, state in list(self.recovered.items()):
+            attempts = state.get('recovery_attempts', 0) + 1
+            if attempts > max_attempts:
+                print(f"Dropping session {session}: not recovered after {max_attempts} attempts")
+                metrics.increment("checkpoint.recovery_abandoned")
+                del self.recovered[session]
+                self.end(session)
+            else:
+                self.recovered[session] = dict(state, recovery_attempts=attempts)
+                self.save(session, self.recovered[session])
+        self.flush()
+        return dict(self.recovered)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is self._STOP:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.fsync_interval
+            while True:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            flushes = [item for item in batch if isinstance(item, threading.Event)]
+            records = [item for item in batch if not isinstance(item, threading.Event)]
+            try:
+                if records:
+                    self._write(records)
+            except OSError as e:
+                sys.stderr.write(f"Checkpoint write error: {e}\n")
+            finally:
+                for done in flushes:
+                    done.set()
+
+    def _write(self, batch):
+        lines = []
+        for session, line in batch:
+            if line is None:
+                self._latest.pop(session, None)
+                line = encode_record({'session': session, 'end': True})
+            else:
+                self._latest[session] = line
+            lines.append(line)
+        start = time.perf_counter()
+        self._file.write(b''.join(lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        metrics.observe("checkpoint.fsync_ms", (time.perf_counter() - start) * 1000)
+        metrics.increment("checkpoint.records", len(lines))
+        self.records_written += len(lines)
+        self.fsyncs += 1
+        if self._file.tell() > self.compact_bytes:
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the file with only the latest checkpoint of each live session."""
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(b''.join(self._latest.values()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._file.close()
+        self._file = open(self.path, 'ab')
+        metrics.increment("checkpoint.compactions")
+        debug_print("Compacted checkpoints to %d sessions", len(self._latest))
+
+    def close(self, timeout=2.0):
+        """Write everything queued, then close the file.
+
+        Args:
+            timeout (float): Seconds to wait for the writer thread
+
+        Returns:
+            bool: True once the file is closed; False if the writer is still
+            busy, in which case the file stays open and close() can be retried
+        """
+        if self._thread is None:
+            return True
+        if not self._stopping:
+            self._stopping = True
+            self._queue.put(self._STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            return False
+        self._thread = None
+        self._file.close()
+        return True
+
+def manager_for_session(config, **kwargs):
+    """Return the BedrockStreamManager for a supervisor session.
+
+    Workers started with a checkpoint directory pass the session id in
+    config['session_id'] and their CheckpointStore in config['checkpoints'].
+    A session recovered after a crash is started again under the same id,
+    with its original config plus its checkpoint in config['restore'].
+
+    Args:
+        config (dict): The session's config as given to the session target;
+            with checkpoints, the rest of it must be JSON-serializable
+        **kwargs: Further BedrockStreamManager arguments; a restored
+            session's checkpointed configuration takes precedence
+
+    Returns:
+        BedrockStreamManager: A new or restored, unstarted manager
+    """
+    from sonic_nova.core.bedrock_manager import BedrockStreamManager
+    checkpoints = config.get('checkpoints')
+    if config.get('restore') is not None:
+        return BedrockStreamManager.from_checkpoint(config['restore'], checkpoints=checkpoints, **kwargs)
+    session_config = {key: value for key, value in config.items()
+                      if key not in ('checkpoints', 'restore', 'session_id')}
+    return BedrockStreamManager(checkpoints=checkpoints, session_id=config.get('session_id'),
+                                session_config=session_config, **kwargs)
+
+async def recover_sessions(store, manager_factory=None):
+    """Reopen every session a previous process left unfinished.
+
+    The streams are opened concurrently.
+
+    Args:
+        store (CheckpointStore): Store opened on the previous process's file;
+            recovered sessions keep checkpointing to it
+        manager_factory (callable, optional): Called with a checkpoint state
+            and the store, returns an unstarted manager. Defaults to
+            BedrockStreamManager.from_checkpoint.
+
+    Returns:
+        list: Initialized managers, one per recovered session; sessions whose
+        stream could not be reopened are left in the store
+    """
+    from sonic_nova.core.bedrock_manager import BedrockStreamManager
+    factory = manager_factory or (lambda state, store: BedrockStreamManager.from_checkpoint(state, checkpoints=store))
+    start = time.perf_counter()
+    pending = [(session, factory(state, store)) for session, state in store.begin_recovery().items()]
+    results = await asyncio.gather(*(manager.initialize_stream() for _, manager in pending),
+                                   return_exceptions=True)
+    managers = []
+    for (session, manager), result in zip(pending, results):
+        if isinstance(result, BaseException):
+            print(f"Could not recover session {session}: {result}")
+            # Release its resources, but keep the checkpoint for another try
+            manager.checkpoints = None
+            await manager.close()
+            continue
+        store.recovered.pop(session, None)
+        managers.append(manager)
+    metrics.observe("checkpoint.recovery_ms", (time.perf_counter() - start) * 1000)
+    return managers
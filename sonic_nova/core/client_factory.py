@@ -0,0 +1,215 @@
+"""Process-wide Bedrock client sharing for the Sonic Nova application.
+
+Building a BedrockRuntimeClient per session means every session pays for its
+own config, credential resolution, auth scheme and HTTP connection setup.
+BedrockClientFactory keeps one client per (region, endpoint) and event loop,
+so every session on a loop shares its HTTP client and connection pool. A
+client's connections belong to the loop that opened them, so a later
+asyncio.run() (tests, load steps, worker restarts) gets clients of its own.
+Credentials are resolved through CachingCredentialsResolver, which reuses the
+resolved identity and refreshes it ahead of expiry.
+
+Usage:
+    >>> from sonic_nova.core.client_factory import client_factory
+    >>> client = client_factory.get_client("us-east-1")
+    >>> client_factory.client_reuse_stats()
+"""
+
+import time
+import asyncio
+import datetime
+import weakref
+import threading
+from aws_sdk_bedrock_runtime.client import BedrockRuntimeClient
+from aws_sdk_bedrock_runtime.config import Config, HTTPAuthSchemeResolver, SigV4AuthScheme
+from smithy_aws_core.credentials_resolvers.environment import EnvironmentCredentialsResolver
+from sonic_nova.config.settings import CREDENTIALS_REFRESH_MARGIN
+from sonic_nova.utils.helpers import debug_print
+from sonic_nova.utils.metrics import metrics
+
+def _running_loop():
+    """Return the running event loop, or None outside of one."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+def default_endpoint(region):
+    """Return the public Bedrock runtime endpoint for a region."""
+    return f"https://bedrock-runtime.{region}.amazonaws.com"
+
+class CachingCredentialsResolver:
+    """Caches the identity returned by another credentials resolver.
+
+    Identities without an expiration are cached for the life of the process.
+    Expiring identities are refreshed in the background once they are within
+    refresh_margin seconds of expiry, and synchronously once they expire.
+    """
+
+    def __init__(self, resolver=None, refresh_margin=CREDENTIALS_REFRESH_MARGIN):
+        """Initialize the resolver.
+
+        Args:
+            resolver: Underlying resolver with an async get_identity(). Defaults
+                to EnvironmentCredentialsResolver.
+            refresh_margin (float): Seconds before expiry to refresh
+        """
+        self._resolver = resolver or EnvironmentCredentialsResolver()
+        self.refresh_margin = refresh_margin
+        self._identity = None
+        # asyncio.Lock and tasks are bound to a loop: one lock per loop
+        self._locks = weakref.WeakKeyDictionary()
+        self._refresh_task = None
+
+    @staticmethod
+    def _seconds_left(identity):
+        expiration = getattr(identity, 'expiration', None)
+        if expiration is None:
+            return None
+        if expiration.tzinfo is None:
+            expiration = expiration.replace(tzinfo=datetime.timezone.utc)
+        return (expiration - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+
+    async def _refresh(self, **kwargs):
+        start = time.perf_counter()
+        self._identity = await self._resolver.get_identity(**kwargs)
+        metrics.increment("credentials.refreshes")
+        metrics.observe("credentials.resolve_ms", (time.perf_counter() - start) * 1000)
+        return self._identity
+
+    async def get_identity(self, **kwargs):
+        """Return cached credentials, resolving them when needed."""
+        identity = self._identity
+        left = self._seconds_left(identity) if identity is not None else 0
+        if identity is not None and (left is None or left > 0):
+            metrics.increment("credentials.cache_hits")
+            if left is not None and left <= self.refresh_margin and not self._refreshing():
+                # Refresh ahead of expiry without delaying this caller
+                self._refresh_task = asyncio.ensure_future(self._locked_refresh(kwargs))
+                self._refresh_task.add_done_callback(self._refresh_done)
+            return identity
+        return await self._locked_refresh(kwargs)
+
+    def _refreshing(self):
+        """True while a background refresh is running on this loop."""
+        task = self._refresh_task
+        return task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop()
+
+    @staticmethod
+    def _refresh_done(task):
+        """Report a failed background refresh; the next caller retries it."""
+        if not task.cancelled() and task.exception() is not None:
+            metrics.increment("credentials.refresh_errors")
+            print(f"Background credentials refresh failed: {task.exception()}")
+
+    async def _locked_refresh(self, kwargs):
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        async with lock:
+            # Another caller may have refreshed while we waited for the lock
+            left = self._seconds_left(self._identity) if self._identity is not None else 0
+            if self._identity is not None and (left is None or left > self.refresh_margin):
+                return self._identity
+            return await self._refresh(**kwargs)
+
+class BedrockClientFactory:
+    """Hands out one shared BedrockRuntimeClient per region, endpoint and event loop."""
+
+    def __init__(self, credentials_resolver=None):
+        """Initialize the factory.
+
+        Args:
+            credentials_resolver (optional): Shared resolver for every client.
+                Defaults to a CachingCredentialsResolver over environment credentials.
+        """
+        self._credentials_resolver = credentials_resolver
+        # Event loop -> {(region, endpoint): client}, dropped with the loop;
+        # clients handed out with no loop running are kept separately
+        self._clients = weakref.WeakKeyDictionary()
+        self._unbound_clients = {}
+        self._acquisitions = {}
+        self._lock = threading.Lock()
+        self.clients_created = 0
+
+    @property
+    def credentials_resolver(self):
+        """The shared credentials resolver, created on first use."""
+        if self._credentials_resolver is None:
+            self._credentials_resolver = CachingCredentialsResolver()
+        return self._credentials_resolver
+
+    def _create_client(self, region, endpoint_uri):
+        config = Config(
+            endpoint_uri=endpoint_uri,
+            region=region,
+            aws_credentials_identity_resolver=self.credentials_resolver,
+            http_auth_scheme_resolver=HTTPAuthSchemeResolver(),
+            http_auth_schemes={"aws.auth#sigv4": SigV4AuthScheme()}
+        )
+        return BedrockRuntimeClient(config=config)
+
+    def get_client(self, region, endpoint_uri=None):
+        """Return the shared client for a region and endpoint on the running loop.
+
+        Args:
+            region (str): AWS region
+            endpoint_uri (str, optional): Endpoint override. Defaults to the
+                public Bedrock runtime endpoint of the region.
+
+        Returns:
+            BedrockRuntimeClient: The shared client
+        """
+        key = (region, endpoint_uri or default_endpoint(region))
+        start = time.perf_counter()
+        loop = _running_loop()
+        with self._lock:
+            if loop is None:
+                clients = self._unbound_clients
+            else:
+                clients = self._clients.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None:
+                client = clients[key] = self._create_client(*key)
+                self.clients_created += 1
+                metrics.increment("bedrock_client.created")
+                debug_print("Created shared Bedrock client for %s", key[1])
+            else:
+                metrics.increment("bedrock_client.reused")
+            self._acquisitions[key] = self._acquisitions.get(key, 0) + 1
+        metrics.observe("bedrock_client.acquire_ms", (time.perf_counter() - start) * 1000)
+        return client
+
+    def client_reuse_stats(self):
+        """Return how often sessions were handed an existing client object.
+
+        This counts client reuse, not HTTP connection reuse: connection
+        pooling happens inside each client's HTTP stack.
+
+        Returns:
+            dict: clients_created, total acquisitions, client reuses and
+            reuse ratio, and acquisitions per (region, endpoint)
+        """
+        with self._lock:
+            per_client = {f"{region} {endpoint}": count for (region, endpoint), count in self._acquisitions.items()}
+            acquisitions = sum(self._acquisitions.values())
+        reused = acquisitions - self.clients_created
+        return {
+            'clients_created': self.clients_created,
+            'acquisitions': acquisitions,
+            'client_reuses': reused,
+            'client_reuse_ratio': reused / acquisitions if acquisitions else 0.0,
+            'per_client': per_client,
+        }
+
+    def clear(self):
+        """Forget all cached clients (e.g. after forking or in tests)."""
+        with self._lock:
+            self._clients.clear()
+            self._unbound_clients.clear()
+            self._acquisitions.clear()
+            self.clients_created = 0
+
+# Process-wide default factory
+client_factory = BedrockClientFactory()
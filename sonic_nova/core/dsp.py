@@ -0,0 +1,312 @@
+"""Cross-session batched capture DSP for the Sonic Nova application.
+
+A host running many sessions would otherwise meter, gate and scale every
+session's microphone frames separately: hundreds of tiny NumPy calls every
+frame period, each dominated by Python overhead. DspScheduler instead
+collects the pending frame of every registered session on each tick, stacks
+them into one (sessions, samples) array and runs DspPipeline over the whole
+batch. It then hands each session its processed frame. The number of NumPy calls
+per tick is the same whether one session or hundreds are active, so the cost
+per session falls as concurrency rises.
+
+Pipeline stages, each vectorized over the batch:
+1. Level metering: RMS level in dBFS per frame
+2. VAD: level above max(threshold, noise floor + margin), with hangover;
+   the noise floor tracks non-speech frames
+3. Resampling from the capture rate to INPUT_SAMPLE_RATE with a windowed
+   sinc filter, when the rates differ
+4. AGC: gain toward a target speech level, smoothed per session and ramped
+   across the frame so gain changes do not click
+
+Per-session state (noise floor, gain, resampler history) lives in arrays
+indexed by the session's slot, so a batch gathers and updates it in one go.
+
+The ingress server and the load generator use the process-wide
+dsp_scheduler when DSP_BATCHED is set.
+
+Usage:
+    >>> manager = BedrockStreamManager(dsp=dsp_scheduler)
+    >>> manager.add_audio_chunk(pcm)  # processed on the next tick
+"""
+
+import time
+import asyncio
+import numpy as np
+from sonic_nova.config.settings import (
+    INPUT_SAMPLE_RATE,
+    CHUNK_SIZE,
+    DSP_TICK_MS,
+    DSP_VAD_THRESHOLD_DB,
+    DSP_VAD_MARGIN_DB,
+    DSP_VAD_HANGOVER_MS,
+    DSP_AGC_TARGET_DB,
+    DSP_AGC_MAX_GAIN_DB,
+)
+from sonic_nova.utils.metrics import metrics
+
+class DspPipeline:
+    """Capture pipeline over a batch of frames, one row per session."""
+
+    def __init__(
+        self,
+        frame_samples=CHUNK_SIZE,
+        capture_rate=INPUT_SAMPLE_RATE,
+        output_rate=INPUT_SAMPLE_RATE,
+        vad_threshold_db=DSP_VAD_THRESHOLD_DB,
+        vad_margin_db=DSP_VAD_MARGIN_DB,
+        vad_hangover_ms=DSP_VAD_HANGOVER_MS,
+        agc_target_db=DSP_AGC_TARGET_DB,
+        agc_max_gain_db=DSP_AGC_MAX_GAIN_DB,
+        agc_smoothing=0.2,
+        floor_alpha=0.05,
+        resample_taps=16,
+        capacity=64,
+    ):
+        """Initialize the pipeline.
+
+        Args:
+            frame_samples (int): Capture samples per frame
+            capture_rate (int): Sample rate of submitted frames in Hz
+            output_rate (int): Sample rate of processed frames in Hz
+            vad_threshold_db (float): Absolute level (dBFS) speech must exceed
+            vad_margin_db (float): Level above the noise floor speech must exceed
+            vad_hangover_ms (int): Time speech is still reported after the level drops
+            agc_target_db (float): Speech level the gain steers toward
+            agc_max_gain_db (float): Largest gain applied
+            agc_smoothing (float): Share of the gain error corrected per speech frame
+            floor_alpha (float): Smoothing factor for the noise floor estimate
+            resample_taps (int): Resampler filter length, per output sample period
+            capacity (int): Initial number of session slots
+
+        Raises:
+            ValueError: If a frame does not resample to a whole number of samples
+        """
+        if (frame_samples * output_rate) % capture_rate:
+            raise ValueError(
+                f"{frame_samples} samples at {capture_rate} Hz is not a whole number of samples at {output_rate} Hz"
+            )
+        self.frame_samples = frame_samples
+        self.output_samples = frame_samples * output_rate // capture_rate
+        self.vad_threshold_db = vad_threshold_db
+        self.vad_margin_db = vad_margin_db
+        self.hangover_frames = max(0, int(round(vad_hangover_ms / 1000 * capture_rate / frame_samples)))
+        self.agc_target_db = agc_target_db
+        self.agc_max_gain_db = agc_max_gain_db
+        self.agc_smoothing = agc_smoothing
+        self.floor_alpha = floor_alpha
+        self._ramp = np.linspace(0.0, 1.0, self.output_samples, dtype=np.float32)
+
+        self.resampling = capture_rate != output_rate
+        # Downsampling needs a proportionally longer filter for the same stopband
+        self.taps = 2 * int(np.ceil(resample_taps * max(1.0, capture_rate / output_rate) / 2)) if self.resampling else 0
+        if self.resampling:
+            self._resample_index, self._resample_weights = self._design_resampler(
+                capture_rate, output_rate, self.taps)
+
+        self._free = []
+        self._grow(capacity)
+
+    def _design_resampler(self, capture_rate, output_rate, taps):
+        """Return gather indices and weights of a windowed-sinc resampler.
+
+        Output sample j sits at capture position j * capture_rate / output_rate,
+        delayed by taps / 2 samples so only past samples are needed. Indices
+        point into the frame prefixed with the previous frame's last taps
+        samples.
+        """
+        ratio = capture_rate / output_rate
+        cutoff = min(1.0, output_rate / capture_rate)
+        centre = np.arange(self.output_samples) * ratio + taps / 2
+        index = np.floor(centre).astype(np.int64)[:, None] + np.arange(-taps // 2 + 1, taps // 2 + 1)
+        distance = centre[:, None] - index
+        window = 0.5 + 0.5 * np.cos(np.pi * np.clip(distance / (taps / 2), -1.0, 1.0))
+        weights = cutoff * np.sinc(cutoff * distance) * window
+        weights /= weights.sum(axis=1, keepdims=True)
+        return index, weights.astype(np.float32)
+
+    def _grow(self, capacity):
+        """Enlarge the per-slot state arrays to capacity slots."""
+        old = getattr(self, 'capacity', 0)
+        def grown(array, fill, shape=()):
+            new = np.full((capacity,) + shape, fill, dtype=np.float32)
+            if old:
+                new[:old] = array
+            return new
+        self.noise_floor_db = grown(getattr(self, 'noise_floor_db', None), self.vad_threshold_db - self.vad_margin_db)
+        self.gain_db = grown(getattr(self, 'gain_db', None), 0.0)
+        self.hangover = grown(getattr(self, 'hangover', None), 0.0)
+        self.history = grown(getattr(self, 'history', None), 0.0, (self.taps,))
+        self._free.extend(range(capacity - 1, old - 1, -1))
+        self.capacity = capacity
+
+    def allocate(self):
+        """Reserve a slot for a new session and reset its state."""
+        if not self._free:
+            self._grow(self.capacity * 2)
+        slot = self._free.pop()
+        self.noise_floor_db[slot] = self.vad_threshold_db - self.vad_margin_db
+        self.gain_db[slot] = 0.0
+        self.hangover[slot] = 0.0
+        self.history[slot] = 0.0
+        return slot
+
+    def release(self, slot):
+        """Return a session's slot for reuse."""
+        self._free.append(slot)
+
+    def process(self, frames, slots):
+        """Run the pipeline over one frame per session.
+
+        Args:
+            frames (numpy.ndarray): int16 (n, frame_samples) capture frames
+            slots (numpy.ndarray): Slot of the session each row belongs to
+
+        Returns:
+            tuple: int16 (n, output_samples) processed frames, float32 (n,)
+            input levels in dBFS and bool (n,) speech flags
+        """
+        x = frames.astype(np.float32) / 32768.0
+
+        # 1. Level metering
+        level_db = 10.0 * np.log10(np.mean(x * x, axis=1) + 1e-12)
+
+        # 2. VAD with a per-session noise floor and hangover
+        floor = self.noise_floor_db[slots]
+        loud = level_db > np.maximum(self.vad_threshold_db, floor + self.vad_margin_db)
+        self.noise_floor_db[slots] = np.where(loud, floor, floor + self.floor_alpha * (level_db - floor))
+        hangover = self.hangover[slots]
+        speech = loud | (hangover > 0)
+        self.hangover[slots] = np.where(loud, self.hangover_frames, np.maximum(hangover - 1, 0))
+
+        # 3. Resampling; the sinc filter needs the previous frame's tail
+        if self.resampling:
+            extended = np.concatenate([self.history[slots], x], axis=1)
+            self.history[slots] = x[:, -self.taps:]
+            x = np.einsum('nij,ij->ni', extended[:, self._resample_index], self._resample_weights)
+
+        # 4. AGC: adapt on loud frames only, ramp from the old gain to the new
+        old_gain = self.gain_db[slots]
+        wanted = np.minimum(self.agc_target_db - level_db, self.agc_max_gain_db)
+        new_gain = np.where(loud, old_gain + self.agc_smoothing * (wanted - old_gain), old_gain)
+        self.gain_db[slots] = new_gain
+        old_lin = 10.0 ** (old_gain / 20.0)
+        new_lin = 10.0 ** (new_gain / 20.0)
+        gain = old_lin[:, None] + (new_lin - old_lin)[:, None] * self._ramp
+        out = np.clip(x * gain * 32768.0, -32768, 32767).astype(np.int16)
+        return out, level_db.astype(np.float32), speech
+
+class DspSession:
+    """A session's handle on the scheduler."""
+
+    __slots__ = ('slot', 'sink', 'buffer', 'level_db', 'speech', 'closed')
+
+    def __init__(self, slot, sink):
+        self.slot = slot
+        self.sink = sink
+        self.buffer = bytearray()
+        self.level_db = None
+        self.speech = False
+        self.closed = False
+
+class DspScheduler:
+    """Runs DspPipeline once per tick over every session with a full frame."""
+
+    def __init__(self, pipeline=None, tick_interval=DSP_TICK_MS / 1000, metrics_registry=None):
+        """Initialize the scheduler.
+
+        Args:
+            pipeline (DspPipeline, optional): Shared pipeline; defaults to
+                CHUNK_SIZE frames at INPUT_SAMPLE_RATE
+            tick_interval (float): Seconds between ticks; a frame waits at most
+                this long for its batch. None leaves calling tick() to the caller.
+            metrics_registry (MetricsRegistry, optional): Where to publish stats
+        """
+        self.pipeline = pipeline or DspPipeline()
+        self.tick_interval = tick_interval
+        self.metrics = metrics_registry or metrics
+        self.frame_bytes = self.pipeline.frame_samples * 2
+        self.sessions = []
+        self._task = None
+
+    def register(self, sink):
+        """Add a session.
+
+        Args:
+            sink (callable): Called as sink(pcm_bytes, level_db, speech) with
+                each processed frame, on the event loop
+
+        Returns:
+            DspSession: Handle for submit() and unregister()
+        """
+        session = DspSession(self.pipeline.allocate(), sink)
+        self.sessions.append(session)
+        self._ensure_running()
+        return session
+
+    def unregister(self, session):
+        """Remove a session; audio it has not yet had processed is dropped."""
+        if session.closed:
+            return
+        session.closed = True
+        self.sessions.remove(session)
+        self.pipeline.release(session.slot)
+        if not self.sessions and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def submit(self, session, pcm_bytes):
+        """Queue capture PCM of any length for the next tick."""
+        if not session.closed:
+            session.buffer += pcm_bytes
+
+    def _ensure_running(self):
+        if self.tick_interval is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No loop yet; the next register() starts the ticks
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while self.sessions:
+            await asyncio.sleep(self.tick_interval)
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"DSP tick error: {e}")
+
+    def tick(self):
+        """Process every full frame pending across all sessions.
+
+        Returns:
+            int: Frames processed
+        """
+        start = time.perf_counter()
+        total = 0
+        frame_bytes = self.frame_bytes
+        while True:
+            ready = [s for s in self.sessions if len(s.buffer) >= frame_bytes]
+            if not ready:
+                break
+            frames = np.empty((len(ready), self.pipeline.frame_samples), dtype=np.int16)
+            for row, session in enumerate(ready):
+                frames[row] = np.frombuffer(session.buffer, dtype=np.int16, count=self.pipeline.frame_samples)
+                del session.buffer[:frame_bytes]
+            slots = np.fromiter((s.slot for s in ready), dtype=np.int64, count=len(ready))
+            out, levels, speech = self.pipeline.process(frames, slots)
+            for row, session in enumerate(ready):
+                session.level_db = float(levels[row])
+                session.speech = bool(speech[row])
+                session.sink(out[row].tobytes(), session.level_db, session.speech)
+            total += len(ready)
+        if total:
+            elapsed_us = (time.perf_counter() - start) * 1e6
+            self.metrics.observe("dsp.tick_us", elapsed_us)
+            self.metrics.observe("dsp.frames_per_tick", total)
+            self.metrics.observe("dsp.us_per_frame", elapsed_us / total)
+        return total
+
+# Process-wide scheduler for hosts that batch DSP across their sessions
+dsp_scheduler = DspScheduler()
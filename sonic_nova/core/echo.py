@@ -0,0 +1,235 @@
+"""Playback-aware echo suppression for the Sonic Nova application.
+
+On speakerphone setups the microphone picks up the assistant's own voice.
+EchoSuppressor uses the far-end reference (the PCM the playback loop writes
+to the output device) to remove that echo before capture frames reach the
+stream manager:
+
+1. The reference is resampled from OUTPUT_SAMPLE_RATE to INPUT_SAMPLE_RATE
+   and kept in a short history buffer.
+2. For each capture frame, an FFT cross-correlation against the history
+   finds the bulk echo delay and the normalized correlation peak.
+3. A frequency-domain block NLMS filter (overlap-save) on the delay-aligned
+   reference cancels the echo path. It only adapts while the frame is
+   dominated by echo, which protects it during double talk.
+4. Frames whose correlation with the reference stays above the gate
+   threshold are echo-only and are attenuated.
+
+All steps are vectorized NumPy; per-frame CPU time is published as the
+"echo.frame_cpu_us" metric.
+"""
+
+import time
+import threading
+import numpy as np
+from sonic_nova.config.settings import (
+    INPUT_SAMPLE_RATE,
+    OUTPUT_SAMPLE_RATE,
+    CHUNK_SIZE,
+    ECHO_MAX_DELAY_MS,
+    ECHO_GATE_CORRELATION,
+    ECHO_GATE_GAIN,
+    ECHO_STEP_SIZE,
+)
+from sonic_nova.utils.metrics import metrics
+
+class EchoSuppressor:
+    """Removes assistant playback from microphone frames."""
+
+    def __init__(
+        self,
+        input_rate=INPUT_SAMPLE_RATE,
+        output_rate=OUTPUT_SAMPLE_RATE,
+        frame_size=CHUNK_SIZE,
+        max_delay_ms=ECHO_MAX_DELAY_MS,
+        gate_correlation=ECHO_GATE_CORRELATION,
+        gate_gain=ECHO_GATE_GAIN,
+        step_size=ECHO_STEP_SIZE,
+        reference_tail=0.5,
+        metrics_registry=None,
+    ):
+        """Initialize the suppressor.
+
+        Args:
+            input_rate (int): Capture sample rate in Hz
+            output_rate (int): Playback sample rate in Hz
+            frame_size (int): Capture frame length in samples; also the
+                adaptive filter length
+            max_delay_ms (int): Largest playback-to-capture delay searched
+            gate_correlation (float): Normalized correlation above which a
+                frame is treated as echo only
+            gate_gain (float): Gain applied to echo-only frames
+            step_size (float): NLMS step size in (0, 1]
+            reference_tail (float): Seconds after the last reference push
+                during which suppression stays active
+            metrics_registry (MetricsRegistry, optional): Where to publish stats
+        """
+        self.input_rate = input_rate
+        self.frame_size = frame_size
+        self.max_delay = int(input_rate * max_delay_ms / 1000)
+        self.gate_correlation = gate_correlation
+        self.gate_gain = gate_gain
+        self.step_size = step_size
+        self.reference_tail = reference_tail
+        self.metrics = metrics_registry or metrics
+
+        self._step = output_rate / float(input_rate)
+        self._resample_phase = 0.0
+        self._resample_tail = np.zeros(1, dtype=np.float32)
+
+        # Reference history long enough for the delay search plus two filter blocks
+        self._history_len = self.max_delay + 3 * frame_size
+        self._history = np.zeros(self._history_len, dtype=np.float32)
+        self._lock = threading.Lock()
+        self._last_reference = None
+
+        # Frequency-domain filter state (overlap-save, FFT size 2L)
+        self._fft_size = 2 * frame_size
+        self._weights = np.zeros(frame_size + 1, dtype=np.complex64)
+        self._power = np.full(frame_size + 1, 1e-6, dtype=np.float32)
+        self._delay = 0
+
+        self.last_correlation = 0.0
+        self.last_gated = False
+
+    def _resample(self, samples):
+        """Linearly resample playback-rate samples to the capture rate."""
+        buf = np.concatenate((self._resample_tail, samples))
+        positions = np.arange(self._resample_phase, len(buf) - 1, self._step)
+        if positions.size == 0:
+            self._resample_phase -= len(samples)
+            self._resample_tail = buf[-1:]
+            return np.empty(0, dtype=np.float32)
+        out = np.interp(positions, np.arange(len(buf)), buf).astype(np.float32)
+        self._resample_phase = positions[-1] + self._step - (len(buf) - 1)
+        self._resample_tail = buf[-1:]
+        return out
+
+    def push_reference(self, pcm_bytes, now=None):
+        """Add played assistant audio to the far-end reference.
+
+        Args:
+            pcm_bytes (bytes): 16-bit mono PCM at the playback rate, exactly as
+                written to the output device
+            now (float, optional): time.monotonic() timestamp
+        """
+        samples = np.frombuffer(pcm_bytes, dtype=np.int16).astype(np.float32) / 32768.0
+        resampled = self._resample(samples)
+        n = resampled.size
+        if n == 0:
+            return
+        with self._lock:
+            if n >= self._history_len:
+                self._history[:] = resampled[-self._history_len:]
+            else:
+                self._history[:-n] = self._history[n:]
+                self._history[-n:] = resampled
+            self._last_reference = time.monotonic() if now is None else now
+
+    def discard_pending_reference(self):
+        """Forget the partial resampler state after playback is flushed.
+
+        The next reference chunk does not continue the flushed audio. The
+        filter, delay estimate and history are kept, because the echo of what
+        was already played is still reaching the microphone.
+        """
+        self._resample_phase = 0.0
+        self._resample_tail = np.zeros(1, dtype=np.float32)
+
+    def reference_active(self, now=None):
+        """Return True if reference audio was pushed within reference_tail seconds."""
+        if self._last_reference is None:
+            return False
+        now = time.monotonic() if now is None else now
+        return now - self._last_reference <= self.reference_tail
+
+    def _estimate_delay(self, near, history):
+        """Find the reference lag that best matches the near-end frame.
+
+        Returns:
+            tuple: (delay in samples back from the newest reference sample,
+            normalized correlation at that delay)
+        """
+        L = near.size
+        window = history[-(L + self.max_delay):]
+        n = int(2 ** np.ceil(np.log2(window.size + L)))
+        corr = np.fft.irfft(np.fft.rfft(window, n) * np.conj(np.fft.rfft(near, n)), n)
+        corr = corr[:self.max_delay + 1]
+
+        # Energy of every length-L window of the reference, via cumulative sums
+        sq = np.concatenate(([0.0], np.cumsum(window.astype(np.float64) ** 2)))
+        seg_energy = sq[L:L + self.max_delay + 1] - sq[:self.max_delay + 1]
+        denom = np.sqrt(seg_energy * float(np.dot(near, near))) + 1e-9
+        # Near-silent reference segments cannot explain an echo
+        normalized = np.where(seg_energy > 1e-6 * L, corr / denom, 0.0)
+
+        lag = int(np.argmax(normalized))
+        delay = (window.size - L) - lag
+        return delay, float(normalized[lag])
+
+    def _cancel(self, near, history, adapt):
+        """Run one overlap-save NLMS block on the delay-aligned reference."""
+        L = self.frame_size
+        end = history.size - self._delay
+        x = history[end - 2 * L:end]
+        X = np.fft.rfft(x)
+        y = np.fft.irfft(X * self._weights, self._fft_size)[L:]
+        error = near - y
+
+        if adapt:
+            self._power = 0.9 * self._power + 0.1 * (np.abs(X) ** 2).astype(np.float32)
+            E = np.fft.rfft(np.concatenate((np.zeros(L, dtype=np.float32), error)))
+            gradient = np.fft.irfft(np.conj(X) * E / (self._power + 1e-6), self._fft_size)
+            gradient[L:] = 0.0  # Gradient constraint keeps the filter causal
+            self._weights += (self.step_size * np.fft.rfft(gradient)).astype(np.complex64)
+        return error
+
+    def process(self, frame_bytes, now=None):
+        """Suppress echo in a capture frame.
+
+        Args:
+            frame_bytes (bytes): 16-bit mono PCM at the capture rate
+            now (float, optional): time.monotonic() timestamp
+
+        Returns:
+            tuple: (processed frame bytes, True if the frame was gated as echo)
+        """
+        start = time.perf_counter()
+        self.last_gated = False
+        if not self.reference_active(now):
+            return frame_bytes, False
+
+        near = np.frombuffer(frame_bytes, dtype=np.int16).astype(np.float32) / 32768.0
+        if near.size != self.frame_size:
+            return frame_bytes, False
+
+        with self._lock:
+            history = self._history.copy()
+
+        near_energy = float(np.dot(near, near))
+        if near_energy < 1e-9:
+            return frame_bytes, False
+
+        delay, correlation = self._estimate_delay(near, history)
+        self.last_correlation = correlation
+        echo_dominant = correlation >= self.gate_correlation
+        if echo_dominant:
+            self._delay = min(delay, history.size - 2 * self.frame_size)
+
+        error = self._cancel(near, history, adapt=echo_dominant)
+        error_energy = float(np.dot(error, error))
+        if error_energy > near_energy:
+            # Filter is not helping (e.g. still converging after a delay change)
+            error = near
+            error_energy = near_energy
+        else:
+            self.metrics.observe("echo.erle_db", 10.0 * np.log10(near_energy / (error_energy + 1e-12)))
+
+        if echo_dominant:
+            error = error * self.gate_gain
+            self.last_gated = True
+            self.metrics.increment("echo.gated_frames")
+
+        out = np.clip(error * 32768.0, -32768, 32767).astype(np.int16).tobytes()
+        self.metrics.observe("echo.frame_cpu_us", (time.perf_counter() - start) * 1e6)
+        return out, self.last_gated
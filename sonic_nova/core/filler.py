@@ -0,0 +1,144 @@
+"""Pre-rendered filler audio for slow tool calls.
+
+While a tool runs, the caller would otherwise hear nothing between the
+toolUse and the assistant's answer. AudioStreamer plays one short filler clip
+("One moment, let me check that") when a tool call takes longer than
+FILLER_THRESHOLD_MS, and fades it out as soon as real audioOutput arrives.
+No extra model calls are made.
+
+A filler cache is a directory with two files:
+- clips.pcm: every clip's 16-bit mono PCM at OUTPUT_SAMPLE_RATE, concatenated
+- clips.json: sample rate plus each clip's name, offset and length in samples
+
+The PCM is memory-mapped read-only and opened once per process, so every
+session (and every worker process, through the page cache) plays from the
+same pages.
+
+Build a cache from WAV files rendered offline:
+    python -m sonic_nova.core.filler one_moment.wav checking.wav --out filler_cache
+"""
+
+import os
+import sys
+import json
+import wave
+import random
+import shutil
+import argparse
+import threading
+import numpy as np
+from sonic_nova.config.settings import OUTPUT_SAMPLE_RATE, FILLER_CACHE_DIR
+from sonic_nova.utils.helpers import debug_print
+
+class FillerCache:
+    """Read-only, memory-mapped set of filler clips."""
+
+    def __init__(self, path, samples, clips):
+        """Use FillerCache.open() rather than calling this directly."""
+        self.path = path
+        self.samples = samples
+        self.clips = clips
+
+    @classmethod
+    def open(cls, path):
+        """Memory-map a filler cache directory.
+
+        Raises:
+            FileNotFoundError: If the directory holds no cache
+            ValueError: If the clips are not at OUTPUT_SAMPLE_RATE
+        """
+        with open(os.path.join(path, 'clips.json')) as f:
+            meta = json.load(f)
+        if meta['sample_rate'] != OUTPUT_SAMPLE_RATE:
+            raise ValueError(f"Filler clips in {path} are {meta['sample_rate']} Hz, expected {OUTPUT_SAMPLE_RATE} Hz")
+        samples = np.memmap(os.path.join(path, 'clips.pcm'), dtype='<i2', mode='r')
+        return cls(path, samples, meta['clips'])
+
+    def __len__(self):
+        return len(self.clips)
+
+    def clip(self, i):
+        """Return clip i as a read-only int16 array backed by the mapping."""
+        entry = self.clips[i]
+        return self.samples[entry['offset']:entry['offset'] + entry['samples']]
+
+    def choose(self, exclude=None, rng=random):
+        """Pick a clip index at random, avoiding exclude when there is a choice."""
+        choices = [i for i in range(len(self.clips)) if i != exclude] or list(range(len(self.clips)))
+        return rng.choice(choices)
+
+def read_clip(path):
+    """Return the PCM of a WAV file in the playback format.
+
+    Raises:
+        ValueError: If the file is not 16-bit mono at OUTPUT_SAMPLE_RATE
+    """
+    with wave.open(path, 'rb') as w:
+        if (w.getnchannels(), w.getsampwidth(), w.getframerate()) != (1, 2, OUTPUT_SAMPLE_RATE):
+            raise ValueError(f"{path} must be 16-bit mono at {OUTPUT_SAMPLE_RATE} Hz")
+        return w.readframes(w.getnframes())
+
+def pack_clips(clips, path):
+    """Write a filler cache, replacing any previous cache at path.
+
+    Args:
+        clips (list): (name, pcm bytes) pairs
+        path (str): Cache directory
+    """
+    tmp = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    entries, offset = [], 0
+    with open(os.path.join(tmp, 'clips.pcm'), 'wb') as f:
+        for name, pcm in clips:
+            f.write(pcm)
+            entries.append({'name': name, 'offset': offset, 'samples': len(pcm) // 2})
+            offset += len(pcm) // 2
+    with open(os.path.join(tmp, 'clips.json'), 'w') as f:
+        json.dump({'sample_rate': OUTPUT_SAMPLE_RATE, 'clips': entries}, f)
+    old = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+def open_shared(path):
+    """Return the process-wide FillerCache for path, opening it on first use."""
+    key = os.path.realpath(path)
+    with _shared_lock:
+        cache = _shared.get(key)
+        if cache is None:
+            cache = _shared[key] = FillerCache.open(key)
+            debug_print("Opened filler cache %s with %d clips", key, len(cache))
+        return cache
+
+def default_filler_cache(path=FILLER_CACHE_DIR):
+    """Return the shared cache at FILLER_CACHE_DIR, or None if there is none."""
+    try:
+        cache = open_shared(path)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        print(f"Filler audio unavailable: {e}")
+        return None
+    return cache if len(cache) else None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pack WAV clips into a filler audio cache')
+    parser.add_argument('wavs', nargs='+', help=f'16-bit mono WAV files at {OUTPUT_SAMPLE_RATE} Hz')
+    parser.add_argument('--out', default=FILLER_CACHE_DIR, help='Cache directory')
+    args = parser.parse_args(argv)
+    try:
+        clips = [(os.path.splitext(os.path.basename(p))[0], read_clip(p)) for p in args.wavs]
+    except (OSError, ValueError, wave.Error) as e:
+        print(f"Error: {e}")
+        return 1
+    pack_clips(clips, args.out)
+    print(f"Packed {len(clips)} clips into {args.out}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,675 @@
+"""Network ingress for remote callers (softphones, media gateways).
+
+IngressServer accepts caller audio over the network instead of the local
+microphone. Each connection (or UDP source address) gets its own
+BedrockStreamManager session; assistant audio, transcripts and barge-in
+notices go back on the same connection.
+
+WebSocket (ws://INGRESS_HOST:INGRESS_WS_PORT/):
+- caller -> server binary frames: 16-bit mono PCM at INPUT_SAMPLE_RATE,
+  whole samples per frame
+- server -> caller binary frames: assistant PCM at OUTPUT_SAMPLE_RATE
+- server -> caller text frames, JSON:
+    {"type": "session", "session": "<prompt name>"}
+    {"type": "transcript", "role": ..., "stage": ..., "text": ...}
+    {"type": "interrupted"}     the caller should flush its playback
+- a caller turned away by admission control is closed with code 1013
+
+UDP (INGRESS_UDP_PORT, off by default): every datagram starts with a kind
+byte, KIND_AUDIO followed by PCM or KIND_EVENT followed by one of the JSON
+events above. A caller ends its session with {"type": "bye"} or by going
+quiet for INGRESS_UDP_IDLE_TIMEOUT. A caller turned away by admission
+control gets {"type": "rejected"}, and its datagrams are dropped for
+INGRESS_UDP_REJECT_BACKOFF before it may retry.
+
+Caller audio takes no intermediate copies: WebSocket payloads are received
+straight into a buffer of the frame's size, unmasked in place, and that
+buffer becomes the session's queued chunk; UDP audio is a memoryview of the
+datagram. Each connection has its own backpressure. Once a session has
+INGRESS_MAX_QUEUED_CHUNKS unsent chunks its socket stops being read (UDP:
+its datagrams are dropped), and assistant audio waits while more than
+INGRESS_WRITE_BUFFER_HIGH bytes are buffered toward a slow caller.
+
+Run a server (--local answers with the scripted stand-in, no AWS needed):
+    python -m sonic_nova.core.ingress --port 8765 [--udp-port 8766] [--local]
+"""
+
+import os
+import abc
+import sys
+import json
+import time
+import base64
+import struct
+import asyncio
+import hashlib
+import argparse
+import numpy as np
+from sonic_nova.config.settings import (
+    DEFAULT_MODEL_ID,
+    DEFAULT_REGION,
+    INGRESS_HOST,
+    INGRESS_WS_PORT,
+    INGRESS_UDP_PORT,
+    INGRESS_MAX_FRAME_BYTES,
+    INGRESS_MAX_QUEUED_CHUNKS,
+    INGRESS_WRITE_BUFFER_HIGH,
+    INGRESS_UDP_IDLE_TIMEOUT,
+    INGRESS_UDP_REJECT_BACKOFF,
+    DSP_BATCHED
+)
+from sonic_nova.core.admission import AdmissionRejected
+from sonic_nova.core.bedrock_manager import BedrockStreamManager
+from sonic_nova.core.dsp import dsp_scheduler
+from sonic_nova.core.local_stream import LocalBedrockClient
+from sonic_nova.core.transcript import LoopTranscriptSink
+from sonic_nova.utils.helpers import debug_print
+from sonic_nova.utils.metrics import metrics
+
+# WebSocket opcodes
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+# WebSocket close codes
+CLOSE_NORMAL = 1000
+CLOSE_PROTOCOL_ERROR = 1002
+CLOSE_TOO_BIG = 1009
+CLOSE_TRY_AGAIN_LATER = 1013
+
+# UDP datagram kinds
+KIND_AUDIO = 0x01
+KIND_EVENT = 0x02
+
+_WS_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+_MAX_HANDSHAKE_BYTES = 8192
+_UDP_AUDIO_BYTES = 1280  # Assistant audio per datagram, well under a typical MTU
+
+def default_session_factory(transcript_sinks):
+    """Create a Bedrock session for a remote caller.
+
+    With DSP_BATCHED, caller audio goes through the process-wide batched DSP.
+    """
+    return BedrockStreamManager(
+        model_id=DEFAULT_MODEL_ID,
+        region=DEFAULT_REGION,
+        transcript_sinks=transcript_sinks,
+        dsp=dsp_scheduler if DSP_BATCHED else None
+    )
+
+def websocket_accept(key):
+    """Return the Sec-WebSocket-Accept value for a Sec-WebSocket-Key."""
+    return base64.b64encode(hashlib.sha1(key.encode('ascii') + _WS_GUID).digest()).decode('ascii')
+
+def encode_frame(opcode, payload, mask=None):
+    """Return the header of a final frame carrying payload (payload masked in place if mask)."""
+    n = len(payload)
+    first = 0x80 | opcode
+    mask_bit = 0x80 if mask else 0
+    if n < 126:
+        header = struct.pack('!BB', first, mask_bit | n)
+    elif n < 65536:
+        header = struct.pack('!BBH', first, mask_bit | 126, n)
+    else:
+        header = struct.pack('!BBQ', first, mask_bit | 127, n)
+    if mask:
+        apply_mask(payload, mask)
+        header += mask
+    return header
+
+def apply_mask(buf, mask):
+    """XOR a writable buffer with a 4-byte WebSocket masking key, in place."""
+    n = len(buf)
+    words = n // 4
+    if words:
+        view = np.frombuffer(buf, dtype=np.uint32, count=words)
+        view ^= np.frombuffer(mask, dtype=np.uint32)[0]
+    for i in range(words * 4, n):
+        buf[i] ^= mask[i % 4]
+
+def _close_payload(code, reason=''):
+    return struct.pack('!H', code) + reason.encode('utf-8')[:123]
+
+class _Call(abc.ABC):
+    """One remote caller: its session, and the pump that sends output back.
+
+    Subclasses supply the transport: how events and audio reach the caller,
+    and how a rejected or finished call is torn down.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.loop = asyncio.get_event_loop()
+        self.manager = server.session_factory([LoopTranscriptSink(self.loop, self._on_transcript)])
+        self.task = None
+        self.closed = False
+
+    def start(self):
+        self.server.calls.add(self)
+        self.task = self.loop.create_task(self._run())
+
+    def accepting(self):
+        """Return False while the session has too much caller audio unsent."""
+        return self.manager.audio_input_queue.qsize() < INGRESS_MAX_QUEUED_CHUNKS
+
+    def hangup(self):
+        """End the call; the session closes within one pump interval."""
+        self.closed = True
+
+    async def _run(self):
+        try:
+            try:
+                await self.manager.initialize_stream()
+            except AdmissionRejected as e:
+                metrics.increment("ingress.rejected")
+                self._reject(CLOSE_TRY_AGAIN_LATER, e.status)
+                return
+            except Exception as e:
+                self._reject(CLOSE_TRY_AGAIN_LATER, f"stream failed: {e}")
+                return
+            self.send_event({"type": "session", "session": self.manager.prompt_name})
+            await self.manager.send_audio_content_start_event()
+            await self._pump()
+        except Exception as e:
+            debug_print("Ingress call failed: %s", e, exc_info=True)
+        finally:
+            self.closed = True
+            await self.manager.close()
+            self._disconnect()
+            self.server.calls.discard(self)
+
+    async def _pump(self):
+        """Send assistant audio and barge-in notices until the call ends."""
+        queue = self.manager.audio_output_queue
+        while self.manager.is_active and not self.closed:
+            if self.manager.barge_in:
+                while not queue.empty():
+                    queue.get_nowait()
+                self.manager.barge_in = False
+                self.send_event({"type": "interrupted"})
+            try:
+                audio = await asyncio.wait_for(queue.get(), timeout=0.1)
+            except asyncio.TimeoutError:
+                continue
+            await self._send_audio(audio)
+
+    def _on_transcript(self, entry):
+        if not self.closed and entry.text:
+            self.send_event({"type": "transcript", "role": entry.role, "stage": entry.stage, "text": entry.text})
+
+    @abc.abstractmethod
+    def send_event(self, event):
+        """Send a JSON event to the caller."""
+
+    @abc.abstractmethod
+    async def _send_audio(self, audio):
+        """Send assistant audio to the caller, waiting out backpressure."""
+
+    @abc.abstractmethod
+    def _reject(self, code, reason):
+        """Tell the caller its session could not be started."""
+
+    @abc.abstractmethod
+    def _disconnect(self):
+        """Release the transport once the session has closed."""
+
+class _WebSocketCall(_Call):
+    def __init__(self, server, protocol):
+        self.protocol = protocol
+        super().__init__(server)
+
+    def send_event(self, event):
+        self.protocol.send_frame(OP_TEXT, json.dumps(event).encode('utf-8'))
+
+    async def _send_audio(self, audio):
+        await self.protocol.writable()
+        self.protocol.send_frame(OP_BINARY, audio)
+
+    def _reject(self, code, reason):
+        self.protocol.close(code, reason)
+
+    def _disconnect(self):
+        self.protocol.close(CLOSE_NORMAL)
+
+class _WebSocketProtocol(asyncio.BufferedProtocol):
+    """Server side of one WebSocket connection.
+
+    get_buffer() hands the transport exactly the bytes still missing from
+    the current handshake, frame header or payload, so payloads are read
+    straight into their own buffer.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.call = None
+        self._handshake = True
+        self._buf = bytearray(_MAX_HANDSHAKE_BYTES)
+        self._filled = 0
+        self._need = len(self._buf)
+        self._frame = None  # (fin, opcode, mask) of the frame being read
+        self._message_opcode = None  # Opcode of an unfinished fragmented message
+        self._can_write = asyncio.Event()
+        self._can_write.set()
+        self._close_sent = False
+
+    # Transport callbacks
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.set_write_buffer_limits(high=INGRESS_WRITE_BUFFER_HIGH)
+        metrics.increment("ingress.ws_connections")
+
+    def connection_lost(self, exc):
+        self._can_write.set()
+        if self.call is not None:
+            self.call.hangup()
+
+    def pause_writing(self):
+        self._can_write.clear()
+
+    def resume_writing(self):
+        self._can_write.set()
+
+    def get_buffer(self, sizehint):
+        return memoryview(self._buf)[self._filled:self._need]
+
+    def buffer_updated(self, nbytes):
+        self._filled += nbytes
+        if self._handshake:
+            self._read_handshake()
+        elif self._filled == self._need:
+            if self._frame is None:
+                self._read_header()
+            else:
+                self._read_payload()
+
+    # Incoming data
+
+    def _expect_header(self, n=2):
+        self._frame = None
+        self._buf = bytearray(14)
+        self._filled = 0
+        self._need = n
+
+    def _read_handshake(self):
+        end = self._buf.find(b'\r\n\r\n', 0, self._filled)
+        if end == -1:
+            if self._filled == len(self._buf):
+                self._reject_handshake()
+            return
+        lines = self._buf[:end].decode('latin-1').split('\r\n')
+        leftover = bytes(self._buf[end + 4:self._filled])
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get('sec-websocket-key')
+        if (not lines[0].startswith('GET ') or 'websocket' not in headers.get('upgrade', '').lower()
+                or not key or headers.get('sec-websocket-version') != '13'):
+            self._reject_handshake()
+            return
+        self.transport.write((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {websocket_accept(key)}\r\n\r\n"
+        ).encode('ascii'))
+        self._handshake = False
+        self._expect_header()
+        self.call = _WebSocketCall(self.server, self)
+        self.call.start()
+        if leftover:
+            self._feed(leftover)
+
+    def _reject_handshake(self):
+        self.transport.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+        self.transport.close()
+
+    def _feed(self, data):
+        """Process bytes that arrived outside get_buffer()."""
+        data = memoryview(data)
+        while data and not self.transport.is_closing():
+            view = self.get_buffer(-1)
+            n = min(len(view), len(data))
+            view[:n] = data[:n]
+            data = data[n:]
+            self.buffer_updated(n)
+
+    def _read_header(self):
+        b0, b1 = self._buf[0], self._buf[1]
+        length = b1 & 0x7F
+        masked = b1 & 0x80
+        extra = (2 if length == 126 else 8 if length == 127 else 0) + (4 if masked else 0)
+        if extra and self._need == 2:
+            self._need += extra
+            return
+        if length == 126:
+            length = struct.unpack_from('!H', self._buf, 2)[0]
+        elif length == 127:
+            length = struct.unpack_from('!Q', self._buf, 2)[0]
+        fin, opcode = b0 & 0x80, b0 & 0x0F
+        if not masked or (opcode >= OP_CLOSE and (length > 125 or not fin)):
+            self.close(CLOSE_PROTOCOL_ERROR, "bad frame")
+            return
+        if length > INGRESS_MAX_FRAME_BYTES:
+            self.close(CLOSE_TOO_BIG, "frame too large")
+            return
+        self._frame = (fin, opcode, bytes(self._buf[self._need - 4:self._need]))
+        self._buf = bytearray(length)
+        self._filled = 0
+        self._need = length
+        if length == 0:
+            self._read_payload()
+
+    def _read_payload(self):
+        fin, opcode, mask = self._frame
+        payload = self._buf
+        apply_mask(payload, mask)
+        self._expect_header()
+        if opcode >= OP_CLOSE:
+            self._on_control(opcode, payload)
+            return
+        if opcode == OP_CONTINUATION:
+            opcode = self._message_opcode
+        self._message_opcode = None if fin else opcode
+        if opcode == OP_BINARY and payload:
+            self._on_audio(payload)
+
+    def _on_audio(self, payload):
+        call = self.call
+        if call.closed:
+            return
+        metrics.increment("ingress.frames_in")
+        # The frame's own buffer is the queued chunk; nothing is copied
+        call.manager.add_audio_chunk(payload)
+        if not call.accepting():
+            metrics.increment("ingress.read_paused")
+            self.transport.pause_reading()
+            self.call.loop.call_later(0.01, self._resume_when_drained)
+
+    def _resume_when_drained(self):
+        if self.transport.is_closing():
+            return
+        if self.call.closed or self.call.manager.audio_input_queue.qsize() <= INGRESS_MAX_QUEUED_CHUNKS // 2:
+            self.transport.resume_reading()
+        else:
+            self.call.loop.call_later(0.01, self._resume_when_drained)
+
+    def _on_control(self, opcode, payload):
+        if opcode == OP_PING:
+            self.send_frame(OP_PONG, payload)
+        elif opcode == OP_CLOSE:
+            code = struct.unpack_from('!H', payload)[0] if len(payload) >= 2 else CLOSE_NORMAL
+            self.close(code)
+
+    # Outgoing data
+
+    async def writable(self):
+        """Wait until the caller has drained enough of what was sent."""
+        await self._can_write.wait()
+
+    def send_frame(self, opcode, payload):
+        if self.transport.is_closing() or self._close_sent:
+            return
+        self.transport.write(encode_frame(opcode, payload))
+        if payload:
+            self.transport.write(payload)
+
+    def close(self, code=CLOSE_NORMAL, reason=''):
+        """Send a close frame (once) and close the connection."""
+        if self.call is not None:
+            self.call.hangup()
+        if self.transport.is_closing():
+            return
+        if not self._handshake:
+            self.send_frame(OP_CLOSE, _close_payload(code, reason))
+            self._close_sent = True
+        self.transport.close()
+
+class _UdpCall(_Call):
+    def __init__(self, server, protocol, addr):
+        self.protocol = protocol
+        self.addr = addr
+        self.last_seen = time.monotonic()
+        super().__init__(server)
+
+    def send_event(self, event):
+        self.protocol.send(self.addr, KIND_EVENT, json.dumps(event).encode('utf-8'))
+
+    async def _send_audio(self, audio):
+        view = memoryview(audio)
+        for i in range(0, len(view), _UDP_AUDIO_BYTES):
+            self.protocol.send(self.addr, KIND_AUDIO, view[i:i + _UDP_AUDIO_BYTES])
+
+    def _reject(self, code, reason):
+        self.send_event({"type": "rejected", "reason": reason})
+        # Without a backoff every further datagram would start a new session
+        self.protocol.rejected[self.addr] = time.monotonic() + INGRESS_UDP_REJECT_BACKOFF
+
+    def _disconnect(self):
+        self.protocol.calls.pop(self.addr, None)
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    """UDP ingress: one session per source address."""
+
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.calls = {}
+        # Rejected source address -> time.monotonic() it may retry
+        self.rejected = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if not data:
+            return
+        call = self.calls.get(addr)
+        if call is None and addr in self.rejected:
+            if time.monotonic() < self.rejected[addr]:
+                metrics.increment("ingress.udp_rejected_dropped")
+                return
+            del self.rejected[addr]
+        if data[0] == KIND_AUDIO:
+            if call is None:
+                call = self.calls[addr] = _UdpCall(self.server, self, addr)
+                call.start()
+                metrics.increment("ingress.udp_sessions")
+            call.last_seen = time.monotonic()
+            if call.closed:
+                return
+            if not call.accepting():
+                metrics.increment("ingress.udp_dropped")
+                return
+            metrics.increment("ingress.frames_in")
+            call.manager.add_audio_chunk(memoryview(data)[1:])
+        elif data[0] == KIND_EVENT and call is not None:
+            call.last_seen = time.monotonic()
+            try:
+                event = json.loads(bytes(data[1:]))
+            except ValueError:
+                return
+            if event.get('type') == 'bye':
+                call.hangup()
+
+    def send(self, addr, kind, payload):
+        if self.transport is not None and not self.transport.is_closing():
+            self.transport.sendto(bytes((kind,)) + payload, addr)
+
+    def reap_idle(self, timeout):
+        """Hang up callers that have sent nothing for timeout seconds."""
+        now = time.monotonic()
+        for call in list(self.calls.values()):
+            if now - call.last_seen > timeout:
+                call.hangup()
+        for addr, retry_at in list(self.rejected.items()):
+            if now >= retry_at:
+                del self.rejected[addr]
+
+class IngressServer:
+    """Accepts remote callers over WebSocket and UDP and runs a session for each."""
+
+    def __init__(self, session_factory=None, host=INGRESS_HOST, ws_port=INGRESS_WS_PORT,
+                 udp_port=INGRESS_UDP_PORT, udp_idle_timeout=INGRESS_UDP_IDLE_TIMEOUT):
+        """Initialize the server; nothing listens until start().
+
+        Args:
+            session_factory (callable, optional): Called with the transcript
+                sinks for a new caller, returns a BedrockStreamManager.
+                Defaults to default_session_factory.
+            host (str): Interface to listen on
+            ws_port (int): WebSocket port; 0 picks a free port
+            udp_port (int, optional): UDP port; None disables UDP ingress
+            udp_idle_timeout (float): Seconds of silence that end a UDP call
+        """
+        self.session_factory = session_factory or default_session_factory
+        self.host = host
+        self.ws_port = ws_port
+        self.udp_port = udp_port
+        self.udp_idle_timeout = udp_idle_timeout
+        self.calls = set()
+        self._ws_server = None
+        self._udp = None
+        self._reaper = None
+
+    async def start(self):
+        """Start listening."""
+        loop = asyncio.get_event_loop()
+        self._ws_server = await loop.create_server(lambda: _WebSocketProtocol(self), self.host, self.ws_port)
+        if self.udp_port is not None:
+            _, self._udp = await loop.create_datagram_endpoint(
+                lambda: _UdpProtocol(self), local_addr=(self.host, self.udp_port))
+            self._reaper = loop.create_task(self._reap())
+        debug_print("Ingress listening on %s (WebSocket) %s (UDP)", self.ws_address, self.udp_address)
+        return self
+
+    @property
+    def ws_address(self):
+        """(host, port) the WebSocket server is bound to."""
+        return self._ws_server.sockets[0].getsockname()[:2] if self._ws_server else None
+
+    @property
+    def udp_address(self):
+        """(host, port) the UDP endpoint is bound to, or None."""
+        return self._udp.transport.get_extra_info('sockname')[:2] if self._udp else None
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(min(1.0, self.udp_idle_timeout / 2))
+            self._udp.reap_idle(self.udp_idle_timeout)
+
+    async def serve_forever(self):
+        await self._ws_server.serve_forever()
+
+    async def stop(self):
+        """Stop listening, end every call and wait for the sessions to close."""
+        if self._reaper:
+            self._reaper.cancel()
+        if self._ws_server:
+            self._ws_server.close()
+        for call in list(self.calls):
+            call.hangup()
+        tasks = [call.task for call in list(self.calls) if call.task]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._udp:
+            self._udp.transport.close()
+        if self._ws_server:
+            await self._ws_server.wait_closed()
+
+class IngressClient:
+    """Minimal WebSocket caller, for tests and tools."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host, port, path='/'):
+        """Open a connection and complete the WebSocket handshake.
+
+        Raises:
+            ConnectionError: If the server refuses the upgrade
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode('ascii')
+        writer.write((
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        ).encode('ascii'))
+        response = await reader.readuntil(b'\r\n\r\n')
+        if not response.startswith(b'HTTP/1.1 101') or websocket_accept(key).encode('ascii') not in response:
+            writer.close()
+            status = response.split(b'\r\n', 1)[0].decode('latin-1')
+            raise ConnectionError(f"WebSocket upgrade refused: {status}")
+        return cls(reader, writer)
+
+    async def send(self, opcode, payload):
+        payload = bytearray(payload)
+        self.writer.write(encode_frame(opcode, payload, mask=os.urandom(4)) + payload)
+        await self.writer.drain()
+
+    async def send_audio(self, pcm):
+        await self.send(OP_BINARY, pcm)
+
+    async def receive(self):
+        """Return the next (opcode, payload) from the server."""
+        b0, b1 = await self.reader.readexactly(2)
+        length = b1 & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', await self.reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', await self.reader.readexactly(8))[0]
+        return b0 & 0x0F, await self.reader.readexactly(length)
+
+    async def close(self, code=CLOSE_NORMAL):
+        """Send a close frame and close the connection."""
+        try:
+            await self.send(OP_CLOSE, _close_payload(code))
+        except ConnectionError:
+            pass
+        self.writer.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve remote callers over WebSocket and UDP')
+    parser.add_argument('--host', default=INGRESS_HOST, help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=INGRESS_WS_PORT, help='WebSocket port')
+    parser.add_argument('--udp-port', type=int, default=INGRESS_UDP_PORT, help='UDP port (disabled by default)')
+    parser.add_argument('--local', action='store_true', help='Answer with the local scripted stand-in instead of Bedrock')
+    args = parser.parse_args(argv)
+
+    factory = None
+    if args.local:
+        client = LocalBedrockClient(turn_silence_ms=600)
+
+        def factory(transcript_sinks):
+            manager = default_session_factory(transcript_sinks)
+            manager.bedrock_client = client
+            return manager
+
+    async def run():
+        server = await IngressServer(factory, args.host, args.port, args.udp_port).start()
+        print(f"Listening on ws://{server.ws_address[0]}:{server.ws_address[1]}/"
+              + (f" and udp://{server.udp_address[0]}:{server.udp_address[1]}" if server.udp_address else ""))
+        try:
+            await server.serve_forever()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
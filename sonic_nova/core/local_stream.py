@@ -0,0 +1,326 @@
+"""Local stand-in for the Bedrock bidirectional stream.
+
+LocalBedrockClient implements the small part of the BedrockRuntimeClient
+interface that BedrockStreamManager uses:
+- invoke_model_with_bidirectional_stream()
+- input_stream.send() and input_stream.close()
+- await_output() followed by receive()
+
+It runs a scripted responder instead of a model. That makes admission
+control, soak, load and text-mode behaviour testable on localhost without
+AWS credentials.
+
+The responder answers each user turn with speculative text, assistant audio
+(silence at OUTPUT_SAMPLE_RATE) and final text. A user turn ends on a
+textInput followed by contentEnd, or after turn_audio_events audioInput
+events (or turn_audio_bytes of PCM, when set). With turn_silence_ms set, a
+turn ends instead once speech is followed by that much all-zero PCM, like a
+server-side endpointer. Non-interactive text content is conversation
+history replayed after a restore: it is kept in LocalStream.history and not
+answered.
+
+Input is handled by a per-stream server task rather than inside send(), so
+the stand-in's own work is not charged to the caller's tasks.
+
+Every tool_every-th turn first emits a toolUse and waits for the toolResult
+before answering. tool_end_delay spaces the toolUse and its contentEnd, as
+the model does while it finishes the tool call.
+"""
+
+import json
+import uuid
+import base64
+import asyncio
+from collections import deque
+from sonic_nova.config.settings import INPUT_SAMPLE_RATE, OUTPUT_SAMPLE_RATE
+
+class LocalQuotaExceeded(Exception):
+    """Raised when more streams are opened than the stand-in allows."""
+
+class _Value:
+    __slots__ = ('bytes_',)
+
+    def __init__(self, payload):
+        self.bytes_ = payload
+
+class _Result:
+    __slots__ = ('value',)
+
+    def __init__(self, payload):
+        self.value = _Value(payload)
+
+class _InputStream:
+    def __init__(self, stream):
+        self._stream = stream
+
+    async def send(self, chunk):
+        if self._stream.closed:
+            raise ConnectionError("Local stream is closed")
+        self._stream._accept(chunk.value.bytes_)
+
+    async def close(self):
+        await self._stream.close()
+
+class _OutputReceiver:
+    def __init__(self, stream):
+        self._stream = stream
+
+    async def receive(self):
+        payload = await self._stream._output.get()
+        if payload is None:
+            raise StopAsyncIteration
+        return _Result(payload)
+
+class LocalStream:
+    """One simulated bidirectional stream."""
+
+    def __init__(self, client, responder_options):
+        self._client = client
+        self.input_stream = _InputStream(self)
+        self._receiver = _OutputReceiver(self)
+        self._output = asyncio.Queue()
+        self.closed = False
+        # Recent event types only, so long soak runs stay flat
+        self.received = deque(maxlen=1000)
+        self.audio_bytes_received = 0
+        self._turn_audio_bytes = 0
+        self.prompt_name = None
+        self.turns = 0
+        self._audio_events = 0
+        self._content_roles = {}
+        # Non-interactive text is replayed history: recorded, never answered
+        self._history_roles = {}
+        self.history = []
+        self._pending_text_turn = False
+        self._tool_results = {}
+        self._tool_contents = {}
+        self.tool_results_received = 0
+        self._heard_speech = False
+        self._silence_bytes = 0
+        self._turn_task = None
+        self._inbox = asyncio.Queue()
+        self._server_task = None
+        self.options = responder_options
+
+    async def await_output(self):
+        """Return (stream, receiver) like the SDK's output stream handle."""
+        return self, self._receiver
+
+    def _accept(self, payload):
+        if self._server_task is None:
+            self._server_task = asyncio.ensure_future(self._serve())
+        self._inbox.put_nowait(payload)
+
+    async def _serve(self):
+        while not self.closed:
+            await self._on_input(await self._inbox.get())
+
+    def _emit(self, event):
+        self._output.put_nowait(json.dumps({"event": event}).encode('utf-8'))
+
+    async def _on_input(self, payload):
+        event = json.loads(payload)["event"]
+        event_type = next(iter(event))
+        body = event[event_type]
+        self.received.append(event_type)
+
+        if event_type == 'promptStart':
+            self.prompt_name = body.get('promptName')
+        elif event_type == 'contentStart':
+            if body.get('interactive') is False:
+                self._history_roles[body.get('contentName')] = body.get('role')
+            else:
+                self._content_roles[body.get('contentName')] = body.get('role')
+            tool_config = body.get('toolResultInputConfiguration')
+            if tool_config:
+                self._tool_contents[body.get('contentName')] = tool_config.get('toolUseId')
+        elif event_type == 'textInput':
+            if body.get('contentName') in self._history_roles:
+                self.history.append((self._history_roles[body.get('contentName')], body.get('content')))
+            elif self._content_roles.get(body.get('contentName')) == 'USER':
+                self._pending_text_turn = True
+        elif event_type == 'contentEnd':
+            if self._pending_text_turn:
+                self._pending_text_turn = False
+                self._start_turn()
+        elif event_type == 'audioInput':
+            self._audio_events += 1
+            pcm_bytes = len(body.get('content', '')) * 3 // 4
+            self.audio_bytes_received += pcm_bytes
+            turn_bytes = self.options['turn_audio_bytes']
+            if self.options['turn_silence_ms']:
+                self._endpoint(base64.b64decode(body.get('content', '')))
+            elif turn_bytes:
+                self._turn_audio_bytes += pcm_bytes
+                if self._turn_audio_bytes >= turn_bytes:
+                    self._turn_audio_bytes -= turn_bytes
+                    self._start_turn()
+            elif self._audio_events >= self.options['turn_audio_events']:
+                self._audio_events = 0
+                self._start_turn()
+        elif event_type == 'toolResult':
+            tool_use_id = self._tool_contents.pop(body.get('contentName'), None)
+            future = self._tool_results.get(tool_use_id)
+            if future is not None and not future.done():
+                self.tool_results_received += 1
+                future.set_result(body.get('content'))
+        elif event_type == 'sessionEnd':
+            await self.close()
+
+    def _endpoint(self, pcm):
+        """End the user turn after speech followed by enough silence."""
+        if pcm.count(0) != len(pcm):
+            self._heard_speech = True
+            self._silence_bytes = 0
+            return
+        self._silence_bytes += len(pcm)
+        needed = self.options['turn_silence_ms'] * INPUT_SAMPLE_RATE * 2 // 1000
+        if self._heard_speech and self._silence_bytes >= needed:
+            self._heard_speech = False
+            self._start_turn()
+
+    def _start_turn(self):
+        if self._turn_task is not None and not self._turn_task.done():
+            return
+        self._turn_task = asyncio.ensure_future(self._respond())
+
+    async def _respond(self):
+        opts = self.options
+        self.turns += 1
+        await asyncio.sleep(opts['latency'])
+
+        if opts['tool_every'] and self.turns % opts['tool_every'] == 0:
+            tool_use_id = str(uuid.uuid4())
+            future = asyncio.get_running_loop().create_future()
+            self._tool_results[tool_use_id] = future
+            self._emit({"contentStart": {"role": "TOOL", "type": "TOOL"}})
+            self._emit({"toolUse": {
+                "toolName": opts['tool_name'],
+                "toolUseId": tool_use_id,
+                "content": json.dumps(opts['tool_input']),
+            }})
+            if opts['tool_end_delay']:
+                await asyncio.sleep(opts['tool_end_delay'])
+            self._emit({"contentEnd": {"type": "TOOL"}})
+            try:
+                await asyncio.wait_for(future, opts['tool_timeout'])
+            except asyncio.TimeoutError:
+                pass
+            self._tool_results.pop(tool_use_id, None)
+            # The model thinks again once it has the tool result
+            await asyncio.sleep(opts['latency'])
+
+        speculative = json.dumps({"generationStage": "SPECULATIVE"})
+        final = json.dumps({"generationStage": "FINAL"})
+        self._emit({"contentStart": {"role": "ASSISTANT", "type": "TEXT", "additionalModelFields": speculative}})
+        self._emit({"textOutput": {"role": "ASSISTANT", "content": opts['reply_text']}})
+        self._emit({"contentEnd": {"type": "TEXT"}})
+
+        self._emit({"contentStart": {"role": "ASSISTANT", "type": "AUDIO"}})
+        chunk_bytes = int(OUTPUT_SAMPLE_RATE * opts['audio_chunk_ms'] / 1000) * 2
+        chunk = base64.b64encode(bytes(chunk_bytes)).decode('ascii')
+        n_chunks = max(1, opts['reply_audio_ms'] // opts['audio_chunk_ms'])
+        for _ in range(n_chunks):
+            if self.closed:
+                return
+            self._emit({"audioOutput": {"role": "ASSISTANT", "content": chunk}})
+            if opts['realtime_audio']:
+                await asyncio.sleep(opts['audio_chunk_ms'] / 1000)
+        self._emit({"contentEnd": {"type": "AUDIO"}})
+
+        self._emit({"contentStart": {"role": "ASSISTANT", "type": "TEXT", "additionalModelFields": final}})
+        self._emit({"textOutput": {"role": "ASSISTANT", "content": opts['reply_text']}})
+        self._emit({"contentEnd": {"type": "TEXT"}})
+
+    async def close(self):
+        """Close the stream and release its slot on the client."""
+        if self.closed:
+            return
+        self.closed = True
+        for task in (self._turn_task, self._server_task):
+            if task is not None and not task.done() and task is not asyncio.current_task():
+                task.cancel()
+        self._emit({"completionEnd": {}})
+        self._output.put_nowait(None)
+        self._client._release(self)
+
+class LocalBedrockClient:
+    """Drop-in stand-in for BedrockRuntimeClient backed by LocalStream."""
+
+    def __init__(
+        self,
+        max_streams=None,
+        handshake_delay=0.0,
+        reply_text="This is a local test response.",
+        reply_audio_ms=400,
+        audio_chunk_ms=40,
+        latency=0.05,
+        turn_audio_events=25,
+        turn_audio_bytes=None,
+        turn_silence_ms=None,
+        tool_every=0,
+        tool_name="getDateAndTimeTool",
+        tool_input=None,
+        tool_timeout=5.0,
+        tool_end_delay=0.0,
+        realtime_audio=False,
+    ):
+        """Initialize the stand-in.
+
+        Args:
+            max_streams (int, optional): Concurrent stream quota; exceeding it
+                raises LocalQuotaExceeded
+            handshake_delay (float): Seconds to simulate stream setup
+            reply_text (str): Text of every assistant reply
+            reply_audio_ms (int): Length of every assistant audio reply
+            audio_chunk_ms (int): Length of each audioOutput event
+            latency (float): Seconds between end of user turn and first reply
+            turn_audio_events (int): audioInput events that make up a user turn
+            turn_audio_bytes (int, optional): PCM bytes that make up a user turn;
+                overrides turn_audio_events so coalesced audio counts correctly
+            turn_silence_ms (int, optional): End a turn after speech followed by
+                this much all-zero PCM; overrides the two options above
+            tool_every (int): Emit a toolUse every N turns (0 disables tools)
+            tool_name (str): Tool requested by the stand-in
+            tool_input (dict, optional): Tool arguments
+            tool_timeout (float): Seconds to wait for a toolResult
+            tool_end_delay (float): Seconds between a toolUse and its contentEnd
+            realtime_audio (bool): Pace audioOutput events in real time
+        """
+        self.max_streams = max_streams
+        self.handshake_delay = handshake_delay
+        self.options = {
+            'reply_text': reply_text,
+            'reply_audio_ms': reply_audio_ms,
+            'audio_chunk_ms': audio_chunk_ms,
+            'latency': latency,
+            'turn_audio_events': turn_audio_events,
+            'turn_audio_bytes': turn_audio_bytes,
+            'turn_silence_ms': turn_silence_ms,
+            'tool_every': tool_every,
+            'tool_name': tool_name,
+            'tool_input': tool_input or {},
+            'tool_timeout': tool_timeout,
+            'tool_end_delay': tool_end_delay,
+            'realtime_audio': realtime_audio,
+        }
+        self.active = set()
+        self.streams_opened = 0
+        self.peak_active = 0
+
+    async def invoke_model_with_bidirectional_stream(self, operation_input=None):
+        """Open a simulated stream, enforcing the concurrent stream quota."""
+        if self.max_streams is not None and len(self.active) >= self.max_streams:
+            raise LocalQuotaExceeded(
+                "ServiceQuotaExceededException: too many concurrent bidirectional streams"
+            )
+        stream = LocalStream(self, self.options)
+        self.active.add(stream)
+        self.streams_opened += 1
+        self.peak_active = max(self.peak_active, len(self.active))
+        if self.handshake_delay:
+            await asyncio.sleep(self.handshake_delay)
+        return stream
+
+    def _release(self, stream):
+        self.active.discard(stream)
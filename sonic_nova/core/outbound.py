@@ -0,0 +1,195 @@
+"""Prioritized outbound event writer for the Sonic Nova application.
+
+All events for a session leave through a single OutboundWriter task instead
+of every caller racing on input_stream.send. The writer has two lanes:
+
+- LANE_CONTROL: session setup and tool-result events. Always sent first, so
+  a tool reply never waits behind a backlog of audio.
+- LANE_BULK: audio chunks plus the events that must stay ordered with them
+  (the audio contentStart/contentEnd, promptEnd, sessionEnd).
+
+Each lane is bounded. When a lane is full, submit() waits, which pushes
+backpressure onto the producer. Queue wait and send time are published per
+lane, and sends that fail with transient errors are retried with
+exponential backoff.
+"""
+
+import asyncio
+from collections import deque
+from sonic_nova.config.settings import (
+    OUTBOUND_CONTROL_CAPACITY,
+    OUTBOUND_BULK_CAPACITY,
+    OUTBOUND_MAX_RETRIES,
+    OUTBOUND_RETRY_BACKOFF,
+)
+from sonic_nova.utils.helpers import debug_print
+from sonic_nova.utils.metrics import metrics
+
+LANE_CONTROL = 'control'
+LANE_BULK = 'bulk'
+
+# Errors worth retrying: the stream is still usable, the send just failed
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError, asyncio.TimeoutError)
+
+class _Lane:
+    """A bounded FIFO with backpressure."""
+
+    def __init__(self, name, capacity):
+        self.name = name
+        self.capacity = capacity
+        self.items = deque()
+        self.space = asyncio.Semaphore(capacity)
+
+class OutboundWriter:
+    """Single writer task per session with priority lanes."""
+
+    def __init__(
+        self,
+        send,
+        control_capacity=OUTBOUND_CONTROL_CAPACITY,
+        bulk_capacity=OUTBOUND_BULK_CAPACITY,
+        max_retries=OUTBOUND_MAX_RETRIES,
+        retry_backoff=OUTBOUND_RETRY_BACKOFF,
+        metrics_registry=None,
+    ):
+        """Initialize the writer.
+
+        Args:
+            send (callable): async function(payload, event_type) performing the
+                actual send; raises on failure
+            control_capacity (int): Maximum queued control events
+            bulk_capacity (int): Maximum queued bulk events
+            max_retries (int): Retries for transient send failures
+            retry_backoff (float): Initial retry delay in seconds, doubled per retry
+            metrics_registry (MetricsRegistry, optional): Where to publish stats
+        """
+        self._send = send
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.metrics = metrics_registry or metrics
+        self._lanes = {
+            LANE_CONTROL: _Lane(LANE_CONTROL, control_capacity),
+            LANE_BULK: _Lane(LANE_BULK, bulk_capacity),
+        }
+        self._order = (self._lanes[LANE_CONTROL], self._lanes[LANE_BULK])
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._pending = 0
+        self._task = None
+        self.sent = 0
+        self.dropped = 0
+
+    @property
+    def is_running(self):
+        """bool: True while the writer task is alive."""
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the writer task on the running loop."""
+        if not self.is_running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def depth(self, lane=None):
+        """Return the number of queued events in one lane or in all lanes."""
+        if lane is not None:
+            return len(self._lanes[lane].items)
+        return sum(len(l.items) for l in self._order)
+
+    async def submit(self, payload, event_type=None, lane=LANE_BULK):
+        """Queue an event, waiting while its lane is full.
+
+        Args:
+            payload (bytes): Serialized event
+            event_type (str, optional): Event type, for logging and metrics
+            lane (str): LANE_CONTROL or LANE_BULK
+        """
+        target = self._lanes[lane]
+        if target.space.locked():
+            self.metrics.increment(f"outbound.{lane}.backpressure")
+        await target.space.acquire()
+        loop = asyncio.get_running_loop()
+        target.items.append((payload, event_type, loop.time()))
+        self._pending += 1
+        self._idle.clear()
+        self._wakeup.set()
+
+    def _next(self):
+        for lane in self._order:
+            if lane.items:
+                return lane, lane.items.popleft()
+        return None, None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lane, item = self._next()
+            if item is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            lane.space.release()
+            payload, event_type, enqueued = item
+            started = loop.time()
+            self.metrics.observe(f"outbound.{lane.name}.queue_ms", (started - enqueued) * 1000)
+            try:
+                await self._send_with_retry(payload, event_type)
+                self.metrics.observe(f"outbound.{lane.name}.send_ms", (loop.time() - started) * 1000)
+            finally:
+                self._pending -= 1
+                if self._pending == 0:
+                    self._idle.set()
+
+    async def _send_with_retry(self, payload, event_type):
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self._send(payload, event_type)
+                self.sent += 1
+                return
+            except asyncio.CancelledError:
+                raise
+            except TRANSIENT_ERRORS as e:
+                if attempt == self.max_retries:
+                    error = e
+                    break
+                self.metrics.increment("outbound.retries")
+                debug_print("Transient send error (%s), retrying in %.2fs", e, delay, event_type=event_type)
+                await asyncio.sleep(delay)
+                delay *= 2
+            except Exception as e:
+                error = e
+                break
+        self.dropped += 1
+        self.metrics.increment("outbound.dropped")
+        debug_print("Error sending event: %s", error, event_type=event_type)
+
+    async def drain(self, timeout=None):
+        """Wait until every queued event has been sent or dropped.
+
+        Args:
+            timeout (float, optional): Seconds to wait
+
+        Returns:
+            bool: True if the writer drained, False on timeout
+        """
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self, timeout=2.0):
+        """Drain pending events, then stop the writer task.
+
+        Args:
+            timeout (float): Seconds to wait for pending events
+        """
+        if self.is_running:
+            await self.drain(timeout)
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
@@ -0,0 +1,180 @@
+"""Playback backlog tracking and catch-up time compression.
+
+After a network stall the model's audio arrives in a burst and queues up in
+audio_output_queue. Played at normal speed, the rest of the turn then runs
+seconds behind the conversation. AudioStreamer instead speeds playback up
+slightly while the queued audio exceeds PLAYBACK_CATCHUP_THRESHOLD_MS, and
+returns to normal speed once it is back to PLAYBACK_CATCHUP_TARGET_MS. No
+audio is dropped.
+
+Speed-up uses WSOLA (waveform-similarity overlap-add): Hann-windowed frames
+are taken from the input at a faster hop than they are laid down in the
+output, and each frame's start is nudged within a small search window to
+the offset that best continues the previous frame. That keeps the pitch
+and avoids the phasing artefacts of plain overlap-add. The similarity
+search for a frame is a single correlation over all candidate offsets.
+
+- AudioQueue: asyncio.Queue of PCM chunks that keeps a running byte total
+- CatchUpController: decides the playback speed from the queued duration,
+  with hysteresis
+- TimeStretcher: streaming WSOLA over 16-bit mono PCM chunks
+"""
+
+import asyncio
+import numpy as np
+from sonic_nova.config.settings import (
+    OUTPUT_SAMPLE_RATE,
+    PLAYBACK_CATCHUP_THRESHOLD_MS,
+    PLAYBACK_CATCHUP_TARGET_MS,
+    PLAYBACK_CATCHUP_SPEED,
+    PLAYBACK_WSOLA_FRAME_MS,
+    PLAYBACK_WSOLA_SEARCH_MS
+)
+
+class AudioQueue(asyncio.Queue):
+    """asyncio.Queue of PCM chunks that tracks how many bytes are queued."""
+
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self.nbytes = 0
+
+    def _put(self, item):
+        super()._put(item)
+        self.nbytes += len(item)
+
+    def _get(self):
+        item = super()._get()
+        self.nbytes -= len(item)
+        return item
+
+class CatchUpController:
+    """Chooses the playback speed from the playback backlog."""
+
+    def __init__(self, threshold_ms=PLAYBACK_CATCHUP_THRESHOLD_MS, target_ms=PLAYBACK_CATCHUP_TARGET_MS,
+                 speed=PLAYBACK_CATCHUP_SPEED):
+        """Initialize the controller.
+
+        Args:
+            threshold_ms (float): Backlog above which playback speeds up
+            target_ms (float): Backlog at or below which it returns to 1.0x
+            speed (float): Playback speed while catching up
+        """
+        self.threshold_ms = threshold_ms
+        self.target_ms = target_ms
+        self.speed = speed
+        self.catching_up = False
+
+    def update(self, backlog_ms):
+        """Return the speed for the next chunk given the queued duration."""
+        if backlog_ms > self.threshold_ms:
+            self.catching_up = True
+        elif backlog_ms <= self.target_ms:
+            self.catching_up = False
+        return self.speed if self.catching_up else 1.0
+
+class TimeStretcher:
+    """Streaming, pitch-preserving WSOLA time compression of 16-bit mono PCM."""
+
+    def __init__(self, sample_rate=OUTPUT_SAMPLE_RATE, frame_ms=PLAYBACK_WSOLA_FRAME_MS,
+                 search_ms=PLAYBACK_WSOLA_SEARCH_MS):
+        """Initialize the stretcher.
+
+        Args:
+            sample_rate (int): Sample rate of the PCM
+            frame_ms (float): Analysis frame length; output hop is half of it
+            search_ms (float): How far a frame may move to match the previous one
+        """
+        self.frame = int(sample_rate * frame_ms / 1000) // 2 * 2
+        self.hop = self.frame // 2
+        self.search = int(sample_rate * search_ms / 1000)
+        # Periodic Hann: overlapping halves at 50% sum to exactly one
+        self.window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(self.frame) / self.frame)).astype(np.float32)
+        self.reset()
+
+    @property
+    def active(self):
+        """True while input is held between calls."""
+        return self._input is not None
+
+    def reset(self):
+        """Drop all held audio, e.g. on barge-in."""
+        self._input = None
+        self._pos = 0.0  # Nominal start of the next frame in _input
+        self._prev = None  # Start of the previous frame in _input
+        self._tail = None  # Windowed second half of the previous frame
+
+    def process(self, pcm, speed):
+        """Compress a chunk by speed.
+
+        Output lags input by about one frame plus the search window; the held
+        samples come out with the next call or flush().
+
+        Args:
+            pcm (bytes-like): 16-bit mono PCM
+            speed (float): Playback speed, e.g. 1.25 plays 25% faster
+
+        Returns:
+            bytes: Compressed PCM
+        """
+        x = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        x = x if self._input is None else np.concatenate([self._input, x])
+        self._input = x
+        step = self.hop * speed
+        n, hop, search = self.frame, self.hop, self.search
+        out = []
+        while True:
+            nominal = int(round(self._pos))
+            if self._prev is None:
+                # First frame continues straight on from what was played before
+                if len(x) < n:
+                    break
+                start = 0
+                out.append(x[:hop])
+            else:
+                natural = self._prev + hop
+                lo = max(nominal - search, 0)
+                hi = nominal + search + n
+                if hi > len(x) or natural + n > len(x):
+                    break
+                # Best match of every candidate start against the previous
+                # frame's natural continuation, in one correlation
+                scores = np.correlate(x[lo:hi], x[natural:natural + n], mode='valid')
+                start = lo + int(np.argmax(scores))
+                out.append(self._tail + x[start:start + hop] * self.window[:hop])
+            self._tail = x[start + hop:start + n] * self.window[hop:]
+            self._prev = start
+            self._pos += step
+        self._trim()
+        if not out:
+            return b''
+        return np.clip(np.concatenate(out), -32768, 32767).astype(np.int16).tobytes()
+
+    def flush(self, pcm=b''):
+        """Return to normal speed: release held audio, followed by pcm.
+
+        The previous frame's overlap is completed with the input that
+        naturally follows it, so the switch back is seamless.
+        """
+        if self._input is None:
+            return bytes(pcm)
+        if self._prev is None:
+            held = self._input
+        else:
+            natural = self._prev + self.hop
+            rest = self._input[natural:]
+            held = rest.copy()
+            overlap = min(len(held), len(self._tail))
+            held[:overlap] = self._tail[:overlap] + rest[:overlap] * self.window[:self.hop][:overlap]
+        self.reset()
+        held = np.clip(held, -32768, 32767).astype(np.int16).tobytes()
+        return held + bytes(pcm)
+
+    def _trim(self):
+        """Drop input no later frame can reach."""
+        if self._prev is None:
+            return
+        keep = min(self._prev + self.hop, max(int(round(self._pos)) - self.search, 0))
+        if keep > 0:
+            self._input = self._input[keep:]
+            self._prev -= keep
+            self._pos -= keep
@@ -0,0 +1,150 @@
+"""Parallel session startup for the Sonic Nova application.
+
+Opening the audio devices and setting up the Bedrock stream do not depend on
+each other. start_session() opens the devices on a worker thread while the
+stream handshake and init events run on the event loop. It then sends the
+audio contentStart, after which the user can speak. Time to "speak now" is
+roughly the longer of the two branches rather than their sum.
+
+StartupTimeline records every phase with its start and end relative to
+launch, so the report shows both branches side by side.
+
+Usage:
+    >>> timeline = StartupTimeline()
+    >>> audio_streamer = AudioStreamer(stream_manager, open_devices=False)
+    >>> await start_session(stream_manager, audio_streamer, timeline)
+    >>> print(timeline.format())
+"""
+
+import time
+import asyncio
+import threading
+import contextlib
+from sonic_nova.utils.helpers import debug_print
+from sonic_nova.utils.metrics import metrics
+
+# Top-level phases of each branch; sub-phases are nested inside these
+PHASE_DEVICES = 'audio_devices'
+PHASE_STREAM = 'bedrock_stream'
+PHASE_CONTENT_START = 'audio_content_start'
+
+class StartupTimeline:
+    """Thread-safe record of startup phases relative to launch."""
+
+    def __init__(self, clock=time.perf_counter):
+        """Initialize the timeline; launch is the moment of construction.
+
+        Args:
+            clock (callable): Monotonic clock in seconds
+        """
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.t0 = clock()
+        self.phases = {}
+        self.ready_at = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time the enclosed block as a phase; usable from any thread."""
+        start = self._clock() - self.t0
+        try:
+            yield
+        finally:
+            end = self._clock() - self.t0
+            with self._lock:
+                self.phases[name] = (start, end)
+            metrics.observe(f"startup.{name}_ms", (end - start) * 1000)
+
+    def mark_ready(self):
+        """Record the moment the user can start speaking."""
+        self.ready_at = self._clock() - self.t0
+        metrics.observe("startup.ready_ms", self.ready_at * 1000)
+
+    def report(self, top_level=(PHASE_DEVICES, PHASE_STREAM, PHASE_CONTENT_START)):
+        """Return the timeline as a dict.
+
+        Args:
+            top_level (tuple): Phases that would run back to back without
+                parallel startup, used for the sequential estimate
+
+        Returns:
+            dict: phases (name -> start_ms, end_ms, duration_ms), ready_ms,
+            sequential_ms and saved_ms
+        """
+        with self._lock:
+            phases = dict(self.phases)
+        sequential = sum(end - start for name, (start, end) in phases.items() if name in top_level)
+        ready = self.ready_at if self.ready_at is not None else 0.0
+        return {
+            'phases': {
+                name: {
+                    'start_ms': start * 1000,
+                    'end_ms': end * 1000,
+                    'duration_ms': (end - start) * 1000,
+                }
+                for name, (start, end) in sorted(phases.items(), key=lambda item: item[1][0])
+            },
+            'ready_ms': ready * 1000,
+            'sequential_ms': sequential * 1000,
+            'saved_ms': max(0.0, sequential - ready) * 1000,
+        }
+
+    def format(self, width=40):
+        """Return the timeline as text with one bar per phase."""
+        report = self.report()
+        total = max([report['ready_ms']] + [p['end_ms'] for p in report['phases'].values()] + [1e-9])
+        lines = ["Startup timeline (ms):"]
+        for name, p in report['phases'].items():
+            first = int(p['start_ms'] / total * width)
+            last = max(first + 1, int(p['end_ms'] / total * width))
+            bar = ' ' * first + '#' * (last - first)
+            lines.append(f"  {name:<24} {p['start_ms']:>7.0f} {p['end_ms']:>7.0f}  |{bar:<{width}}|")
+        lines.append(
+            f"  ready after {report['ready_ms']:.0f} ms "
+            f"(sequential estimate {report['sequential_ms']:.0f} ms, saved {report['saved_ms']:.0f} ms)"
+        )
+        return '\n'.join(lines)
+
+def timed_phase(timeline, name):
+    """Return timeline.phase(name), or a no-op context when timeline is None."""
+    return timeline.phase(name) if timeline is not None else contextlib.nullcontext()
+
+async def start_session(stream_manager, audio_streamer, timeline=None):
+    """Open audio devices and the Bedrock stream concurrently.
+
+    Args:
+        stream_manager (BedrockStreamManager): Session to initialize
+        audio_streamer (AudioStreamer): Created with open_devices=False
+        timeline (StartupTimeline, optional): Where to record phases
+
+    Raises:
+        Exception: The first failure of either branch, after closing the
+            stream and whatever devices were opened
+    """
+    loop = asyncio.get_running_loop()
+
+    def open_devices():
+        with timed_phase(timeline, PHASE_DEVICES):
+            audio_streamer.open_devices(timeline)
+
+    async def open_stream():
+        with timed_phase(timeline, PHASE_STREAM):
+            await stream_manager.initialize_stream(timeline)
+
+    devices, stream = await asyncio.gather(
+        loop.run_in_executor(None, open_devices),
+        open_stream(),
+        return_exceptions=True,
+    )
+    if isinstance(devices, BaseException) or isinstance(stream, BaseException):
+        # A failed open_devices() may have left PyAudio or a stream open
+        audio_streamer.close_devices()
+        if not isinstance(stream, BaseException):
+            await stream_manager.close()
+        raise devices if isinstance(devices, BaseException) else stream
+
+    with timed_phase(timeline, PHASE_CONTENT_START):
+        await stream_manager.send_audio_content_start_event()
+    if timeline is not None:
+        timeline.mark_ready()
+        debug_print("%s", timeline.format())
@@ -0,0 +1,465 @@
+"""Multi-process worker sharding for the Sonic Nova application.
+
+A single asyncio loop saturates one core. WorkerSupervisor starts N worker
+processes, each running its own event loop and hosting many sessions, and
+assigns new sessions to the least-loaded worker. It restarts workers that
+crash, with exponential backoff so a worker that crashes on startup does
+not spin, and folds the metrics every worker publishes into one registry.
+
+With a checkpoint directory, each worker keeps its sessions' checkpoints in
+a file of its own (two processes appending to and compacting one file would
+corrupt it). A restarted worker reopens the file its predecessor left and
+starts every unfinished session again under its session id, with its
+original config plus the checkpoint in config['restore']. Until then the
+supervisor keeps those sessions assigned to the worker, and only counts
+the ones that could not be recovered as lost.
+
+A session is an async callable run inside a worker:
+
+    async def run_session(session_id, config):
+        manager = manager_for_session(config)  # new, or restored after a crash
+        await manager.initialize_stream()
+        ...
+
+The callable must be importable by the worker (a module-level function),
+because workers are started with the "spawn" method by default.
+
+Usage:
+    >>> supervisor = WorkerSupervisor(run_session, num_workers=4, checkpoint_dir='checkpoints')
+    >>> supervisor.start()
+    >>> session_id, worker_id = supervisor.submit_session({"model_id": DEFAULT_MODEL_ID})
+    >>> supervisor.aggregate_metrics()
+    >>> supervisor.stop()
+"""
+
+import os
+import time
+import uuid
+import queue
+import asyncio
+import threading
+import traceback
+import multiprocessing
+from sonic_nova.config.settings import (
+    WORKER_COUNT,
+    WORKER_REPORT_INTERVAL,
+    WORKER_RESTART_BACKOFF,
+    WORKER_RESTART_BACKOFF_MAX,
+    CHECKPOINT_DIR
+)
+from sonic_nova.core.checkpoint import CheckpointStore
+from sonic_nova.utils.metrics import MetricsRegistry, metrics
+
+# Worker -> supervisor event types
+EVENT_READY = 'ready'
+EVENT_REPORT = 'report'
+EVENT_SESSION_END = 'session_end'
+
+class _WorkerHost:
+    """Runs inside a worker process: hosts sessions on one event loop."""
+
+    def __init__(self, worker_id, session_target, commands, events, report_interval, checkpoint_dir=None):
+        self.worker_id = worker_id
+        self.session_target = session_target
+        self.commands = commands
+        self.events = events
+        self.report_interval = report_interval
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoints = None
+        self.sessions = {}
+        self.loop = None
+        self._stopped = None
+
+    def _read_commands(self):
+        """Forward commands from the supervisor queue onto the event loop."""
+        while True:
+            command = self.commands.get()
+            self.loop.call_soon_threadsafe(self._handle, command)
+            if command.get('op') == 'shutdown':
+                return
+
+    def _handle(self, command):
+        op = command.get('op')
+        if op == 'start_session':
+            self._start_session(command['session_id'], command.get('config') or {})
+        elif op == 'stop_session':
+            task = self.sessions.get(command['session_id'])
+            if task:
+                task.cancel()
+        elif op == 'shutdown':
+            for task in self.sessions.values():
+                task.cancel()
+            self._stopped.set()
+
+    def _start_session(self, session_id, config):
+        if self.checkpoints is not None:
+            config = dict(config, session_id=session_id, checkpoints=self.checkpoints)
+        self.sessions[session_id] = self.loop.create_task(self._run_session(session_id, config))
+
+    def _open_checkpoints(self):
+        """Open this worker's checkpoint file; returns the sessions left in it."""
+        if not self.checkpoint_dir:
+            return {}
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        path = os.path.join(self.checkpoint_dir, f"worker-{self.worker_id}.log")
+        self.checkpoints = CheckpointStore(path)
+        recovered = self.checkpoints.begin_recovery()
+        self.checkpoints.recovered.clear()
+        return recovered
+
+    async def _run_session(self, session_id, config):
+        error = None
+        started = time.process_time()
+        try:
+            await self.session_target(session_id, config)
+        except asyncio.CancelledError:
+            error = 'cancelled'
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        finally:
+            self.sessions.pop(session_id, None)
+            metrics.increment("worker.sessions_completed")
+            self.events.put({
+                'type': EVENT_SESSION_END,
+                'worker': self.worker_id,
+                'session_id': session_id,
+                'error': error,
+                'cpu_seconds': time.process_time() - started,
+            })
+
+    def _report(self):
+        # Send metric deltas so the supervisor can simply add them up
+        raw = metrics.take_raw()
+        self.events.put({
+            'type': EVENT_REPORT,
+            'worker': self.worker_id,
+            'pid': os.getpid(),
+            'sessions': len(self.sessions),
+            'cpu_seconds': time.process_time(),
+            'metrics': raw,
+        })
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self._report()
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        recovered = self._open_checkpoints()
+        threading.Thread(target=self._read_commands, name="worker-commands", daemon=True).start()
+        self.events.put({'type': EVENT_READY, 'worker': self.worker_id, 'pid': os.getpid(),
+                         'recovered': list(recovered)})
+        # Sessions a crashed predecessor left unfinished; each reconnects on its own
+        for session_id, state in recovered.items():
+            self._start_session(session_id, dict(state.get('session_config') or {}, restore=state))
+        reporter = asyncio.create_task(self._report_loop())
+        await self._stopped.wait()
+        if self.sessions:
+            await asyncio.gather(*self.sessions.values(), return_exceptions=True)
+        if self.checkpoints is not None:
+            await self.loop.run_in_executor(None, self.checkpoints.close)
+        reporter.cancel()
+        self._report()
+
+def _worker_main(worker_id, session_target, commands, events, report_interval, checkpoint_dir=None):
+    """Entry point of a worker process."""
+    host = _WorkerHost(worker_id, session_target, commands, events, report_interval, checkpoint_dir)
+    try:
+        asyncio.run(host.run())
+    except KeyboardInterrupt:
+        pass
+
+class _WorkerHandle:
+    """Supervisor-side bookkeeping for one worker process."""
+
+    def __init__(self, worker_id, process, commands):
+        self.worker_id = worker_id
+        self.process = process
+        self.commands = commands
+        self.sessions = set()
+        self.pid = None
+        self.cpu_seconds = 0.0
+        self.restarts = 0
+        self.started = time.monotonic()
+        # Consecutive short-lived crashes, and when a crashed worker is respawned
+        self.crash_streak = 0
+        self.restart_at = None
+        # Sessions of a crashed predecessor awaiting recovery, and the ones
+        # among them asked to stop before they were recovered
+        self.recovering = set()
+        self.pending_stops = set()
+
+class WorkerSupervisor:
+    """Starts, load-balances and restarts session worker processes."""
+
+    def __init__(
+        self,
+        session_target,
+        num_workers=WORKER_COUNT,
+        report_interval=WORKER_REPORT_INTERVAL,
+        monitor_interval=0.2,
+        mp_context='spawn',
+        restart_backoff=WORKER_RESTART_BACKOFF,
+        restart_backoff_max=WORKER_RESTART_BACKOFF_MAX,
+        checkpoint_dir=CHECKPOINT_DIR,
+    ):
+        """Initialize the supervisor.
+
+        Args:
+            session_target (callable): async function(session_id, config) run
+                in a worker for each session
+            num_workers (int, optional): Number of worker processes. Defaults
+                to the number of CPU cores.
+            report_interval (float): Seconds between worker load/metrics reports
+            monitor_interval (float): Seconds between worker liveness checks
+            mp_context (str): multiprocessing start method
+            restart_backoff (float): Seconds before restarting a crashed
+                worker, doubled for each consecutive crash
+            restart_backoff_max (float): Longest restart delay
+            checkpoint_dir (str, optional): Directory for the workers'
+                checkpoint files; None disables crash recovery
+        """
+        self.session_target = session_target
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.report_interval = report_interval
+        self.monitor_interval = monitor_interval
+        self.restart_backoff = restart_backoff
+        self.restart_backoff_max = restart_backoff_max
+        self.checkpoint_dir = checkpoint_dir
+        self._ctx = multiprocessing.get_context(mp_context)
+        self._events = self._ctx.Queue()
+        self._workers = {}
+        self._assignments = {}
+        self._lock = threading.RLock()
+        self._running = False
+        self._threads = []
+        self.metrics = MetricsRegistry()
+        self.ended_sessions = queue.SimpleQueue()
+
+    def _spawn(self, worker_id):
+        commands = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.session_target, commands, self._events, self.report_interval,
+                  self.checkpoint_dir),
+            name=f"sonic-nova-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        return _WorkerHandle(worker_id, process, commands)
+
+    def start(self):
+        """Start all workers and the supervisor's monitor threads."""
+        if self._running:
+            return
+        self._running = True
+        with self._lock:
+            for worker_id in range(self.num_workers):
+                self._workers[worker_id] = self._spawn(worker_id)
+        for target, name in ((self._read_events, "supervisor-events"), (self._monitor, "supervisor-monitor")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _read_events(self):
+        while self._running:
+            try:
+                event = self._events.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            self._handle_event(event)
+
+    def _handle_event(self, event):
+        with self._lock:
+            handle = self._workers.get(event.get('worker'))
+            kind = event.get('type')
+            if kind == EVENT_READY and handle:
+                handle.pid = event['pid']
+                recovered = set(event.get('recovered', ()))
+                lost = handle.recovering - recovered
+                for session_id in lost:
+                    handle.sessions.discard(session_id)
+                    self._assignments.pop(session_id, None)
+                for session_id in recovered:
+                    handle.sessions.add(session_id)
+                    self._assignments[session_id] = handle.worker_id
+                for session_id in handle.pending_stops & recovered:
+                    handle.commands.put({'op': 'stop_session', 'session_id': session_id})
+                handle.recovering.clear()
+                handle.pending_stops.clear()
+                self.metrics.increment("supervisor.sessions_recovered", len(recovered))
+                self.metrics.increment("supervisor.sessions_lost", len(lost))
+            elif kind == EVENT_REPORT:
+                if handle:
+                    handle.cpu_seconds = event['cpu_seconds']
+                self.metrics.merge_raw(event['metrics'])
+            elif kind == EVENT_SESSION_END:
+                session_id = event['session_id']
+                if handle:
+                    handle.sessions.discard(session_id)
+                self._assignments.pop(session_id, None)
+                self.metrics.observe("supervisor.session_cpu_seconds", event['cpu_seconds'])
+                self.ended_sessions.put(event)
+
+    def _monitor(self):
+        while self._running:
+            time.sleep(self.monitor_interval)
+            with self._lock:
+                if not self._running:
+                    return
+                for worker_id, handle in list(self._workers.items()):
+                    if handle.process.is_alive():
+                        continue
+                    if handle.restart_at is None:
+                        self._schedule_restart(handle)
+                    elif time.monotonic() >= handle.restart_at:
+                        replacement = self._spawn(worker_id)
+                        replacement.restarts = handle.restarts + 1
+                        replacement.crash_streak = handle.crash_streak
+                        replacement.sessions = handle.sessions
+                        replacement.recovering = handle.recovering
+                        replacement.pending_stops = handle.pending_stops
+                        self._workers[worker_id] = replacement
+                        self.metrics.increment("supervisor.worker_restarts")
+
+    def _schedule_restart(self, handle):
+        """Account for a crashed worker and pick when to respawn it."""
+        now = time.monotonic()
+        if self.checkpoint_dir:
+            # The replacement reports which of them it recovered
+            handle.recovering = set(handle.sessions)
+            lost = 0
+        else:
+            lost = len(handle.sessions)
+            for session_id in handle.sessions:
+                self._assignments.pop(session_id, None)
+            handle.sessions.clear()
+        if now - handle.started >= self.restart_backoff_max:
+            # It ran fine for a while; this is not a crash loop
+            handle.crash_streak = 0
+        delay = min(self.restart_backoff * 2 ** handle.crash_streak, self.restart_backoff_max)
+        handle.crash_streak += 1
+        handle.restart_at = now + delay
+        self.metrics.increment("supervisor.worker_crashes")
+        self.metrics.increment("supervisor.sessions_lost", lost)
+        print(f"Worker {handle.worker_id} exited with code {handle.process.exitcode}; "
+              f"restarting in {delay:.1f}s ({lost} sessions lost, {len(handle.recovering)} to recover)")
+
+    def _least_loaded(self):
+        # Fewest sessions first, then least CPU consumed so far; crashed
+        # workers waiting to be restarted get nothing
+        candidates = [h for h in self._workers.values() if h.restart_at is None and h.process.is_alive()]
+        if not candidates:
+            raise RuntimeError("No worker is running; all are waiting to be restarted")
+        return min(candidates, key=lambda h: (len(h.sessions), h.cpu_seconds, h.worker_id))
+
+    def submit_session(self, config=None, session_id=None):
+        """Start a session on the least-loaded worker.
+
+        Args:
+            config (dict, optional): Picklable session configuration
+            session_id (str, optional): Session identifier. Generated if omitted.
+
+        Returns:
+            tuple: (session_id, worker_id)
+
+        Raises:
+            RuntimeError: If the supervisor is stopped or no worker is running
+        """
+        if not self._running:
+            raise RuntimeError("Supervisor is not running")
+        session_id = session_id or str(uuid.uuid4())
+        with self._lock:
+            handle = self._least_loaded()
+            handle.sessions.add(session_id)
+            self._assignments[session_id] = handle.worker_id
+            handle.commands.put({'op': 'start_session', 'session_id': session_id, 'config': config})
+        self.metrics.increment("supervisor.sessions_started")
+        return session_id, handle.worker_id
+
+    def stop_session(self, session_id):
+        """Cancel a running session.
+
+        Args:
+            session_id (str): The session to stop
+
+        Returns:
+            bool: True if the session was known and a stop was sent
+        """
+        with self._lock:
+            worker_id = self._assignments.get(session_id)
+            if worker_id is None:
+                return False
+            handle = self._workers[worker_id]
+            if session_id in handle.recovering:
+                # Sent once the restarted worker has started it again
+                handle.pending_stops.add(session_id)
+            else:
+                handle.commands.put({'op': 'stop_session', 'session_id': session_id})
+            return True
+
+    def worker_loads(self):
+        """Return per-worker load.
+
+        Returns:
+            dict: worker_id -> {"pid", "alive", "sessions", "cpu_seconds",
+            "restarts", "restart_in"}; restart_in is the seconds until a
+            crashed worker is respawned, else None
+        """
+        with self._lock:
+            return {
+                worker_id: {
+                    'pid': handle.pid,
+                    'alive': handle.process.is_alive(),
+                    'sessions': len(handle.sessions),
+                    'cpu_seconds': handle.cpu_seconds,
+                    'restarts': handle.restarts,
+                    'restart_in': (max(0.0, handle.restart_at - time.monotonic())
+                                   if handle.restart_at is not None else None),
+                }
+                for worker_id, handle in self._workers.items()
+            }
+
+    def aggregate_metrics(self):
+        """Return metrics merged across all workers and the supervisor itself.
+
+        Returns:
+            dict: MetricsRegistry.snapshot() of the aggregated registry
+        """
+        return self.metrics.snapshot()
+
+    def stop(self, timeout=5.0):
+        """Shut down all workers.
+
+        Args:
+            timeout (float): Seconds to wait for each worker to exit cleanly
+        """
+        if not self._running:
+            return
+        with self._lock:
+            self._running = False
+            workers = list(self._workers.values())
+        for handle in workers:
+            try:
+                handle.commands.put({'op': 'shutdown'})
+            except (OSError, ValueError):
+                pass
+        for handle in workers:
+            handle.process.join(timeout)
+            if handle.process.is_alive():
+                handle.process.terminate()
+                handle.process.join(1.0)
+        # Collect the final reports the workers sent on shutdown
+        while True:
+            try:
+                self._handle_event(self._events.get(timeout=0.1))
+            except (queue.Empty, EOFError, OSError):
+                break
+        for thread in self._threads:
+            thread.join(1.0)
+        self._threads = []
@@ -0,0 +1,372 @@
+"""Transcript sinks for the Sonic Nova application.
+
+This module moves transcript output off the receive loop. The receive loop
+only enqueues a TranscriptEntry; one background writer thread per process
+drains the queue in batches and hands each session's batch to its sinks.
+
+The module includes:
+- TranscriptEntry: a single transcript line (user, speculative or final assistant text)
+- StdoutTranscriptSink: console output in the familiar "User: ..." format
+- JsonlTranscriptSink: one JSON object per line in a file
+- RotatingTranscriptSink: JSONL file rotated by size
+- LoopTranscriptSink: hands entries to a callback on an event loop
+- TranscriptThread: the background writer thread shared by all sessions
+- TranscriptWriter: one session's sinks, batched onto that thread
+"""
+
+import os
+import abc
+import sys
+import json
+import time
+import queue
+import threading
+
+# Generation stages reported by Nova in contentStart.additionalModelFields
+STAGE_SPECULATIVE = 'SPECULATIVE'
+STAGE_FINAL = 'FINAL'
+
+# Entry kinds
+KIND_TEXT = 'text'
+KIND_COMPLETION_END = 'completionEnd'
+
+class TranscriptEntry:
+    """A single transcript record.
+
+    Attributes:
+        role (str): Speaker role reported by the model (USER, ASSISTANT, ...)
+        text (str): Transcript text
+        stage (str): STAGE_SPECULATIVE, STAGE_FINAL or None when not reported
+        kind (str): KIND_TEXT or KIND_COMPLETION_END
+        session (str): Prompt name of the session that produced the entry
+        timestamp (float): Wall-clock time the entry was enqueued
+    """
+
+    __slots__ = ('role', 'text', 'stage', 'kind', 'session', 'timestamp')
+
+    def __init__(self, role, text, stage=None, kind=KIND_TEXT, session=None, timestamp=None):
+        self.role = role
+        self.text = text
+        self.stage = stage
+        self.kind = kind
+        self.session = session
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    @property
+    def is_speculative(self):
+        """bool: True if the entry is speculative assistant text."""
+        return self.stage == STAGE_SPECULATIVE
+
+    def to_dict(self):
+        """Return the entry as a JSON-serializable dictionary."""
+        return {
+            'timestamp': self.timestamp,
+            'session': self.session,
+            'kind': self.kind,
+            'role': self.role,
+            'stage': self.stage,
+            'text': self.text,
+        }
+
+class TranscriptSink(abc.ABC):
+    """Base class for transcript sinks.
+
+    Sinks are only ever called from the writer thread, so implementations
+    may block on I/O freely.
+    """
+
+    @abc.abstractmethod
+    def write_batch(self, entries):
+        """Write a batch of entries.
+
+        Args:
+            entries (list): TranscriptEntry objects in arrival order
+        """
+
+    def flush(self):
+        """Flush any buffered output."""
+
+    def close(self):
+        """Release resources held by the sink."""
+        self.flush()
+
+class StdoutTranscriptSink(TranscriptSink):
+    """Prints transcript lines to a text stream.
+
+    Mirrors the console output of earlier versions: user text and speculative
+    assistant text are shown, final assistant text is hidden unless requested.
+    """
+
+    def __init__(self, stream=None, show_final=False):
+        """Initialize the sink.
+
+        Args:
+            stream: Text stream to write to. Defaults to sys.stdout at write time.
+            show_final (bool): Also print final assistant text, marked "(final)"
+        """
+        self.stream = stream
+        self.show_final = show_final
+
+    def _format(self, entry):
+        if entry.kind == KIND_COMPLETION_END:
+            return "End of response sequence"
+        if entry.role == "USER":
+            return f"User: {entry.text}"
+        if entry.role == "ASSISTANT":
+            if entry.is_speculative:
+                return f"Assistant: {entry.text}"
+            if self.show_final:
+                return f"Assistant (final): {entry.text}"
+        return None
+
+    def write_batch(self, entries):
+        lines = [line for line in map(self._format, entries) if line is not None]
+        if lines:
+            stream = self.stream or sys.stdout
+            stream.write("\n".join(lines) + "\n")
+
+    def flush(self):
+        (self.stream or sys.stdout).flush()
+
+    def close(self):
+        # Never close stdout, just flush it
+        self.flush()
+
+class JsonlTranscriptSink(TranscriptSink):
+    """Appends transcript entries to a file as JSON lines."""
+
+    def __init__(self, path):
+        """Initialize the sink.
+
+        Args:
+            path (str): File to append to. Parent directories are created.
+        """
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write_batch(self, entries):
+        self._file.write(''.join(json.dumps(e.to_dict()) + '\n' for e in entries))
+
+    def flush(self):
+        if self._file and not self._file.closed:
+            self._file.flush()
+
+    def close(self):
+        if self._file and not self._file.closed:
+            self._file.flush()
+            self._file.close()
+
+class RotatingTranscriptSink(JsonlTranscriptSink):
+    """JSONL sink that rotates the file once it exceeds a size limit.
+
+    Rotation follows the logging.handlers.RotatingFileHandler naming scheme:
+    path -> path.1 -> path.2 ... up to backup_count files.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=5):
+        """Initialize the sink.
+
+        Args:
+            path (str): Active transcript file
+            max_bytes (int): Size at which the file is rotated
+            backup_count (int): Number of rotated files to keep
+        """
+        super().__init__(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+    def _rotate(self):
+        self._file.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def write_batch(self, entries):
+        super().write_batch(entries)
+        if self.max_bytes > 0 and self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+class LoopTranscriptSink(TranscriptSink):
+    """Hands each entry to a callback running on an event loop.
+
+    Used to forward transcripts to a remote caller over its connection.
+    """
+
+    def __init__(self, loop, callback):
+        """Initialize the sink.
+
+        Args:
+            loop: Event loop the callback runs on
+            callback (callable): Called with each TranscriptEntry
+        """
+        self.loop = loop
+        self.callback = callback
+
+    def write_batch(self, entries):
+        for entry in entries:
+            try:
+                self.loop.call_soon_threadsafe(self.callback, entry)
+            except RuntimeError:
+                # The loop has closed; nobody is listening any more
+                return
+
+class TranscriptThread:
+    """One background thread that writes transcripts for every session.
+
+    A host with hundreds of sessions would otherwise run hundreds of mostly
+    idle writer threads. Entries from all writers share one queue; each
+    pass takes what arrived within flush_interval and writes it per writer,
+    in arrival order.
+    """
+
+    _CLOSE = object()
+
+    def __init__(self, flush_interval=0.05, max_batch=1024):
+        """Initialize the thread; it starts on first use.
+
+        Args:
+            flush_interval (float): Seconds to wait for more entries before writing
+            max_batch (int): Maximum entries, across all writers, taken per pass
+        """
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        """Start the thread if it is not already running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="transcript-writer", daemon=True)
+                self._thread.start()
+
+    def put(self, writer, entry):
+        """Queue an entry for a writer."""
+        self._queue.put((writer, entry))
+
+    def close_writer(self, writer):
+        """Queue a writer's close, after everything it has submitted."""
+        self._queue.put((writer, self._CLOSE))
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._dispatch(batch)
+            except Exception as e:
+                sys.stderr.write(f"Transcript writer error: {e}\n")
+
+    def _dispatch(self, batch):
+        pending = {}
+        for writer, entry in batch:
+            if entry is self._CLOSE:
+                writer._write_all(pending.pop(writer, ()))
+                writer._finish()
+            else:
+                pending.setdefault(writer, []).append(entry)
+        for writer, entries in pending.items():
+            writer._write_all(entries)
+
+_shared_thread = TranscriptThread()
+
+class TranscriptWriter:
+    """Batches one session's transcript entries onto the shared writer thread.
+
+    submit() is an O(1), non-blocking enqueue that is safe to call from the
+    event loop or any thread. The shared TranscriptThread writes each
+    session's entries to its sinks in batches of at most batch_size, and
+    closes the sinks itself once everything before close() is written.
+    """
+
+    def __init__(self, sinks=None, batch_size=64, thread=None):
+        """Initialize the writer.
+
+        Args:
+            sinks (list): TranscriptSink instances. Defaults to a StdoutTranscriptSink.
+            batch_size (int): Maximum entries written per batch
+            thread (TranscriptThread, optional): Writer thread. Defaults to
+                the process-wide one.
+        """
+        self.sinks = list(sinks) if sinks is not None else [StdoutTranscriptSink()]
+        self.batch_size = batch_size
+        self._thread = thread or _shared_thread
+        self._started = False
+        self._closing = False
+        self._closed = threading.Event()
+        self.entries_written = 0
+        self.batches_written = 0
+
+    @property
+    def is_running(self):
+        """bool: True between start() and close()."""
+        return self._started and not self._closed.is_set()
+
+    def start(self):
+        """Make sure the shared writer thread is running."""
+        self._thread.ensure_started()
+        self._started = True
+
+    def submit(self, entry):
+        """Enqueue an entry for writing.
+
+        Args:
+            entry (TranscriptEntry): The entry to write
+        """
+        self._thread.put(self, entry)
+
+    def _write_all(self, entries):
+        for i in range(0, len(entries), self.batch_size):
+            self._write(entries[i:i + self.batch_size])
+
+    def _write(self, batch):
+        for sink in self.sinks:
+            try:
+                sink.write_batch(batch)
+                sink.flush()
+            except Exception as e:
+                sys.stderr.write(f"Transcript sink error: {e}\n")
+        self.entries_written += len(batch)
+        self.batches_written += 1
+
+    def _finish(self):
+        """Close the sinks; runs on the writer thread after the last entry."""
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                sys.stderr.write(f"Transcript sink error: {e}\n")
+        self._closed.set()
+
+    def close(self, timeout=2.0):
+        """Write pending entries, then close all sinks.
+
+        The sinks are closed by the writer thread once the entries before
+        this call are written, so a timeout never closes a sink under it.
+
+        Args:
+            timeout (float): Seconds to wait for that to finish
+
+        Returns:
+            bool: True if the sinks were closed within timeout
+        """
+        if not self._closing:
+            self._closing = True
+            self._thread.ensure_started()
+            self._thread.close_writer(self)
+        return self._closed.wait(timeout)
@@ -0,0 +1 @@
+# Knowledge base package
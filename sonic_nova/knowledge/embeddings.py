@@ -0,0 +1,131 @@
+"""Text embeddings for the knowledge base.
+
+The knowledge base embeds documents at ingestion time and queries during a
+spoken turn. For queries, the embedding must take a fraction of a
+millisecond and must not call out to the network. HashingEmbedder meets that:
+it maps word unigrams and bigrams into a fixed number of buckets (feature
+hashing) with sublinear term frequency. Buckets are unsigned, so two
+features that collide add up rather than cancel each other out. The result is L2 normalized,
+so a dot product is cosine similarity.
+
+Any object with a name, a dim and an embed(texts) method returning a float32
+array of shape (len(texts), dim) with unit-length rows can be used instead.
+
+CachedQueryEmbedder adds an LRU cache of query vectors in front of an
+embedder, since callers tend to repeat the same questions.
+"""
+
+import re
+import hashlib
+import functools
+import threading
+from collections import Counter, OrderedDict
+import numpy as np
+from sonic_nova.config.settings import KB_EMBEDDING_DIM, KB_QUERY_CACHE_SIZE
+from sonic_nova.utils.metrics import metrics
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Very common words carry no retrieval signal
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or "
+    "our so that the this to was what when where which who why will with you your".split()
+)
+
+def tokenize(text):
+    """Return the lowercase alphanumeric tokens of text, without stopwords."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+class HashingEmbedder:
+    """Feature-hashing embedder over word unigrams and bigrams."""
+
+    name = 'hashing-v1'
+
+    def __init__(self, dim=KB_EMBEDDING_DIM):
+        """Initialize the embedder.
+
+        Args:
+            dim (int): Number of hash buckets (vector dimension)
+        """
+        self.dim = dim
+
+    def _features(self, text):
+        tokens = tokenize(text)
+        return Counter(tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])])
+
+    def embed(self, texts):
+        """Embed texts.
+
+        Args:
+            texts (list): Strings to embed
+
+        Returns:
+            numpy.ndarray: float32 array of shape (len(texts), dim), rows of
+            unit length (all-zero for texts without tokens)
+        """
+        rows, buckets, counts = [], [], []
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            rows.extend([row] * len(features))
+            buckets.extend([_bucket(feature) for feature in features])
+            counts.extend(features.values())
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if rows:
+            weights = 1.0 + np.log(np.array(counts, dtype=np.float32))
+            np.add.at(out, (np.array(rows), np.array(buckets, dtype=np.uint64) % self.dim), weights)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+@functools.lru_cache(maxsize=1 << 18)
+def _bucket(feature):
+    """Return a 64-bit hash of feature; memoized since vocabularies repeat."""
+    # CRC32's low bits correlate across similar strings; blake2b's do not
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+class CachedQueryEmbedder:
+    """LRU cache of query embeddings in front of another embedder."""
+
+    def __init__(self, embedder, max_size=KB_QUERY_CACHE_SIZE):
+        """Initialize the cache.
+
+        Args:
+            embedder: Embedder to call on a cache miss
+            max_size (int): Queries to keep
+        """
+        self.embedder = embedder
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(query):
+        return ' '.join(query.lower().split())
+
+    def embed_query(self, query):
+        """Return the (read-only) embedding of one query."""
+        key = self._key(query)
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                metrics.increment("kb.query_cache_hits")
+                return vector
+        metrics.increment("kb.query_cache_misses")
+        vector = self.embedder.embed([key])[0]
+        vector.setflags(write=False)
+        with self._lock:
+            self._cache[key] = vector
+            if len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return vector
+
+def get_embedder(name, dim):
+    """Return the embedder an index was built with.
+
+    Raises:
+        ValueError: If the embedder name is unknown
+    """
+    if name == HashingEmbedder.name:
+        return HashingEmbedder(dim)
+    raise ValueError(f"Unknown embedder: {name}")
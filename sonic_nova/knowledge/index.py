@@ -0,0 +1,246 @@
+"""Persistent vector index for the knowledge base.
+
+An index is a directory of flat files, designed to be memory-mapped:
+
+- vectors.npy: float32 (dim, n) unit-length chunk embeddings, stored
+  dimension-major so each embedding dimension is one contiguous row
+- offsets.npy: int64 (n + 1) byte offsets of each chunk in texts.bin
+- texts.bin: UTF-8 chunk texts, concatenated
+- source_ids.npy: int32 (n) index into meta.json's sources
+- meta.json: format version, embedder, dimension, count and source names
+
+VectorIndex.open() maps the files read-only, so opening is instant. The OS
+page cache shares the pages between every session and every worker process
+on the host. Query embeddings from the hashing embedder have only a few
+non-zero dimensions. Scoring therefore reads just those rows of the
+dimension-major matrix, not the whole matrix, then selects the top k with
+argpartition. Only the texts of the top-k hits are decoded.
+
+Usage:
+    >>> from sonic_nova.knowledge.index import build_index, open_shared
+    >>> build_index("kb_index", [("Returns are accepted within 30 days.", "returns.md")])
+    >>> open_shared("kb_index").search("how long do I have to return an item")
+"""
+
+import os
+import json
+import time
+import shutil
+import threading
+import numpy as np
+from sonic_nova.config.settings import KB_INDEX_DIR, KB_TOP_K, KB_MIN_SCORE
+from sonic_nova.knowledge.embeddings import HashingEmbedder, CachedQueryEmbedder, get_embedder
+from sonic_nova.utils.helpers import debug_print
+from sonic_nova.utils.metrics import metrics
+
+FORMAT_VERSION = 1
+
+# Score from the non-zero query dimensions only when at most this share is non-zero
+SPARSE_QUERY_FRACTION = 0.25
+
+class VectorIndex:
+    """Read-only, memory-mapped vector index."""
+
+    def __init__(self, path, vectors, offsets, texts, source_ids, meta):
+        """Use VectorIndex.open() rather than calling this directly."""
+        self.path = path
+        self.vectors = vectors
+        self.offsets = offsets
+        self.texts = texts
+        self.source_ids = source_ids
+        self.meta = meta
+        self.sources = meta['sources']
+        self.query_embedder = CachedQueryEmbedder(get_embedder(meta['embedder'], meta['dim']))
+
+    @classmethod
+    def open(cls, path):
+        """Memory-map an index directory.
+
+        Args:
+            path (str): Index directory
+
+        Returns:
+            VectorIndex: The opened index
+
+        Raises:
+            FileNotFoundError: If the directory holds no index
+            ValueError: If the index format is not supported
+        """
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported index format {meta.get('version')} in {path}")
+        # Zero-length files cannot be mapped
+        mode = 'r' if meta['count'] else None
+        vectors = np.load(os.path.join(path, 'vectors.npy'), mmap_mode=mode)
+        offsets = np.load(os.path.join(path, 'offsets.npy'), mmap_mode=mode)
+        source_ids = np.load(os.path.join(path, 'source_ids.npy'), mmap_mode=mode)
+        texts_path = os.path.join(path, 'texts.bin')
+        if os.path.getsize(texts_path):
+            texts = np.memmap(texts_path, dtype=np.uint8, mode='r')
+        else:
+            texts = np.zeros(0, dtype=np.uint8)
+        return cls(path, vectors, offsets, texts, source_ids, meta)
+
+    def __len__(self):
+        return self.meta['count']
+
+    def text(self, i):
+        """Return the text of chunk i."""
+        return self.texts[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+    def source(self, i):
+        """Return the source of chunk i."""
+        return self.sources[self.source_ids[i]]
+
+    def search_vector(self, vector, k=KB_TOP_K):
+        """Return (indices, scores) of the k chunks most similar to vector."""
+        n = len(self)
+        if n == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        nonzero = np.flatnonzero(vector)
+        if len(nonzero) <= SPARSE_QUERY_FRACTION * len(vector):
+            scores = vector[nonzero] @ self.vectors[nonzero]
+        else:
+            scores = vector @ self.vectors
+        k = min(k, n)
+        if k < n:
+            top = np.argpartition(scores, n - k)[n - k:]
+        else:
+            top = np.arange(n)
+        top = top[np.argsort(scores[top])[::-1]]
+        return top, scores[top]
+
+    def search(self, query, k=KB_TOP_K, min_score=KB_MIN_SCORE):
+        """Find the chunks most relevant to a query.
+
+        Retrieval time (embedding plus search) is published as
+        kb.retrieval_ms, separately from model latency.
+
+        Args:
+            query (str): Natural-language query
+            k (int): Maximum results
+            min_score (float): Cosine similarity below which hits are dropped
+
+        Returns:
+            list: Dicts with text, source and score, best first
+        """
+        start = time.perf_counter()
+        vector = self.query_embedder.embed_query(query)
+        embedded = time.perf_counter()
+        indices, scores = self.search_vector(vector, k)
+        results = [
+            {'text': self.text(i), 'source': self.source(i), 'score': float(score)}
+            for i, score in zip(indices, scores)
+            if score >= min_score
+        ]
+        end = time.perf_counter()
+        metrics.observe("kb.embed_ms", (embedded - start) * 1000)
+        metrics.observe("kb.search_ms", (end - embedded) * 1000)
+        metrics.observe("kb.retrieval_ms", (end - start) * 1000)
+        return results
+
+def write_index(path, texts, sources, vectors, embedder):
+    """Write an index directory, replacing any previous index at path.
+
+    The new index is written next to the old one and swapped in with
+    renames, so readers never see a partial index. Sessions that have the old
+    files mapped keep reading them until they reopen.
+
+    Args:
+        path (str): Index directory
+        texts (list): Chunk texts
+        sources (list): Source name of each chunk
+        vectors (numpy.ndarray): float32 (len(texts), embedder.dim) embeddings
+        embedder: The embedder that produced vectors
+    """
+    source_names = sorted(set(sources))
+    source_lookup = {name: i for i, name in enumerate(source_names)}
+    encoded = [t.encode('utf-8') for t in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+
+    tmp = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, 'vectors.npy'), np.ascontiguousarray(np.asarray(vectors, dtype=np.float32).T))
+    np.save(os.path.join(tmp, 'offsets.npy'), offsets)
+    np.save(os.path.join(tmp, 'source_ids.npy'), np.array([source_lookup[s] for s in sources], dtype=np.int32))
+    with open(os.path.join(tmp, 'texts.bin'), 'wb') as f:
+        f.write(b''.join(encoded))
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump({
+            'version': FORMAT_VERSION,
+            'embedder': embedder.name,
+            'dim': embedder.dim,
+            'count': len(texts),
+            'sources': source_names,
+        }, f)
+
+    old = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+
+def build_index(path, chunks, embedder=None, batch_size=256):
+    """Embed (text, source) chunks in batches and write an index.
+
+    Args:
+        path (str): Index directory
+        chunks (iterable): (text, source) pairs
+        embedder (optional): Defaults to HashingEmbedder
+        batch_size (int): Chunks embedded per call
+
+    Returns:
+        VectorIndex: The new index, opened
+    """
+    embedder = embedder or HashingEmbedder()
+    texts, sources, batches = [], [], []
+    batch = []
+    for text, source in chunks:
+        texts.append(text)
+        sources.append(source)
+        batch.append(text)
+        if len(batch) == batch_size:
+            batches.append(embedder.embed(batch))
+            batch = []
+    if batch:
+        batches.append(embedder.embed(batch))
+    vectors = np.concatenate(batches) if batches else np.zeros((0, embedder.dim), dtype=np.float32)
+    write_index(path, texts, sources, vectors, embedder)
+    return VectorIndex.open(path)
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+def open_shared(path):
+    """Return the process-wide VectorIndex for path.
+
+    The index is reopened when its meta.json changes, e.g. after an
+    ingestion run.
+
+    Args:
+        path (str): Index directory
+
+    Returns:
+        VectorIndex: The shared index
+    """
+    key = os.path.realpath(path)
+    stamp = os.stat(os.path.join(key, 'meta.json')).st_mtime_ns
+    with _shared_lock:
+        entry = _shared.get(key)
+        if entry is None or entry[0] != stamp:
+            entry = _shared[key] = (stamp, VectorIndex.open(key))
+            debug_print("Opened knowledge base %s with %d chunks", key, len(entry[1]))
+        return entry[1]
+
+def default_knowledge_base(path=KB_INDEX_DIR):
+    """Return the shared index at KB_INDEX_DIR, or None if there is none."""
+    try:
+        return open_shared(path)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        print(f"Knowledge base unavailable: {e}")
+        return None
@@ -0,0 +1,446 @@
+"""Incremental document ingestion for the knowledge base.
+
+Ingestion turns a tree of documents (PDF, HTML, Markdown, plain text) into
+the memory-mapped index searched by knowledgeBaseTool. The pipeline streams:
+
+- discover() walks the source directories
+- a process pool hashes, parses and chunks files in parallel; results come
+  back as they finish
+- chunks from several files are embedded together in fixed-size batches
+- each file's passages and vectors are saved to the ingestion cache, keyed
+  by the SHA-256 of its content, as soon as the file is done
+- the index is assembled from the cache and swapped in atomically
+
+Re-runs only parse files whose content changed. Files whose size and mtime
+match the manifest are not even re-hashed. An interrupted run keeps every
+file it finished, so running the same command again resumes where it stopped.
+The cache lives next to the index (<index>.cache) and is cleared when the
+embedder or chunking settings change.
+
+PDF parsing needs pypdf (pip install "sonic_nova[kb]"). Without it, PDFs are
+reported as failed and the other formats are still ingested.
+
+Usage:
+    python -m sonic_nova.knowledge.ingest docs/ --index kb_index
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import multiprocessing
+from html.parser import HTMLParser
+import numpy as np
+from sonic_nova.config.settings import (
+    KB_INDEX_DIR,
+    KB_CHUNK_WORDS,
+    KB_CHUNK_OVERLAP,
+    KB_INGEST_WORKERS,
+    KB_INGEST_BATCH_SIZE,
+)
+from sonic_nova.knowledge.embeddings import HashingEmbedder
+from sonic_nova.knowledge.index import write_index
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # Optional dependency
+    PdfReader = None
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.html', '.htm', '.md', '.txt')
+
+# Seconds between manifest checkpoints and progress lines
+CHECKPOINT_INTERVAL = 5.0
+
+_WS_RE = re.compile(r"\s+")
+
+class _TextExtractor(HTMLParser):
+    """Collects the visible text of an HTML document."""
+
+    SKIP = ('script', 'style', 'head')
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+def discover(roots):
+    """Yield (path, source) for every supported file under roots.
+
+    Args:
+        roots (list): Files or directories to ingest
+
+    Yields:
+        tuple: Absolute path and the source name stored with its passages
+            (the path relative to its root)
+    """
+    for root in roots:
+        if os.path.isfile(root):
+            yield os.path.abspath(root), os.path.basename(root)
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    path = os.path.join(dirpath, name)
+                    yield os.path.abspath(path), os.path.relpath(path, root).replace(os.sep, '/')
+
+def file_digest(path, block_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def extract_pages(path):
+    """Return the text of each page of a document.
+
+    PDFs have real pages; form feeds split plain text and Markdown into
+    pages; an HTML document is a single page.
+
+    Raises:
+        RuntimeError: If the file is a PDF and pypdf is not installed
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.pdf':
+        if PdfReader is None:
+            raise RuntimeError('pypdf is not installed (pip install "sonic_nova[kb]")')
+        return [page.extract_text() or '' for page in PdfReader(path).pages]
+    with open(path, encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    if ext in ('.html', '.htm'):
+        extractor = _TextExtractor()
+        extractor.feed(text)
+        extractor.close()
+        return [' '.join(extractor.parts)]
+    return text.split('\f')
+
+def iter_chunks(pages, chunk_words=KB_CHUNK_WORDS, overlap=KB_CHUNK_OVERLAP):
+    """Yield overlapping passages of about chunk_words words.
+
+    Passages run across page boundaries, so a sentence split by a page
+    break stays in one passage.
+
+    Args:
+        pages (iterable): Page texts
+        chunk_words (int): Words per passage
+        overlap (int): Words repeated at the start of the next passage
+    """
+    step = max(1, chunk_words - overlap)
+    window = []
+    emitted = 0  # Words of window already ending a passage
+    for page in pages:
+        for word in _WS_RE.split(page):
+            if not word:
+                continue
+            window.append(word)
+            if len(window) == chunk_words:
+                yield ' '.join(window)
+                del window[:step]
+                emitted = len(window)
+    if len(window) > emitted:
+        yield ' '.join(window)
+
+def _parse_file(task):
+    """Hash, parse and chunk one file; runs in a worker process."""
+    path, source, digest, entries_dir, chunk_words, overlap = task
+    result = {'path': path, 'source': source, 'pages': 0, 'chunks': [], 'cached': False, 'error': None}
+    try:
+        st = os.stat(path)
+        result['size'], result['mtime_ns'] = st.st_size, st.st_mtime_ns
+        result['digest'] = digest or file_digest(path)
+        if os.path.exists(_entry_path(entries_dir, result['digest'])):
+            # Finished by an interrupted run, or a copy of another file
+            result['cached'] = True
+            return result
+        pages = extract_pages(path)
+        result['pages'] = len(pages)
+        result['chunks'] = list(iter_chunks(pages, chunk_words, overlap))
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+def _entry_path(entries_dir, digest):
+    return os.path.join(entries_dir, f"{digest}.npz")
+
+def save_entry(entries_dir, digest, texts, vectors):
+    """Atomically save one file's passages and vectors to the cache."""
+    encoded = [t.encode('utf-8') for t in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    tmp = os.path.join(entries_dir, f".{digest}.{os.getpid()}.tmp.npz")
+    np.savez(tmp, vectors=vectors, offsets=offsets, texts=np.frombuffer(b''.join(encoded), dtype=np.uint8))
+    os.replace(tmp, _entry_path(entries_dir, digest))
+
+def load_entry(entries_dir, digest):
+    """Return (texts, vectors) of a cached file."""
+    with np.load(_entry_path(entries_dir, digest)) as data:
+        raw, offsets = data['texts'].tobytes(), data['offsets']
+        texts = [raw[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+        return texts, data['vectors']
+
+def _embed_files(results, embedder, batch_size):
+    """Embed the chunks of parsed files in batches that span files.
+
+    Args:
+        results (iterable): Parse results with chunks to embed
+        embedder: Embedder for the chunks
+        batch_size (int): Chunks per embed() call
+
+    Yields:
+        tuple: (result, vectors) for each file once all its chunks are embedded
+    """
+    waiting = []  # [result, vector blocks, chunks not yet embedded]
+    texts, owners = [], []
+
+    def flush():
+        vectors = embedder.embed(texts)
+        start = 0
+        for entry, count in owners:
+            entry[1].append(vectors[start:start + count])
+            entry[2] -= count
+            start += count
+        texts.clear()
+        owners.clear()
+
+    def completed():
+        done = [entry for entry in waiting if entry[2] == 0]
+        waiting[:] = [entry for entry in waiting if entry[2]]
+        for result, blocks, _ in done:
+            vectors = np.concatenate(blocks) if blocks else np.zeros((0, embedder.dim), dtype=np.float32)
+            yield result, vectors
+
+    for result in results:
+        chunks = result['chunks']
+        entry = [result, [], len(chunks)]
+        waiting.append(entry)
+        pos = 0
+        while pos < len(chunks):
+            piece = chunks[pos:pos + batch_size - len(texts)]
+            texts.extend(piece)
+            owners.append((entry, len(piece)))
+            pos += len(piece)
+            if len(texts) == batch_size:
+                flush()
+                yield from completed()
+        yield from completed()
+    if texts:
+        flush()
+    yield from completed()
+
+class Manifest:
+    """What the ingestion cache holds: config, and each file's stat and digest."""
+
+    def __init__(self, cache_dir, config):
+        self.path = os.path.join(cache_dir, 'manifest.json')
+        self.entries_dir = os.path.join(cache_dir, 'entries')
+        self.config = config
+        self.files = {}
+        self.index_key = None
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            data = None
+        if data is not None and data.get('config') == config:
+            self.files = data.get('files', {})
+            self.index_key = data.get('index_key')
+        elif os.path.isdir(self.entries_dir):
+            # Cached vectors from another embedder or chunking are unusable
+            shutil.rmtree(self.entries_dir)
+        os.makedirs(self.entries_dir, exist_ok=True)
+
+    def unchanged_digest(self, path):
+        """Return the recorded digest if the file's size and mtime still match."""
+        record = self.files.get(path)
+        if record is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if [st.st_size, st.st_mtime_ns] == record[:2] and os.path.exists(_entry_path(self.entries_dir, record[2])):
+            return record[2]
+        return None
+
+    def record(self, result):
+        self.files[result['path']] = [result['size'], result['mtime_ns'], result['digest']]
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'config': self.config, 'index_key': self.index_key, 'files': self.files}, f)
+        os.replace(tmp, self.path)
+
+def ingest(roots, index_path=KB_INDEX_DIR, embedder=None, workers=KB_INGEST_WORKERS,
+           batch_size=KB_INGEST_BATCH_SIZE, chunk_words=KB_CHUNK_WORDS, overlap=KB_CHUNK_OVERLAP,
+           cache_dir=None, progress=None):
+    """Ingest documents into the knowledge base index.
+
+    Args:
+        roots (list): Files or directories to ingest
+        index_path (str): Index directory to (re)build
+        embedder (optional): Defaults to HashingEmbedder
+        workers (int): Parser processes; None uses every CPU, 1 parses inline
+        batch_size (int): Chunks per embed() call
+        chunk_words (int): Words per passage
+        overlap (int): Words shared by consecutive passages
+        cache_dir (str, optional): Ingestion cache; defaults to <index_path>.cache
+        progress (callable, optional): Called with the running stats dict
+            about every CHECKPOINT_INTERVAL seconds
+
+    Returns:
+        dict: Stats: files, parsed, unchanged, failed (path -> error), pages,
+        chunks, indexed_chunks, seconds, pages_per_second, index_written
+    """
+    embedder = embedder or HashingEmbedder()
+    cache_dir = cache_dir or f"{index_path}.cache"
+    manifest = Manifest(cache_dir, {
+        'embedder': embedder.name,
+        'dim': embedder.dim,
+        'chunk_words': chunk_words,
+        'overlap': overlap,
+    })
+    stats = {'files': 0, 'parsed': 0, 'unchanged': 0, 'failed': {}, 'pages': 0, 'chunks': 0}
+    start = time.perf_counter()
+
+    files = []  # (path, source, digest) in index order
+    tasks = []
+    for path, source in discover(roots):
+        digest = manifest.unchanged_digest(path)
+        files.append([path, source, digest])
+        if digest is None:
+            tasks.append((path, source, None, manifest.entries_dir, chunk_words, overlap))
+    stats['files'] = len(files)
+    stats['unchanged'] = len(files) - len(tasks)
+    digests = {}
+
+    pool = None
+    if tasks:
+        if workers == 1:
+            results = map(_parse_file, tasks)
+        else:
+            pool = multiprocessing.Pool(min(workers or os.cpu_count() or 1, len(tasks)))
+            results = pool.imap_unordered(_parse_file, tasks)
+    else:
+        results = iter(())
+
+    def parsed():
+        """Record cached and failed files; pass on the rest for embedding."""
+        for result in results:
+            if result['error']:
+                stats['failed'][result['source']] = result['error']
+            elif result['cached']:
+                stats['unchanged'] += 1
+                manifest.record(result)
+                digests[result['path']] = result['digest']
+            else:
+                stats['pages'] += result['pages']
+                stats['chunks'] += len(result['chunks'])
+                yield result
+
+    last_checkpoint = time.perf_counter()
+    try:
+        for result, vectors in _embed_files(parsed(), embedder, batch_size):
+            save_entry(manifest.entries_dir, result['digest'], result['chunks'], vectors)
+            manifest.record(result)
+            digests[result['path']] = result['digest']
+            stats['parsed'] += 1
+            now = time.perf_counter()
+            if now - last_checkpoint >= CHECKPOINT_INTERVAL:
+                last_checkpoint = now
+                manifest.save()
+                if progress is not None:
+                    progress(_finish_stats(stats, now - start))
+        if pool is not None:
+            pool.close()
+            pool.join()
+    finally:
+        if pool is not None:
+            pool.terminate()
+        manifest.save()
+
+    for entry in files:
+        entry[2] = entry[2] or digests.get(entry[0])
+    indexed = [(path, source, digest) for path, source, digest in files if digest]
+    # Forget deleted files and drop cache entries nothing refers to any more
+    live = {path for path, _, _ in indexed}
+    manifest.files = {path: record for path, record in manifest.files.items() if path in live}
+    referenced = {f"{digest}.npz" for _, _, digest in indexed}
+    for name in os.listdir(manifest.entries_dir):
+        if name not in referenced:
+            os.remove(os.path.join(manifest.entries_dir, name))
+
+    index_key = hashlib.sha256(json.dumps([[s, d] for _, s, d in indexed]).encode('utf-8')).hexdigest()
+    stats['indexed_chunks'] = None
+    stats['index_written'] = False
+    if index_key != manifest.index_key or not os.path.exists(os.path.join(index_path, 'meta.json')):
+        texts, sources, blocks = [], [], []
+        for _, source, digest in indexed:
+            entry_texts, vectors = load_entry(manifest.entries_dir, digest)
+            texts.extend(entry_texts)
+            sources.extend([source] * len(entry_texts))
+            blocks.append(vectors)
+        vectors = np.concatenate(blocks) if blocks else np.zeros((0, embedder.dim), dtype=np.float32)
+        write_index(index_path, texts, sources, vectors, embedder)
+        manifest.index_key = index_key
+        stats['indexed_chunks'] = len(texts)
+        stats['index_written'] = True
+    manifest.save()
+    return _finish_stats(stats, time.perf_counter() - start)
+
+def _finish_stats(stats, seconds):
+    stats = dict(stats)
+    stats['seconds'] = seconds
+    stats['pages_per_second'] = stats['pages'] / seconds if seconds > 0 else 0.0
+    return stats
+
+def _print_progress(stats):
+    print(f"  {stats['parsed']} parsed, {stats['unchanged']} unchanged, {len(stats['failed'])} failed "
+          f"of {stats['files']} files; {stats['pages']} pages at {stats['pages_per_second']:.1f} pages/s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or update the knowledge base index')
+    parser.add_argument('roots', nargs='+', help='Files or directories to ingest')
+    parser.add_argument('--index', default=KB_INDEX_DIR, help='Index directory')
+    parser.add_argument('--workers', type=int, default=KB_INGEST_WORKERS, help='Parser processes (default: CPU count)')
+    parser.add_argument('--batch-size', type=int, default=KB_INGEST_BATCH_SIZE, help='Passages per embedding batch')
+    parser.add_argument('--chunk-words', type=int, default=KB_CHUNK_WORDS, help='Words per passage')
+    parser.add_argument('--overlap', type=int, default=KB_CHUNK_OVERLAP, help='Words shared by consecutive passages')
+    args = parser.parse_args(argv)
+
+    try:
+        stats = ingest(
+            args.roots, args.index, workers=args.workers, batch_size=args.batch_size,
+            chunk_words=args.chunk_words, overlap=args.overlap, progress=_print_progress,
+        )
+    except KeyboardInterrupt:
+        print("Interrupted; finished files are cached, run the same command again to resume")
+        return 130
+    _print_progress(stats)
+    for source, error in sorted(stats['failed'].items()):
+        print(f"  failed: {source}: {error}")
+    if stats['index_written']:
+        print(f"Wrote {stats['indexed_chunks']} passages to {args.index} in {stats['seconds']:.1f} s")
+    else:
+        print(f"{args.index} is up to date")
+    return 1 if stats['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,7 +8,7 @@ The module includes templates for:
 - Session management (start/end)
 - Content management (start/end)
 - Audio input/output
-- Text input/output
+- Text input/output, including replayed conversation history
 - Tool usage
 
 Each template is a string that can be formatted with specific values using
@@ -80,6 +80,10 @@ AUDIO_EVENT_TEMPLATE = '''{
     }
 }'''
 
+# Bytes form of the audio template, formatted with bytes arguments so the
+# base64 payload never round-trips through str
+AUDIO_EVENT_TEMPLATE_BYTES = AUDIO_EVENT_TEMPLATE.encode('utf-8')
+
 # Text events
 TEXT_CONTENT_START_EVENT = '''{
     "event": {
@@ -96,6 +100,22 @@ TEXT_CONTENT_START_EVENT = '''{
     }
 }'''
 
+# Conversation history replayed into a new stream; the model does not reply to it
+HISTORY_CONTENT_START_EVENT = '''{
+    "event": {
+        "contentStart": {
+        "promptName": "%s",
+        "contentName": "%s",
+        "type": "TEXT",
+        "role": "%s",
+        "interactive": false,
+            "textInputConfiguration": {
+                "mediaType": "text/plain"
+            }
+        }
+    }
+}'''
+
 TEXT_INPUT_EVENT = '''{
     "event": {
         "textInput": {
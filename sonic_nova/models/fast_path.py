@@ -0,0 +1,76 @@
+"""Receive fast path for audioOutput events.
+
+audioOutput events make up most of the inbound traffic and carry one large
+base64 string. Decoding them the general way (bytes -> str -> json.loads ->
+b64decode) copies the audio three times. This module locates the content
+field directly in the raw payload bytes and base64-decodes it from a
+memoryview slice, so the only allocation is the decoded PCM itself.
+
+Anything unusual (escape sequences in the content, a different event type,
+malformed base64) returns None and the caller falls back to full parsing.
+"""
+
+import binascii
+
+AUDIO_OUTPUT_KEY = b'"audioOutput"'
+CONTENT_KEY = b'"content"'
+
+# The event key appears right after {"event": so only the head is scanned
+_HEAD_LIMIT = 64
+_WHITESPACE = b' \t\r\n'
+
+def _skip_colon(payload, pos, size):
+    """Return the offset after a ':' at pos (whitespace allowed), else None."""
+    while pos < size and payload[pos] in _WHITESPACE:
+        pos += 1
+    if pos >= size or payload[pos] != 0x3A:  # ':'
+        return None
+    return pos + 1
+
+def find_audio_output_content(payload):
+    """Locate the base64 content of an audioOutput event in raw bytes.
+
+    Args:
+        payload (bytes): Raw event payload received from the stream
+
+    Returns:
+        tuple: (start, end) offsets of the base64 text, or None if the payload
+        is not an audioOutput event the fast path can handle
+    """
+    size = len(payload)
+    marker = payload.find(AUDIO_OUTPUT_KEY, 0, _HEAD_LIMIT)
+    if marker == -1 or _skip_colon(payload, marker + len(AUDIO_OUTPUT_KEY), size) is None:
+        # Absent, or a string value rather than the event key
+        return None
+    key = payload.find(CONTENT_KEY, marker)
+    if key == -1:
+        return None
+    pos = _skip_colon(payload, key + len(CONTENT_KEY), size)
+    if pos is None:
+        return None
+    while pos < size and payload[pos] in _WHITESPACE:
+        pos += 1
+    if pos >= size or payload[pos] != 0x22:  # '"'
+        return None
+    start = pos + 1
+    end = payload.find(b'"', start)
+    if end == -1 or payload.find(b'\\', start, end) != -1:
+        return None
+    return start, end
+
+def decode_audio_output(payload):
+    """Decode the PCM carried by an audioOutput event without parsing JSON.
+
+    Args:
+        payload (bytes): Raw event payload received from the stream
+
+    Returns:
+        bytes: Decoded audio, or None if the caller should parse the event
+    """
+    span = find_audio_output_content(payload)
+    if span is None:
+        return None
+    try:
+        return binascii.a2b_base64(memoryview(payload)[span[0]:span[1]])
+    except binascii.Error:
+        return None
@@ -0,0 +1,114 @@
+"""JSON codec backends for the Sonic Nova application.
+
+Every event sent to or received from Bedrock goes through a JSON codec. The
+codec abstraction lets the stream manager use an accelerated backend when
+one is installed, and fall back to the standard library otherwise. Both
+backends produce bytes natively, ready for the wire, so no str round trip is
+needed.
+
+Backends:
+- StdlibJsonCodec: the json module; always available
+- OrjsonCodec: orjson, used automatically when installed
+  (pip install "sonic_nova[fast]")
+
+Usage:
+    >>> from sonic_nova.utils.codec import get_codec
+    >>> codec = get_codec()
+    >>> codec.loads(codec.dumps({"event": {}}))
+    {'event': {}}
+"""
+
+import abc
+import json
+from sonic_nova.config.settings import JSON_CODEC
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+class JsonCodec(abc.ABC):
+    """Interface implemented by every codec backend."""
+
+    name = None
+
+    @abc.abstractmethod
+    def dumps(self, obj):
+        """Serialize obj to UTF-8 JSON bytes."""
+
+    def dumps_str(self, obj):
+        """Serialize obj to a JSON str (for JSON embedded as a string field)."""
+        return self.dumps(obj).decode('utf-8')
+
+    @abc.abstractmethod
+    def loads(self, data):
+        """Parse JSON from bytes, bytearray, memoryview or str.
+
+        Raises:
+            ValueError: If data is not valid JSON
+        """
+
+class StdlibJsonCodec(JsonCodec):
+    """Codec backed by the standard library json module."""
+
+    name = 'json'
+
+    def __init__(self):
+        # Compact separators match orjson output and keep events small
+        self._encoder = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+
+    def dumps(self, obj):
+        return self._encoder.encode(obj).encode('utf-8')
+
+    def loads(self, data):
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+class OrjsonCodec(JsonCodec):
+    """Codec backed by orjson."""
+
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+_BACKENDS = {
+    StdlibJsonCodec.name: StdlibJsonCodec,
+    OrjsonCodec.name: OrjsonCodec,
+}
+
+def available_codecs():
+    """Return the names of the backends that can be used in this environment."""
+    names = [StdlibJsonCodec.name]
+    if orjson is not None:
+        names.append(OrjsonCodec.name)
+    return names
+
+def get_codec(name=None):
+    """Return a codec instance.
+
+    Args:
+        name (str, optional): 'json', 'orjson' or 'auto'. Defaults to the
+            JSON_CODEC setting. 'auto' picks orjson when installed.
+
+    Returns:
+        JsonCodec: The selected codec
+
+    Raises:
+        ValueError: If the backend name is unknown
+        ImportError: If the requested backend is not installed
+    """
+    name = name or JSON_CODEC
+    if name == 'auto':
+        name = OrjsonCodec.name if orjson is not None else StdlibJsonCodec.name
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown JSON codec: {name}")
+    return _BACKENDS[name]()
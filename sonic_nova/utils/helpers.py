@@ -1,7 +1,7 @@
 """Utility functions for the Sonic Nova application.
 
 This module provides utility functions used throughout the application, including:
-- Debug printing functionality
+- Debug logging through the non-blocking structured logger
 - Timing decorators for both synchronous and asynchronous functions
 - Performance monitoring tools
 
@@ -15,22 +15,28 @@ import time
 import asyncio
 import functools
 from sonic_nova.config.settings import is_debug
+from sonic_nova.utils.log import get_logger
 
-def debug_print(message):
-    """Print debug messages when debug mode is enabled.
+def debug_print(message, *args, event_type=None, exc_info=False):
+    """Log a debug message when debug mode is enabled.
     
-    This function checks if debug mode is enabled before printing,
-    ensuring debug messages only appear when needed.
+    The message is handed to the structured logger, which queues it for a
+    background writer thread. Pass %-style args instead of pre-formatting so
+    the string is only built for records that survive sampling, and off the
+    event loop.
     
     Args:
-        message (str): The debug message to print
+        message (str): The debug message, optionally with %-style placeholders
+        *args: Values for the placeholders in message
+        event_type (str, optional): Event type used for per-type sampling
+        exc_info (bool): Attach the current exception traceback
     
     Example:
-        >>> debug_print("Processing audio chunk")
-        [DEBUG] Processing audio chunk
+        >>> debug_print("Sent event type: %s", "audioInput", event_type="audioInput")
+        [DEBUG] Sent event type: audioInput event_type=audioInput sampled=1/100
     """
     if is_debug():
-        print(f"[DEBUG] {message}")
+        get_logger().debug(message, *args, extra={'event_type': event_type}, exc_info=exc_info)
 
 def time_it(name, func=None):
     """Decorator to measure and log the execution time of a synchronous function.
@@ -60,7 +66,7 @@ def time_it(name, func=None):
         start_time = time.time()
         result = func(*args, **kwargs)
         end_time = time.time()
-        debug_print(f"{name} took {end_time - start_time:.2f} seconds")
+        debug_print("%s took %.2f seconds", name, end_time - start_time)
         return result
     return wrapper
 
@@ -95,6 +101,6 @@ def time_it_async(name, func=None):
         start_time = time.time()
         result = await func(*args, **kwargs)
         end_time = time.time()
-        debug_print(f"{name} took {end_time - start_time:.2f} seconds")
+        debug_print("%s took %.2f seconds", name, end_time - start_time)
         return result
     return wrapper 
\ No newline at end of file
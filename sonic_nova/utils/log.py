@@ -0,0 +1,197 @@
+"""Non-blocking structured logging for the Sonic Nova application.
+
+This module backs debug output with the standard logging package while keeping
+the event loop free of terminal I/O:
+- Records are handed to a QueueHandler and written by a QueueListener thread
+- Message formatting is deferred to the listener thread (lazy %-style args)
+- Records can carry an event_type and be sampled per event type, so
+  high-rate events such as audioInput do not flood the output
+
+Usage:
+    >>> from sonic_nova.utils.log import get_logger
+    >>> logger = get_logger()
+    >>> logger.debug("Sent event type: %s", "audioInput", extra={"event_type": "audioInput"})
+"""
+
+import sys
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from sonic_nova.config.settings import LOG_SAMPLE_RATES
+
+LOGGER_NAME = 'sonic_nova'
+
+class SamplingFilter(logging.Filter):
+    """Keeps a deterministic fraction of records for each event type.
+
+    A rate of 1.0 keeps every record, 0.01 keeps one record in a hundred and
+    0 drops the event type entirely. Records without an event_type use the
+    default rate. Counting instead of random sampling keeps the cost to one
+    dictionary lookup and an increment.
+    """
+
+    def __init__(self, rates=None, default_rate=1.0):
+        """Initialize the filter.
+
+        Args:
+            rates (dict): Mapping of event type to sampling rate in [0, 1]
+            default_rate (float): Rate for event types not listed in rates
+        """
+        super().__init__()
+        self.default_rate = default_rate
+        self._intervals = {}
+        self._counters = {}
+        self.dropped = 0
+        self.set_rates(rates or {})
+
+    @staticmethod
+    def _interval(rate):
+        if rate <= 0:
+            return 0
+        return max(1, int(round(1.0 / min(rate, 1.0))))
+
+    def set_rates(self, rates):
+        """Replace the per-event-type sampling rates.
+
+        Args:
+            rates (dict): Mapping of event type to sampling rate in [0, 1]
+        """
+        self._intervals = {k: self._interval(v) for k, v in rates.items()}
+        self._default_interval = self._interval(self.default_rate)
+        self._counters = {}
+
+    def filter(self, record):
+        event_type = getattr(record, 'event_type', None)
+        interval = self._intervals.get(event_type, self._default_interval)
+        if interval == 1:
+            return True
+        if interval == 0:
+            self.dropped += 1
+            return False
+        count = self._counters.get(event_type, 0)
+        self._counters[event_type] = count + 1
+        if count % interval == 0:
+            record.sample_interval = interval
+            return True
+        self.dropped += 1
+        return False
+
+_PAYLOAD_TYPES = (bytes, bytearray, memoryview)
+
+def _summarize_payload(value):
+    """Return a length summary in place of a binary payload."""
+    if isinstance(value, _PAYLOAD_TYPES):
+        return f"<{value.nbytes if isinstance(value, memoryview) else len(value)} bytes>"
+    return value
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as "[LEVEL] message" followed by key=value fields.
+
+    The fields rendered are event_type and, for sampled event types, the
+    sampling interval, so a reader can tell a line stands for N events.
+    Binary args (e.g. audio payloads) are shown as their length only.
+    """
+
+    def format(self, record):
+        if isinstance(record.args, dict):
+            record.args = {k: _summarize_payload(v) for k, v in record.args.items()}
+        elif record.args:
+            record.args = tuple(_summarize_payload(v) for v in record.args)
+        message = f"[{record.levelname}] {record.getMessage()}"
+        event_type = getattr(record, 'event_type', None)
+        if event_type:
+            message += f" event_type={event_type}"
+        interval = getattr(record, 'sample_interval', None)
+        if interval:
+            message += f" sampled=1/{interval}"
+        if record.exc_info:
+            message += "\n" + self.formatException(record.exc_info)
+        return message
+
+class _LazyQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock QueueHandler.prepare() merges args into the message on the
+    calling thread so records can be pickled. Records never leave this
+    process, so the record is queued untouched and %-formatting happens on
+    the writer thread instead of the event loop.
+    """
+
+    def prepare(self, record):
+        return record
+
+_lock = threading.Lock()
+_listener = None
+_sampling_filter = SamplingFilter(LOG_SAMPLE_RATES)
+
+def get_logger():
+    """Return the package logger, installing the queue handler on first use.
+
+    Returns:
+        logging.Logger: The 'sonic_nova' logger
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    if _listener is None:
+        configure_logging()
+    return logger
+
+def _remove_queue_handlers(logger):
+    for handler in list(logger.handlers):
+        if isinstance(handler, _LazyQueueHandler):
+            logger.removeHandler(handler)
+
+def configure_logging(stream=None, level=logging.DEBUG, sample_rates=None):
+    """Install the queue handler and start the background writer.
+
+    Calling this again replaces the output stream and sampling rates.
+
+    Args:
+        stream: Text stream for log output. Defaults to sys.stdout.
+        level (int): Logger level
+        sample_rates (dict, optional): Per-event-type sampling rates
+
+    Returns:
+        logging.Logger: The configured logger
+    """
+    global _listener
+    with _lock:
+        logger = logging.getLogger(LOGGER_NAME)
+        if _listener is not None:
+            _listener.stop()
+            _remove_queue_handlers(logger)
+
+        log_queue = queue.SimpleQueue()
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(StructuredFormatter())
+        _listener = QueueListener(log_queue, output, respect_handler_level=False)
+        _listener.start()
+
+        logger.addHandler(_LazyQueueHandler(log_queue))
+        if _sampling_filter not in logger.filters:
+            logger.addFilter(_sampling_filter)
+        if sample_rates is not None:
+            _sampling_filter.set_rates(sample_rates)
+        logger.setLevel(level)
+        logger.propagate = False
+        return logger
+
+def set_sample_rates(rates):
+    """Set per-event-type sampling rates on the package logger.
+
+    Args:
+        rates (dict): Mapping of event type to sampling rate in [0, 1]
+    """
+    _sampling_filter.set_rates(rates)
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            _remove_queue_handlers(logging.getLogger(LOGGER_NAME))
+
+atexit.register(shutdown_logging)
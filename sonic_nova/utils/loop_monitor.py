@@ -0,0 +1,202 @@
+"""Event-loop lag monitoring and blocking-call attribution.
+
+Audio stutters when something holds the event loop: a slow tool, synchronous
+I/O, or a large json.loads or b64decode. LoopLagMonitor measures scheduling
+delay continuously and finds out who was responsible:
+
+- A heartbeat coroutine sleeps for a fixed interval and records how late it
+  wakes up (the "loop.lag_ms" metric).
+- A watchdog thread notices when the heartbeat is overdue by more than the
+  threshold and captures the loop thread's stack and current task at that
+  moment, i.e. while the offending callback is still running.
+- When the heartbeat resumes, the stall's total duration is recorded and
+  attributed to the innermost application frame of the captured stack.
+
+report() summarises lag percentiles, stalls and per-culprit totals, and
+export() writes that report as JSON for a session.
+"""
+
+import sys
+import json
+import time
+import asyncio
+import threading
+import traceback
+from sonic_nova.config.settings import LOOP_LAG_INTERVAL, LOOP_LAG_THRESHOLD
+from sonic_nova.utils.metrics import metrics, summarize
+
+# Frames from these paths are loop plumbing, not the code holding the loop
+_PLUMBING = ('asyncio', 'selectors.py', 'threading.py', 'concurrent')
+
+class LoopLagMonitor:
+    """Measures event-loop scheduling delay and attributes long stalls."""
+
+    def __init__(
+        self,
+        interval=LOOP_LAG_INTERVAL,
+        threshold=LOOP_LAG_THRESHOLD,
+        max_stalls=200,
+        stack_depth=20,
+        metrics_registry=None,
+    ):
+        """Initialize the monitor.
+
+        Args:
+            interval (float): Heartbeat period in seconds
+            threshold (float): Lag in seconds above which a stall is captured
+            max_stalls (int): Maximum number of stalls kept for the report
+            stack_depth (int): Frames kept per captured stack
+            metrics_registry (MetricsRegistry, optional): Where to publish lag
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.max_stalls = max_stalls
+        self.stack_depth = stack_depth
+        self.metrics = metrics_registry or metrics
+
+        self._loop = None
+        self._loop_thread_id = None
+        self._heartbeat_task = None
+        self._watchdog = None
+        self._running = False
+        self._lock = threading.Lock()
+        self._last_beat = None
+        self._pending = None
+        self._lags_ms = []
+        self._stalls = []
+        self._started_at = None
+
+    def start(self):
+        """Start monitoring the running event loop.
+
+        Must be called from a coroutine or callback on the loop to monitor.
+        """
+        if self._running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._running = True
+        self._started_at = time.time()
+        self._last_beat = time.monotonic()
+        self._heartbeat_task = self._loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        """Stop monitoring."""
+        if not self._running:
+            return
+        self._running = False
+        if self._heartbeat_task and not self._heartbeat_task.done():
+            self._heartbeat_task.cancel()
+        if self._watchdog and self._watchdog is not threading.current_thread():
+            self._watchdog.join(1.0)
+
+    async def _heartbeat(self):
+        while self._running:
+            scheduled = time.monotonic()
+            with self._lock:
+                self._last_beat = scheduled
+            await asyncio.sleep(self.interval)
+            woke = time.monotonic()
+            lag = max(0.0, woke - scheduled - self.interval)
+            lag_ms = lag * 1000
+            self._lags_ms.append(lag_ms)
+            if len(self._lags_ms) > 10000:
+                del self._lags_ms[:5000]
+            self.metrics.observe("loop.lag_ms", lag_ms)
+
+            with self._lock:
+                stall, self._pending = self._pending, None
+            if stall is not None:
+                stall['duration_ms'] = round(lag_ms, 3)
+                self.metrics.observe("loop.stall_ms", lag_ms)
+                self._stalls.append(stall)
+                if len(self._stalls) > self.max_stalls:
+                    # Keep the longest stalls
+                    self._stalls.sort(key=lambda s: s['duration_ms'], reverse=True)
+                    del self._stalls[self.max_stalls:]
+
+    def _watch(self):
+        check = max(0.005, self.threshold / 4)
+        while self._running:
+            time.sleep(check)
+            with self._lock:
+                if self._pending is not None or self._last_beat is None:
+                    continue
+                overdue = time.monotonic() - self._last_beat - self.interval
+                if overdue < self.threshold:
+                    continue
+                self._pending = self._capture(overdue)
+
+    def _capture(self, overdue):
+        """Snapshot the loop thread while it is blocked."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.extract_stack(frame)[-self.stack_depth:] if frame is not None else []
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        task_name = coroutine = None
+        if task is not None:
+            task_name = task.get_name()
+            coro = task.get_coro()
+            coroutine = getattr(coro, '__qualname__', repr(coro))
+        return {
+            'detected_at': time.time(),
+            'detected_after_ms': round(overdue * 1000, 3),
+            'task': task_name,
+            'coroutine': coroutine,
+            'culprit': self._culprit(stack, coroutine),
+            'stack': [f"{f.filename}:{f.lineno} in {f.name}" for f in stack],
+            'duration_ms': None,
+        }
+
+    @staticmethod
+    def _culprit(stack, coroutine):
+        """Pick the innermost frame that is not event-loop plumbing."""
+        for frame in reversed(stack):
+            if 'sonic_nova' in frame.filename and 'loop_monitor' not in frame.filename:
+                return f"{frame.name} ({frame.filename.rsplit('/', 1)[-1]}:{frame.lineno})"
+        for frame in reversed(stack):
+            if not any(part in frame.filename for part in _PLUMBING):
+                return f"{frame.name} ({frame.filename.rsplit('/', 1)[-1]}:{frame.lineno})"
+        return coroutine or 'unknown'
+
+    def report(self, session_id=None):
+        """Summarise lag and stalls observed so far.
+
+        Args:
+            session_id (str, optional): Session the report belongs to
+
+        Returns:
+            dict: Lag summary, stalls (longest first) and per-culprit totals
+        """
+        stalls = sorted(
+            (s for s in self._stalls if s['duration_ms'] is not None),
+            key=lambda s: s['duration_ms'],
+            reverse=True
+        )
+        culprits = {}
+        for stall in stalls:
+            entry = culprits.setdefault(stall['culprit'], {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            entry['count'] += 1
+            entry['total_ms'] += stall['duration_ms']
+            entry['max_ms'] = max(entry['max_ms'], stall['duration_ms'])
+        return {
+            'session_id': session_id,
+            'started_at': self._started_at,
+            'interval_ms': self.interval * 1000,
+            'threshold_ms': self.threshold * 1000,
+            'lag_ms': summarize(self._lags_ms),
+            'stall_count': len(stalls),
+            'culprits': dict(sorted(culprits.items(), key=lambda kv: kv[1]['total_ms'], reverse=True)),
+            'stalls': stalls,
+        }
+
+    def export(self, path, session_id=None):
+        """Write report() to a JSON file.
+
+        Args:
+            path (str): Output file path
+            session_id (str, optional): Session the report belongs to
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(session_id), f, indent=2)
@@ -0,0 +1,169 @@
+"""Lightweight in-process metrics for the Sonic Nova application.
+
+This module provides a thread-safe registry of counters and sample windows
+that components use to publish timings (reaction times, per-frame CPU cost,
+send latency, ...). Snapshots summarise each window as count, mean,
+percentiles and max, and can be merged across registries.
+
+Usage:
+    >>> from sonic_nova.utils.metrics import metrics
+    >>> metrics.observe("barge_in.reaction_ms", 42.0)
+    >>> metrics.increment("barge_in.local_detections")
+    >>> metrics.snapshot()["barge_in.reaction_ms"]["p50"]
+    42.0
+"""
+
+import threading
+from collections import deque
+
+def percentile(sorted_values, pct):
+    """Return the pct-th percentile of an already sorted sequence.
+
+    Args:
+        sorted_values (list): Values in ascending order
+        pct (float): Percentile in [0, 100]
+
+    Returns:
+        float: The interpolated percentile, or 0.0 for an empty sequence
+    """
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+def summarize(values):
+    """Summarise a list of samples.
+
+    Args:
+        values (list): Numeric samples
+
+    Returns:
+        dict: count, mean, p50, p95, p99 and max of the samples
+    """
+    ordered = sorted(values)
+    count = len(ordered)
+    return {
+        "count": count,
+        "mean": sum(ordered) / count if count else 0.0,
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1] if ordered else 0.0,
+    }
+
+class MetricsRegistry:
+    """Thread-safe counters and bounded sample windows.
+
+    Sample windows keep the most recent window_size observations so memory
+    stays flat on long sessions.
+    """
+
+    def __init__(self, window_size=2048):
+        """Initialize the registry.
+
+        Args:
+            window_size (int): Number of recent samples kept per metric
+        """
+        self.window_size = window_size
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._samples = {}
+
+    def increment(self, name, value=1):
+        """Add value to a counter.
+
+        Args:
+            name (str): Counter name
+            value (int): Amount to add
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        """Record a sample.
+
+        Args:
+            name (str): Metric name
+            value (float): Observed value
+        """
+        with self._lock:
+            window = self._samples.get(name)
+            if window is None:
+                window = self._samples[name] = deque(maxlen=self.window_size)
+            window.append(value)
+
+    def counter(self, name):
+        """Return the current value of a counter (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def samples(self, name):
+        """Return a copy of the recent samples recorded for a metric."""
+        with self._lock:
+            return list(self._samples.get(name, ()))
+
+    def snapshot(self):
+        """Return counters and summarised sample windows.
+
+        Returns:
+            dict: Counter names map to ints, sample names map to summary dicts
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            samples = {name: list(window) for name, window in self._samples.items()}
+        result = counters
+        for name, values in samples.items():
+            result[name] = summarize(values)
+        return result
+
+    def raw(self):
+        """Return counters and raw samples, suitable for merging elsewhere.
+
+        Returns:
+            dict: {"counters": {...}, "samples": {name: [values]}}
+        """
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "samples": {name: list(window) for name, window in self._samples.items()},
+            }
+
+    def take_raw(self):
+        """Return raw() and clear the registry in one step.
+
+        Nothing recorded by another thread between the two is lost, so
+        repeated calls yield deltas that add up to the full totals.
+
+        Returns:
+            dict: {"counters": {...}, "samples": {name: [values]}}
+        """
+        with self._lock:
+            counters, self._counters = self._counters, {}
+            samples, self._samples = self._samples, {}
+        return {
+            "counters": counters,
+            "samples": {name: list(window) for name, window in samples.items()},
+        }
+
+    def merge_raw(self, raw):
+        """Fold a raw() dump from another registry into this one.
+
+        Args:
+            raw (dict): Output of MetricsRegistry.raw()
+        """
+        for name, value in raw.get("counters", {}).items():
+            self.increment(name, value)
+        for name, values in raw.get("samples", {}).items():
+            for value in values:
+                self.observe(name, value)
+
+    def reset(self):
+        """Clear all counters and samples."""
+        with self._lock:
+            self._counters.clear()
+            self._samples.clear()
+
+# Process-wide default registry
+metrics = MetricsRegistry()
@@ -0,0 +1,173 @@
+"""Tests for the admission module."""
+
+import asyncio
+import unittest
+from sonic_nova.core.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    TokenBucket,
+    is_quota_error,
+    STATUS_SATURATED,
+    STATUS_TIMEOUT,
+    STATUS_QUOTA_EXCEEDED,
+)
+from sonic_nova.core.bedrock_manager import BedrockStreamManager
+from sonic_nova.core.local_stream import LocalBedrockClient, LocalQuotaExceeded
+from sonic_nova.utils.metrics import MetricsRegistry
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestAdmission(unittest.TestCase):
+    """Test cases for admission module."""
+
+    def run_async(self, coro):
+        """Run a coroutine to completion."""
+        return asyncio.run(coro)
+
+    def make_controller(self, **kwargs):
+        """Create a controller with generous defaults and a private registry."""
+        options = {'max_streams': 2, 'rate': 1000.0, 'burst': 1000,
+                   'max_queue': 4, 'max_wait': 1.0, 'metrics_registry': MetricsRegistry()}
+        options.update(kwargs)
+        return AdmissionController(**options)
+
+    def test_token_bucket_refills(self):
+        """Test the bucket empties at burst and refills at rate."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2.0, burst=2, clock=clock)
+        self.assertTrue(bucket.try_take())
+        self.assertTrue(bucket.try_take())
+        self.assertFalse(bucket.try_take())
+        self.assertAlmostEqual(bucket.seconds_until_token(), 0.5)
+        clock.now = 0.5
+        self.assertTrue(bucket.try_take())
+
+    def test_waiter_admitted_on_release(self):
+        """Test a queued caller gets the slot freed by release()."""
+        async def scenario():
+            controller = self.make_controller(max_streams=1)
+            await controller.acquire()
+            waiter = asyncio.ensure_future(controller.acquire())
+            await asyncio.sleep(0.01)
+            queued = controller.status()['waiting']
+            controller.release()
+            await waiter
+            return queued, controller.status()
+        queued, status = self.run_async(scenario())
+        self.assertEqual(queued, 1)
+        self.assertEqual(status['active'], 1)
+        self.assertEqual(status['admitted'], 2)
+
+    def test_release_admits_one_of_many_waiters(self):
+        """Test one freed slot admits one queued caller, not every caller queued."""
+        async def scenario():
+            controller = self.make_controller(max_streams=1)
+            await controller.acquire()
+            waiters = [asyncio.ensure_future(controller.acquire()) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            controller.release()
+            await asyncio.sleep(0.01)
+            admitted = [w.done() for w in waiters]
+            active = controller.active
+            for _ in waiters[1:]:
+                controller.release()
+                await asyncio.sleep(0.01)
+                self.assertLessEqual(controller.active, controller.max_streams)
+            await asyncio.gather(*waiters)
+            return admitted, active, controller.status()
+        admitted, active, status = self.run_async(scenario())
+        self.assertEqual(admitted, [True, False, False])
+        self.assertEqual(active, 1)
+        self.assertEqual(status['active'], 1)
+        self.assertEqual(status['admitted'], 4)
+
+    def test_rejects_when_queue_full(self):
+        """Test callers beyond max_queue are rejected as saturated at once."""
+        async def scenario():
+            controller = self.make_controller(max_streams=1, max_queue=1)
+            await controller.acquire()
+            waiter = asyncio.ensure_future(controller.acquire())
+            await asyncio.sleep(0.01)
+            with self.assertRaises(AdmissionRejected) as ctx:
+                await controller.acquire()
+            waiter.cancel()
+            return ctx.exception
+        error = self.run_async(scenario())
+        self.assertEqual(error.status, STATUS_SATURATED)
+        self.assertTrue(error.snapshot['saturated'])
+
+    def test_times_out_after_max_wait(self):
+        """Test a caller that never gets a slot is rejected with timeout."""
+        async def scenario():
+            controller = self.make_controller(max_streams=1, max_wait=0.05)
+            await controller.acquire()
+            with self.assertRaises(AdmissionRejected) as ctx:
+                await controller.acquire()
+            return ctx.exception, controller.status()
+        error, status = self.run_async(scenario())
+        self.assertEqual(error.status, STATUS_TIMEOUT)
+        self.assertEqual(status['waiting'], 0)
+        self.assertEqual(status['rejected'][STATUS_TIMEOUT], 1)
+
+    def test_rate_limit_spaces_creations(self):
+        """Test creations beyond the burst wait for token refill."""
+        async def scenario():
+            controller = self.make_controller(max_streams=10, rate=50.0, burst=1)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await asyncio.gather(*(controller.acquire() for _ in range(3)))
+            return loop.time() - start
+        elapsed = self.run_async(scenario())
+        self.assertGreaterEqual(elapsed, 0.035)
+
+    def test_quota_error_detection(self):
+        """Test service quota errors are recognized by message."""
+        self.assertTrue(is_quota_error(LocalQuotaExceeded("ServiceQuotaExceededException: too many")))
+        self.assertFalse(is_quota_error(ValueError("bad input")))
+
+    def test_manager_admission_against_local_streams(self):
+        """Test sessions beyond the limit wait, and the service quota maps to quota_exceeded."""
+        async def scenario():
+            controller = self.make_controller(max_streams=2, max_wait=0.2)
+            client = LocalBedrockClient()
+            managers = []
+            for _ in range(3):
+                manager = BedrockStreamManager(transcript_sinks=[], admission=controller)
+                manager.bedrock_client = client
+                managers.append(manager)
+            await managers[0].initialize_stream()
+            await managers[1].initialize_stream()
+            with self.assertRaises(AdmissionRejected) as ctx:
+                await managers[2].initialize_stream()
+            timeout_status = ctx.exception.status
+            peak = client.peak_active
+
+            await managers[0].close()
+            await managers[2].initialize_stream()
+            for manager in managers[1:]:
+                await manager.close()
+            active_after = controller.status()['active']
+
+            # The service quota is tighter than the local limit
+            quota_client = LocalBedrockClient(max_streams=0)
+            manager = BedrockStreamManager(transcript_sinks=[], admission=controller)
+            manager.bedrock_client = quota_client
+            with self.assertRaises(AdmissionRejected) as ctx:
+                await manager.initialize_stream()
+            return timeout_status, peak, active_after, ctx.exception.status, controller.status()
+        timeout_status, peak, active_after, quota_status, status = self.run_async(scenario())
+        self.assertEqual(timeout_status, STATUS_TIMEOUT)
+        self.assertEqual(peak, 2)
+        self.assertEqual(active_after, 0)
+        self.assertEqual(quota_status, STATUS_QUOTA_EXCEEDED)
+        self.assertEqual(status['active'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
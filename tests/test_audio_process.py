@@ -0,0 +1,139 @@
+"""Tests for the audio device process."""
+
+import time
+import asyncio
+import threading
+import unittest
+from types import SimpleNamespace
+from sonic_nova.core.audio_streamer import AudioStreamer
+from sonic_nova.core.audio_process import AudioProcess, SharedRing
+
+class LoopbackDevices:
+    """Fake devices that capture whatever was just played."""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = None
+
+    def open(self, on_capture, on_playback):
+        def run():
+            while not self._stop.wait(0.005):
+                on_capture(on_playback(512))
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+class MissingDevices:
+    """Fake devices that fail to open."""
+
+    def open(self, on_capture, on_playback):
+        raise OSError("no default input device")
+
+    def close(self):
+        pass
+
+class TestSharedRing(unittest.TestCase):
+    """Test cases for the shared-memory ring buffer."""
+
+    def setUp(self):
+        self.ring = SharedRing.create(10)
+        self.reader = SharedRing.attach(self.ring.name)
+
+    def tearDown(self):
+        self.reader.close()
+        self.ring.close()
+
+    def test_wraparound(self):
+        """Test data written across the end of the buffer reads back in order."""
+        self.assertEqual(self.ring.write(b'abcdefg'), 7)
+        self.assertEqual(self.reader.read(5), b'abcde')
+        self.assertEqual(self.ring.write(b'hijklmn'), 7)
+        self.assertEqual(self.reader.available(), 9)
+        self.assertEqual(self.reader.read(100), b'fghijklmn')
+        self.assertEqual(self.reader.read(100), b'')
+
+    def test_full_ring_and_discard(self):
+        """Test writes stop at capacity and discard skips unread data."""
+        self.assertEqual(self.ring.write(b'x' * 15), 10)
+        self.assertEqual(self.ring.free(), 0)
+        self.ring.discard()
+        self.assertEqual(self.reader.available(), 0)
+        self.assertEqual(self.reader.read(4), b'')
+        self.assertEqual(self.ring.free(), 10)
+        self.ring.write(b'new')
+        self.assertEqual(self.reader.read(10), b'new')
+
+    def test_counters_are_shared(self):
+        """Test overrun and underrun counters are visible to both sides."""
+        self.ring.note_dropped(2048)
+        self.reader.note_padded()
+        self.assertEqual(self.reader.dropped_bytes, 2048)
+        self.assertEqual(self.ring.padded_reads, 1)
+
+class TestAudioProcess(unittest.TestCase):
+    """Test cases for device I/O in a child process."""
+
+    def test_playback_round_trip(self):
+        """Test playback reaches the audio process and its capture comes back to the loop."""
+        pattern = bytes(range(1, 256)) * 40
+
+        async def scenario():
+            audio = AudioProcess(device_factory=LoopbackDevices, frame_bytes=512)
+            await asyncio.get_running_loop().run_in_executor(None, audio.start)
+            captured = []
+            try:
+                audio.attach(asyncio.get_running_loop(), captured.append)
+                await audio.write_playback(pattern)
+                deadline = time.monotonic() + 10
+                while len(b''.join(captured).replace(b'\x00', b'')) < len(pattern):
+                    self.assertLess(time.monotonic(), deadline)
+                    await asyncio.sleep(0.02)
+                stats = audio.stats()
+            finally:
+                audio.stop()
+            return captured, stats
+
+        captured, stats = asyncio.run(scenario())
+        self.assertTrue(all(len(frame) == 512 for frame in captured))
+        # Silence pads the gaps; the played bytes come back whole and in order
+        self.assertEqual(b''.join(captured).replace(b'\x00', b''), pattern)
+        self.assertEqual(stats['capture_dropped_bytes'], 0)
+
+    def test_streamer_uses_the_audio_process(self):
+        """Test AudioStreamer plays through the rings and forwards captured frames upstream."""
+        async def scenario():
+            sent = []
+            manager = SimpleNamespace(add_audio_chunk=sent.append)
+            streamer = AudioStreamer(manager, open_devices=False, device_process=True)
+            streamer.echo_suppressor = None
+            streamer.audio_process = AudioProcess(device_factory=LoopbackDevices, frame_bytes=512)
+            await asyncio.get_running_loop().run_in_executor(None, streamer.audio_process.start)
+            try:
+                streamer.is_streaming = True
+                streamer.audio_process.attach(streamer.loop, streamer._on_process_capture)
+                await streamer._write_output(b'\x10\x27' * 256)
+                deadline = time.monotonic() + 10
+                while b'\x10\x27' * 256 not in b''.join(sent):
+                    self.assertLess(time.monotonic(), deadline)
+                    await asyncio.sleep(0.02)
+            finally:
+                streamer.close_devices()
+            return streamer
+
+        streamer = asyncio.run(scenario())
+        self.assertIsNone(streamer.audio_process)
+
+    def test_device_error_is_reported(self):
+        """Test a device that fails to open raises in the main process."""
+        audio = AudioProcess(device_factory=MissingDevices)
+        with self.assertRaises(OSError) as ctx:
+            audio.start()
+        self.assertIn("no default input device", str(ctx.exception))
+        self.assertIsNone(audio.process)
+        self.assertIsNone(audio.capture)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""Tests for the barge_in module."""
+
+import unittest
+import numpy as np
+from sonic_nova.core.barge_in import BargeInDetector
+
+def tone(amplitude, samples=1024, rate=16000):
+    """Return 16-bit PCM bytes of a 440 Hz tone."""
+    t = np.arange(samples) / float(rate)
+    return (amplitude * 32767 * np.sin(2 * np.pi * 440 * t)).astype(np.int16).tobytes()
+
+class TestBargeIn(unittest.TestCase):
+    """Test cases for barge_in module."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.detector = BargeInDetector(
+            sample_rate=16000, block_ms=16, threshold_db=-40.0,
+            margin_db=12.0, min_speech_ms=32, playback_tail=0.3
+        )
+
+    def test_block_levels(self):
+        """Test per-block levels are computed for each complete block."""
+        levels = self.detector.block_levels(tone(0.5))
+        self.assertEqual(levels.shape, (4,))
+        self.assertTrue(np.all(np.abs(levels - (-9.0)) < 0.5))
+
+    def test_no_detection_without_playback(self):
+        """Test speech is ignored while the assistant is silent."""
+        self.assertIsNone(self.detector.process(tone(0.5), now=10.0))
+
+    def test_detects_onset_during_playback(self):
+        """Test speech onset is reported once while the assistant plays."""
+        self.detector.note_playback(now=10.0)
+        self.assertIsNone(self.detector.process(tone(0.0001), now=10.05))
+        onset = self.detector.process(tone(0.5), now=10.1)
+        self.assertIsNotNone(onset)
+        self.assertAlmostEqual(onset, 10.1 - 4 * self.detector.block_duration)
+        # Continued speech does not trigger again
+        self.detector.note_playback(now=10.1)
+        self.assertIsNone(self.detector.process(tone(0.5), now=10.16))
+
+    def test_quiet_audio_does_not_trigger(self):
+        """Test background noise below the threshold is ignored."""
+        self.detector.note_playback(now=10.0)
+        for i in range(10):
+            self.assertIsNone(self.detector.process(tone(0.001), now=10.0 + i * 0.01))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+"""Tests for session checkpoints and crash recovery."""
+
+import os
+import time
+import asyncio
+import tempfile
+import unittest
+from sonic_nova.core.admission import AdmissionController
+from sonic_nova.core.bedrock_manager import BedrockStreamManager
+from sonic_nova.core.checkpoint import CheckpointStore, read_checkpoints, recover_sessions
+from sonic_nova.core.local_stream import LocalBedrockClient
+from sonic_nova.utils.metrics import MetricsRegistry, metrics
+
+def restore_factory(client):
+    """Return a recover_sessions() factory whose sessions use client."""
+    def factory(state, store):
+        manager = BedrockStreamManager.from_checkpoint(
+            state, checkpoints=store, transcript_sinks=[],
+            admission=AdmissionController(metrics_registry=MetricsRegistry()))
+        manager.bedrock_client = client
+        return manager
+    return factory
+
+class TestCheckpointStore(unittest.TestCase):
+    """Test cases for the checkpoint file."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'checkpoints.log')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_latest_live_sessions_are_loaded(self):
+        """Test a reopened store recovers each unfinished session's latest checkpoint."""
+        store = CheckpointStore(self.path, fsync_interval=0.01)
+        store.save('a', {'n': 1})
+        store.save('b', {'n': 1})
+        store.save('a', {'n': 2})
+        store.end('b')
+        store.close()
+        self.assertEqual(CheckpointStore(self.path).recovered, {'a': {'n': 2}})
+        self.assertLess(store.fsyncs, store.records_written)
+
+    def test_torn_tail_is_skipped(self):
+        """Test a record cut short by a crash does not hide the ones before it."""
+        store = CheckpointStore(self.path)
+        store.save('a', {'n': 1})
+        store.close()
+        with open(self.path, 'ab') as f:
+            f.write(b'0badc0de {"session":"a","sta')
+        self.assertEqual(read_checkpoints(self.path), {'a': {'n': 1}})
+
+    def test_compaction_keeps_live_sessions(self):
+        """Test a full file is rewritten with one record per live session."""
+        store = CheckpointStore(self.path, fsync_interval=0.0, compact_bytes=2048)
+        for i in range(200):
+            store.save('a', {'n': i})
+        store.save('b', {'n': 0})
+        store.end('b')
+        store.save('c', {'n': 0})
+        store.close()
+        self.assertLess(os.path.getsize(self.path), 4096)
+        self.assertEqual(read_checkpoints(self.path), {'a': {'n': 199}, 'c': {'n': 0}})
+
+    def test_close_waits_for_a_busy_writer(self):
+        """Test the file stays open while the writer thread is still writing."""
+        class SlowStore(CheckpointStore):
+            def _write(self, batch):
+                time.sleep(0.2)
+                super()._write(batch)
+
+        store = SlowStore(self.path, fsync_interval=0.0)
+        store.save('a', {'n': 1})
+        time.sleep(0.05)
+        self.assertFalse(store.close(timeout=0.01))
+        self.assertFalse(store._file.closed)
+        self.assertTrue(store.close())
+        self.assertEqual(read_checkpoints(self.path), {'a': {'n': 1}})
+
+    def test_recovery_attempts_are_limited(self):
+        """Test a session that never completes a turn after recovery is eventually dropped."""
+        store = CheckpointStore(self.path, fsync_interval=0.01)
+        store.save('a', {'n': 1})
+        store.close()
+        for _ in range(2):
+            store = CheckpointStore(self.path, fsync_interval=0.01)
+            self.assertEqual(list(store.begin_recovery(max_attempts=2)), ['a'])
+            store.close()
+        store = CheckpointStore(self.path, fsync_interval=0.01)
+        self.assertEqual(store.begin_recovery(max_attempts=2), {})
+        store.close()
+        self.assertEqual(read_checkpoints(self.path), {})
+
+class TestRecovery(unittest.TestCase):
+    """Test cases for resuming a session in a new process."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'checkpoints.log')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_conversation_resumes_on_a_new_stream(self):
+        """Test history reaches the new stream without replies and the call carries on."""
+        async def crashed_call():
+            store = CheckpointStore(self.path, fsync_interval=0.01)
+            manager = BedrockStreamManager(
+                transcript_sinks=[], text_only=True, checkpoints=store,
+                admission=AdmissionController(metrics_registry=MetricsRegistry()))
+            manager.bedrock_client = LocalBedrockClient(latency=0.0, reply_text="It has shipped.")
+            await manager.initialize_stream()
+            await manager.ask("Where is my order?")
+            await manager.ask("When will it arrive?")
+            # The process dies here: no close(), only what was already queued is written
+            store.close()
+            return manager.prompt_name
+
+        async def restarted_worker():
+            store = CheckpointStore(self.path, fsync_interval=0.01)
+            client = LocalBedrockClient(latency=0.0, reply_text="Tomorrow.")
+            managers = await recover_sessions(store, restore_factory(client))
+            manager = managers[0]
+            stream = next(iter(client.active))
+            reply = await manager.ask("Thanks, and the second one?")
+            await manager.close()
+            store.close()
+            return manager, stream, reply
+
+        session = asyncio.run(crashed_call())
+        manager, stream, reply = asyncio.run(restarted_worker())
+        self.assertEqual(manager.prompt_name, session)
+        self.assertEqual(stream.history, [
+            ('USER', "Where is my order?"),
+            ('ASSISTANT', "It has shipped."),
+            ('USER', "When will it arrive?"),
+            ('ASSISTANT', "It has shipped."),
+        ])
+        self.assertEqual(reply, "Tomorrow.")
+        self.assertEqual(stream.turns, 1)
+        # Closed on purpose, so there is nothing left to recover
+        self.assertEqual(read_checkpoints(self.path), {})
+
+    def test_pending_tool_is_reused(self):
+        """Test the tool call in flight at the crash answers the model's repeated request."""
+        state = {
+            'config': {'model_id': 'ermis', 'region': 'us-east-1', 'endpoint_uri': None, 'text_only': True},
+            'prompt_name': 'restored-session',
+            'history': [['USER', "What time is it?"]],
+            'pending_tool': {'toolName': 'getDateAndTimeTool', 'toolUseId': 'old-id', 'content': '{}'},
+        }
+
+        async def scenario():
+            store = CheckpointStore(self.path, fsync_interval=0.01)
+            store.recovered = {'restored-session': state}
+            client = LocalBedrockClient(latency=0.0, tool_every=1)
+            manager = (await recover_sessions(store, restore_factory(client)))[0]
+            stream = next(iter(client.active))
+            stream._start_turn()  # The model asks for the tool again
+            reply = await manager.text_reply_queue.get()
+            await manager.close()
+            store.close()
+            return stream, reply
+
+        reused_before = metrics.counter("checkpoint.tool_reused")
+        stream, reply = asyncio.run(scenario())
+        self.assertEqual(metrics.counter("checkpoint.tool_reused") - reused_before, 1)
+        self.assertEqual(stream.tool_results_received, 1)
+        self.assertEqual(reply, "This is a local test response.")
+
+    def test_failed_recovery_is_closed_and_kept(self):
+        """Test a session whose stream cannot be reopened releases its slot but stays recoverable."""
+        state = {
+            'config': {'model_id': 'ermis', 'region': 'us-east-1', 'endpoint_uri': None, 'text_only': True},
+            'prompt_name': 'restored-session',
+            'history': [['USER', "Where is my order?"]],
+        }
+        admission = AdmissionController(metrics_registry=MetricsRegistry())
+
+        def factory(state, store):
+            manager = BedrockStreamManager.from_checkpoint(
+                state, checkpoints=store, transcript_sinks=[], admission=admission)
+            manager.bedrock_client = LocalBedrockClient(max_streams=0)
+            return manager
+
+        async def scenario():
+            store = CheckpointStore(self.path, fsync_interval=0.01)
+            store.save('restored-session', state)
+            store.close()
+            store = CheckpointStore(self.path, fsync_interval=0.01)
+            managers = await recover_sessions(store, factory)
+            store.close()
+            return managers, store
+
+        managers, store = asyncio.run(scenario())
+        self.assertEqual(managers, [])
+        self.assertIn('restored-session', store.recovered)
+        self.assertEqual(admission.status()['active'], 0)
+        self.assertEqual(list(read_checkpoints(self.path)), ['restored-session'])
+
+if __name__ == '__main__':
+    unittest.main()
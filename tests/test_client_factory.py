@@ -0,0 +1,123 @@
+"""Tests for the client_factory module."""
+
+import io
+import asyncio
+import datetime
+import unittest
+from contextlib import redirect_stdout
+from sonic_nova.core.client_factory import BedrockClientFactory, CachingCredentialsResolver
+from sonic_nova.utils.metrics import metrics
+
+class Identity:
+    """Minimal credentials identity."""
+
+    def __init__(self, expiration=None):
+        self.expiration = expiration
+
+class CountingResolver:
+    """Resolver that counts how often it is asked for credentials."""
+
+    def __init__(self, lifetime=None):
+        self.calls = 0
+        self.lifetime = lifetime
+
+    async def get_identity(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.lifetime is None:
+            return Identity()
+        return Identity(datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=self.lifetime))
+
+class TestClientFactory(unittest.TestCase):
+    """Test cases for client_factory module."""
+
+    def test_client_is_shared_per_region_and_endpoint(self):
+        """Test one client per key and reuse statistics."""
+        factory = BedrockClientFactory(credentials_resolver=CountingResolver())
+        a = factory.get_client("us-east-1")
+        b = factory.get_client("us-east-1")
+        c = factory.get_client("us-west-2")
+        d = factory.get_client("us-east-1", "http://localhost:8080")
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+        self.assertIsNot(a, d)
+        stats = factory.client_reuse_stats()
+        self.assertEqual(stats['clients_created'], 3)
+        self.assertEqual(stats['client_reuses'], 1)
+        self.assertEqual(stats['per_client']["us-east-1 https://bedrock-runtime.us-east-1.amazonaws.com"], 2)
+
+    def test_each_event_loop_gets_its_own_client(self):
+        """Test a client is not handed to a loop other than the one it was made on."""
+        factory = BedrockClientFactory(credentials_resolver=CountingResolver())
+
+        async def acquire():
+            return factory.get_client("us-east-1"), factory.get_client("us-east-1")
+
+        first, again = asyncio.run(acquire())
+        second, _ = asyncio.run(acquire())
+        self.assertIs(first, again)
+        self.assertIsNot(first, second)
+
+    def test_credentials_are_cached(self):
+        """Test non-expiring credentials are resolved once."""
+        inner = CountingResolver()
+        resolver = CachingCredentialsResolver(inner)
+
+        async def scenario():
+            return await asyncio.gather(*(resolver.get_identity() for _ in range(5)))
+
+        identities = asyncio.run(scenario())
+        self.assertEqual(inner.calls, 1)
+        self.assertTrue(all(identity is identities[0] for identity in identities))
+
+    def test_credentials_refresh_ahead_of_expiry(self):
+        """Test credentials near expiry are refreshed in the background."""
+        inner = CountingResolver(lifetime=60)
+        resolver = CachingCredentialsResolver(inner, refresh_margin=120)
+
+        async def scenario():
+            first = await resolver.get_identity()
+            second = await resolver.get_identity()
+            await asyncio.sleep(0.01)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        self.assertIs(first, second)
+        self.assertEqual(inner.calls, 2)
+
+    def test_resolver_works_across_event_loops(self):
+        """Test the cached resolver keeps working after its first loop is gone."""
+        inner = CountingResolver(lifetime=1)
+        resolver = CachingCredentialsResolver(inner, refresh_margin=0)
+
+        async def resolve():
+            return await resolver.get_identity()
+
+        asyncio.run(resolve())
+        resolver._identity.expiration -= datetime.timedelta(seconds=5)
+        asyncio.run(resolve())
+        self.assertEqual(inner.calls, 2)
+
+    def test_failed_background_refresh_is_reported(self):
+        """Test a background refresh error is retrieved and counted."""
+        class FailingResolver(CountingResolver):
+            async def get_identity(self, **kwargs):
+                if self.calls:
+                    raise RuntimeError("metadata service unavailable")
+                return await super().get_identity(**kwargs)
+
+        resolver = CachingCredentialsResolver(FailingResolver(lifetime=60), refresh_margin=120)
+
+        async def scenario():
+            await resolver.get_identity()
+            await resolver.get_identity()
+            await asyncio.sleep(0.01)
+
+        errors_before = metrics.counter("credentials.refresh_errors")
+        with redirect_stdout(io.StringIO()) as out:
+            asyncio.run(scenario())
+        self.assertEqual(metrics.counter("credentials.refresh_errors") - errors_before, 1)
+        self.assertIn("metadata service unavailable", out.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
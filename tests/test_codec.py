@@ -0,0 +1,39 @@
+"""Tests for the codec module."""
+
+import json
+import unittest
+from sonic_nova.utils.codec import available_codecs, get_codec, JsonCodec, StdlibJsonCodec
+
+class TestCodec(unittest.TestCase):
+    """Test cases for codec module."""
+
+    def test_round_trip_every_backend(self):
+        """Test every installed backend produces bytes and parses them back."""
+        event = {"event": {"textOutput": {"content": "héllo", "role": "USER"}}}
+        for name in available_codecs():
+            codec = get_codec(name)
+            encoded = codec.dumps(event)
+            self.assertIsInstance(encoded, bytes)
+            self.assertEqual(codec.loads(encoded), event)
+            self.assertEqual(codec.loads(memoryview(encoded)), event)
+            self.assertEqual(json.loads(codec.dumps_str(event)), event)
+
+    def test_auto_selection(self):
+        """Test 'auto' resolves to an available backend."""
+        self.assertIn(get_codec('auto').name, available_codecs())
+        self.assertIsInstance(get_codec('json'), StdlibJsonCodec)
+
+    def test_invalid_input(self):
+        """Test decode errors surface as ValueError and unknown names are rejected."""
+        with self.assertRaises(ValueError):
+            get_codec('json').loads(b'{not json')
+        with self.assertRaises(ValueError):
+            get_codec('yaml')
+
+    def test_interface_is_abstract(self):
+        """Test the codec interface cannot be used without a backend."""
+        with self.assertRaises(TypeError):
+            JsonCodec()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""Tests for the batched capture DSP."""
+
+import time
+import asyncio
+import unittest
+import numpy as np
+from sonic_nova.config.settings import CHUNK_SIZE
+from sonic_nova.core.bedrock_manager import BedrockStreamManager
+from sonic_nova.core.dsp import DspPipeline, DspScheduler
+from sonic_nova.utils.metrics import MetricsRegistry
+
+def sine(amplitude, frames, frame_samples=CHUNK_SIZE, rate=16000, freq=440):
+    """Return int16 (frames, frame_samples) of a continuous sine."""
+    t = np.arange(frames * frame_samples) / rate
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.int16).reshape(frames, frame_samples)
+
+class TestDsp(unittest.TestCase):
+    """Test cases for the batched capture DSP."""
+
+    def test_batch_matches_per_session_processing(self):
+        """Test processing sessions together gives the same result as one by one."""
+        rng = np.random.default_rng(0)
+        frames = (rng.standard_normal((3, 4, CHUNK_SIZE)) * [[[500]], [[3000]], [[12000]]]).astype(np.int16)
+        batched, single = DspPipeline(), DspPipeline()
+        batched_slots = np.array([batched.allocate() for _ in range(3)])
+        single_slots = [np.array([single.allocate()]) for _ in range(3)]
+        for step in range(4):
+            out, levels, speech = batched.process(frames[:, step], batched_slots)
+            for i in range(3):
+                one, one_level, one_speech = single.process(frames[i:i + 1, step], single_slots[i])
+                np.testing.assert_array_equal(out[i], one[0])
+                self.assertAlmostEqual(float(levels[i]), float(one_level[0]), places=4)
+                self.assertEqual(bool(speech[i]), bool(one_speech[0]))
+
+    def test_vad_and_agc(self):
+        """Test speech is flagged with hangover and quiet speech is raised toward the target."""
+        pipeline = DspPipeline(vad_hangover_ms=150, agc_target_db=-20.0)
+        slot = np.array([pipeline.allocate()])
+        quiet = sine(1000, 30)  # About -33 dBFS
+        speech_flags, out_levels = [], []
+        for frame in np.concatenate([np.zeros((3, CHUNK_SIZE), np.int16), quiet, np.zeros((4, CHUNK_SIZE), np.int16)]):
+            out, _, speech = pipeline.process(frame[None], slot)
+            speech_flags.append(bool(speech[0]))
+            x = out[0].astype(np.float64) / 32768
+            out_levels.append(10 * np.log10(np.mean(x * x) + 1e-12))
+        self.assertEqual(speech_flags[:3], [False] * 3)
+        self.assertTrue(all(speech_flags[3:33]))
+        self.assertEqual(speech_flags[33:], [True, True, False, False])
+        self.assertLess(out_levels[3], -30)
+        self.assertGreater(out_levels[32], -21)
+
+    def test_resampling(self):
+        """Test 48 kHz capture is converted to 16 kHz without changing a tone."""
+        pipeline = DspPipeline(frame_samples=960, capture_rate=48000, agc_smoothing=0.0)
+        slot = np.array([pipeline.allocate()])
+        frames = sine(10000, 6, frame_samples=960, rate=48000, freq=1000)
+        out = np.concatenate([pipeline.process(f[None], slot)[0][0] for f in frames]).astype(np.float64)
+        self.assertEqual(len(out), 6 * 320)
+        self.assertAlmostEqual(np.abs(out[160:]).max(), 10000, delta=200)
+        spectrum = np.abs(np.fft.rfft(out[320:] * np.hanning(len(out) - 320)))
+        self.assertAlmostEqual(np.argmax(spectrum) * 16000 / (len(out) - 320), 1000, delta=20)
+        with self.assertRaises(ValueError):
+            DspPipeline(frame_samples=1000, capture_rate=48000)
+
+    def test_slots_grow_and_are_reused(self):
+        """Test the state arrays grow past capacity and freed slots are reused."""
+        pipeline = DspPipeline(capacity=2)
+        slots = [pipeline.allocate() for _ in range(5)]
+        self.assertEqual(sorted(slots), [0, 1, 2, 3, 4])
+        self.assertGreaterEqual(pipeline.capacity, 5)
+        pipeline.release(slots[1])
+        self.assertEqual(pipeline.allocate(), slots[1])
+
+    def test_cost_per_frame_falls_with_concurrency(self):
+        """Test a tick over many sessions costs less per frame than a tick over one."""
+        def per_frame_us(sessions, ticks=30):
+            scheduler = DspScheduler(tick_interval=None, metrics_registry=MetricsRegistry())
+            handles = [scheduler.register(lambda *args: None) for _ in range(sessions)]
+            frame = sine(3000, 1)[0].tobytes()
+            best = float('inf')
+            for _ in range(ticks):
+                for handle in handles:
+                    scheduler.submit(handle, frame)
+                start = time.perf_counter()
+                scheduler.tick()
+                best = min(best, (time.perf_counter() - start) / sessions)
+            return best * 1e6
+        self.assertLess(per_frame_us(64), per_frame_us(1) * 0.7)
+
+    def test_managers_share_a_scheduler(self):
+        """Test sessions' audio is processed in batches and reaches their input queues."""
+        async def scenario():
+            registry = MetricsRegistry()
+            scheduler = DspScheduler(tick_interval=0.005, metrics_registry=registry)
+            managers = [BedrockStreamManager(transcript_sinks=[], dsp=scheduler) for _ in range(3)]
+            frames = sine(3000, 2)
+            for manager in managers:
+                pcm = frames.tobytes()
+                # Odd-sized chunks are buffered into whole frames
+                manager.add_audio_chunk(pcm[:1000])
+                manager.add_audio_chunk(pcm[1000:])
+            await asyncio.sleep(0.1)
+            queued = [m.audio_input_queue.qsize() for m in managers]
+            levels = [m.input_level_db for m in managers]
+            for manager in managers:
+                await manager.close()
+            return scheduler, registry, queued, levels
+        scheduler, registry, queued, levels = asyncio.run(scenario())
+        self.assertEqual(queued, [2, 2, 2])
+        self.assertTrue(all(-25 < level < -22 for level in levels))
+        self.assertEqual(registry.samples("dsp.frames_per_tick"), [6])
+        self.assertEqual(scheduler.sessions, [])
+
+if __name__ == '__main__':
+    unittest.main()
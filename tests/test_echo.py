@@ -0,0 +1,75 @@
+"""Tests for the echo module."""
+
+import asyncio
+import unittest
+import numpy as np
+from types import SimpleNamespace
+from sonic_nova.core.audio_streamer import AudioStreamer
+from sonic_nova.core.echo import EchoSuppressor
+from sonic_nova.utils.metrics import MetricsRegistry
+
+FRAME = 1024
+
+def to_pcm(samples):
+    """Convert float samples in [-1, 1] to 16-bit PCM bytes."""
+    return (np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes()
+
+class TestEcho(unittest.TestCase):
+    """Test cases for echo module."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.registry = MetricsRegistry()
+        self.suppressor = EchoSuppressor(
+            input_rate=16000, output_rate=16000, frame_size=FRAME,
+            max_delay_ms=100, metrics_registry=self.registry
+        )
+        self.rng = np.random.default_rng(0)
+
+    def test_bypass_without_reference(self):
+        """Test frames pass through untouched when nothing is playing."""
+        frame = to_pcm(self.rng.standard_normal(FRAME) * 0.1)
+        self.assertEqual(self.suppressor.process(frame), (frame, False))
+
+    def test_echo_is_gated_and_attenuated(self):
+        """Test delayed playback picked up by the mic is suppressed."""
+        far = self.rng.standard_normal(FRAME * 40) * 0.1
+        delay = 300
+        mic = 0.6 * np.concatenate((np.zeros(delay), far[:-delay]))
+        in_energy = out_energy = 0.0
+        for i in range(40):
+            self.suppressor.push_reference(to_pcm(far[i * FRAME:(i + 1) * FRAME]))
+            out, gated = self.suppressor.process(to_pcm(mic[i * FRAME:(i + 1) * FRAME]))
+            if i >= 20:
+                self.assertTrue(gated)
+                in_energy += float(np.sum(mic[i * FRAME:(i + 1) * FRAME] ** 2))
+                out_energy += float(np.sum((np.frombuffer(out, dtype=np.int16) / 32768.0) ** 2))
+        self.assertLess(out_energy, in_energy * 0.01)
+        self.assertGreater(self.registry.snapshot()["echo.frame_cpu_us"]["count"], 0)
+
+    def test_barge_in_flush_keeps_suppressor(self):
+        """Test flushing playback keeps the converged filter and reference history."""
+        async def make_streamer():
+            return AudioStreamer(SimpleNamespace(audio_output_queue=asyncio.Queue()), open_devices=False)
+        streamer = asyncio.run(make_streamer())
+        streamer.echo_suppressor = self.suppressor
+        far = self.rng.standard_normal(FRAME * 20) * 0.1
+        for i in range(20):
+            self.suppressor.push_reference(to_pcm(far[i * FRAME:(i + 1) * FRAME]))
+            self.suppressor.process(to_pcm(0.6 * far[i * FRAME:(i + 1) * FRAME]))
+        weights = self.suppressor._weights.copy()
+        streamer._clear_output_queue()
+        self.assertIs(streamer.echo_suppressor, self.suppressor)
+        self.assertTrue(self.suppressor.reference_active())
+        np.testing.assert_array_equal(self.suppressor._weights, weights)
+
+    def test_near_end_speech_passes(self):
+        """Test speech uncorrelated with playback is not gated."""
+        far = self.rng.standard_normal(FRAME) * 0.1
+        near = self.rng.standard_normal(FRAME) * 0.3
+        self.suppressor.push_reference(to_pcm(far))
+        _, gated = self.suppressor.process(to_pcm(near))
+        self.assertFalse(gated)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+"""Tests for the fast_path module."""
+
+import os
+import json
+import base64
+import unittest
+from sonic_nova.models.fast_path import decode_audio_output, find_audio_output_content
+
+def audio_output_payload(audio, **extra):
+    """Build a raw audioOutput payload as the server would send it."""
+    body = {"content": base64.b64encode(audio).decode('utf-8'), "contentId": "c1", "role": "ASSISTANT"}
+    body.update(extra)
+    return json.dumps({"event": {"audioOutput": body}}).encode('utf-8')
+
+class TestFastPath(unittest.TestCase):
+    """Test cases for fast_path module."""
+
+    def test_decode_audio_output(self):
+        """Test audio is decoded without JSON parsing."""
+        audio = os.urandom(4096)
+        self.assertEqual(decode_audio_output(audio_output_payload(audio)), audio)
+
+    def test_content_after_other_fields(self):
+        """Test the content key is found regardless of field order."""
+        audio = os.urandom(300)
+        payload = json.dumps({"event": {"audioOutput": {
+            "contentId": "c1",
+            "content": base64.b64encode(audio).decode('utf-8'),
+        }}}, indent=2).encode('utf-8')
+        self.assertEqual(decode_audio_output(payload), audio)
+
+    def test_other_events_fall_back(self):
+        """Test non-audio events are left to the JSON path."""
+        payload = json.dumps({"event": {"textOutput": {"content": "audioOutput", "role": "USER"}}}).encode('utf-8')
+        self.assertIsNone(find_audio_output_content(payload))
+        self.assertIsNone(decode_audio_output(payload))
+
+    def test_escaped_content_falls_back(self):
+        """Test escaped base64 (e.g. \\/) is left to the JSON path."""
+        payload = b'{"event":{"audioOutput":{"content":"AA\\/A"}}}'
+        self.assertIsNone(decode_audio_output(payload))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Tests for filler audio."""
+
+import os
+import time
+import wave
+import random
+import asyncio
+import tempfile
+import unittest
+from types import SimpleNamespace
+import numpy as np
+from sonic_nova.config.settings import OUTPUT_SAMPLE_RATE, FILLER_FADE_MS
+from sonic_nova.core.audio_streamer import AudioStreamer
+from sonic_nova.core.filler import FillerCache, pack_clips, read_clip, default_filler_cache
+
+def tone(seconds, amplitude=8000):
+    """Return 16-bit PCM of a 440 Hz tone."""
+    t = np.arange(int(seconds * OUTPUT_SAMPLE_RATE)) / OUTPUT_SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype('<i2').tobytes()
+
+class FakeOutput:
+    """Output device that records writes and can deliver real audio mid-clip."""
+
+    def __init__(self, queue=None, arrive_after=None):
+        self.writes = []
+        self.queue = queue
+        self.arrive_after = arrive_after
+
+    def write(self, data):
+        self.writes.append(bytes(data))
+        if self.arrive_after is not None and len(self.writes) == self.arrive_after:
+            self.queue.put_nowait(b'\x00\x00' * 100)
+
+class TestFiller(unittest.TestCase):
+    """Test cases for filler audio."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, 'filler')
+        self.clips = [('one_moment', tone(0.5)), ('checking', tone(0.3))]
+        pack_clips(self.clips, self.path)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def make_streamer(self, output):
+        manager = SimpleNamespace(
+            tool_wait_started=time.monotonic() - 1.0,
+            audio_output_queue=asyncio.Queue(),
+            barge_in=False,
+        )
+        streamer = AudioStreamer(manager, open_devices=False, filler_cache=FillerCache.open(self.path))
+        streamer.echo_suppressor = None
+        streamer.output_stream = output
+        if output.arrive_after is not None:
+            output.queue = manager.audio_output_queue
+        streamer.is_streaming = True
+        return streamer
+
+    def test_pack_and_open(self):
+        """Test clips round-trip through the memory-mapped cache."""
+        cache = FillerCache.open(self.path)
+        self.assertEqual(len(cache), 2)
+        self.assertIsInstance(cache.samples, np.memmap)
+        self.assertEqual(cache.clip(1).tobytes(), self.clips[1][1])
+        rng = random.Random(0)
+        self.assertTrue(all(cache.choose(exclude=0, rng=rng) == 1 for _ in range(10)))
+
+    def test_missing_or_wrong_format(self):
+        """Test a missing cache disables filler and bad WAVs are refused."""
+        self.assertIsNone(default_filler_cache(os.path.join(self._tmp.name, 'none')))
+        wav = os.path.join(self._tmp.name, 'bad.wav')
+        with wave.open(wav, 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(b'\x00\x00' * 10)
+        with self.assertRaises(ValueError):
+            read_clip(wav)
+
+    def test_filler_plays_once_per_tool_wait(self):
+        """Test a slow tool gets one whole clip and the same wait gets no second one."""
+        async def scenario():
+            output = FakeOutput()
+            streamer = self.make_streamer(output)
+            streamer.stream_manager.tool_wait_started = time.monotonic()
+            self.assertFalse(streamer._filler_due())
+            streamer.stream_manager.tool_wait_started -= 1.0
+            self.assertTrue(streamer._filler_due())
+            await streamer._play_filler()
+            self.assertFalse(streamer._filler_due())
+            return output, streamer
+        output, streamer = asyncio.run(scenario())
+        played = b''.join(output.writes)
+        self.assertEqual(played, self.clips[streamer._last_filler][1])
+
+    def test_real_audio_cuts_filler_with_fade(self):
+        """Test arriving audio stops the clip after a short fade-out."""
+        async def scenario():
+            output = FakeOutput(arrive_after=3)
+            streamer = self.make_streamer(output)
+            await streamer._play_filler()
+            return output
+        output = asyncio.run(scenario())
+        self.assertEqual(len(output.writes), 4)
+        tail = np.frombuffer(output.writes[-1], dtype=np.int16)
+        self.assertEqual(len(tail), FILLER_FADE_MS * OUTPUT_SAMPLE_RATE // 1000)
+        self.assertLess(abs(int(tail[-1])), 50)
+        self.assertLess(np.abs(tail[-20:]).max(), np.abs(tail[:20]).max() + 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,12 +20,14 @@ class TestHelpers(unittest.TestCase):
         debug_print("Test message")
         mock_print.assert_not_called()
 
-    @patch('builtins.print')
-    def test_debug_print_when_debug_enabled(self, mock_print):
+    def test_debug_print_when_debug_enabled(self):
         """Test debug_print when debug is enabled."""
         set_debug(True)
-        debug_print("Test message")
-        mock_print.assert_called_once_with("[DEBUG] Test message")
+        with self.assertLogs('sonic_nova', level='DEBUG') as captured:
+            debug_print("Test %s", "message", event_type="textInput")
+        self.assertEqual(len(captured.records), 1)
+        self.assertEqual(captured.records[0].getMessage(), "Test message")
+        self.assertEqual(captured.records[0].event_type, "textInput")
 
     def test_time_it(self):
         """Test time_it decorator."""
@@ -0,0 +1,116 @@
+"""Tests for knowledge base ingestion."""
+
+import os
+import tempfile
+import unittest
+from sonic_nova.knowledge.embeddings import HashingEmbedder
+from sonic_nova.knowledge.index import VectorIndex
+from sonic_nova.knowledge.ingest import discover, extract_pages, iter_chunks, ingest
+
+class FailingEmbedder(HashingEmbedder):
+    """Raises after a number of embed() calls, like an interrupted run."""
+
+    def __init__(self, calls):
+        super().__init__(dim=64)
+        self.calls = calls
+
+    def embed(self, texts):
+        if self.calls == 0:
+            raise KeyboardInterrupt
+        self.calls -= 1
+        return super().embed(texts)
+
+class TestIngest(unittest.TestCase):
+    """Test cases for knowledge base ingestion."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.docs = os.path.join(self._tmp.name, 'docs')
+        self.index = os.path.join(self._tmp.name, 'kb')
+        os.makedirs(os.path.join(self.docs, 'faq'))
+        for i in range(6):
+            self.write(f"policy{i}.txt", f"policy {i} " + "refund shipping warranty " * 30)
+        self.write('faq/returns.md', "Items can be returned within 30 days.\fRefunds take 5 days.")
+        self.write('faq/help.html', "<html><head><title>t</title></head><body><p>Reset your password</p>"
+                                    "<script>var x = 1;</script></body></html>")
+        self.write('notes.docx', "not ingested")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.docs, name), 'w') as f:
+            f.write(text)
+
+    def test_discover_and_extract(self):
+        """Test supported files are found and their text extracted."""
+        sources = [source for _, source in discover([self.docs])]
+        self.assertEqual(sources, ['policy0.txt', 'policy1.txt', 'policy2.txt', 'policy3.txt',
+                                   'policy4.txt', 'policy5.txt', 'faq/help.html', 'faq/returns.md'])
+        self.assertEqual(len(extract_pages(os.path.join(self.docs, 'faq/returns.md'))), 2)
+        html = extract_pages(os.path.join(self.docs, 'faq/help.html'))
+        self.assertIn('Reset your password', html[0])
+        self.assertNotIn('var x', html[0])
+
+    def test_chunks_overlap_across_pages(self):
+        """Test passages have the configured size and overlap, across pages."""
+        pages = [' '.join(f"w{i}" for i in range(7)), ' '.join(f"w{i}" for i in range(7, 12))]
+        chunks = [c.split() for c in iter_chunks(pages, chunk_words=5, overlap=2)]
+        self.assertEqual(chunks[0], ['w0', 'w1', 'w2', 'w3', 'w4'])
+        self.assertEqual(chunks[1], ['w3', 'w4', 'w5', 'w6', 'w7'])
+        self.assertEqual(chunks[-1][-1], 'w11')
+        self.assertEqual(list(iter_chunks(['a b'], chunk_words=5, overlap=2)), ['a b'])
+
+    def test_parallel_ingest_and_incremental_rerun(self):
+        """Test a pool run builds the index and a rerun only touches changes."""
+        stats = ingest([self.docs], self.index, workers=2, batch_size=4, chunk_words=20, overlap=5)
+        self.assertEqual(stats['parsed'], 8)
+        self.assertEqual(stats['failed'], {})
+        self.assertTrue(stats['index_written'])
+        self.assertGreater(stats['pages_per_second'], 0)
+        index = VectorIndex.open(self.index)
+        self.assertEqual(len(index), stats['chunks'])
+        self.assertEqual(index.search("reset password")[0]['source'], 'faq/help.html')
+
+        stats = ingest([self.docs], self.index, workers=2, batch_size=4, chunk_words=20, overlap=5)
+        self.assertEqual((stats['parsed'], stats['unchanged']), (0, 8))
+        self.assertFalse(stats['index_written'])
+
+        self.write('faq/returns.md', "Exchanges are free of charge.")
+        os.remove(os.path.join(self.docs, 'policy5.txt'))
+        stats = ingest([self.docs], self.index, workers=2, batch_size=4, chunk_words=20, overlap=5)
+        self.assertEqual((stats['parsed'], stats['unchanged']), (1, 6))
+        self.assertTrue(stats['index_written'])
+        index = VectorIndex.open(self.index)
+        self.assertNotIn('policy5.txt', index.sources)
+        self.assertEqual(index.search("exchanges free")[0]['text'], "Exchanges are free of charge.")
+        self.assertEqual(len(os.listdir(self.index + '.cache/entries')), 7)
+
+    def test_resume_after_interruption(self):
+        """Test an interrupted run keeps finished files for the next run."""
+        with self.assertRaises(KeyboardInterrupt):
+            ingest([self.docs], self.index, embedder=FailingEmbedder(calls=2), workers=1,
+                   batch_size=4, chunk_words=20, overlap=5)
+        self.assertFalse(os.path.exists(self.index))
+        stats = ingest([self.docs], self.index, embedder=HashingEmbedder(dim=64), workers=1,
+                       batch_size=4, chunk_words=20, overlap=5)
+        self.assertGreater(stats['unchanged'], 0)
+        self.assertEqual(stats['parsed'] + stats['unchanged'], 8)
+        self.assertEqual(len(VectorIndex.open(self.index).sources), 8)
+
+    def test_settings_change_rebuilds_cache(self):
+        """Test cached vectors are discarded when chunking changes."""
+        ingest([self.docs], self.index, workers=1, chunk_words=20, overlap=5)
+        stats = ingest([self.docs], self.index, workers=1, chunk_words=30, overlap=5)
+        self.assertEqual(stats['parsed'], 8)
+
+    def test_unsupported_pdf_is_reported(self):
+        """Test a file that fails to parse is reported and left out."""
+        with open(os.path.join(self.docs, 'broken.pdf'), 'wb') as f:
+            f.write(b'%PDF-1.4 not really')
+        stats = ingest([self.docs], self.index, workers=1)
+        self.assertIn('broken.pdf', stats['failed'])
+        self.assertNotIn('broken.pdf', VectorIndex.open(self.index).sources)
+
+if __name__ == '__main__':
+    unittest.main()
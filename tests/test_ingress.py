@@ -0,0 +1,225 @@
+"""Tests for the network ingress server."""
+
+import json
+import struct
+import asyncio
+import unittest
+from unittest import mock
+from sonic_nova.config.settings import CHUNK_SIZE, INGRESS_MAX_QUEUED_CHUNKS
+from sonic_nova.core.admission import AdmissionController
+from sonic_nova.core.bedrock_manager import BedrockStreamManager
+from sonic_nova.core.dsp import dsp_scheduler
+from sonic_nova.core.ingress import (
+    IngressServer,
+    IngressClient,
+    OP_BINARY,
+    OP_TEXT,
+    OP_CLOSE,
+    KIND_AUDIO,
+    KIND_EVENT,
+    CLOSE_TRY_AGAIN_LATER,
+    apply_mask,
+    default_session_factory,
+)
+from sonic_nova.core.local_stream import LocalBedrockClient
+from sonic_nova.utils.metrics import MetricsRegistry, metrics
+
+FRAME = b'\x10\x00' * CHUNK_SIZE
+REPLY_BYTES = 9600  # 200 ms at 24 kHz
+
+class StalledManager(BedrockStreamManager):
+    """Session whose caller audio is never sent upstream."""
+
+    async def _process_audio_input(self):
+        await asyncio.sleep(3600)
+
+def make_factory(manager_class=BedrockStreamManager, admission=None, **client_options):
+    """Return a session factory backed by one LocalBedrockClient."""
+    options = dict(latency=0.0, turn_audio_bytes=len(FRAME) * 3, reply_audio_ms=200)
+    options.update(client_options)
+    client = LocalBedrockClient(**options)
+    admission = admission or AdmissionController(metrics_registry=MetricsRegistry())
+
+    def factory(transcript_sinks):
+        manager = manager_class(transcript_sinks=transcript_sinks, admission=admission)
+        manager.bedrock_client = client
+        return manager
+    factory.client = client
+    return factory
+
+async def start_server(factory, **kwargs):
+    return await IngressServer(factory, host='127.0.0.1', ws_port=0, **kwargs).start()
+
+async def settle(server, timeout=5.0):
+    """Wait for every call on the server to finish."""
+    for _ in range(int(timeout / 0.02)):
+        if not server.calls:
+            return
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"{len(server.calls)} calls still open")
+
+class UdpCaller(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.datagrams = asyncio.Queue()
+
+    def datagram_received(self, data, addr):
+        self.datagrams.put_nowait(data)
+
+class TestIngress(unittest.TestCase):
+    """Test cases for the ingress server."""
+
+    def test_mask_round_trip(self):
+        """Test masking is its own inverse for every payload length."""
+        for n in range(9):
+            payload = bytearray(range(n))
+            apply_mask(payload, b'\x01\x02\x03\x04')
+            apply_mask(payload, b'\x01\x02\x03\x04')
+            self.assertEqual(payload, bytearray(range(n)))
+
+    def test_default_factory_batches_dsp_when_enabled(self):
+        """Test DSP_BATCHED puts remote callers on the shared DSP scheduler."""
+        self.assertIsNone(default_session_factory([]).dsp)
+        with mock.patch('sonic_nova.core.ingress.DSP_BATCHED', True):
+            self.assertIs(default_session_factory([]).dsp, dsp_scheduler)
+
+    def test_websocket_conversation(self):
+        """Test a caller's audio reaches a session and the reply comes back on the connection."""
+        async def scenario():
+            factory = make_factory()
+            server = await start_server(factory)
+            client = await IngressClient.connect(*server.ws_address)
+            opcode, payload = await client.receive()
+            session = json.loads(payload)
+            for _ in range(3):
+                await client.send_audio(FRAME)
+            audio, transcripts = 0, []
+            while audio < REPLY_BYTES or len(transcripts) < 2:
+                opcode, payload = await asyncio.wait_for(client.receive(), 5)
+                if opcode == OP_BINARY:
+                    audio += len(payload)
+                elif opcode == OP_TEXT:
+                    transcripts.append(json.loads(payload))
+            await client.close()
+            await settle(server)
+            await server.stop()
+            return factory.client, session, audio, transcripts
+        local, session, audio, transcripts = asyncio.run(scenario())
+        self.assertEqual(session['type'], 'session')
+        self.assertEqual(audio, REPLY_BYTES)
+        self.assertEqual([t['stage'] for t in transcripts], ['SPECULATIVE', 'FINAL'])
+        self.assertEqual(transcripts[1]['text'], "This is a local test response.")
+        self.assertEqual(local.streams_opened, 1)
+        self.assertFalse(local.active)
+
+    def test_reading_pauses_when_session_backs_up(self):
+        """Test a session that cannot send upstream stops its socket being read."""
+        async def scenario():
+            server = await start_server(make_factory(manager_class=StalledManager))
+            client = await IngressClient.connect(*server.ws_address)
+            await client.receive()
+            paused_before = metrics.counter("ingress.read_paused")
+            for _ in range(INGRESS_MAX_QUEUED_CHUNKS * 3):
+                client.writer.write(struct.pack('!BBH', 0x80 | OP_BINARY, 0x80 | 126, len(FRAME))
+                                    + b'\x00\x00\x00\x00' + FRAME)
+            await asyncio.sleep(0.3)
+            call = next(iter(server.calls))
+            queued = call.manager.audio_input_queue.qsize()
+            paused = metrics.counter("ingress.read_paused") - paused_before
+            # Stopping hangs up the call even though its socket is not being read
+            await server.stop()
+            client.writer.close()
+            return queued, paused
+        queued, paused = asyncio.run(scenario())
+        self.assertEqual(queued, INGRESS_MAX_QUEUED_CHUNKS)
+        self.assertGreaterEqual(paused, 1)
+
+    def test_rejected_caller_is_told_to_retry(self):
+        """Test a caller over the stream limit is closed with 1013."""
+        async def scenario():
+            admission = AdmissionController(max_streams=1, max_queue=0, metrics_registry=MetricsRegistry())
+            server = await start_server(make_factory(admission=admission))
+            first = await IngressClient.connect(*server.ws_address)
+            await first.receive()
+            second = await IngressClient.connect(*server.ws_address)
+            opcode, payload = await asyncio.wait_for(second.receive(), 5)
+            await first.close()
+            second.writer.close()
+            await settle(server)
+            await server.stop()
+            return opcode, payload
+        opcode, payload = asyncio.run(scenario())
+        self.assertEqual(opcode, OP_CLOSE)
+        self.assertEqual(struct.unpack('!H', payload[:2])[0], CLOSE_TRY_AGAIN_LATER)
+
+    def test_plain_http_is_refused(self):
+        """Test a request without a WebSocket upgrade gets 400."""
+        async def scenario():
+            server = await start_server(make_factory())
+            reader, writer = await asyncio.open_connection(*server.ws_address)
+            writer.write(b"GET / HTTP/1.1\r\nHost: x\r\n\r\n")
+            response = await reader.read()
+            writer.close()
+            await server.stop()
+            return response
+        self.assertTrue(asyncio.run(scenario()).startswith(b"HTTP/1.1 400"))
+
+    def test_udp_conversation(self):
+        """Test a UDP caller gets a session, the reply audio, and can hang up."""
+        async def scenario():
+            factory = make_factory()
+            server = await start_server(factory, udp_port=0)
+            loop = asyncio.get_running_loop()
+            transport, caller = await loop.create_datagram_endpoint(UdpCaller, remote_addr=server.udp_address)
+            for _ in range(3):
+                transport.sendto(bytes((KIND_AUDIO,)) + FRAME)
+            audio, events = 0, []
+            while audio < REPLY_BYTES or len(events) < 3:
+                data = await asyncio.wait_for(caller.datagrams.get(), 5)
+                if data[0] == KIND_AUDIO:
+                    audio += len(data) - 1
+                else:
+                    events.append(json.loads(data[1:]))
+            transport.sendto(bytes((KIND_EVENT,)) + b'{"type": "bye"}')
+            await settle(server)
+            transport.close()
+            await server.stop()
+            return factory.client, audio, events
+        local, audio, events = asyncio.run(scenario())
+        self.assertEqual(audio, REPLY_BYTES)
+        # Audio sent straight away can be answered before the session event goes out
+        self.assertEqual(sorted(e['type'] for e in events), ['session', 'transcript', 'transcript'])
+        self.assertFalse(local.active)
+
+    def test_rejected_udp_caller_backs_off(self):
+        """Test a rejected UDP caller that keeps sending does not start new sessions."""
+        async def scenario():
+            admission = AdmissionController(max_streams=1, max_queue=0, metrics_registry=MetricsRegistry())
+            factory = make_factory(admission=admission)
+            created = []
+
+            def counting_factory(transcript_sinks):
+                created.append(transcript_sinks)
+                return factory(transcript_sinks)
+            server = await start_server(counting_factory, udp_port=0)
+            loop = asyncio.get_running_loop()
+            first = await IngressClient.connect(*server.ws_address)
+            await first.receive()
+            transport, caller = await loop.create_datagram_endpoint(UdpCaller, remote_addr=server.udp_address)
+            transport.sendto(bytes((KIND_AUDIO,)) + FRAME)
+            data = await asyncio.wait_for(caller.datagrams.get(), 5)
+            await asyncio.sleep(0.05)
+            for _ in range(10):
+                transport.sendto(bytes((KIND_AUDIO,)) + FRAME)
+                await asyncio.sleep(0.01)
+            await first.close()
+            transport.close()
+            await settle(server)
+            await server.stop()
+            return json.loads(data[1:]), len(created)
+        event, sessions = asyncio.run(scenario())
+        self.assertEqual(event['type'], 'rejected')
+        # The WebSocket caller's session and the one rejected UDP attempt
+        self.assertEqual(sessions, 2)
+
+if __name__ == '__main__':
+    unittest.main()
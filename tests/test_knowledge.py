@@ -0,0 +1,129 @@
+"""Tests for the knowledge base package."""
+
+import os
+import json
+import time
+import asyncio
+import tempfile
+import unittest
+import numpy as np
+from sonic_nova.core.bedrock_manager import BedrockStreamManager
+from sonic_nova.knowledge.embeddings import HashingEmbedder, CachedQueryEmbedder, tokenize
+from sonic_nova.knowledge.index import VectorIndex, build_index, open_shared, default_knowledge_base
+from sonic_nova.utils.metrics import metrics
+
+CHUNKS = [
+    ("Items can be returned within 30 days of delivery for a full refund.", "returns.md"),
+    ("Standard shipping takes 3 to 5 business days; express shipping takes 1 day.", "shipping.md"),
+    ("The battery is covered by a two year limited warranty.", "warranty.md"),
+    ("Reset your password from the account settings page.", "account.md"),
+]
+
+class TestKnowledge(unittest.TestCase):
+    """Test cases for the knowledge base package."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, 'kb')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_tokenize_drops_stopwords(self):
+        """Test tokens are lowercase and stopwords are removed."""
+        self.assertEqual(tokenize("What is the Refund policy?"), ['refund', 'policy'])
+
+    def test_embeddings_are_unit_length_and_deterministic(self):
+        """Test rows are normalized, repeatable, and zero for empty text."""
+        embedder = HashingEmbedder(dim=64)
+        vectors = embedder.embed(["refund policy", "refund policy", "the"])
+        self.assertEqual(vectors.shape, (3, 64))
+        self.assertEqual(vectors.dtype, np.float32)
+        self.assertAlmostEqual(float(np.linalg.norm(vectors[0])), 1.0, places=5)
+        np.testing.assert_array_equal(vectors[0], vectors[1])
+        self.assertFalse(vectors[2].any())
+
+    def test_query_cache(self):
+        """Test repeated queries hit the cache and evict least recently used."""
+        cache = CachedQueryEmbedder(HashingEmbedder(dim=64), max_size=2)
+        hits = metrics.counter("kb.query_cache_hits")
+        first = cache.embed_query("refund policy")
+        self.assertIs(cache.embed_query("  Refund   POLICY "), first)
+        self.assertEqual(metrics.counter("kb.query_cache_hits"), hits + 1)
+        self.assertFalse(first.flags.writeable)
+        cache.embed_query("shipping")
+        cache.embed_query("warranty")
+        self.assertEqual(list(cache._cache), ['shipping', 'warranty'])
+
+    def test_build_and_search(self):
+        """Test a built index finds the relevant chunk with its source."""
+        build_index(self.path, CHUNKS, batch_size=3)
+        index = VectorIndex.open(self.path)
+        self.assertEqual(len(index), 4)
+        self.assertIsInstance(index.vectors, np.memmap)
+        self.assertEqual(index.text(2), CHUNKS[2][0])
+        results = index.search("how long is the warranty on the battery")
+        self.assertEqual(results[0]['source'], 'warranty.md')
+        self.assertEqual(results[0]['text'], CHUNKS[2][0])
+        scores = [r['score'] for r in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(index.search("what is it"), [])
+
+    def test_sparse_and_dense_scores_match(self):
+        """Test scoring only the non-zero query rows gives the dense scores."""
+        index = build_index(self.path, CHUNKS)
+        query = index.query_embedder.embed_query("express shipping days")
+        indices, scores = index.search_vector(query, k=4)
+        dense = query @ np.asarray(index.vectors)
+        np.testing.assert_allclose(scores, dense[indices], rtol=1e-5)
+        self.assertEqual(int(indices[0]), 1)
+
+    def test_empty_index(self):
+        """Test an index without chunks opens and returns no results."""
+        build_index(self.path, [])
+        index = VectorIndex.open(self.path)
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.search("refund"), [])
+
+    def test_unsupported_format(self):
+        """Test an index from another format version is refused."""
+        build_index(self.path, CHUNKS)
+        meta_path = os.path.join(self.path, 'meta.json')
+        with open(meta_path) as f:
+            meta = json.load(f)
+        meta['version'] = 99
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+        with self.assertRaises(ValueError):
+            VectorIndex.open(self.path)
+        self.assertIsNone(default_knowledge_base(self.path))
+
+    def test_open_shared_reopens_after_rebuild(self):
+        """Test the shared index is reused until the index is rebuilt."""
+        self.assertIsNone(default_knowledge_base(self.path))
+        build_index(self.path, CHUNKS[:2])
+        first = open_shared(self.path)
+        self.assertIs(open_shared(self.path), first)
+        time.sleep(0.01)
+        build_index(self.path, CHUNKS)
+        second = open_shared(self.path)
+        self.assertIsNot(second, first)
+        self.assertEqual(len(second), 4)
+
+    def test_manager_tool(self):
+        """Test the manager offers and answers knowledgeBaseTool."""
+        index = build_index(self.path, CHUNKS)
+        manager = BedrockStreamManager(transcript_sinks=[], knowledge_base=index)
+        tools = manager.codec.loads(manager.start_prompt())['event']['promptStart']['toolConfiguration']['tools']
+        self.assertIn('knowledgeBaseTool', [t['toolSpec']['name'] for t in tools])
+
+        result = asyncio.run(manager.processToolUse(
+            'knowledgeBaseTool', {'content': '{"query": "can I get a refund"}'}))
+        self.assertEqual(result['query'], 'can I get a refund')
+        self.assertEqual(result['results'][0]['source'], 'returns.md')
+
+        missing = asyncio.run(manager.processToolUse('knowledgeBaseTool', {'content': '{}'}))
+        self.assertIn('error', missing)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Tests for the load generator."""
+
+import os
+import wave
+import asyncio
+import tempfile
+import unittest
+from benchmarks.loadgen import TalkPattern, load_pcm, synthetic_speech, run_load
+from sonic_nova.config.settings import INPUT_SAMPLE_RATE, CHUNK_SIZE
+from sonic_nova.core.dsp import dsp_scheduler
+from sonic_nova.utils.metrics import metrics
+
+class TestLoadgen(unittest.TestCase):
+    """Test cases for the load generator."""
+
+    def test_talk_pattern_alternates(self):
+        """Test segments alternate talk and silence within their ranges."""
+        chunk_seconds = CHUNK_SIZE / INPUT_SAMPLE_RATE
+        segments = TalkPattern(talk=(1.0, 2.0), silence=(0.5, 0.5), seed=1).segments()
+        for _ in range(4):
+            is_talk, chunks = next(segments)
+            self.assertTrue(is_talk)
+            self.assertTrue(1.0 - chunk_seconds <= chunks * chunk_seconds <= 2.0 + chunk_seconds)
+            is_talk, chunks = next(segments)
+            self.assertFalse(is_talk)
+            self.assertEqual(chunks, round(0.5 / chunk_seconds))
+
+    def test_synthetic_speech_has_no_silent_frames(self):
+        """Test synthetic talk never produces an all-zero frame."""
+        pcm = synthetic_speech(seconds=1.0)
+        self.assertEqual(len(pcm), INPUT_SAMPLE_RATE * 2)
+        for i in range(0, len(pcm), CHUNK_SIZE * 2):
+            frame = pcm[i:i + CHUNK_SIZE * 2]
+            self.assertNotEqual(frame.count(0), len(frame))
+
+    def test_load_pcm_validates_wav_format(self):
+        """Test WAV files must match the input format."""
+        with tempfile.TemporaryDirectory() as tmp:
+            good, bad = os.path.join(tmp, 'good.wav'), os.path.join(tmp, 'bad.wav')
+            for path, rate in ((good, INPUT_SAMPLE_RATE), (bad, 44100)):
+                with wave.open(path, 'wb') as w:
+                    w.setnchannels(1)
+                    w.setsampwidth(2)
+                    w.setframerate(rate)
+                    w.writeframes(b'\x01\x00' * 100)
+            self.assertEqual(load_pcm(good), b'\x01\x00' * 100)
+            with self.assertRaises(ValueError):
+                load_pcm(bad)
+
+    def test_ramp_against_local_stand_in(self):
+        """Test a short ramp reports turn and tool latencies per step."""
+        rows = asyncio.run(run_load(
+            [1, 2], step_duration=2.0, settle=0.2, talk=(0.3, 0.4), silence=(0.6, 0.7),
+            local_options={'turn_silence_ms': 200, 'tool_every': 2, 'latency': 0.02, 'reply_audio_ms': 200},
+        ))
+        self.assertEqual([row['callers'] for row in rows], [1, 2])
+        self.assertGreater(rows[-1]['first_audio_ms']['count'], 0)
+        self.assertGreater(rows[-1]['first_audio_ms']['p50'], 200)
+        self.assertGreater(rows[0]['tool_rtt_ms']['count'] + rows[1]['tool_rtt_ms']['count'], 0)
+        self.assertGreater(rows[-1]['cpu_ms_per_session_s'], 0.0)
+
+    def test_batched_dsp(self):
+        """Test callers share the process-wide DSP scheduler when asked to."""
+        ticks_before = len(metrics.samples("dsp.frames_per_tick"))
+        rows = asyncio.run(run_load(
+            [2], step_duration=1.0, settle=0.2, talk=(0.3, 0.4), silence=(0.6, 0.7), dsp=True,
+            local_options={'turn_silence_ms': 200, 'latency': 0.02, 'reply_audio_ms': 200},
+        ))
+        self.assertEqual(rows[0]['callers'], 2)
+        self.assertGreater(len(metrics.samples("dsp.frames_per_tick")), ticks_before)
+        self.assertEqual(dsp_scheduler.sessions, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Tests for the log module."""
+
+import io
+import logging
+import unittest
+from sonic_nova.utils.log import (
+    SamplingFilter,
+    StructuredFormatter,
+    configure_logging,
+    set_sample_rates,
+    shutdown_logging
+)
+from sonic_nova.config.settings import LOG_SAMPLE_RATES
+
+def make_record(event_type=None, msg="message %s", args=("x",)):
+    """Build a log record carrying an event type."""
+    record = logging.LogRecord("sonic_nova", logging.DEBUG, __file__, 1, msg, args, None)
+    record.event_type = event_type
+    return record
+
+class TestLog(unittest.TestCase):
+    """Test cases for log module."""
+
+    def tearDown(self):
+        """Clean up test environment."""
+        shutdown_logging()
+        set_sample_rates(LOG_SAMPLE_RATES)
+
+    def test_sampling_filter_rates(self):
+        """Test SamplingFilter keeps one record per interval."""
+        sampler = SamplingFilter({'audioInput': 0.1, 'muted': 0})
+        kept = sum(sampler.filter(make_record('audioInput')) for _ in range(100))
+        self.assertEqual(kept, 10)
+        self.assertFalse(sampler.filter(make_record('muted')))
+        self.assertTrue(all(sampler.filter(make_record('contentEnd')) for _ in range(5)))
+        self.assertEqual(sampler.dropped, 91)
+
+    def test_structured_formatter(self):
+        """Test StructuredFormatter renders event metadata."""
+        record = make_record('audioInput')
+        record.sample_interval = 100
+        self.assertEqual(
+            StructuredFormatter().format(record),
+            "[DEBUG] message x event_type=audioInput sampled=1/100"
+        )
+
+    def test_binary_args_are_summarized(self):
+        """Test audio payloads are logged as their length, not their contents."""
+        record = make_record(msg="chunk %s %r %s %s", args=(b'\x01' * 3200, bytearray(10), memoryview(bytes(8)), "ok"))
+        self.assertEqual(
+            StructuredFormatter().format(record),
+            "[DEBUG] chunk <3200 bytes> '<10 bytes>' <8 bytes> ok"
+        )
+
+    def test_configure_logging_writes_through_listener(self):
+        """Test records reach the stream via the background listener."""
+        stream = io.StringIO()
+        logger = configure_logging(stream=stream, sample_rates={'audioInput': 0.5})
+        for i in range(4):
+            logger.debug("chunk %d", i, extra={'event_type': 'audioInput'})
+        logger.debug("done", extra={'event_type': None})
+        shutdown_logging()
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(lines, [
+            "[DEBUG] chunk 0 event_type=audioInput sampled=1/2",
+            "[DEBUG] chunk 2 event_type=audioInput sampled=1/2",
+            "[DEBUG] done",
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
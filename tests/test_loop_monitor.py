@@ -0,0 +1,61 @@
+"""Tests for the loop_monitor module."""
+
+import os
+import json
+import time
+import asyncio
+import tempfile
+import unittest
+from sonic_nova.utils.loop_monitor import LoopLagMonitor
+from sonic_nova.utils.metrics import MetricsRegistry
+
+async def blocking_handler():
+    """Coroutine that holds the loop with a synchronous sleep."""
+    time.sleep(0.3)
+
+class TestLoopMonitor(unittest.TestCase):
+    """Test cases for loop_monitor module."""
+
+    def test_stall_is_captured_and_attributed(self):
+        """Test a blocking call is recorded with its task and duration."""
+        registry = MetricsRegistry()
+        monitor = LoopLagMonitor(interval=0.02, threshold=0.05, metrics_registry=registry)
+
+        async def run():
+            monitor.start()
+            await asyncio.sleep(0.1)
+            await asyncio.create_task(blocking_handler(), name="tool-call")
+            await asyncio.sleep(0.1)
+            monitor.stop()
+
+        asyncio.run(run())
+        report = monitor.report(session_id="s1")
+        self.assertEqual(report['session_id'], "s1")
+        self.assertEqual(report['stall_count'], 1)
+        stall = report['stalls'][0]
+        self.assertEqual(stall['task'], "tool-call")
+        self.assertIn("blocking_handler", stall['culprit'])
+        self.assertGreater(stall['duration_ms'], 200)
+        self.assertGreater(registry.snapshot()["loop.lag_ms"]["max"], 200)
+
+    def test_export(self):
+        """Test the report is written as JSON."""
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+
+        async def run():
+            monitor.start()
+            await asyncio.sleep(0.05)
+            monitor.stop()
+
+        asyncio.run(run())
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "report.json")
+            monitor.export(path, session_id="s2")
+            with open(path, encoding='utf-8') as f:
+                report = json.load(f)
+        self.assertEqual(report['session_id'], "s2")
+        self.assertEqual(report['stall_count'], 0)
+        self.assertGreater(report['lag_ms']['count'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Tests for the metrics module."""
+
+import unittest
+import threading
+from sonic_nova.utils.metrics import MetricsRegistry, percentile
+
+class TestMetrics(unittest.TestCase):
+    """Test cases for metrics module."""
+
+    def test_percentile(self):
+        """Test percentile interpolation."""
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.assertEqual(percentile(values, 50), 3.0)
+        self.assertEqual(percentile(values, 100), 5.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_snapshot(self):
+        """Test counters and sample summaries."""
+        registry = MetricsRegistry(window_size=3)
+        registry.increment("hits")
+        registry.increment("hits", 2)
+        for value in (10.0, 20.0, 30.0, 40.0):
+            registry.observe("latency_ms", value)
+        snapshot = registry.snapshot()
+        self.assertEqual(snapshot["hits"], 3)
+        self.assertEqual(snapshot["latency_ms"]["count"], 3)
+        self.assertEqual(snapshot["latency_ms"]["p50"], 30.0)
+        self.assertEqual(snapshot["latency_ms"]["max"], 40.0)
+
+    def test_merge_raw(self):
+        """Test folding one registry into another."""
+        a, b = MetricsRegistry(), MetricsRegistry()
+        a.increment("sessions", 2)
+        a.observe("cpu_ms", 1.0)
+        b.increment("sessions", 1)
+        b.merge_raw(a.raw())
+        self.assertEqual(b.counter("sessions"), 3)
+        self.assertEqual(b.samples("cpu_ms"), [1.0])
+
+    def test_take_raw_loses_nothing_under_concurrent_writes(self):
+        """Test deltas taken while another thread records add up to the total."""
+        registry, total = MetricsRegistry(), MetricsRegistry()
+
+        def record():
+            for _ in range(20000):
+                registry.increment("records")
+
+        writer = threading.Thread(target=record)
+        writer.start()
+        while writer.is_alive():
+            total.merge_raw(registry.take_raw())
+        writer.join()
+        total.merge_raw(registry.take_raw())
+        self.assertEqual(total.counter("records"), 20000)
+        self.assertEqual(registry.raw(), {"counters": {}, "samples": {}})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Tests for the microbenchmark suite."""
+
+import os
+import tempfile
+import unittest
+from benchmarks.micro import benchmark_names, run, compare, save_baseline, load_baseline
+
+class TestMicro(unittest.TestCase):
+    """Test cases for the microbenchmark suite."""
+
+    def test_covers_hot_paths(self):
+        """Test every requested hot path has a benchmark."""
+        names = benchmark_names()
+        for prefix in ('audio_event.', 'base64.encode', 'base64.decode', 'prompt.start_prompt',
+                       'tool.getDateAndTimeTool', 'tool.trackOrderTool', 'playback.'):
+            self.assertTrue(any(n.startswith(prefix) for n in names), prefix)
+        for event_type in ('contentStart', 'textOutput', 'audioOutput', 'toolUse', 'contentEnd', 'completionEnd'):
+            self.assertIn(f'parse.{event_type}', names)
+
+    def test_run_every_benchmark(self):
+        """Test each benchmark runs and reports a positive time."""
+        results = run(number=5, repeat=1)
+        self.assertEqual(sorted(results), benchmark_names())
+        for name, result in results.items():
+            self.assertGreater(result['us_per_op'], 0.0, name)
+
+    def test_compare_flags_regressions(self):
+        """Test slowdowns beyond the threshold are regressions."""
+        baseline = {'a': {'us_per_op': 10.0}, 'b': {'us_per_op': 10.0}, 'c': {'us_per_op': 10.0}}
+        results = {'a': {'us_per_op': 12.0}, 'b': {'us_per_op': 10.5}, 'c': {'us_per_op': 5.0},
+                   'd': {'us_per_op': 1.0}}
+        statuses = {row['name']: row['status'] for row in compare(results, baseline, threshold_pct=15)}
+        self.assertEqual(statuses, {'a': 'regression', 'b': 'ok', 'c': 'improvement', 'd': 'new'})
+
+    def test_baseline_round_trip(self):
+        """Test a saved baseline loads back with its metadata."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'nested', 'micro.json')
+            self.assertIsNone(load_baseline(path))
+            save_baseline({'a': {'us_per_op': 1.5}}, path)
+            baseline = load_baseline(path)
+        self.assertEqual(baseline['results']['a']['us_per_op'], 1.5)
+        self.assertIn('python', baseline['meta'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Tests for the outbound module."""
+
+import asyncio
+import unittest
+from sonic_nova.core.outbound import OutboundWriter, LANE_CONTROL, LANE_BULK
+from sonic_nova.utils.metrics import MetricsRegistry
+
+class RecordingSender:
+    """Send callable that records payloads and can fail on demand."""
+
+    def __init__(self, failures=None, delay=0.0):
+        self.sent = []
+        self.failures = list(failures or [])
+        self.delay = delay
+
+    async def __call__(self, payload, event_type):
+        await asyncio.sleep(self.delay)
+        error = self.failures.pop(0) if self.failures else None
+        if error is not None:
+            raise error
+        self.sent.append(payload)
+
+class TestOutbound(unittest.TestCase):
+    """Test cases for outbound module."""
+
+    def run_async(self, coro):
+        """Run a coroutine to completion."""
+        return asyncio.run(coro)
+
+    def test_control_lane_jumps_ahead_of_audio(self):
+        """Test a tool result queued after audio is sent before it."""
+        async def scenario():
+            sender = RecordingSender(delay=0.001)
+            writer = OutboundWriter(sender, metrics_registry=MetricsRegistry())
+            for i in range(5):
+                await writer.submit(b"audio%d" % i, 'audioInput', LANE_BULK)
+            await writer.submit(b"tool", 'toolResult', LANE_CONTROL)
+            writer.start()
+            await writer.close()
+            return sender.sent
+        sent = self.run_async(scenario())
+        self.assertEqual(sent[0], b"tool")
+        self.assertEqual(sent[1:], [b"audio%d" % i for i in range(5)])
+
+    def test_backpressure_when_lane_full(self):
+        """Test submit waits while the lane is at capacity."""
+        async def scenario():
+            registry = MetricsRegistry()
+            writer = OutboundWriter(RecordingSender(), bulk_capacity=2, metrics_registry=registry)
+            await writer.submit(b"a", lane=LANE_BULK)
+            await writer.submit(b"b", lane=LANE_BULK)
+            blocked = asyncio.ensure_future(writer.submit(b"c", lane=LANE_BULK))
+            await asyncio.sleep(0.01)
+            was_blocked = not blocked.done()
+            writer.start()
+            await blocked
+            await writer.close()
+            return was_blocked, registry.counter("outbound.bulk.backpressure")
+        was_blocked, backpressure = self.run_async(scenario())
+        self.assertTrue(was_blocked)
+        self.assertEqual(backpressure, 1)
+
+    def test_transient_errors_are_retried(self):
+        """Test a transient failure is retried and a permanent one dropped."""
+        async def scenario():
+            registry = MetricsRegistry()
+            sender = RecordingSender(failures=[ConnectionError("reset"), None, ValueError("bad")])
+            writer = OutboundWriter(sender, retry_backoff=0.001, metrics_registry=registry)
+            writer.start()
+            await writer.submit(b"first")
+            await writer.drain(1.0)
+            await writer.submit(b"second")
+            await writer.close()
+            return sender.sent, registry, writer
+        sent, registry, writer = self.run_async(scenario())
+        self.assertEqual(sent, [b"first"])
+        self.assertEqual(registry.counter("outbound.retries"), 1)
+        self.assertEqual(writer.dropped, 1)
+        self.assertEqual(registry.snapshot()["outbound.bulk.send_ms"]["count"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
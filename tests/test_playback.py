@@ -0,0 +1,101 @@
+"""Tests for playback catch-up."""
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+import numpy as np
+from sonic_nova.config.settings import OUTPUT_SAMPLE_RATE
+from sonic_nova.core.audio_streamer import AudioStreamer
+from sonic_nova.core.playback import AudioQueue, CatchUpController, TimeStretcher
+
+def tone(seconds, freq=200, amplitude=8000):
+    """Return 16-bit PCM of a sine tone at OUTPUT_SAMPLE_RATE."""
+    t = np.arange(int(seconds * OUTPUT_SAMPLE_RATE)) / OUTPUT_SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype('<i2').tobytes()
+
+def dominant_hz(pcm):
+    x = np.frombuffer(pcm, dtype=np.int16).astype(np.float64)
+    spectrum = np.abs(np.fft.rfft(x * np.hanning(len(x))))
+    return np.argmax(spectrum) * OUTPUT_SAMPLE_RATE / len(x)
+
+class FakeOutput:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(bytes(data))
+
+class TestPlayback(unittest.TestCase):
+    """Test cases for playback catch-up."""
+
+    def test_audio_queue_tracks_bytes(self):
+        """Test the queued byte total follows puts and gets."""
+        async def scenario():
+            queue = AudioQueue()
+            queue.put_nowait(b'\x00' * 100)
+            await queue.put(b'\x00' * 50)
+            totals = [queue.nbytes]
+            await queue.get()
+            totals.append(queue.nbytes)
+            queue.get_nowait()
+            totals.append(queue.nbytes)
+            return totals
+        self.assertEqual(asyncio.run(scenario()), [150, 50, 0])
+
+    def test_controller_hysteresis(self):
+        """Test speed-up starts above the threshold and ends at the target."""
+        controller = CatchUpController(threshold_ms=1000, target_ms=300, speed=1.25)
+        speeds = [controller.update(ms) for ms in (500, 1200, 800, 400, 300, 800)]
+        self.assertEqual(speeds, [1.0, 1.25, 1.25, 1.25, 1.0, 1.0])
+
+    def test_compression_preserves_pitch(self):
+        """Test WSOLA shortens a tone by the speed without changing its pitch or clicking."""
+        pcm = tone(2.0)
+        stretcher = TimeStretcher()
+        chunk = 1920
+        out = b''.join(stretcher.process(pcm[i:i + chunk], 1.25) for i in range(0, len(pcm), chunk))
+        out += stretcher.flush(tone(0.1))
+        expected = (len(pcm) / 1.25 + len(tone(0.1))) / 2
+        self.assertAlmostEqual(len(out) / 2, expected, delta=stretcher.frame + stretcher.search)
+        self.assertAlmostEqual(dominant_hz(out), 200, delta=3)
+        # A 200 Hz sine at this amplitude moves at most ~420 per sample
+        samples = np.frombuffer(out, dtype=np.int16).astype(np.int32)
+        self.assertLess(np.abs(np.diff(samples)).max(), 600)
+        self.assertFalse(stretcher.active)
+
+    def test_flush_without_compression_is_passthrough(self):
+        """Test an idle stretcher passes audio through unchanged."""
+        stretcher = TimeStretcher()
+        pcm = tone(0.05)
+        self.assertEqual(stretcher.flush(pcm), pcm)
+        stretcher.process(pcm, 1.25)
+        stretcher.reset()
+        self.assertEqual(stretcher.flush(pcm), pcm)
+
+    def test_streamer_catches_up_on_backlog(self):
+        """Test a burst of queued audio plays faster until the backlog is back on target."""
+        async def scenario():
+            manager = SimpleNamespace(audio_output_queue=AudioQueue(), barge_in=False, tool_wait_started=None)
+            streamer = AudioStreamer(manager, open_devices=False)
+            streamer.echo_suppressor = None
+            streamer.output_stream = FakeOutput()
+            burst = tone(2.0)
+            step = OUTPUT_SAMPLE_RATE * 2 // 25  # 40 ms events
+            for i in range(0, len(burst), step):
+                manager.audio_output_queue.put_nowait(burst[i:i + step])
+            streamer.is_streaming = True
+            task = asyncio.create_task(streamer.play_output_audio())
+            while not manager.audio_output_queue.empty() or streamer.time_stretcher.active:
+                await asyncio.sleep(0.05)
+            streamer.is_streaming = False
+            await task
+            return streamer, b''.join(streamer.output_stream.writes)
+        streamer, played = asyncio.run(scenario())
+        played_ms = len(played) / 2 / OUTPUT_SAMPLE_RATE * 1000
+        # 1700 ms above target at 1.25x, then the last 300 ms at 1.0x
+        self.assertAlmostEqual(played_ms, 1700 / 1.25 + 300, delta=60)
+        self.assertFalse(streamer.catch_up.catching_up)
+        self.assertAlmostEqual(dominant_hz(played), 200, delta=3)
+
+if __name__ == '__main__':
+    unittest.main()
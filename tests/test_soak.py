@@ -0,0 +1,66 @@
+"""Tests for the soak harness."""
+
+import asyncio
+import unittest
+from benchmarks.soak import TaskCpuMeter, evaluate, run_soak
+from sonic_nova.config.settings import OUTPUT_QUEUE_MAXSIZE
+
+def busy_report(**overrides):
+    """Return a minimal passing report, with selected fields overridden."""
+    report = {
+        'growth': {'rss_bytes': 0, 'traced_bytes': 0},
+        'max_queue_depths': {'audio_input': 1, 'audio_output': 0, 'output': 256, 'outbound': 0},
+        'latency_ms': {'start': {'count': 5, 'p50': 40.0}, 'end': {'count': 5, 'p50': 42.0}, 'drift_ms': 2.0},
+        'cpu': {'process_start': 0.05, 'process_end': 0.05},
+    }
+    report.update(overrides)
+    return report
+
+class TestSoak(unittest.TestCase):
+    """Test cases for the soak harness."""
+
+    def test_task_cpu_meter_charges_coroutines(self):
+        """Test CPU time is charged to the coroutine that used it."""
+        async def spin():
+            total = 0
+            for i in range(200000):
+                total += i
+            await asyncio.sleep(0)
+            return total
+
+        async def scenario():
+            meter = TaskCpuMeter()
+            meter.install(asyncio.get_running_loop())
+            try:
+                result = await asyncio.get_running_loop().create_task(spin())
+            finally:
+                meter.uninstall()
+            return result, meter.snapshot()
+        result, totals = asyncio.run(scenario())
+        self.assertEqual(result, sum(range(200000)))
+        name = next(n for n in totals if n.endswith('spin'))
+        self.assertGreater(totals[name], 0.0)
+
+    def test_evaluate_thresholds(self):
+        """Test each threshold produces a failure only when exceeded."""
+        self.assertEqual(evaluate(busy_report()), [])
+        failures = evaluate(busy_report(
+            growth={'rss_bytes': 50 * 2**20, 'traced_bytes': 10 * 2**20},
+            max_queue_depths={'audio_input': 500, 'output': 256},
+            latency_ms={'start': {'count': 5, 'p50': 40.0}, 'end': {'count': 5, 'p50': 140.0}, 'drift_ms': 100.0},
+            cpu={'process_start': 0.05, 'process_end': 0.2},
+        ))
+        self.assertEqual(len(failures), 5)
+        self.assertTrue(any('audio_input' in f for f in failures))
+
+    def test_short_soak_run(self):
+        """Test a short accelerated run answers turns and keeps queues bounded."""
+        report = asyncio.run(run_soak(duration=1.0, sessions=2, sample_interval=0.25,
+                                      warmup=0.5, speed=8.0, turn_seconds=1.0, tool_every=2))
+        self.assertGreater(report['turns_answered'], 0)
+        self.assertGreaterEqual(len(report['samples']), 4)
+        self.assertLessEqual(report['max_queue_depths']['output'], OUTPUT_QUEUE_MAXSIZE)
+        self.assertIn('tasks', report['cpu'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Tests for speculative tool execution in BedrockStreamManager."""
+
+import time
+import asyncio
+import unittest
+from sonic_nova.core.admission import AdmissionController
+from sonic_nova.core.bedrock_manager import BedrockStreamManager
+from sonic_nova.core.local_stream import LocalBedrockClient
+from sonic_nova.models.events import TEXT_CONTENT_START_EVENT, TEXT_INPUT_EVENT, CONTENT_END_EVENT
+from sonic_nova.utils.metrics import MetricsRegistry, metrics
+
+TOOL_SECONDS = 0.2
+
+class SlowToolManager(BedrockStreamManager):
+    """Manager whose tools take TOOL_SECONDS and record what happened to them."""
+
+    def __init__(self, **kwargs):
+        super().__init__(transcript_sinks=[], admission=AdmissionController(metrics_registry=MetricsRegistry()),
+                         **kwargs)
+        self.started = []
+        self.finished = []
+
+    async def processToolUse(self, toolName, toolUseContent):
+        self.started.append(toolUseContent['toolUseId'])
+        await asyncio.sleep(TOOL_SECONDS)
+        self.finished.append(toolUseContent['toolUseId'])
+        return {"ok": True}
+
+class TestSpeculativeTools(unittest.TestCase):
+    """Test cases for speculative tool execution."""
+
+    def run_tool_turn(self, speculative):
+        """Run one user turn that calls a tool; return seconds until the result arrived."""
+        async def scenario():
+            manager = SlowToolManager()
+            manager.speculative_tools = speculative
+            manager.bedrock_client = LocalBedrockClient(
+                tool_every=1, tool_end_delay=TOOL_SECONDS, latency=0.0, reply_audio_ms=40)
+            await manager.initialize_stream()
+            stream = next(iter(manager.bedrock_client.active))
+            content = 'user-turn'
+            for event in (TEXT_CONTENT_START_EVENT % (manager.prompt_name, content, "USER"),
+                          TEXT_INPUT_EVENT % (manager.prompt_name, content, "Where is my order?"),
+                          CONTENT_END_EVENT % (manager.prompt_name, content)):
+                await manager.send_raw_event(event)
+            start = time.perf_counter()
+            while stream.tool_results_received == 0:
+                await asyncio.sleep(0.01)
+            elapsed = time.perf_counter() - start
+            await manager.close()
+            return elapsed
+        return asyncio.run(scenario())
+
+    def test_tool_overlaps_tool_use_to_content_end(self):
+        """Test the tool runs while the model finishes the tool call."""
+        saved_before = len(metrics.samples("tool.speculative_saved_ms"))
+        speculative = self.run_tool_turn(speculative=True)
+        saved = metrics.samples("tool.speculative_saved_ms")[saved_before:]
+        sequential = self.run_tool_turn(speculative=False)
+        self.assertEqual(len(saved), 1)
+        self.assertGreater(saved[0], TOOL_SECONDS * 1000 * 0.75)
+        self.assertLess(speculative, sequential - TOOL_SECONDS * 0.5)
+
+    def test_superseded_and_interrupted_calls_are_cancelled(self):
+        """Test a newer toolUse or a barge-in cancels tool calls in flight."""
+        async def scenario():
+            manager = SlowToolManager()
+            for tool_use_id in ('first', 'second'):
+                manager.toolName, manager.toolUseId = 'trackOrderTool', tool_use_id
+                manager.toolUseContent = {'toolUseId': tool_use_id}
+                manager._start_tool()
+                await asyncio.sleep(0)
+            first_cancelled = metrics.counter("tool.cancelled_superseded")
+            manager._cancel_tools("interrupted")
+            await asyncio.sleep(TOOL_SECONDS * 1.5)
+            return manager, first_cancelled
+        cancelled_before = metrics.counter("tool.cancelled_superseded")
+        manager, cancelled_after = asyncio.run(scenario())
+        self.assertEqual(manager.started, ['first', 'second'])
+        self.assertEqual(manager.finished, [])
+        self.assertEqual(cancelled_after, cancelled_before + 1)
+        self.assertEqual(manager._tool_tasks, {})
+
+    def test_content_end_without_tool_use_runs_tool(self):
+        """Test a TOOL contentEnd with no call in flight still gets a result."""
+        async def scenario():
+            manager = SlowToolManager()
+            manager.toolName, manager.toolUseId = 'trackOrderTool', 'late'
+            manager.toolUseContent = {'toolUseId': 'late'}
+            return manager, await manager._finish_tool()
+        manager, result = asyncio.run(scenario())
+        self.assertEqual(result, {"ok": True})
+        self.assertEqual(manager.finished, ['late'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""Tests for the startup module."""
+
+import time
+import asyncio
+import unittest
+from sonic_nova.core.admission import AdmissionController
+from sonic_nova.core.bedrock_manager import BedrockStreamManager
+from sonic_nova.core.local_stream import LocalBedrockClient
+from sonic_nova.core.startup import (
+    StartupTimeline,
+    start_session,
+    timed_phase,
+    PHASE_DEVICES,
+    PHASE_STREAM,
+    PHASE_CONTENT_START,
+)
+from sonic_nova.utils.metrics import MetricsRegistry
+
+class FakeDevices:
+    """Stands in for AudioStreamer's device handling."""
+
+    def __init__(self, delay, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.opened = False
+        self.closed = False
+
+    def open_devices(self, timeline=None):
+        with timed_phase(timeline, 'pyaudio_init'):
+            time.sleep(self.delay)
+        if self.fail:
+            raise OSError("No default input device")
+        self.opened = True
+
+    def close_devices(self):
+        self.closed = True
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+class TestStartup(unittest.TestCase):
+    """Test cases for startup module."""
+
+    def make_manager(self, admission, handshake_delay=0.1):
+        """Create a manager backed by the local stream stand-in."""
+        manager = BedrockStreamManager(transcript_sinks=[], admission=admission)
+        manager.bedrock_client = LocalBedrockClient(handshake_delay=handshake_delay)
+        return manager
+
+    def test_timeline_report(self):
+        """Test phases are reported relative to launch with a sequential estimate."""
+        clock = FakeClock()
+        timeline = StartupTimeline(clock=clock)
+        with timeline.phase(PHASE_DEVICES):
+            clock.now += 0.4
+        clock.now -= 0.4
+        with timeline.phase(PHASE_STREAM):
+            clock.now += 0.7
+        timeline.mark_ready()
+        report = timeline.report()
+        self.assertAlmostEqual(report['phases'][PHASE_DEVICES]['duration_ms'], 400)
+        self.assertAlmostEqual(report['ready_ms'], 700)
+        self.assertAlmostEqual(report['sequential_ms'], 1100)
+        self.assertAlmostEqual(report['saved_ms'], 400)
+        self.assertIn(PHASE_STREAM, timeline.format())
+
+    def test_devices_open_during_handshake(self):
+        """Test time to ready is about the longer branch, not the sum."""
+        async def scenario():
+            admission = AdmissionController(metrics_registry=MetricsRegistry())
+            manager = self.make_manager(admission)
+            devices = FakeDevices(delay=0.4)
+            timeline = StartupTimeline()
+            await start_session(manager, devices, timeline)
+            # A second contentStart from start_streaming must be a no-op
+            await manager.send_audio_content_start_event()
+            await manager.outbound.drain(1.0)
+            stream = next(iter(manager.bedrock_client.active))
+            content_starts = list(stream.received).count('contentStart')
+            await manager.close()
+            return devices, timeline.report(), content_starts
+        devices, report, content_starts = asyncio.run(scenario())
+        self.assertTrue(devices.opened)
+        for name in (PHASE_DEVICES, PHASE_STREAM, PHASE_CONTENT_START, 'stream_handshake', 'init_events'):
+            self.assertIn(name, report['phases'])
+        devices_phase = report['phases'][PHASE_DEVICES]
+        stream_phase = report['phases'][PHASE_STREAM]
+        self.assertLess(devices_phase['start_ms'], stream_phase['end_ms'])
+        self.assertLess(report['ready_ms'], report['sequential_ms'] - 300)
+        # System prompt contentStart plus a single audio contentStart
+        self.assertEqual(content_starts, 2)
+
+    def test_device_failure_closes_stream(self):
+        """Test a device error tears down the stream and frees its slot."""
+        async def scenario():
+            admission = AdmissionController(metrics_registry=MetricsRegistry())
+            manager = self.make_manager(admission, handshake_delay=0.0)
+            devices = FakeDevices(delay=0.0, fail=True)
+            with self.assertRaises(OSError):
+                await start_session(manager, devices, StartupTimeline())
+            return manager, devices, admission.status()
+        manager, devices, status = asyncio.run(scenario())
+        # Devices opened before the failure are released too
+        self.assertTrue(devices.closed)
+        self.assertFalse(manager.is_active)
+        self.assertEqual(status['active'], 0)
+        self.assertEqual(len(manager.bedrock_client.active), 0)
+
+if __name__ == '__main__':
+    unittest.main()
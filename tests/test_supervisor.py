@@ -0,0 +1,134 @@
+"""Tests for the supervisor module."""
+
+import os
+import time
+import asyncio
+import tempfile
+import unittest
+from sonic_nova.core.admission import AdmissionController
+from sonic_nova.core.checkpoint import manager_for_session, read_checkpoints
+from sonic_nova.core.local_stream import LocalBedrockClient
+from sonic_nova.core.supervisor import WorkerSupervisor
+from sonic_nova.utils.metrics import MetricsRegistry, metrics
+
+async def sleepy_session(session_id, config):
+    """Session target that records a metric and sleeps."""
+    metrics.increment("test.sessions_run")
+    await asyncio.sleep(config.get('duration', 0.05))
+
+async def crashing_session(session_id, config):
+    """Session target that kills its worker process."""
+    await asyncio.sleep(0.05)
+    os._exit(1)
+
+async def checkpointed_session(session_id, config):
+    """Session target that asks one question and crashes, then waits once restored."""
+    manager = manager_for_session(config, text_only=True, transcript_sinks=[],
+                                  admission=AdmissionController(metrics_registry=MetricsRegistry()))
+    manager.bedrock_client = LocalBedrockClient(latency=0.0)
+    await manager.initialize_stream()
+    try:
+        if config.get('restore'):
+            metrics.increment("test.restored_turns", len(manager.history))
+            if config.get('caller') == 'alice':
+                metrics.increment("test.restored_with_config")
+            await asyncio.sleep(60)
+            return
+        await manager.ask("Where is my order?")
+        await asyncio.sleep(0.2)  # Let the checkpoint reach the disk
+        os._exit(1)
+    finally:
+        await manager.close()
+
+def wait_for(predicate, timeout=10.0):
+    """Poll predicate until it is true or timeout elapses."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+class TestSupervisor(unittest.TestCase):
+    """Test cases for supervisor module."""
+
+    def test_least_loaded_assignment_and_metrics(self):
+        """Test sessions spread across workers and metrics are aggregated."""
+        supervisor = WorkerSupervisor(sleepy_session, num_workers=2, report_interval=0.1)
+        supervisor.start()
+        try:
+            workers = [supervisor.submit_session({'duration': 0.3})[1] for _ in range(4)]
+            self.assertEqual(sorted(workers), [0, 0, 1, 1])
+            self.assertTrue(wait_for(
+                lambda: supervisor.aggregate_metrics().get("test.sessions_run") == 4
+            ))
+            self.assertTrue(wait_for(
+                lambda: all(load['sessions'] == 0 for load in supervisor.worker_loads().values())
+            ))
+        finally:
+            supervisor.stop()
+
+    def test_crashed_worker_is_restarted(self):
+        """Test a worker that dies is replaced."""
+        supervisor = WorkerSupervisor(crashing_session, num_workers=1, monitor_interval=0.05)
+        supervisor.start()
+        try:
+            supervisor.submit_session()
+            self.assertTrue(wait_for(
+                lambda: supervisor.aggregate_metrics().get("supervisor.worker_restarts", 0) >= 1
+            ))
+            self.assertEqual(supervisor.aggregate_metrics()["supervisor.sessions_lost"], 1)
+            self.assertTrue(wait_for(lambda: supervisor.worker_loads()[0]['alive']))
+        finally:
+            supervisor.stop()
+
+    def test_repeated_crashes_back_off(self):
+        """Test each consecutive crash doubles the restart delay."""
+        supervisor = WorkerSupervisor(crashing_session, num_workers=1, monitor_interval=0.02,
+                                      restart_backoff=0.3, restart_backoff_max=5.0)
+        supervisor.start()
+        delays = []
+        try:
+            for _ in range(2):
+                self.assertTrue(wait_for(lambda: supervisor.worker_loads()[0]['alive']))
+                supervisor.submit_session()
+                self.assertTrue(wait_for(lambda: supervisor.worker_loads()[0]['restart_in'] is not None))
+                delays.append(supervisor.worker_loads()[0]['restart_in'])
+                with self.assertRaises(RuntimeError):
+                    supervisor.submit_session()
+            self.assertTrue(wait_for(lambda: supervisor.worker_loads()[0]['alive']))
+        finally:
+            supervisor.stop()
+        self.assertGreater(delays[0], 0.2)
+        self.assertGreater(delays[1], 0.5)
+        self.assertEqual(supervisor.aggregate_metrics()["supervisor.worker_crashes"], 2)
+
+    def test_restarted_worker_recovers_its_sessions(self):
+        """Test a worker restarted after a crash resumes the sessions in its checkpoint file."""
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            supervisor = WorkerSupervisor(checkpointed_session, num_workers=1, monitor_interval=0.05,
+                                          report_interval=0.1, restart_backoff=0.1,
+                                          checkpoint_dir=checkpoint_dir)
+            supervisor.start()
+            try:
+                session_id, _ = supervisor.submit_session({'caller': 'alice'})
+                self.assertTrue(wait_for(
+                    lambda: supervisor.aggregate_metrics().get("test.restored_turns") == 2
+                ))
+                snapshot = supervisor.aggregate_metrics()
+                self.assertEqual(snapshot["test.restored_with_config"], 1)
+                self.assertEqual(snapshot["supervisor.sessions_recovered"], 1)
+                self.assertEqual(snapshot.get("supervisor.sessions_lost", 0), 0)
+                self.assertEqual(supervisor.worker_loads()[0]['sessions'], 1)
+                self.assertTrue(supervisor.stop_session(session_id))
+                ended = supervisor.ended_sessions.get(timeout=10)
+                self.assertEqual(ended['session_id'], session_id)
+                self.assertEqual(ended['error'], 'cancelled')
+                self.assertTrue(wait_for(lambda: supervisor.worker_loads()[0]['sessions'] == 0))
+            finally:
+                supervisor.stop()
+            self.assertEqual(os.listdir(checkpoint_dir), ['worker-0.log'])
+            self.assertEqual(read_checkpoints(os.path.join(checkpoint_dir, 'worker-0.log')), {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Tests for text-only sessions in BedrockStreamManager."""
+
+import json
+import asyncio
+import unittest
+from sonic_nova.core.admission import AdmissionController
+from sonic_nova.core.bedrock_manager import BedrockStreamManager
+from sonic_nova.core.local_stream import LocalBedrockClient
+from sonic_nova.utils.metrics import MetricsRegistry, metrics
+
+class TestTextMode(unittest.TestCase):
+    """Test cases for text-only sessions."""
+
+    def make_manager(self, **client_options):
+        manager = BedrockStreamManager(
+            transcript_sinks=[], text_only=True,
+            admission=AdmissionController(metrics_registry=MetricsRegistry()))
+        manager.bedrock_client = LocalBedrockClient(latency=0.0, **client_options)
+        return manager
+
+    def test_scripted_conversation(self):
+        """Test each user turn gets one final reply and no audio is set up."""
+        async def scenario():
+            manager = self.make_manager(reply_text="Your order has shipped.")
+            await manager.initialize_stream()
+            stream = next(iter(manager.bedrock_client.active))
+            replies = [await manager.ask("Where is my order?"), await manager.ask('Order "1234"\nplease')]
+            await manager.close()
+            return manager, stream, replies
+        discarded_before = metrics.counter("receive.audio_discarded")
+        manager, stream, replies = asyncio.run(scenario())
+        self.assertEqual(replies, ["Your order has shipped."] * 2)
+        self.assertEqual(stream.turns, 2)
+        self.assertNotIn('audioInput', stream.received)
+        # System prompt plus two user turns; no audio content block
+        self.assertEqual(stream.received.count('contentStart'), 3)
+        self.assertEqual(stream.received.count('contentEnd'), 3)
+        self.assertGreater(metrics.counter("receive.audio_discarded"), discarded_before)
+        self.assertTrue(manager.audio_output_queue.empty())
+
+    def test_text_is_escaped(self):
+        """Test user text with quotes and newlines is sent as valid JSON."""
+        async def scenario():
+            manager = self.make_manager()
+            sent = []
+
+            async def capture(payload, event_type, lane):
+                sent.append(payload)
+            manager.is_active = True
+            manager.stream_response = object()
+            manager.outbound.submit = capture
+            await manager.send_text('He said "hi"\\\nbye')
+            return sent
+        sent = asyncio.run(scenario())
+        self.assertEqual(len(sent), 3)
+        event = json.loads(sent[1])
+        self.assertEqual(event['event']['textInput']['content'], 'He said "hi"\\\nbye')
+
+    def test_replies_iterator_ends_with_the_stream(self):
+        """Test text_replies() yields each turn's reply and stops when the stream closes."""
+        async def scenario():
+            manager = self.make_manager(tool_every=2)
+            await manager.initialize_stream()
+            replies = []
+
+            async def read():
+                async for reply in manager.text_replies():
+                    replies.append(reply)
+            reader = asyncio.create_task(read())
+            for turn, text in enumerate(("What time is it?", "And the date?", "Thanks"), 1):
+                await manager.send_text(text)
+                while len(replies) < turn:
+                    await asyncio.sleep(0.01)
+            await manager.close()
+            await asyncio.wait_for(reader, 2)
+            return replies
+        replies = asyncio.run(scenario())
+        self.assertEqual(replies, ["This is a local test response."] * 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+"""Tests for the transcript module."""
+
+import io
+import os
+import json
+import shutil
+import time
+import tempfile
+import threading
+import unittest
+from sonic_nova.core.transcript import (
+    TranscriptEntry,
+    TranscriptSink,
+    TranscriptThread,
+    TranscriptWriter,
+    StdoutTranscriptSink,
+    JsonlTranscriptSink,
+    RotatingTranscriptSink,
+    STAGE_SPECULATIVE,
+    STAGE_FINAL,
+    KIND_COMPLETION_END
+)
+
+class SlowSink(TranscriptSink):
+    """Sink that takes a while per batch and notes writes after close."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.entries = []
+        self.closed = False
+        self.written_after_close = False
+
+    def write_batch(self, entries):
+        time.sleep(self.delay)
+        self.written_after_close |= self.closed
+        self.entries.extend(entries)
+
+    def close(self):
+        self.closed = True
+
+class TestTranscript(unittest.TestCase):
+    """Test cases for transcript module."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up test environment."""
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_stdout_sink_marks_speculative_and_hides_final(self):
+        """Test StdoutTranscriptSink output format."""
+        stream = io.StringIO()
+        sink = StdoutTranscriptSink(stream=stream)
+        sink.write_batch([
+            TranscriptEntry("USER", "hello"),
+            TranscriptEntry("ASSISTANT", "hi there", stage=STAGE_SPECULATIVE),
+            TranscriptEntry("ASSISTANT", "hi there", stage=STAGE_FINAL),
+            TranscriptEntry(None, "", kind=KIND_COMPLETION_END),
+        ])
+        self.assertEqual(
+            stream.getvalue(),
+            "User: hello\nAssistant: hi there\nEnd of response sequence\n"
+        )
+
+    def test_stdout_sink_show_final(self):
+        """Test StdoutTranscriptSink with final text enabled."""
+        stream = io.StringIO()
+        sink = StdoutTranscriptSink(stream=stream, show_final=True)
+        sink.write_batch([TranscriptEntry("ASSISTANT", "done", stage=STAGE_FINAL)])
+        self.assertEqual(stream.getvalue(), "Assistant (final): done\n")
+
+    def test_writer_batches_to_jsonl(self):
+        """Test TranscriptWriter writes every entry through a JSONL sink."""
+        path = os.path.join(self.tmpdir, "t.jsonl")
+        writer = TranscriptWriter([JsonlTranscriptSink(path)], batch_size=8)
+        writer.start()
+        for i in range(20):
+            writer.submit(TranscriptEntry("USER", f"line {i}", session="s1"))
+        writer.close()
+
+        with open(path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([r['text'] for r in records], [f"line {i}" for i in range(20)])
+        self.assertEqual(records[0]['session'], "s1")
+        self.assertEqual(writer.entries_written, 20)
+        self.assertFalse(writer.is_running)
+
+    def test_sink_must_implement_write_batch(self):
+        """Test a sink without write_batch cannot be created."""
+        class Incomplete(TranscriptSink):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_writer_close_without_start(self):
+        """Test TranscriptWriter flushes queued entries when never started."""
+        stream = io.StringIO()
+        writer = TranscriptWriter([StdoutTranscriptSink(stream=stream)])
+        writer.submit(TranscriptEntry("USER", "queued"))
+        writer.close()
+        self.assertEqual(stream.getvalue(), "User: queued\n")
+
+    def test_writers_share_one_thread(self):
+        """Test many sessions' writers are served by a single thread."""
+        thread = TranscriptThread()
+        sinks = [SlowSink(0) for _ in range(50)]
+        writers = [TranscriptWriter([sink], thread=thread) for sink in sinks]
+        before = threading.active_count()
+        for i, writer in enumerate(writers):
+            writer.start()
+            writer.submit(TranscriptEntry("USER", f"session {i}"))
+        self.assertLessEqual(threading.active_count() - before, 1)
+        for writer in writers:
+            self.assertTrue(writer.close())
+        self.assertEqual([sink.entries[0].text for sink in sinks], [f"session {i}" for i in range(50)])
+
+    def test_close_timeout_never_closes_a_sink_mid_write(self):
+        """Test sinks are closed after their last write even when close() times out."""
+        sink = SlowSink(0.2)
+        writer = TranscriptWriter([sink])
+        writer.start()
+        writer.submit(TranscriptEntry("USER", "slow"))
+        self.assertFalse(writer.close(timeout=0.01))
+        self.assertTrue(writer.close(timeout=2.0))
+        self.assertTrue(sink.closed)
+        self.assertFalse(sink.written_after_close)
+        self.assertEqual(len(sink.entries), 1)
+
+    def test_rotating_sink(self):
+        """Test RotatingTranscriptSink rotates by size."""
+        path = os.path.join(self.tmpdir, "r.jsonl")
+        sink = RotatingTranscriptSink(path, max_bytes=200, backup_count=2)
+        for i in range(30):
+            sink.write_batch([TranscriptEntry("USER", "x" * 50)])
+        sink.close()
+        self.assertTrue(os.path.exists(path + ".1"))
+        self.assertTrue(os.path.exists(path + ".2"))
+        self.assertFalse(os.path.exists(path + ".3"))
+
+if __name__ == '__main__':
+    unittest.main()